@@ -7,52 +7,83 @@ from environs import Env
 env = Env()
 env.read_env()
 
-# Logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+# Logging - navbat orqali (utils.log_pipeline), format/yozish alohida thread'da
+from data import config
+from utils.log_pipeline import setup_logging
+import utils.db_api.database as database
+
+log_listener = setup_logging(
+    level=config.LOG_LEVEL,
+    fmt=config.LOG_FORMAT,
+    queue_size=config.LOG_QUEUE_SIZE,
+    sampling=config.LOG_SAMPLING,
+    rate_limit=config.LOG_RATE_LIMIT,
+    window=config.LOG_RATE_WINDOW
 )
+if config.SQL_TRACE:
+    database.logger = database.trace_sql
+    database.sql_logger.setLevel(logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 # Import bot va dispatcher
-from loader import dp, bot, user_db
+from loader import dp, bot, user_db, task_progress, task_scheduler, theme_catalog, artifact_store, archiver, \
+    openai_client, speculation
 
 # Import utilities
 from utils.content_generator import ContentGenerator
 from utils.gamma_api import GammaAPI
 from utils.presentation_worker import PresentationWorker
+from utils.metrics import start_metrics_server
+from utils.notify_admins import notify_admins
+from data.config import METRICS_PORT, TASK_LEASE_SECONDS, TASK_MAX_ATTEMPTS
 
 # API keys
-OPENAI_API_KEY = env.str("OPENAI_API_KEY")
 GAMMA_API_KEY = env.str("GAMMA_API_KEY")
+# Load-test / staging uchun almashtiriladi (OpenAI uchun - OPENAI_BASE_URL, SDK o'zi o'qiydi)
+GAMMA_BASE_URL = env.str("GAMMA_BASE_URL", "https://public-api.gamma.app/v1.0")
 
 # Initialize utilities
-content_generator = ContentGenerator(OPENAI_API_KEY)
-gamma_api = GammaAPI(GAMMA_API_KEY)
+content_generator = ContentGenerator(openai_client)
+gamma_api = GammaAPI(GAMMA_API_KEY, base_url=GAMMA_BASE_URL, theme_catalog=theme_catalog)
 presentation_worker = None
+metrics_runner = None
 
+import middlewares
 import handlers.users.user_handlers
 import handlers.users.admin_panel
 
 
 async def on_startup(dispatcher):
     """Bot ishga tushganda"""
-    global presentation_worker
+    global presentation_worker, metrics_runner
 
     logger.info("=" * 50)
     logger.info("🚀 BOT ISHGA TUSHMOQDA...")
     logger.info("=" * 50)
 
-    # Database jadvallarini yaratish
+    # Database sxemasi (faqat qo'llanilmagan migratsiyalar bajariladi)
     try:
-        user_db.create_table_users()
-        user_db.create_table_transactions()
-        user_db.create_table_pricing()
-        user_db.create_table_presentation_tasks()
-        user_db.create_business_plans_table()
-        logger.info("✅ Database jadvallari tayyor")
+        schema_version = user_db.migrate()
+        logger.info(f"✅ Database jadvallari tayyor (sxema v{schema_version})")
     except Exception as e:
+        # Sxema yarim holatda - bot shu bazada ishlamaydi
         logger.error(f"❌ Database xato: {e}")
+        raise
+
+    # OpenAI hedge chegarasi - oxirgi chaqiruvlar davomiyligidan
+    openai_client.latency.load(user_db.get_openai_latency_samples())
+
+    # Gamma theme katalogi (bazadagi oxirgi holat + fon sinxroni)
+    try:
+        await theme_catalog.start(gamma_api, notify=lambda text: notify_admins(bot, text))
+    except Exception as e:
+        logger.error(f"❌ Theme katalogi xato: {e}")
+
+    # Theme tanlanayotganda content'ni oldindan yaratish
+    try:
+        await speculation.start(content_generator, user_db)
+    except Exception as e:
+        logger.error(f"❌ Speculation xato: {e}")
 
     # Background worker'ni ishga tushirish
     try:
@@ -60,13 +91,33 @@ async def on_startup(dispatcher):
             bot=bot,
             user_db=user_db,
             content_generator=content_generator,
-            gamma_api=gamma_api
+            gamma_api=gamma_api,
+            progress_registry=task_progress,
+            scheduler=task_scheduler,
+            lease_seconds=TASK_LEASE_SECONDS,
+            max_attempts=TASK_MAX_ATTEMPTS,
+            artifacts=artifact_store,
+            speculation=speculation
         )
+        await artifact_store.start()
         await presentation_worker.start()
         logger.info("✅ Background Worker ishga tushdi")
     except Exception as e:
         logger.error(f"❌ Worker xato: {e}")
 
+    # Eski task/tranzaksiyalarni arxivlash (fonda)
+    try:
+        await archiver.start()
+    except Exception as e:
+        logger.error(f"❌ Arxivlash xato: {e}")
+
+    # Metrikalar endpoint'i
+    if METRICS_PORT:
+        try:
+            metrics_runner = await start_metrics_server(port=METRICS_PORT)
+        except Exception as e:
+            logger.error(f"❌ Metrics server xato: {e}")
+
     logger.info("=" * 50)
     logger.info("✅ BOT TAYYOR!")
     logger.info("=" * 50)
@@ -74,7 +125,6 @@ async def on_startup(dispatcher):
 
 async def on_shutdown(dispatcher):
     """Bot to'xtaganda"""
-    global presentation_worker
 
     logger.info("=" * 50)
     logger.info("⏹ BOT TO'XTATILMOQDA...")
@@ -85,6 +135,15 @@ async def on_shutdown(dispatcher):
         await presentation_worker.stop()
         logger.info("✅ Background Worker to'xtatildi")
 
+    await theme_catalog.stop()
+    await artifact_store.stop()
+    await archiver.stop()
+    await speculation.stop()
+    await openai_client.close()
+
+    if metrics_runner:
+        await metrics_runner.cleanup()
+
     # Connectionlarni yopish
     await dp.storage.close()
     await dp.storage.wait_closed()
@@ -92,6 +151,7 @@ async def on_shutdown(dispatcher):
     logger.info("=" * 50)
     logger.info("✅ BOT TO'XTATILDI")
     logger.info("=" * 50)
+    log_listener.stop()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,101 @@
+# benchmarks/billing_concurrency.py
+# Parallel tasdiqlashlarda billing: eski ketma-ketlik va charge_and_create_task
+#
+# Har bir "foydalanuvchi" bitta buyurtmani ikki marta (double tap) parallel yuboradi.
+# O'lchanadi: tasdiqlash/soniya, yaratilgan task'lar soni va ortiqcha yechilgan summa.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.billing_concurrency [--users 500] [--threads 16]
+
+import argparse
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import utils.db_api.database as database
+from utils.db_api.users import UserDatabase
+
+PRICE = 10000
+START_BALANCE = 25000  # ikki buyurtmaga yetadi - double tap ikki marta yechishi mumkin
+
+
+def legacy_confirm(db: UserDatabase, telegram_id: int, order_key: str):
+    """Eski handler ketma-ketligi: har bir qadam alohida commit"""
+    if db.get_user_balance(telegram_id) < PRICE:
+        return
+    if not db.deduct_from_balance(telegram_id, PRICE):
+        return
+    db.create_transaction(telegram_id, 'withdrawal', PRICE, 'benchmark', status='approved')
+    db.create_presentation_task(telegram_id, str(uuid.uuid4()), 'basic', 10, '{}', PRICE)
+
+
+def unit_of_work_confirm(db: UserDatabase, telegram_id: int, order_key: str):
+    db.charge_and_create_task(
+        telegram_id=telegram_id,
+        idempotency_key=order_key,
+        task_uuid=str(uuid.uuid4()),
+        presentation_type='basic',
+        slide_count=10,
+        answers='{}',
+        price=PRICE,
+        description='benchmark',
+        allow_free=False
+    )
+
+
+def seed(db: UserDatabase, users: int):
+    db.create_table_users()
+    db.create_table_transactions()
+    db.create_table_presentation_tasks()
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO Users (telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, 0, ?, CURRENT_TIMESTAMP)",
+            [(100000 + i, f"user{i}", START_BALANCE) for i in range(users)]
+        )
+
+
+def run(db: UserDatabase, confirm, users: int, threads: int) -> dict:
+    jobs = []
+    for i in range(users):
+        order_key = str(uuid.uuid4())
+        jobs.append((100000 + i, order_key))
+        jobs.append((100000 + i, order_key))  # double tap
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda job: confirm(db, *job), jobs))
+    elapsed = time.perf_counter() - started
+
+    tasks = db.execute("SELECT COUNT(*) FROM PresentationTasks", fetchone=True)[0]
+    charged = db.execute("SELECT COALESCE(SUM(total_spent), 0) FROM Users", fetchone=True)[0]
+    return {
+        'confirmations_per_sec': len(jobs) / elapsed,
+        'tasks_created': tasks,
+        'expected_tasks': users,
+        'overcharged': float(charged) - users * PRICE,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--threads', type=int, default=16)
+    args = parser.parse_args()
+
+    database.logger = lambda statement: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, confirm in (('legacy', legacy_confirm), ('unit_of_work', unit_of_work_confirm)):
+            db = UserDatabase(path_to_db=os.path.join(tmp, f"{name}.db"))
+            seed(db, args.users)
+            result = run(db, confirm, args.users, args.threads)
+            print(f"{name:>13}: {result['confirmations_per_sec']:8.1f} tasdiqlash/s, "
+                  f"task'lar {result['tasks_created']}/{result['expected_tasks']}, "
+                  f"ortiqcha yechilgan {result['overcharged']:,.0f} so'm")
+
+
+if __name__ == '__main__':
+    main()
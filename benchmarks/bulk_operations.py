@@ -0,0 +1,111 @@
+# benchmarks/bulk_operations.py
+# Ommaviy amallar: eski (har user uchun alohida commit / bitta katta UPDATE) va bo'laklab set-based
+#
+# reset_all_balances'ning eski varianti har bir user uchun alohida ulanish va
+# commit ochadi - 1M userda soatlab ishlaydi, shuning uchun u --legacy-users
+# hajmida o'lchanadi va tezligi (user/s) taqqoslanadi. "max lock" - bitta
+# yozish tranzaksiyasining eng uzun davomiyligi (shu vaqtda boshqa yozuvlar kutadi).
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.bulk_operations [--users 1000000] [--legacy-users 5000] [--chunk 20000]
+
+import argparse
+import os
+import tempfile
+import time
+
+import utils.db_api.database as database
+from utils.db_api.users import UserDatabase
+
+
+def seed(db: UserDatabase, users: int):
+    db.create_table_users()
+    db.create_table_transactions()
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO Users (telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            ((100000 + i, f"user{i}", i % 3, 5000 if i % 3 == 0 else 0) for i in range(users))
+        )
+
+
+def legacy_reset(db: UserDatabase, admin_id: int) -> int:
+    """Eski reset_all_balances: SELECT, har user uchun INSERT + commit, keyin UPDATE"""
+    users = db.execute("SELECT id, telegram_id, balance FROM Users WHERE balance > 0", fetchall=True)
+    for user_id, _, balance in users:
+        db.execute(
+            """INSERT INTO Transactions
+               (user_id, transaction_type, amount, balance_before, balance_after,
+                description, status, admin_id, created_at, updated_at)
+               VALUES (?, 'reset', ?, ?, 0, 'reset', 'approved', ?, datetime('now'), datetime('now'))""",
+            parameters=(user_id, balance, balance, admin_id),
+            commit=True
+        )
+    db.execute("UPDATE Users SET balance = 0", commit=True)
+    return len(users)
+
+
+def measure_steps(steps) -> dict:
+    """iter_* generatorini yurgizish, bo'laklar orasidagi eng uzun vaqtni o'lchash"""
+    started = last = time.perf_counter()
+    max_chunk = 0.0
+    result = {}
+    for result in steps:
+        now = time.perf_counter()
+        max_chunk = max(max_chunk, now - last)
+        last = now
+    return {'seconds': last - started, 'max_lock_ms': max_chunk * 1000, 'result': result}
+
+
+def measure_single(db: UserDatabase, sql: str, parameters: tuple = ()) -> dict:
+    started = time.perf_counter()
+    db.execute(sql, parameters=parameters, commit=True)
+    elapsed = time.perf_counter() - started
+    return {'seconds': elapsed, 'max_lock_ms': elapsed * 1000}
+
+
+def report(name: str, seconds: float, users: int, max_lock_ms: float = None):
+    rate = users / seconds if seconds else float('inf')
+    lock = f", max lock {max_lock_ms:8.1f} ms" if max_lock_ms is not None else ""
+    print(f"  {name:<34} {seconds:8.2f} s, {rate:>12,.0f} user/s{lock}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--legacy-users', type=int, default=5000)
+    parser.add_argument('--chunk', type=int, default=UserDatabase.BULK_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    database.logger = lambda statement: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"reset_all_balances (eski variant: {args.legacy_users:,} user)")
+        db = UserDatabase(path_to_db=os.path.join(tmp, "legacy.db"))
+        seed(db, args.legacy_users)
+        started = time.perf_counter()
+        funded = legacy_reset(db, admin_id=1)
+        report("legacy (row-by-row commit)", time.perf_counter() - started, funded)
+
+        print(f"\nreset_all_balances ({args.users:,} user, bo'lak {args.chunk:,})")
+        db = UserDatabase(path_to_db=os.path.join(tmp, "bulk.db"))
+        seed(db, args.users)
+        run = measure_steps(db.iter_reset_all_balances(admin_telegram_id=1, chunk_size=args.chunk))
+        report("set-based, chunked", run['seconds'], run['result']['users'], run['max_lock_ms'])
+
+        print(f"\nBepul prezentatsiyalar ({args.users:,} user)")
+        run = measure_single(db, "UPDATE Users SET free_presentations = COALESCE(free_presentations, 0) + ?", (1,))
+        report("qo'shish: bitta UPDATE", run['seconds'], args.users, run['max_lock_ms'])
+        run = measure_steps(db.iter_add_free_presentations_to_all(1, chunk_size=args.chunk))
+        report("qo'shish: chunked", run['seconds'], run['result']['users'], run['max_lock_ms'])
+
+        run = measure_single(db, "UPDATE Users SET free_presentations = ?", (2,))
+        report("o'rnatish: bitta UPDATE", run['seconds'], args.users, run['max_lock_ms'])
+        run = measure_steps(db.iter_set_free_presentations_for_all(0, chunk_size=args.chunk))
+        report("o'chirish: chunked", run['seconds'], run['result']['users'], run['max_lock_ms'])
+        run = measure_steps(db.iter_set_free_presentations_for_all(0, chunk_size=args.chunk))
+        report("o'chirish: chunked (o'zgarishsiz)", run['seconds'], run['result']['users'], run['max_lock_ms'])
+
+
+if __name__ == '__main__':
+    main()
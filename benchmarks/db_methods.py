@@ -0,0 +1,586 @@
+# benchmarks/db_methods.py
+# UserDatabase'ning har bir public metodi production hajmidagi bazada
+#
+# Sintetik ma'lumot (--scale 1): 1M user, 5M tranzaksiya, 500k task - seed'dan,
+# sanalar oxirgi 365 kunga yoyilgan, created_at ikkala formatda (CURRENT_TIMESTAMP
+# va add_user'dagi isoformat). Har bir metod uchun:
+#   - vaqt: median / min / p95 (kamida --min-rounds, --min-time soniya to'lguncha)
+#   - so'rovlar soni (Database.query_count)
+#   - xotira cho'qqisi (tracemalloc, alohida chaqiruvda)
+#   - so'rov rejalari: metod bajargan SQL (trace callback) uchun EXPLAIN QUERY PLAN,
+#     indekssiz to'liq SCAN'lar alohida
+# Bazani o'zgartiradigan bulk metodlar (reset_all_balances, delete_users, ...)
+# oxirida bir martadan ishlaydi. Yangi public metod CASES'da bo'lmasa
+# "qamrab olinmagan" ro'yxatiga tushadi.
+#
+# Natija JSON'ga yoziladi; --baseline bilan oldingi natijaga nisbatan
+# sekinlashgan metodlar ko'rsatiladi (--fail-on-regression - exit 1).
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.db_methods [--scale 1] [--db seeded.db] [--output db_methods.json]
+#                                     [--baseline old.json] [--only get_extended_statistics ...]
+
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+import platform
+import random
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+import utils.db_api.database as database
+from utils.db_api.database import Database
+from utils.db_api.users import UserDatabase
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BASE_USERS = 1_000_000
+BASE_TRANSACTIONS = 5_000_000
+BASE_TASKS = 500_000
+FIRST_TELEGRAM_ID = 100_000_000
+ADMIN_COUNT = 5
+PLAN_COUNT = 20
+SEED_BATCH = 100_000
+
+# Jadvallar va metodlar uchun tayyorlanadigan namuna hajmi
+SAMPLE_SIZE = 2000
+
+
+# ==================== SEED ====================
+
+def _timestamp(rng: random.Random, now: datetime, days: int = 365) -> str:
+    moment = now - timedelta(seconds=rng.randrange(days * 86400))
+    # 20% - add_user formati ('T' va mikrosekund), qolgani CURRENT_TIMESTAMP formati
+    if rng.random() < 0.2:
+        return moment.isoformat()
+    return moment.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _users(rng: random.Random, count: int, now: datetime):
+    for i in range(count):
+        balance = rng.choice((5000, 10000, 25000, 100000)) if rng.random() < 0.3 else 0
+        yield (
+            i + 1, FIRST_TELEGRAM_ID + i, f"user{i}",
+            1 if rng.random() < 0.1 else 0,
+            balance, balance * 2, balance * 3,
+            _timestamp(rng, now, 30),
+            rng.random() < 0.95, rng.random() < 0.03,
+            _timestamp(rng, now),
+        )
+
+
+def _transactions(rng: random.Random, count: int, users: int, now: datetime):
+    for _ in range(count):
+        kind = 'deposit' if rng.random() < 0.4 else 'withdrawal'
+        roll = rng.random()
+        status = 'pending' if roll < 0.001 else ('rejected' if roll < 0.03 else 'approved')
+        amount = rng.choice((5000, 10000, 20000, 50000))
+        created = _timestamp(rng, now)
+        yield (
+            rng.randrange(users) + 1, kind, amount, 0, 0,
+            'Benchmark', status, created, None if status == 'pending' else created,
+        )
+
+
+def _tasks(rng: random.Random, count: int, users: int, now: datetime):
+    for _ in range(count):
+        roll = rng.random()
+        status = 'pending' if roll < 0.0002 else ('failed' if roll < 0.03 else 'completed')
+        yield (
+            rng.randrange(users) + 1,
+            str(uuid.UUID(int=rng.getrandbits(128), version=4)),
+            rng.choice(('basic', 'basic', 'pitch_deck', 'course_work')),
+            rng.randint(5, 20), '{}', status,
+            0 if status == 'pending' else 100,
+            rng.choice((0, 10000, 20000)),
+            _timestamp(rng, now),
+        )
+
+
+def seed(db: UserDatabase, scale: float, seed_value: int) -> dict:
+    started = time.perf_counter()
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    users = max(int(BASE_USERS * scale), 1000)
+    transactions = int(BASE_TRANSACTIONS * scale)
+    tasks = int(BASE_TASKS * scale)
+
+    db.migrate()
+
+    def insert(sql: str, rows):
+        batch = []
+        with db.transaction(immediate=True) as cursor:
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= SEED_BATCH:
+                    cursor.executemany(sql, batch)
+                    batch = []
+            if batch:
+                cursor.executemany(sql, batch)
+
+    insert("""INSERT INTO Users (id, telegram_id, username, free_presentations, balance, total_spent,
+                                 total_deposited, last_active, is_active, is_blocked, created_at)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""", _users(rng, users, now))
+    insert("""INSERT INTO Transactions (user_id, transaction_type, amount, balance_before, balance_after,
+                                        description, status, created_at, updated_at)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", _transactions(rng, transactions, users, now))
+    insert("""INSERT INTO PresentationTasks (user_id, task_uuid, presentation_type, slide_count, answers, status,
+                                             progress, amount_charged, created_at)
+              VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", _tasks(rng, tasks, users, now))
+    insert("INSERT INTO Admins (user_id, name, is_super_admin) VALUES (?, ?, ?)",
+           ((i + 1, f"Admin {i}", i == 0) for i in range(ADMIN_COUNT)))
+    insert("""INSERT INTO BusinessPlans (title, description, price, file_id, category)
+              VALUES (?, ?, ?, ?, ?)""",
+           ((f"Plan {i}", "Benchmark", 50000, f"file{i}", 'benchmark') for i in range(PLAN_COUNT)))
+    db.execute("ANALYZE", commit=True)
+
+    return {
+        'users': users,
+        'transactions': transactions,
+        'tasks': tasks,
+        'seconds': time.perf_counter() - started,
+    }
+
+
+# ==================== HOLAT (metod argumentlari) ====================
+
+class Bench:
+    """Metodlarga argument beruvchi: mavjud user/task/tranzaksiya namunalari (seed'dan)"""
+
+    def __init__(self, db: UserDatabase, seed_value: int):
+        self.db = db
+        self.random = random.Random(seed_value)
+        connection = sqlite3.connect(db.path_to_db)
+        try:
+            self.users = [row[0] for row in connection.execute(
+                "SELECT telegram_id FROM Users ORDER BY random() LIMIT ?", (SAMPLE_SIZE,))]
+            self.user_ids = [row[0] for row in connection.execute(
+                "SELECT id FROM Users ORDER BY random() LIMIT ?", (SAMPLE_SIZE,))]
+            self.tasks = [row[0] for row in connection.execute(
+                "SELECT task_uuid FROM PresentationTasks ORDER BY random() LIMIT ?", (SAMPLE_SIZE,))]
+            self.transactions = [row[0] for row in connection.execute(
+                "SELECT id FROM Transactions ORDER BY random() LIMIT ?", (SAMPLE_SIZE,))]
+            self.pending = [row[0] for row in connection.execute(
+                "SELECT id FROM Transactions WHERE status = 'pending'")]
+            self.plans = [row[0] for row in connection.execute("SELECT id FROM BusinessPlans")]
+            self.next_telegram_id = connection.execute("SELECT MAX(telegram_id) FROM Users").fetchone()[0] + 1
+        finally:
+            connection.close()
+        self.admin = FIRST_TELEGRAM_ID
+
+    def user(self) -> int:
+        return self.random.choice(self.users)
+
+    def user_id(self) -> int:
+        return self.random.choice(self.user_ids)
+
+    def task(self) -> str:
+        return self.random.choice(self.tasks)
+
+    def transaction(self) -> int:
+        return self.random.choice(self.transactions)
+
+    def pending_transaction(self) -> int:
+        # Har bir tasdiqlash/rad etish bitta pending tranzaksiyani "ishlatadi"
+        if self.pending:
+            return self.pending.pop()
+        return self.db.create_transaction(self.user(), 'deposit', 1000, 'Benchmark')
+
+    def new_telegram_id(self) -> int:
+        self.next_telegram_id += 1
+        return self.next_telegram_id
+
+    @staticmethod
+    def key() -> str:
+        return str(uuid.uuid4())
+
+
+# Oddiy metodlar: nom -> chaqiruv (har bir round'da yangi argumentlar)
+CASES = {
+    # O'qish
+    'user_exists': lambda b: b.db.user_exists(b.user()),
+    'select_user': lambda b: b.db.select_user(telegram_id=b.user()),
+    'select_all_users': lambda b: b.db.select_all_users(),
+    'get_active_users': lambda b: b.db.get_active_users(),
+    'get_inactive_users': lambda b: b.db.get_inactive_users(),
+    'get_blocked_users': lambda b: b.db.get_blocked_users(),
+    'get_user_id': lambda b: b.db.get_user_id(b.user()),
+    'get_user_balance': lambda b: b.db.get_user_balance(b.user()),
+    'get_user_context': lambda b: b.db.get_user_context(b.user()),
+    'get_user_stats': lambda b: b.db.get_user_stats(b.user()),
+    'get_user_tasks': lambda b: b.db.get_user_tasks(b.user()),
+    'get_user_transactions': lambda b: b.db.get_user_transactions(b.user()),
+    'get_free_presentations': lambda b: b.db.get_free_presentations(b.user()),
+    'get_transaction_by_id': lambda b: b.db.get_transaction_by_id(b.transaction()),
+    'get_pending_transactions': lambda b: b.db.get_pending_transactions(),
+    'get_transactions_page': lambda b: b.db.get_transactions_page('approved', after=b.transaction()),
+    'get_tasks_page': lambda b: b.db.get_tasks_page('completed', before=b.random.randint(1, 10 ** 6)),
+    'get_admins_page': lambda b: b.db.get_admins_page(),
+    'get_task_by_uuid': lambda b: b.db.get_task_by_uuid(b.task()),
+    'get_pending_tasks': lambda b: b.db.get_pending_tasks(),
+    'get_task_duration_stats': lambda b: b.db.get_task_duration_stats(),
+    'get_task_usage': lambda b: b.db.get_task_usage(b.task()),
+    'get_task_checkpoint': lambda b: b.db.get_task_checkpoint(b.task()),
+    'get_usage_by_product': lambda b: b.db.get_usage_by_product(),
+    'get_usage_by_day': lambda b: b.db.get_usage_by_day(),
+    'get_openai_latency_samples': lambda b: b.db.get_openai_latency_samples(),
+    'get_speculation_usage': lambda b: b.db.get_speculation_usage(),
+    'get_gamma_theme_sync': lambda b: b.db.get_gamma_theme_sync(),
+    'get_gamma_themes': lambda b: b.db.get_gamma_themes(),
+    'get_archived_totals': lambda b: b.db.get_archived_totals('Transactions', 'deposit', 'approved'),
+    'get_task_status_counts': lambda b: b.db.get_task_status_counts(),
+    'get_archive_stats': lambda b: b.db.get_archive_stats(),
+    'get_price': lambda b: b.db.get_price('slide_basic'),
+    'get_all_prices': lambda b: b.db.get_all_prices(),
+    'get_price_list_text': lambda b: b.db.get_price_list_text(),
+    'get_all_admins': lambda b: b.db.get_all_admins(),
+    'check_if_admin': lambda b: b.db.check_if_admin(b.user_id()),
+    'count_users': lambda b: b.db.count_users(),
+    'count_active_users': lambda b: b.db.count_active_users(),
+    'count_blocked_users': lambda b: b.db.count_blocked_users(),
+    'count_users_last_12_hours': lambda b: b.db.count_users_last_12_hours(),
+    'count_users_today': lambda b: b.db.count_users_today(),
+    'count_users_this_week': lambda b: b.db.count_users_this_week(),
+    'count_users_this_month': lambda b: b.db.count_users_this_month(),
+    'count_users_with_balance': lambda b: b.db.count_users_with_balance(),
+    'get_total_balance': lambda b: b.db.get_total_balance(),
+    'get_financial_stats': lambda b: b.db.get_financial_stats(),
+    'get_extended_statistics': lambda b: b.db.get_extended_statistics(),
+    'get_tashkent_now': lambda b: b.db.get_tashkent_now(),
+    'get_tashkent_today_range': lambda b: b.db.get_tashkent_today_range(),
+    'migrate': lambda b: b.db.migrate(),
+
+    # Yozish (bitta user / task)
+    'add_user': lambda b: b.db.add_user(b.new_telegram_id(), 'benchmark'),
+    'update_user_last_active': lambda b: b.db.update_user_last_active(b.user()),
+    'activate_user': lambda b: b.db.activate_user(b.user()),
+    'deactivate_user': lambda b: b.db.deactivate_user(b.user()),
+    'mark_user_as_blocked': lambda b: b.db.mark_user_as_blocked(b.user()),
+    'add_to_balance': lambda b: b.db.add_to_balance(b.user(), 1000),
+    'deduct_from_balance': lambda b: b.db.deduct_from_balance(b.user(), 1),
+    'add_free_presentations': lambda b: b.db.add_free_presentations(b.user(), 1),
+    'set_free_presentations': lambda b: b.db.set_free_presentations(b.user(), 1),
+    'use_free_presentation': lambda b: b.db.use_free_presentation(b.user()),
+    'create_transaction': lambda b: b.db.create_transaction(b.user(), 'deposit', 1000, 'Benchmark',
+                                                            status='approved'),
+    'update_transaction_status': lambda b: b.db.update_transaction_status(b.transaction(), 'approved'),
+    'approve_transaction': lambda b: b.db.approve_transaction(b.pending_transaction(), b.admin),
+    'reject_transaction': lambda b: b.db.reject_transaction(b.pending_transaction(), b.admin),
+    'create_presentation_task': lambda b: b.db.create_presentation_task(b.user(), b.key(), 'basic', 10, '{}', 0),
+    'charge_and_create_task': lambda b: b.db.charge_and_create_task(
+        b.user(), b.key(), b.key(), 'basic', 10, '{}', 1000, 'Benchmark'),
+    'update_task_status': lambda b: b.db.update_task_status(b.task(), 'completed', progress=100),
+    'update_tasks_progress': lambda b: b.db.update_tasks_progress([(50, None, b.task()) for _ in range(20)]),
+    'claim_task': lambda b: b.db.claim_task(b.task(), 'benchmark', 90),
+    'renew_task_leases': lambda b: b.db.renew_task_leases('benchmark', [b.task() for _ in range(8)], 90),
+    'release_task_leases': lambda b: b.db.release_task_leases('benchmark', [b.task() for _ in range(8)]),
+    'reclaim_expired_tasks': lambda b: b.db.reclaim_expired_tasks(3),
+    'fail_task_and_refund': lambda b: b.db.fail_task_and_refund(b.task(), 'benchmark'),
+    'save_task_checkpoint': lambda b: b.db.save_task_checkpoint(
+        b.task(), 'content', content={'title': 'Benchmark', 'slides': [{'title': 'Slayd', 'content': 'x' * 500}] * 10}),
+    'purchase_business_plan': lambda b: b.db.purchase_business_plan(b.user(), b.random.choice(b.plans), b.key()),
+    'add_api_usage': lambda b: b.db.add_api_usage(b.task(), 'openai', 'presentation', 'gpt-4', 1000, 2000, 0,
+                                                  150000, 20000, 0, 'ok', path='primary'),
+    'attach_speculative_usage': lambda b: b.db.attach_speculative_usage(f"spec:{b.key()}", b.task()),
+    'add_admin': lambda b: b.db.add_admin(b.user_id(), 'Benchmark'),
+    'update_admin_status': lambda b: b.db.update_admin_status(b.user_id(), False),
+    'remove_admin': lambda b: b.db.remove_admin(b.user_id() + ADMIN_COUNT),
+    'update_price': lambda b: b.db.update_price('slide_basic', b.db.get_price('slide_basic'), b.admin),
+    'save_gamma_themes': lambda b: b.db.save_gamma_themes(
+        [{'id': f"theme-{i}", 'name': f"Theme {i}", 'type': 'standard'} for i in range(50)], None, b.key()),
+    'touch_gamma_theme_sync': lambda b: b.db.touch_gamma_theme_sync(),
+    'mark_gamma_theme_rejected': lambda b: b.db.mark_gamma_theme_rejected('theme-0'),
+    'incremental_vacuum': lambda b: b.db.incremental_vacuum(100),
+    'optimize': lambda b: b.db.optimize(),
+
+    # Sxema (IF NOT EXISTS - qayta chaqirish narxi)
+    'create_table_users': lambda b: b.db.create_table_users(),
+    'create_table_transactions': lambda b: b.db.create_table_transactions(),
+    'create_table_pricing': lambda b: b.db.create_table_pricing(),
+    'create_table_presentation_tasks': lambda b: b.db.create_table_presentation_tasks(),
+    'create_business_plans_table': lambda b: b.db.create_business_plans_table(),
+    'create_table_api_usage': lambda b: b.db.create_table_api_usage(),
+    'create_table_gamma_themes': lambda b: b.db.create_table_gamma_themes(),
+    'create_table_task_checkpoints': lambda b: b.db.create_table_task_checkpoints(),
+    'create_table_archive': lambda b: b.db.create_table_archive(),
+    'create_api_usage_path_column': lambda b: b.db.create_api_usage_path_column(),
+}
+
+# Butun jadvalni o'zgartiradigan metodlar - oxirida, bir martadan, shu tartibda
+BULK_CASES = {
+    'iter_add_free_presentations_to_all': lambda b: UserDatabase._drain(b.db.iter_add_free_presentations_to_all(1)),
+    'iter_set_free_presentations_for_all': lambda b: UserDatabase._drain(
+        b.db.iter_set_free_presentations_for_all(0)),
+    'reset_all_balances': lambda b: b.db.reset_all_balances(b.admin),
+    'archive_tasks_chunk': lambda b: b.db.archive_tasks_chunk(90),
+    'archive_transactions_chunk': lambda b: b.db.archive_transactions_chunk(90),
+    'purge_idempotency_keys_chunk': lambda b: b.db.purge_idempotency_keys_chunk(24),
+    'vacuum': lambda b: b.db.vacuum(),
+    'delete_users': lambda b: b.db.delete_users(),
+}
+
+# Boshqa case bilan bir xil ish (generator va uning _drain'li varianti)
+ALIASES = {'iter_reset_all_balances': 'reset_all_balances'}
+
+
+def public_methods() -> list:
+    """UserDatabase'ning o'z public metodlari (Database bazaviy metodlari - infra, kirmaydi)"""
+    return sorted(
+        name for name, member in inspect.getmembers(UserDatabase, predicate=inspect.isfunction)
+        if not name.startswith('_') and member.__qualname__.startswith('UserDatabase.')
+    )
+
+
+# ==================== O'LCHASH ====================
+
+PLAN_STATEMENT = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|INSERT\s+INTO\s+\w+\s*(\([^)]*\))?\s*SELECT)',
+                            re.IGNORECASE)
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def capture_statements(call) -> list:
+    """Bitta chaqiruv bajargan SQL'lar (parametrlar qo'yilgan holda)"""
+    statements = []
+    previous = database.logger
+    database.logger = statements.append
+    try:
+        call()
+    finally:
+        database.logger = previous
+    return statements
+
+
+def query_plans(path: str, statements: list, limit: int = 12) -> tuple:
+    """Har xil ko'rinishdagi so'rovlar uchun EXPLAIN QUERY PLAN; (rejalar, to'liq SCAN'lar)"""
+    plans = []
+    full_scans = set()
+    seen = set()
+    connection = sqlite3.connect(path)
+    try:
+        for statement in statements:
+            if not PLAN_STATEMENT.match(statement):
+                continue
+            shape = ' '.join(LITERALS.sub('?', statement).split())
+            if shape in seen:
+                continue
+            seen.add(shape)
+            if len(plans) >= limit:
+                break
+            try:
+                details = [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}")]
+            except sqlite3.Error as e:
+                details = [f"explain xato: {e}"]
+            plans.append({'sql': shape[:300], 'plan': details})
+            for detail in details:
+                if detail.startswith('SCAN ') and ' USING ' not in detail:
+                    full_scans.add(detail)
+    finally:
+        connection.close()
+    return plans, sorted(full_scans)
+
+
+def quiet(case):
+    """Metodlarning print() loglari o'lchov chiqishiga aralashmasin"""
+    def call(bench):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return case(bench)
+    return call
+
+
+def measure(bench: Bench, case, min_rounds: int, max_rounds: int, min_time: float, memory: bool) -> dict:
+    case = quiet(case)
+    # Birinchi chaqiruv: SQL'larni yig'ish (va isitish)
+    statements = capture_statements(lambda: case(bench))
+
+    times = []
+    queries_before = Database.query_count
+    started = time.perf_counter()
+    while len(times) < max_rounds and (len(times) < min_rounds or time.perf_counter() - started < min_time):
+        call_started = time.perf_counter()
+        case(bench)
+        times.append(time.perf_counter() - call_started)
+    queries = (Database.query_count - queries_before) / len(times)
+
+    peak_kb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            case(bench)
+            peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+        finally:
+            tracemalloc.stop()
+
+    times.sort()
+    plans, full_scans = query_plans(bench.db.path_to_db, statements)
+    return {
+        'rounds': len(times),
+        'median_ms': times[len(times) // 2] * 1000,
+        'min_ms': times[0] * 1000,
+        'p95_ms': times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))] * 1000,
+        'queries': queries,
+        'peak_kb': peak_kb,
+        'plans': plans,
+        'full_scans': full_scans,
+    }
+
+
+def measure_once(bench: Bench, case) -> dict:
+    """Bulk metodlar: bitta chaqiruv (vaqt), SQL'lar shu chaqiruvdan"""
+    case = quiet(case)
+    queries_before = Database.query_count
+    started = time.perf_counter()
+    statements = capture_statements(lambda: case(bench))
+    elapsed = time.perf_counter() - started
+    plans, full_scans = query_plans(bench.db.path_to_db, statements)
+    return {
+        'rounds': 1,
+        'median_ms': elapsed * 1000,
+        'min_ms': elapsed * 1000,
+        'p95_ms': elapsed * 1000,
+        'queries': Database.query_count - queries_before,
+        'peak_kb': None,
+        'plans': plans,
+        'full_scans': full_scans,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """(metod, eski ms, yangi ms, nisbat) - threshold'dan sekinlashganlar"""
+    regressions = []
+    old_methods = baseline.get('methods', {})
+    for name, current in results['methods'].items():
+        old = old_methods.get(name)
+        if not old or not old.get('median_ms'):
+            continue
+        ratio = current['median_ms'] / old['median_ms']
+        # Juda tez metodlarda shovqin katta - 0.05 ms dan kichik farqlar hisobga olinmaydi
+        if ratio >= threshold and current['median_ms'] - old['median_ms'] > 0.05:
+            regressions.append((name, old['median_ms'], current['median_ms'], ratio))
+    return sorted(regressions, key=lambda item: item[3], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--scale', type=float, default=1.0, help="1 = 1M user, 5M tranzaksiya, 500k task")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', help="seed qilingan bazani saqlash/qayta ishlatish (bulk metodlar o'tkazib yuboriladi)")
+    parser.add_argument('--bulk', action='store_true', help="--db bilan ham bulk metodlarni ishlatish")
+    parser.add_argument('--only', nargs='*', help="faqat shu metodlar")
+    parser.add_argument('--min-rounds', type=int, default=3)
+    parser.add_argument('--max-rounds', type=int, default=200)
+    parser.add_argument('--min-time', type=float, default=0.5, help="har bir metod uchun soniya")
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', default='db_methods.json')
+    parser.add_argument('--baseline')
+    parser.add_argument('--threshold', type=float, default=1.25, help="sekinlashish nisbati chegarasi")
+    parser.add_argument('--fail-on-regression', action='store_true')
+    args = parser.parse_args()
+
+    database.logger = lambda statement: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, "db_methods.db")
+        reuse = bool(args.db) and os.path.exists(args.db)
+        db = UserDatabase(path_to_db=path)
+
+        if reuse:
+            db.migrate()
+            seeded = {'reused': True}
+            print(f"♻️ Mavjud baza: {path}")
+        else:
+            print(f"🌱 Seed (scale {args.scale}) ...")
+            seeded = seed(db, args.scale, args.seed)
+            print(f"   {seeded['users']:,} user, {seeded['transactions']:,} tranzaksiya, {seeded['tasks']:,} task - "
+                  f"{seeded['seconds']:.0f} s")
+        seeded['size_mb'] = os.path.getsize(path) / 1024 / 1024
+
+        bench = Bench(db, args.seed)
+        methods = public_methods()
+        run_bulk = not args.db or args.bulk
+        covered = set(CASES) | set(BULK_CASES) | set(ALIASES)
+        selected = set(args.only) if args.only else None
+
+        results = {}
+        for name in methods:
+            if name not in CASES or (selected and name not in selected):
+                continue
+            result = measure(bench, CASES[name], args.min_rounds, args.max_rounds, args.min_time,
+                             memory=not args.no_memory)
+            result['kind'] = 'read' if name.startswith(('get_', 'count_', 'select_', 'check_', 'user_exists')) \
+                else 'write'
+            results[name] = result
+            print(f"  {name:<38} {result['median_ms']:10.3f} ms  ({result['rounds']} round, "
+                  f"{result['queries']:.0f} so'rov){'  SCAN: ' + ', '.join(result['full_scans']) if result['full_scans'] else ''}")
+
+        if run_bulk:
+            for name, case in BULK_CASES.items():
+                if selected and name not in selected:
+                    continue
+                result = measure_once(bench, case)
+                result['kind'] = 'bulk'
+                results[name] = result
+                print(f"  {name:<38} {result['median_ms']:10.1f} ms  (bulk, 1 marta)")
+
+        report = {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'params': {'scale': args.scale, 'seed': args.seed},
+            'seed': seeded,
+            'methods': results,
+            'not_covered': [name for name in methods if name not in covered],
+        }
+
+    if report['not_covered']:
+        print(f"\n⚠️ CASES'da yo'q metodlar: {', '.join(report['not_covered'])}")
+
+    print("\nEng sekin 10 ta (median):")
+    for name, result in sorted(results.items(), key=lambda item: item[1]['median_ms'], reverse=True)[:10]:
+        memory = f"{result['peak_kb'] / 1024:8.1f} MB" if result['peak_kb'] is not None else "        -"
+        print(f"  {name:<38} {result['median_ms']:10.1f} ms {memory}")
+
+    scans = {name: result['full_scans'] for name, result in results.items() if result['full_scans']}
+    if scans:
+        print("\nIndekssiz to'liq SCAN'lar:")
+        for name, details in scans.items():
+            print(f"  {name:<38} {', '.join(details)}")
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n🐢 Sekinlashgan ({args.threshold:.2f}x dan ko'p, baseline {baseline.get('commit')}):")
+            for name, old, new, ratio in regressions:
+                print(f"  {name:<38} {old:10.3f} -> {new:10.3f} ms ({ratio:.2f}x)")
+            exit_code = 1 if args.fail_on_regression else 0
+        else:
+            print(f"\n✅ Baseline ({baseline.get('commit')}) ga nisbatan sekinlashish yo'q")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 {args.output}")
+    sys.exit(exit_code)
+
+
+if __name__ == '__main__':
+    main()
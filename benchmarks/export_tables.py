@@ -0,0 +1,85 @@
+# benchmarks/export_tables.py
+# Admin eksporti: 1M qatorli jadvalni XLSX (constant_memory) va CSV.gz ga yozish
+#
+# Vaqt tracemalloc'siz o'lchanadi. Xotira (Python allokatsiyalari cho'qqisi)
+# alohida, --rows/10 va --rows hajmlarda o'lchanadi - ikkalasi deyarli teng
+# bo'lishi kerak (xotira jadval hajmiga bog'liq emas).
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.export_tables [--rows 1000000]
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import utils.db_api.database as database
+from utils.data_export import export_csv_gz, export_xlsx
+from utils.db_api.users import UserDatabase
+
+
+def seed(db: UserDatabase, rows: int):
+    db.migrate()
+    with db.transaction() as cursor:
+        cursor.execute("DELETE FROM Transactions")
+        cursor.execute("DELETE FROM Users")
+        cursor.executemany(
+            "INSERT INTO Users (id, telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            ((i + 1, 100000 + i, f"user{i}", i % 3, (i % 50) * 1000) for i in range(rows))
+        )
+        cursor.executemany(
+            "INSERT INTO Transactions (user_id, transaction_type, amount, balance_before, balance_after, "
+            "description, status) VALUES (?, ?, ?, 0, 0, 'Benchmark tranzaksiya', 'approved')",
+            ((i % rows + 1, ('deposit', 'withdrawal')[i % 2], 5000) for i in range(rows))
+        )
+
+
+def run(export, db: UserDatabase, tmp: str, fmt: str, tables) -> dict:
+    if fmt == 'xlsx':
+        return export(db, os.path.join(tmp, "export.xlsx"), tables)
+    return export(db, tmp, tables)
+
+
+def peak_memory(export, db: UserDatabase, tmp: str, fmt: str, tables) -> float:
+    tracemalloc.start()
+    try:
+        run(export, db, tmp, fmt, tables)
+        return tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    database.logger = lambda statement: None
+    exporters = (('xlsx', export_xlsx), ('csv', export_csv_gz))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = UserDatabase(path_to_db=os.path.join(tmp, "export.db"))
+
+        print(f"Vaqt ({args.rows:,} qator, har bir jadval)")
+        seed(db, args.rows)
+        for table in ('users', 'transactions'):
+            for fmt, export in exporters:
+                result = run(export, db, tmp, fmt, [table])
+                rows = sum(result['rows'].values())
+                print(f"  {table:<13} {fmt:<5} {result['seconds']:7.1f} s, {rows / result['seconds']:>9,.0f} qator/s, "
+                      f"{result['size'] / 1024 / 1024:6.1f} MB")
+
+        print("\nXotira cho'qqisi (users, tracemalloc)")
+        peaks = {}
+        for rows in (args.rows // 10, args.rows):
+            seed(db, rows)
+            for fmt, export in exporters:
+                peaks[(fmt, rows)] = peak_memory(export, db, tmp, fmt, ['users'])
+        for fmt, _ in exporters:
+            small, large = peaks[(fmt, args.rows // 10)], peaks[(fmt, args.rows)]
+            print(f"  {fmt:<5} {args.rows // 10:>9,} qator: {small:6.2f} MB, {args.rows:>9,} qator: {large:6.2f} MB")
+
+
+if __name__ == '__main__':
+    main()
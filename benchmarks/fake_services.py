@@ -0,0 +1,467 @@
+# benchmarks/fake_services.py
+# Load-test uchun local aiohttp stand-in'lar: Telegram Bot API, OpenAI, Gamma
+#
+# - FakeTelegram: getUpdates (long polling) orqali driver bergan update'larni
+#   botga uzatadi; bot yuborgan har bir chaqiruv (sendMessage, sendPhoto,
+#   editMessage*, answerCallbackQuery, sendDocument, ...) chat bo'yicha
+#   navbatga vaqt belgisi bilan tushadi - driver javob kechikishini shundan o'lchaydi.
+# - FakeOpenAI: POST /v1/chat/completions - sozlanadigan kechikish (asosiy +
+#   token/s, slow_rate ulushi slow_factor marta sekin - dum kechikishi, model
+#   bo'yicha tezlanish), stream=true bo'lsa SSE bo'laklari, usage bloki bilan.
+# - FakeGamma: POST /v1.0/generations, GET /v1.0/generations/{id} (sozlanadigan
+#   tayyor bo'lish vaqti), GET /v1.0/themes, GET /files/{id}.pptx.
+#
+# Tasodifiy qiymatlar (jitter, xatolar) seed'dan olinadi - natijalar takrorlanadi.
+#
+# Alohida ishga tushirish (botni qo'lda ulash uchun):
+#     python -m benchmarks.fake_services [--openai-latency-ms 1500] [--gamma-seconds 20]
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+# Gamma katalogi: themes_data.THEMES'dagilar + karuselda yo'q bir nechtasi
+THEME_IDS = ['chisel', 'coal', 'blues', 'elysia', 'breeze', 'aurora', 'coral-glow', 'gamma', 'creme',
+             'gamma-dark', 'ash', 'atmosphere', 'bee-happy', 'bonan-hale', 'consultant', 'dialogue']
+
+# Bot'ning Telegram chaqiruvlari - natijasi Message bo'lganlar
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendDocument', 'sendVideo', 'sendAnimation', 'sendAudio', 'sendVoice',
+    'sendSticker', 'editMessageText', 'editMessageCaption', 'editMessageMedia', 'editMessageReplyMarkup',
+    'copyMessage', 'forwardMessage',
+}
+
+
+class TelegramEvent:
+    """Bot'dan kelgan bitta Bot API chaqiruvi"""
+
+    __slots__ = ('at', 'method', 'chat_id', 'fields', 'message_id')
+
+    def __init__(self, at: float, method: str, chat_id: Optional[int], fields: Dict, message_id: Optional[int]):
+        self.at = at
+        self.method = method
+        self.chat_id = chat_id
+        self.fields = fields
+        self.message_id = message_id
+
+    @property
+    def text(self) -> str:
+        return self.fields.get('text') or self.fields.get('caption') or ''
+
+    def buttons(self) -> List[Dict]:
+        """reply_markup ichidagi barcha tugmalar (inline va oddiy)"""
+        try:
+            markup = json.loads(self.fields.get('reply_markup') or '{}')
+        except ValueError:
+            return []
+        rows = markup.get('inline_keyboard') or markup.get('keyboard') or []
+        return [button if isinstance(button, dict) else {'text': button} for row in rows for button in row]
+
+
+class _Service:
+    """Umumiy: so'rovlar soni, bir vaqtdagi so'rovlar cho'qqisi"""
+
+    def __init__(self):
+        self.requests = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def _enter(self, name: str):
+        self.requests[name] += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        self.in_flight -= 1
+
+    def stats(self) -> Dict:
+        return {'requests': dict(self.requests), 'peak_in_flight': self.peak_in_flight}
+
+
+class FakeTelegram(_Service):
+    def __init__(self, latency_ms: float = 0, bot_id: int = 123456789):
+        super().__init__()
+        self.latency = latency_ms / 1000
+        self.bot_id = bot_id
+        self.pending: List[Dict] = []
+        self.next_update_id = 1
+        self.has_updates = asyncio.Event()
+        self.message_ids = itertools.count(1_000_000)
+        self.inboxes: Dict[int, asyncio.Queue] = {}
+        self.callback_chats: Dict[str, int] = {}
+        # Bot getUpdates chaqira boshladi - tayyor
+        self.polling = asyncio.Event()
+
+    # ==================== DRIVER TOMONI ====================
+
+    def push_update(self, update: Dict) -> float:
+        """Update'ni navbatga qo'yish; qo'yilgan vaqtni qaytaradi"""
+        update['update_id'] = self.next_update_id
+        self.next_update_id += 1
+        callback = update.get('callback_query')
+        if callback:
+            self.callback_chats[callback['id']] = callback['message']['chat']['id']
+        self.pending.append(update)
+        self.has_updates.set()
+        return time.perf_counter()
+
+    def inbox(self, chat_id: int) -> asyncio.Queue:
+        queue = self.inboxes.get(chat_id)
+        if queue is None:
+            queue = self.inboxes[chat_id] = asyncio.Queue()
+        return queue
+
+    # ==================== BOT API ====================
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info['method']
+        fields = dict(await request.post()) if request.can_read_body else {}
+        fields.update(request.query)
+        self._enter(method)
+        try:
+            if method == 'getUpdates':
+                return self._ok(await self._get_updates(fields))
+
+            received = time.perf_counter()
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return self._ok(self._dispatch(method, fields, received))
+        finally:
+            self._exit()
+
+    async def _get_updates(self, fields: Dict) -> List[Dict]:
+        self.polling.set()
+        offset = int(fields.get('offset') or 0)
+        limit = int(fields.get('limit') or 100)
+        timeout = float(fields.get('timeout') or 0)
+
+        if offset < 0:
+            # skip_updates: oxirgi update'lar tashlab yuboriladi
+            return self.pending[offset:]
+        if offset:
+            self.pending = [update for update in self.pending if update['update_id'] >= offset]
+        if not self.pending and timeout:
+            self.has_updates.clear()
+            try:
+                await asyncio.wait_for(self.has_updates.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.pending[:limit]
+
+    def _dispatch(self, method: str, fields: Dict, received: float):
+        chat_id = fields.get('chat_id')
+        if chat_id is not None:
+            chat_id = int(chat_id)
+        elif method == 'answerCallbackQuery':
+            chat_id = self.callback_chats.pop(fields.get('callback_query_id'), None)
+
+        result = True
+        message_id = None
+        if method == 'getMe':
+            result = {'id': self.bot_id, 'is_bot': True, 'first_name': 'LoadTest', 'username': 'loadtest_bot'}
+        elif method in MESSAGE_METHODS:
+            message_id = int(fields['message_id']) if method.startswith('edit') and 'message_id' in fields \
+                else next(self.message_ids)
+            result = {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': self.bot_id, 'is_bot': True, 'first_name': 'LoadTest'},
+            }
+            if 'text' in fields:
+                result['text'] = fields['text']
+            if method == 'sendDocument':
+                result['document'] = {'file_id': f"doc{message_id}", 'file_unique_id': f"u{message_id}"}
+        elif method == 'getChatMember':
+            result = {'status': 'member', 'user': {'id': int(fields.get('user_id') or 0), 'is_bot': False,
+                                                   'first_name': 'User'}}
+        elif method == 'getWebhookInfo':
+            result = {'url': '', 'has_custom_certificate': False, 'pending_update_count': len(self.pending)}
+        elif method == 'getChat':
+            result = {'id': chat_id, 'type': 'private'}
+
+        if chat_id is not None:
+            self.inbox(chat_id).put_nowait(TelegramEvent(received, method, chat_id, fields, message_id))
+        return result
+
+    @staticmethod
+    def _ok(result) -> web.Response:
+        return web.json_response({'ok': True, 'result': result})
+
+    def app(self) -> web.Application:
+        app = web.Application(client_max_size=64 * 1024 * 1024)
+        app.router.add_route('*', '/bot{token}/{method}', self.handle)
+        return app
+
+
+class FakeOpenAI(_Service):
+    def __init__(self, latency_ms: float = 1500, tokens_per_second: float = 400, completion_tokens: int = 600,
+                 error_rate: float = 0.0, seed: int = 1, slow_rate: float = 0.0, slow_factor: float = 1.0,
+                 model_speedups: Dict[str, float] = None, model_error_rates: Dict[str, float] = None):
+        super().__init__()
+        self.latency = latency_ms / 1000
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.slow_rate = slow_rate
+        self.slow_factor = slow_factor
+        self.model_speedups = model_speedups or {}
+        self.model_error_rates = model_error_rates or {}
+        self.random = random.Random(seed)
+        self.models = Counter()
+
+    @staticmethod
+    def content() -> str:
+        """Prezentatsiya, pitch deck, bozor tahlili va mustaqil ish uchun yaroqli JSON"""
+        section = "Load-test matni. " * 20
+        return json.dumps({
+            'title': 'Load test',
+            'subtitle': 'Fake OpenAI',
+            'project_name': 'Load test',
+            'slides': [{'title': f"Slayd {i}", 'content': section, 'bullet_points': ['a', 'b', 'c']}
+                       for i in range(1, 11)],
+            'market_size': '1M', 'target_market': 'Test', 'competitors': ['A', 'B'],
+            'introduction': {'title': 'KIRISH', 'content': section},
+            'chapters': [{'number': i, 'title': f"{i}-bob", 'sections': [
+                {'number': f"{i}.1", 'title': 'Bo\'lim', 'content': section}]} for i in (1, 2)],
+            'conclusion': {'title': 'XULOSA', 'content': section},
+            'references': ['Manba 1', 'Manba 2'],
+        }, ensure_ascii=False)
+
+    async def handle(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        self._enter('chat.completions')
+        try:
+            model = body.get('model', 'gpt-4')
+            self.models[model] += 1
+            jitter = self.random.uniform(0.9, 1.1)
+            if self.slow_rate and self.random.random() < self.slow_rate:
+                jitter *= self.slow_factor
+            jitter /= self.model_speedups.get(model, 1.0)
+            failed = self.random.random() < self.model_error_rates.get(model, self.error_rate)
+            delay = (self.latency + self.completion_tokens / self.tokens_per_second) * jitter
+            prompt_tokens = len(json.dumps(body.get('messages', []), ensure_ascii=False)) // 4
+            usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': self.completion_tokens,
+                     'total_tokens': prompt_tokens + self.completion_tokens}
+
+            if failed:
+                await asyncio.sleep(self.latency * jitter)
+                return web.json_response({'error': {'message': 'fake overload', 'type': 'server_error'}},
+                                         status=500)
+
+            completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+            content = self.content()
+            if body.get('stream'):
+                return await self._stream(request, completion_id, model, content, delay, usage,
+                                          (body.get('stream_options') or {}).get('include_usage'))
+
+            await asyncio.sleep(delay)
+            return web.json_response({
+                'id': completion_id,
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': model,
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content},
+                             'finish_reason': 'stop'}],
+                'usage': usage,
+            })
+        finally:
+            self._exit()
+
+    async def _stream(self, request, completion_id: str, model: str, content: str, delay: float, usage: Dict,
+                      include_usage: bool) -> web.StreamResponse:
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+
+        def chunk(delta: Optional[Dict], finish_reason=None, **extra) -> bytes:
+            choices = [] if delta is None else [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+            payload = {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                       'model': model, 'choices': choices}
+            payload.update(extra)
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n".encode('utf-8')
+
+        # Birinchi token - asosiy kechikishdan keyin, qolganlari token/s tezligida
+        await asyncio.sleep(self.latency)
+        pieces = 20
+        step = max(len(content) // pieces, 1)
+        interval = max(delay - self.latency, 0) / pieces
+        await response.write(chunk({'role': 'assistant', 'content': ''}))
+        for start in range(0, len(content), step):
+            await response.write(chunk({'content': content[start:start + step]}))
+            await asyncio.sleep(interval)
+        await response.write(chunk({}, 'stop'))
+        if include_usage:
+            # stream_options.include_usage: oxirgi bo'lak - choices bo'sh, usage bilan
+            await response.write(chunk(None, usage=usage))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1/chat/completions', self.handle)
+        return app
+
+
+class FakeGamma(_Service):
+    def __init__(self, generation_seconds: float = 20, file_kb: int = 200, error_rate: float = 0.0,
+                 credits: int = 40, seed: int = 1):
+        super().__init__()
+        self.generation_seconds = generation_seconds
+        self.file = b'PK\x03\x04' + b'\0' * (file_kb * 1024)
+        self.error_rate = error_rate
+        self.credits = credits
+        self.random = random.Random(seed)
+        self.generations: Dict[str, float] = {}
+        self.theme_list = [{'id': theme_id, 'name': theme_id.replace('-', ' ').title(), 'type': 'standard'}
+                           for theme_id in THEME_IDS]
+        self.themes_etag = f'"{len(self.theme_list)}-1"'
+
+    async def create(self, request: web.Request) -> web.Response:
+        self._enter('create')
+        try:
+            await request.json()
+            if self.random.random() < self.error_rate:
+                return web.json_response({'message': 'fake error'}, status=500)
+            generation_id = uuid.uuid4().hex[:16]
+            self.generations[generation_id] = time.monotonic() + self.generation_seconds * self.random.uniform(0.9, 1.1)
+            return web.json_response({'generationId': generation_id}, status=201)
+        finally:
+            self._exit()
+
+    async def status(self, request: web.Request) -> web.Response:
+        self._enter('status')
+        try:
+            generation_id = request.match_info['generation_id']
+            ready_at = self.generations.get(generation_id)
+            if ready_at is None:
+                return web.json_response({'message': 'not found'}, status=404)
+            if time.monotonic() < ready_at:
+                return web.json_response({'generationId': generation_id, 'status': 'pending'})
+            base = f"{request.scheme}://{request.host}"
+            return web.json_response({
+                'generationId': generation_id,
+                'status': 'completed',
+                'gammaUrl': f"{base}/docs/{generation_id}",
+                'exportUrl': f"{base}/files/{generation_id}.pptx",
+                'credits': {'deducted': self.credits, 'remaining': 100000},
+            })
+        finally:
+            self._exit()
+
+    async def themes(self, request: web.Request) -> web.Response:
+        """Sahifalangan katalog (limit / after), ETag va If-None-Match -> 304"""
+        self._enter('themes')
+        try:
+            if request.headers.get('If-None-Match') == self.themes_etag:
+                return web.Response(status=304)
+            limit = int(request.query.get('limit', 50))
+            start = int(request.query.get('after', 0))
+            page = self.theme_list[start:start + limit]
+            has_more = start + limit < len(self.theme_list)
+            response = web.json_response({
+                'data': page,
+                'hasMore': has_more,
+                'nextCursor': str(start + limit) if has_more else None,
+            })
+            if start == 0:
+                response.headers['ETag'] = self.themes_etag
+            return response
+        finally:
+            self._exit()
+
+    async def download(self, request: web.Request) -> web.Response:
+        self._enter('download')
+        try:
+            return web.Response(body=self.file, content_type='application/octet-stream')
+        finally:
+            self._exit()
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/v1.0/generations', self.create)
+        app.router.add_get('/v1.0/generations/{generation_id}', self.status)
+        app.router.add_get('/v1.0/themes', self.themes)
+        app.router.add_get('/files/{name}', self.download)
+        return app
+
+
+async def serve(app: web.Application, host: str = '127.0.0.1', port: int = 0):
+    """(runner, url) - port=0 bo'lsa bo'sh port tanlanadi"""
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{port}"
+
+
+async def start_services(telegram: FakeTelegram, openai: FakeOpenAI, gamma: FakeGamma) -> Dict:
+    """Uchala servisni ishga tushirish; bot uchun env qiymatlari va runner'lar"""
+    telegram_runner, telegram_url = await serve(telegram.app())
+    openai_runner, openai_url = await serve(openai.app())
+    gamma_runner, gamma_url = await serve(gamma.app())
+    return {
+        'runners': [telegram_runner, openai_runner, gamma_runner],
+        'env': {
+            'TELEGRAM_API_URL': telegram_url,
+            'OPENAI_BASE_URL': f"{openai_url}/v1",
+            'GAMMA_BASE_URL': f"{gamma_url}/v1.0",
+        },
+    }
+
+
+def add_service_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--telegram-latency-ms', type=float, default=0)
+    parser.add_argument('--openai-latency-ms', type=float, default=1500, help="birinchi tokengacha")
+    parser.add_argument('--openai-tokens-per-second', type=float, default=400)
+    parser.add_argument('--openai-completion-tokens', type=int, default=600)
+    parser.add_argument('--openai-error-rate', type=float, default=0.0)
+    parser.add_argument('--gamma-seconds', type=float, default=20, help="generatsiya tayyor bo'lish vaqti")
+    parser.add_argument('--gamma-error-rate', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=1)
+
+
+def build_services(args):
+    return (
+        FakeTelegram(latency_ms=args.telegram_latency_ms),
+        FakeOpenAI(latency_ms=args.openai_latency_ms, tokens_per_second=args.openai_tokens_per_second,
+                   completion_tokens=args.openai_completion_tokens, error_rate=args.openai_error_rate,
+                   seed=args.seed),
+        FakeGamma(generation_seconds=args.gamma_seconds, error_rate=args.gamma_error_rate, seed=args.seed),
+    )
+
+
+async def _main(args):
+    telegram, openai, gamma = build_services(args)
+    services = await start_services(telegram, openai, gamma)
+    print("Fake servislar ishlayapti. Botni quyidagi env bilan ishga tushiring:")
+    for key, value in services['env'].items():
+        print(f"  {key}={value}")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        for runner in services['runners']:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_service_arguments(parser)
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,623 @@
+# benchmarks/loadtest.py
+# End-to-end load test: haqiqiy bot (app.py, alohida jarayon) + fake Telegram/OpenAI/Gamma
+#
+# Driver minglab foydalanuvchini simulyatsiya qiladi:
+#   - prezentatsiya: /start -> 📊 Prezentatsiya -> mavzu -> o'tkazib yuborish -> slaydlar
+#                    -> theme (ba'zan ▶️ ko'rib) -> tanlash -> ✅ Ha, boshlash -> PPTX
+#                    (--abandon-share qismi theme tanlashda ❌ Bekor qilish bosadi)
+#   - mustaqil ish:  /start -> 📝 Mustaqil ish -> Web App ma'lumoti -> DOCX
+# Har bir qadamda update fake Telegram navbatiga qo'yilgan paytdan bot'ning shu
+# chatga birinchi Bot API chaqiruvigacha bo'lgan vaqt - javob kechikishi;
+# tasdiqlashdan sendDocument gacha - worker tugatish vaqti.
+#
+# Hisobot: update throughput, javob kechikishi (p50/p90/p99, qadamlar bo'yicha),
+# tugatish vaqtlari, DB (bot /metrics dagi db_query_duration_seconds va
+# "database is locked" loglari), task holatlari, fake servislar yuklamasi,
+# oldindan content yaratish natijalari va behuda tokenlar (--no-speculation
+# bilan solishtirish uchun).
+# Natija JSON faylga yoziladi (commit, parametrlar bilan); --baseline bilan
+# oldingi natija bilan solishtiriladi. Bir xil seed - bir xil foydalanuvchi
+# ssenariylari, fikrlash vaqtlari va fake servis jitter'i.
+#
+# Ishga tushirish (loyiha ildizidan, requirements o'rnatilgan muhitda):
+#     python -m benchmarks.loadtest [--users 2000] [--ramp 120] [--course-share 0.3]
+#                                   [--output loadtest.json] [--baseline old.json]
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from typing import Callable, Dict, List, Optional
+
+import aiohttp
+
+from benchmarks.fake_services import (FakeTelegram, TelegramEvent, add_service_arguments, build_services,
+                                      start_services)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BOT_TOKEN = "123456789:LOADTEST-token"
+ADMIN_ID = 1
+FIRST_USER_ID = 10_000_000
+START_BALANCE = 10_000_000
+
+# Hisobotdagi qadamlar tartibi
+STEPS = ['start', 'menu', 'topic', 'details', 'slides', 'theme_next', 'theme_select', 'abandon', 'confirm',
+         'web_app']
+
+
+def percentiles(values: List[float]) -> Dict:
+    if not values:
+        return {'count': 0}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+
+    def at(q):
+        return ordered[min(last, int(round(q * last)))]
+
+    return {
+        'count': len(ordered),
+        'p50': at(0.5),
+        'p90': at(0.9),
+        'p95': at(0.95),
+        'p99': at(0.99),
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered),
+    }
+
+
+class Results:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.completions: Dict[str, List[float]] = defaultdict(list)
+        self.errors = Counter()
+        self.updates_sent = 0
+        self.replies = 0
+        self.flows = Counter()
+        self.flows_completed = Counter()
+        self.abandoned = 0
+
+
+class UserSession:
+    """Bitta simulyatsiya qilingan foydalanuvchi"""
+
+    message_ids = itertools.count(1)
+    callback_ids = itertools.count(1)
+
+    def __init__(self, index: int, telegram: FakeTelegram, results: Results, args):
+        self.user_id = FIRST_USER_ID + index
+        self.telegram = telegram
+        self.results = results
+        self.args = args
+        # Har bir user o'z seed'idan - rejalashtirish tartibidan qat'i nazar bir xil ssenariy
+        self.random = random.Random(args.seed * 1_000_003 + index)
+        self.flow = 'course_work' if self.random.random() < args.course_share else 'presentation'
+        # Alohida generator - qolgan ssenariy --abandon-share'dan qat'i nazar bir xil
+        self.abandons = random.Random(args.seed * 7_919 + index).random() < args.abandon_share
+        self.inbox = telegram.inbox(self.user_id)
+
+    # ==================== UPDATE'LAR ====================
+
+    def _user(self) -> Dict:
+        return {'id': self.user_id, 'is_bot': False, 'first_name': f"User{self.user_id}",
+                'username': f"user{self.user_id}", 'language_code': 'uz'}
+
+    def _message(self, **fields) -> Dict:
+        message = {
+            'message_id': next(self.message_ids),
+            'date': int(time.time()),
+            'chat': {'id': self.user_id, 'type': 'private', 'first_name': f"User{self.user_id}"},
+            'from': self._user(),
+        }
+        message.update(fields)
+        return {'message': message}
+
+    def text(self, text: str) -> Dict:
+        update = self._message(text=text)
+        if text.startswith('/'):
+            update['message']['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+        return update
+
+    def callback(self, data: str, message_id: int) -> Dict:
+        return {'callback_query': {
+            'id': str(next(self.callback_ids)),
+            'from': self._user(),
+            'chat_instance': str(self.user_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': self.user_id, 'type': 'private'},
+                'from': {'id': self.telegram.bot_id, 'is_bot': True, 'first_name': 'LoadTest'},
+            },
+        }}
+
+    def web_app(self, payload: Dict) -> Dict:
+        return self._message(web_app_data={'data': json.dumps(payload, ensure_ascii=False),
+                                           'button_text': "📱 Formani ochish"})
+
+    # ==================== QADAMLAR ====================
+
+    async def think(self):
+        await asyncio.sleep(self.random.uniform(self.args.think_min, self.args.think_max))
+
+    async def step(self, name: str, update: Dict, expect: Callable[[TelegramEvent], bool],
+                   timeout: float = None) -> TelegramEvent:
+        """Update yuborish va kutilgan javobni olish (birinchi javobgacha - kechikish)"""
+        # Oldingi qadamdan qolgan (kechikkan) chaqiruvlar
+        while not self.inbox.empty():
+            self.inbox.get_nowait()
+
+        sent = self.telegram.push_update(update)
+        self.results.updates_sent += 1
+        deadline = sent + (timeout or self.args.step_timeout)
+        replied = False
+
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                self.results.errors[f"{name}:timeout" if not replied else f"{name}:unexpected"] += 1
+                raise asyncio.TimeoutError(name)
+            try:
+                event = await asyncio.wait_for(self.inbox.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if not replied:
+                replied = True
+                self.results.replies += 1
+                self.results.latencies[name].append(event.at - sent)
+            if expect(event):
+                return event
+
+    async def wait_document(self, started: float) -> bool:
+        deadline = started + self.args.task_timeout
+        while True:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                self.results.errors[f"{self.flow}:document_timeout"] += 1
+                return False
+            try:
+                event = await asyncio.wait_for(self.inbox.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if event.method == 'sendDocument':
+                self.results.completions[self.flow].append(event.at - started)
+                return True
+            if event.method == 'sendMessage' and ('xato' in event.text.lower() or '❌' in event.text):
+                self.results.errors[f"{self.flow}:failed"] += 1
+                return False
+
+    async def run(self):
+        self.results.flows[self.flow] += 1
+        try:
+            await self.step('start', self.text('/start'), lambda e: 'Assalomu alaykum' in e.text)
+            await self.think()
+            if self.flow == 'presentation':
+                done = await self.presentation()
+            else:
+                done = await self.course_work()
+            if done:
+                self.results.flows_completed[self.flow] += 1
+        except asyncio.TimeoutError:
+            pass
+
+    async def presentation(self) -> bool:
+        await self.step('menu', self.text("📊 Prezentatsiya"), lambda e: 'mavzusini kiriting' in e.text)
+        await self.think()
+        await self.step('topic', self.text(f"Load test mavzusi #{self.user_id}"),
+                        lambda e: 'Mavzu qabul qilindi' in e.text)
+        await self.think()
+        await self.step('details', self.text("⏭ O'tkazib yuborish"), lambda e: 'Slaydlar sonini' in e.text)
+        await self.think()
+        photo = await self.step('slides', self.text(str(self.random.randint(5, 12))),
+                                lambda e: e.method == 'sendPhoto')
+        await self.think()
+
+        if self.abandons:
+            await self.step('abandon', self.text("❌ Bekor qilish"), lambda e: 'bekor qilindi' in e.text)
+            self.results.abandoned += 1
+            return False
+
+        # Ba'zi foydalanuvchilar theme'larni varaqlaydi
+        if self.random.random() < self.args.browse_share:
+            next_button = next((b for b in photo.buttons() if b.get('callback_data', '').startswith('theme_next:')),
+                               None)
+            if next_button:
+                edited = await self.step(
+                    'theme_next', self.callback(next_button['callback_data'], photo.message_id),
+                    lambda e: e.method in ('editMessageMedia', 'sendPhoto')
+                )
+                photo = edited if edited.method == 'sendPhoto' else TelegramEvent(
+                    edited.at, edited.method, edited.chat_id,
+                    dict(photo.fields, reply_markup=edited.fields.get('reply_markup', '')), photo.message_id
+                )
+                await self.think()
+
+        select = next((b for b in photo.buttons() if b.get('callback_data', '').startswith('theme_select:')), None)
+        data = select['callback_data'] if select and self.random.random() > self.args.skip_theme_share \
+            else 'theme_skip'
+        await self.step('theme_select', self.callback(data, photo.message_id), lambda e: 'TASDIQLASH' in e.text)
+        await self.think()
+
+        started = time.perf_counter()
+        await self.step('confirm', self.text("✅ Ha, boshlash"), lambda e: 'boshlandi' in e.text)
+        return await self.wait_document(started)
+
+    async def course_work(self) -> bool:
+        await self.step('menu', self.text("📝 Mustaqil ish"), lambda e: 'Mustaqil ish' in e.text)
+        await self.think()
+        payload = {
+            'work_type': self.random.choice(['referat', 'mustaqil_ish', 'kurs_ishi']),
+            'topic': f"Load test mavzusi #{self.user_id}",
+            'subject_name': 'Informatika',
+            'details': '',
+            'page_count': self.random.randint(8, 15),
+            'language': 'uz',
+        }
+        started = time.perf_counter()
+        await self.step('web_app', self.web_app(payload), lambda e: 'Qabul qilindi' in e.text)
+        return await self.wait_document(started)
+
+
+# ==================== BOT JARAYONI ====================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(db_dir: str, users: int):
+    """Sxema + balansli foydalanuvchilar (bot o'zi migrate() ni qayta chaqiradi - o'zgarishsiz)"""
+    sys.path.insert(0, ROOT)
+    import utils.db_api.database as database
+    from utils.db_api.users import UserDatabase
+
+    database.logger = lambda statement: None
+    db = UserDatabase(path_to_db=os.path.join(db_dir, "user.db"))
+    db.migrate()
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO Users (telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, 0, ?, CURRENT_TIMESTAMP)",
+            ((FIRST_USER_ID + i, f"user{FIRST_USER_ID + i}", START_BALANCE) for i in range(users))
+        )
+
+
+def start_bot(env_overrides: Dict, workdir: str, log_path: str) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(env_overrides)
+    log = open(log_path, 'wb')
+    # cwd - vaqtinchalik papka: bot yozadigan downloads/ va boshqa fayllar repo'ga tushmaydi
+    return subprocess.Popen([sys.executable, os.path.join(ROOT, 'app.py')], cwd=workdir, env=env,
+                            stdout=log, stderr=subprocess.STDOUT)
+
+
+async def stop_bot(process: subprocess.Popen, timeout: float = 30):
+    if process.poll() is not None:
+        return
+    process.send_signal(signal.SIGINT)
+    for _ in range(int(timeout * 10)):
+        if process.poll() is not None:
+            return
+        await asyncio.sleep(0.1)
+    process.kill()
+
+
+# ==================== /metrics ====================
+
+METRIC_LINE = re.compile(r'^(\w+)(?:\{(.*)\})? ([0-9.eE+-]+|\+Inf|NaN)$')
+LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text: str) -> Dict[str, List]:
+    metrics = defaultdict(list)
+    for line in text.splitlines():
+        match = METRIC_LINE.match(line)
+        if match:
+            labels = dict(LABEL.findall(match.group(2) or ''))
+            metrics[match.group(1)].append((labels, float(match.group(3))))
+    return metrics
+
+
+def histogram_summary(metrics: Dict, name: str, label: str) -> Dict[str, Dict]:
+    """label bo'yicha: count, sum, p99 (bucket yuqori chegarasi), >100 ms ulushi"""
+    summary = defaultdict(lambda: {'count': 0, 'sum': 0.0, 'buckets': []})
+    for labels, value in metrics.get(f"{name}_count", []):
+        summary[labels.get(label, '')]['count'] = value
+    for labels, value in metrics.get(f"{name}_sum", []):
+        summary[labels.get(label, '')]['sum'] = value
+    for labels, value in metrics.get(f"{name}_bucket", []):
+        bound = float('inf') if labels['le'] == '+Inf' else float(labels['le'])
+        summary[labels.get(label, '')]['buckets'].append((bound, value))
+
+    result = {}
+    for key, item in summary.items():
+        buckets = sorted(item['buckets'])
+        count = item['count']
+        p99 = next((bound for bound, cumulative in buckets if cumulative >= 0.99 * count), None) if count else None
+        under_100ms = next((cumulative for bound, cumulative in buckets if bound >= 0.1), count)
+        result[key] = {
+            'count': int(count),
+            'seconds': item['sum'],
+            'p99_le': p99,
+            'over_100ms': int(count - under_100ms),
+        }
+    return result
+
+
+async def scrape_metrics(port: int) -> Dict:
+    try:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics",
+                                   timeout=aiohttp.ClientTimeout(total=10)) as response:
+                return parse_metrics(await response.text())
+    except Exception as e:
+        print(f"⚠️ /metrics o'qilmadi: {e}")
+        return {}
+
+
+def task_statuses(db_dir: str) -> Dict:
+    import sqlite3
+    connection = sqlite3.connect(os.path.join(db_dir, "user.db"))
+    try:
+        rows = connection.execute("SELECT status, COUNT(*) FROM PresentationTasks GROUP BY status").fetchall()
+        return dict(rows)
+    finally:
+        connection.close()
+
+
+def speculation_usage(db_dir: str) -> Dict:
+    """Task'ga olinmagan oldindan yaratish chaqiruvlari va prezentatsiya tokenlari"""
+    import sqlite3
+    connection = sqlite3.connect(os.path.join(db_dir, "user.db"))
+    try:
+        wasted = connection.execute(
+            """SELECT COUNT(*), COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM ApiUsage
+               WHERE task_uuid >= 'spec:' AND task_uuid < 'spec;'""").fetchone()
+        total = connection.execute(
+            """SELECT COALESCE(SUM(prompt_tokens + completion_tokens), 0) FROM ApiUsage
+               WHERE service = 'openai' AND operation = 'presentation'""").fetchone()[0]
+        return {'wasted_calls': wasted[0], 'wasted_tokens': wasted[1], 'presentation_tokens': total,
+                'wasted_rate': wasted[1] / total if total else 0.0}
+    finally:
+        connection.close()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+# ==================== HISOBOT ====================
+
+def build_report(args, results: Results, elapsed: float, metrics: Dict, log_text: str, statuses: Dict,
+                 services, speculation: Dict) -> Dict:
+    all_latencies = [value for values in results.latencies.values() for value in values]
+    db_sites = histogram_summary(metrics, 'db_query_duration_seconds', 'site')
+    handlers = histogram_summary(metrics, 'bot_handler_duration_seconds', 'handler')
+    top_sites = sorted(db_sites.items(), key=lambda item: item[1]['seconds'], reverse=True)[:8]
+    telegram, openai, gamma = services
+    delivery = histogram_summary(metrics, 'worker_task_delivery_seconds', 'speculation')
+    outcomes = {labels.get('outcome'): int(value) for labels, value in metrics.get('speculative_content_total', [])}
+
+    return {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'params': {key: value for key, value in vars(args).items() if key not in ('output', 'baseline')},
+        'elapsed_seconds': elapsed,
+        'updates': {
+            'sent': results.updates_sent,
+            'replied': results.replies,
+            'per_second': results.replies / elapsed if elapsed else 0,
+        },
+        'flows': {flow: {'started': results.flows[flow], 'completed': results.flows_completed[flow]}
+                  for flow in results.flows},
+        'reply_latency': percentiles(all_latencies),
+        'reply_latency_by_step': {step: percentiles(results.latencies[step]) for step in STEPS
+                                  if step in results.latencies},
+        'completion_seconds': {flow: percentiles(values) for flow, values in results.completions.items()},
+        'errors': dict(results.errors),
+        'db': {
+            'queries': sum(site['count'] for site in db_sites.values()),
+            'seconds': sum(site['seconds'] for site in db_sites.values()),
+            'over_100ms': sum(site['over_100ms'] for site in db_sites.values()),
+            'locked_errors': log_text.count('database is locked'),
+            'top_sites': dict(top_sites),
+        },
+        'handlers': dict(sorted(handlers.items(), key=lambda item: item[1]['seconds'], reverse=True)[:8]),
+        'tasks': statuses,
+        'abandoned': results.abandoned,
+        'speculation': {
+            **speculation,
+            'outcomes': outcomes,
+            'delivery': {key: {'count': value['count'],
+                               'mean': value['seconds'] / value['count'] if value['count'] else None}
+                         for key, value in delivery.items()},
+        },
+        # LOG_FORMAT=json (standart) va text
+        'bot_errors_logged': log_text.count('"level": "ERROR"') + log_text.count(' - ERROR - '),
+        'log': {
+            'records': {labels.get('level'): int(value) for labels, value in metrics.get('log_records_total', [])},
+            'dropped': {labels.get('reason'): int(value)
+                        for labels, value in metrics.get('log_records_dropped_total', [])},
+            'bytes': len(log_text.encode('utf-8')),
+        },
+        'services': {'telegram': telegram.stats(), 'openai': openai.stats(), 'gamma': gamma.stats()},
+    }
+
+
+def ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value * 1000:,.0f}"
+
+
+def print_report(report: Dict, baseline: Optional[Dict]):
+    def delta(path: List[str], value: float, scale: float = 1000) -> str:
+        if not baseline:
+            return ""
+        old = baseline
+        for key in path:
+            old = old.get(key, {}) if isinstance(old, dict) else {}
+        if not isinstance(old, (int, float)) or not old:
+            return ""
+        return f"  ({(value - old) / old * 100:+.0f}% vs {old * scale:,.0f})"
+
+    updates = report['updates']
+    print(f"\nCommit {report['commit']}, {report['elapsed_seconds']:.0f} s")
+    print(f"Update'lar: {updates['sent']:,} yuborildi, {updates['replied']:,} javob, "
+          f"{updates['per_second']:.1f} update/s{delta(['updates', 'per_second'], updates['per_second'], 1)}")
+    for flow, counts in report['flows'].items():
+        print(f"  {flow:<13} {counts['completed']:,}/{counts['started']:,} tugadi")
+
+    latency = report['reply_latency']
+    if latency.get('count'):
+        print(f"\nJavob kechikishi (ms): p50 {ms(latency['p50'])} · p90 {ms(latency['p90'])} · "
+              f"p99 {ms(latency['p99'])}{delta(['reply_latency', 'p99'], latency['p99'])} · max {ms(latency['max'])}")
+        for step, values in report['reply_latency_by_step'].items():
+            print(f"  {step:<13} n={values['count']:>6,}  p50 {ms(values['p50']):>7}  p99 {ms(values['p99']):>7}")
+
+    print("\nTugatish vaqti (s):")
+    for flow, values in report['completion_seconds'].items():
+        if values.get('count'):
+            print(f"  {flow:<13} n={values['count']:>6,}  p50 {values['p50']:6.1f}  p90 {values['p90']:6.1f}  "
+                  f"p99 {values['p99']:6.1f}{delta(['completion_seconds', flow, 'p99'], values['p99'], 1)}")
+
+    db = report['db']
+    print(f"\nDB: {db['queries']:,} so'rov, {db['seconds']:.1f} s jami, >100 ms: {db['over_100ms']:,}, "
+          f"'database is locked': {db['locked_errors']}")
+    for site, values in db['top_sites'].items():
+        print(f"  {site:<36} {values['count']:>8,}  {values['seconds']:7.2f} s  p99 ≤ {ms(values['p99_le'])} ms")
+
+    speculation = report['speculation']
+    print(f"\nOldindan yaratish: {speculation['outcomes'] or '-'}, bekor qilganlar {report['abandoned']}, "
+          f"behuda {speculation['wasted_tokens']:,} tok ({speculation['wasted_rate']:.1%} prezentatsiya tokenlaridan)")
+    for key, values in speculation['delivery'].items():
+        if values['count']:
+            print(f"  tasdiqlash -> fayl, {key:<10} n={values['count']:>6,}  o'rtacha {values['mean']:6.1f} s")
+
+    print(f"\nTask'lar: {report['tasks']}")
+    if report['errors']:
+        print(f"Xatolar: {report['errors']}")
+    print(f"Bot log'idagi ERROR: {report['bot_errors_logged']}")
+    log = report['log']
+    print(f"Log: {sum(log['records'].values()):,} yozuv {log['records']}, tashlangan {log['dropped'] or 0}, "
+          f"{log['bytes'] / 1024:,.0f} KB")
+    services = report['services']
+    print(f"Fake servislar: OpenAI {sum(services['openai']['requests'].values()):,} so'rov "
+          f"(bir vaqtda max {services['openai']['peak_in_flight']}), Gamma "
+          f"{sum(services['gamma']['requests'].values()):,} so'rov, Telegram "
+          f"{sum(services['telegram']['requests'].values()):,} chaqiruv")
+
+
+async def run(args) -> Dict:
+    services = build_services(args)
+    telegram = services[0]
+    started_services = await start_services(*services)
+    metrics_port = free_port()
+
+    with tempfile.TemporaryDirectory(prefix="loadtest_") as workdir:
+        db_dir = os.path.join(workdir, "data")
+        os.makedirs(db_dir)
+        log_path = os.path.join(workdir, "bot.log")
+        env = dict(started_services['env'])
+        env.update({
+            'BOT_TOKEN': BOT_TOKEN,
+            'ADMINS': str(ADMIN_ID),
+            'ip': '127.0.0.1',
+            'OPENAI_API_KEY': 'sk-loadtest',
+            'GAMMA_API_KEY': 'gamma-loadtest',
+            'DB_DIR': db_dir,
+            'ARTIFACT_DIR': os.path.join(workdir, "artifacts"),
+            'METRICS_PORT': str(metrics_port),
+            'SPECULATIVE_CONTENT': 'false' if args.no_speculation else 'true',
+        })
+        # utils paketi import paytida data.config ni o'qiydi - driver ham shu env bilan
+        os.environ.update(env)
+        seed_database(db_dir, args.users)
+        process = start_bot(env, workdir, log_path)
+
+        try:
+            await asyncio.wait_for(telegram.polling.wait(), args.startup_timeout)
+        except asyncio.TimeoutError:
+            await stop_bot(process)
+            with open(log_path, encoding='utf-8', errors='replace') as log:
+                print(log.read()[-3000:])
+            raise SystemExit("❌ Bot getUpdates chaqirmadi (log yuqorida)")
+
+        results = Results()
+        sessions = [UserSession(index, telegram, results, args) for index in range(args.users)]
+        print(f"▶️ {args.users:,} foydalanuvchi, {args.ramp:.0f} s ichida ...")
+
+        async def delayed(session: UserSession, delay: float):
+            await asyncio.sleep(delay)
+            await session.run()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            delayed(session, index * args.ramp / max(args.users, 1)) for index, session in enumerate(sessions)
+        ))
+        elapsed = time.perf_counter() - started
+
+        metrics = await scrape_metrics(metrics_port)
+        # To'xtatishdan oldingi log (shutdown paytidagi getUpdates uzilishlari hisobga kirmasin)
+        with open(log_path, encoding='utf-8', errors='replace') as log:
+            log_text = log.read()
+
+        await stop_bot(process)
+        for runner in started_services['runners']:
+            await runner.cleanup()
+        if args.keep_log:
+            shutil.copyfile(log_path, args.keep_log)
+
+        return build_report(args, results, elapsed, metrics, log_text, task_statuses(db_dir), services,
+                            speculation_usage(db_dir))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--ramp', type=float, default=120, help="foydalanuvchilar shu soniyalar ichida kiradi")
+    parser.add_argument('--course-share', type=float, default=0.3, help="mustaqil ish oqimi ulushi")
+    parser.add_argument('--browse-share', type=float, default=0.5, help="theme'larni varaqlaydiganlar ulushi")
+    parser.add_argument('--skip-theme-share', type=float, default=0.2)
+    parser.add_argument('--abandon-share', type=float, default=0.1, help="theme tanlashda bekor qiladiganlar ulushi")
+    parser.add_argument('--no-speculation', action='store_true', help="content'ni oldindan yaratishni o'chirish")
+    parser.add_argument('--think-min', type=float, default=0.5)
+    parser.add_argument('--think-max', type=float, default=2.0)
+    parser.add_argument('--step-timeout', type=float, default=30)
+    parser.add_argument('--task-timeout', type=float, default=900)
+    parser.add_argument('--startup-timeout', type=float, default=60)
+    parser.add_argument('--output', default='loadtest.json')
+    parser.add_argument('--baseline', help="oldingi --output fayli bilan solishtirish")
+    parser.add_argument('--keep-log', help="bot log'ini shu faylga saqlash")
+    add_service_arguments(parser)
+    args = parser.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    report = asyncio.run(run(args))
+    print_report(report, baseline)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
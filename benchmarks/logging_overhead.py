@@ -0,0 +1,225 @@
+# benchmarks/logging_overhead.py
+# Log yozish narxi event loop (chaqiruvchi thread) tomonida: sinxron StreamHandler va QueueHandler
+#
+# Bir xil yozuvlar oqimi (umumiy INFO, httpx so'rov qatori, Gamma poll qatori)
+# uch rejimda:
+#   sync-text   - avvalgi logging.basicConfig: format + yozish chaqiruvchi thread'da
+#   queue-json  - utils.log_pipeline, sampling/rate limit o'chirilgan
+#   queue-json+ - utils.log_pipeline standart sampling (httpx 10%) va rate limit bilan
+# Sink - vaqtinchalik fayl; --sink-delay-ms har yozuvdan keyingi flush'ni
+# sekinlashtiradi (journald / docker log driver / to'lgan pipe). Hisobot:
+# chaqiruv boshiga µs (o'rtacha va p99), navbatni bo'shatish vaqti, yozilgan
+# qatorlar va tashlanganlar. Alohida: Gamma check_status'ning avvalgi va yangi
+# log qatorlari hamda SQL trace (print) bilan/siz Database.execute.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.logging_overhead [--records 20000] [--sink-delay-ms 0.2]
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import utils.db_api.database as database
+from utils.db_api.database import Database
+from utils.log_pipeline import TEXT_FORMAT, setup_logging
+from utils.metrics import LOG_DROPPED
+
+DROP_REASONS = ('sampled', 'rate_limited', 'queue_full')
+
+# check_status javobiga o'xshash (~1 KB)
+STATUS_RESPONSE = {
+    'generationId': 'gen_benchmark', 'status': 'pending', 'gammaUrl': 'https://gamma.app/docs/benchmark',
+    'credits': {'deducted': 0, 'remaining': 4000},
+    'files': [{'type': 'pptx', 'url': f"https://assets.gamma.app/export/{i}.pptx"} for i in range(8)],
+    'exports': {'pptx': None, 'pdf': None}, 'meta': {'cards': 10, 'theme': 'Oasis', 'textMode': 'generate'},
+}
+
+
+class SlowStream:
+    """Fayl, har flush'da delay soniya kutadi"""
+
+    def __init__(self, path: str, delay: float):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.delay = delay
+
+    def write(self, text: str):
+        return self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+        if self.delay:
+            time.sleep(self.delay)
+
+    def close(self):
+        self.file.close()
+
+
+def percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def dropped() -> Dict[str, float]:
+    return {reason: LOG_DROPPED.labels(reason).value for reason in DROP_REASONS}
+
+
+def workload(records: int) -> List[Callable[[int], None]]:
+    app_log = logging.getLogger('utils.presentation_worker')
+    httpx_log = logging.getLogger('httpx')
+    gamma_log = logging.getLogger('utils.gamma_api')
+    calls = [
+        lambda i: app_log.info(f"🎯 Task boshlandi: task-{i:08d} (Type: basic)"),
+        lambda i: httpx_log.info('HTTP Request: POST http://127.0.0.1/v1/chat/completions "HTTP/1.1 200 OK"'),
+        lambda i: gamma_log.info(f"⏳ {i % 600}s / 600s (status: pending)"),
+    ]
+    return [calls[i % len(calls)] for i in range(records)]
+
+
+def run_mode(name: str, args, path: str) -> Dict:
+    sink = SlowStream(path, args.sink_delay_ms / 1000)
+    root = logging.getLogger()
+    listener = None
+    if name == 'sync-text':
+        for old in list(root.handlers):
+            root.removeHandler(old)
+        handler = logging.StreamHandler(sink)
+        handler.setFormatter(logging.Formatter(TEXT_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(logging.INFO)
+    else:
+        limited = name == 'queue-json+'
+        listener = setup_logging(level='INFO', fmt='json', queue_size=args.queue_size, stream=sink,
+                                 sampling=None if limited else {'httpx': 1.0},
+                                 rate_limit=args.rate_limit if limited else 0, window=args.window)
+
+    before = dropped()
+    durations = []
+    calls = workload(args.records)
+    started = time.perf_counter()
+    for i, call in enumerate(calls):
+        t0 = time.perf_counter()
+        call(i)
+        durations.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - started
+
+    drain_started = time.perf_counter()
+    if listener is not None:
+        listener.stop()
+    drain = time.perf_counter() - drain_started
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    sink.close()
+
+    with open(path, encoding='utf-8') as f:
+        lines = sum(1 for _ in f)
+    after = dropped()
+    return {
+        'mean_us': elapsed / len(calls) * 1e6,
+        'p99_us': percentile(durations, 0.99) * 1e6,
+        'max_us': max(durations) * 1e6,
+        'drain_seconds': drain,
+        'lines': lines,
+        'bytes': os.path.getsize(path),
+        'dropped': {reason: int(after[reason] - before[reason]) for reason in DROP_REASONS},
+    }
+
+
+def per_call_us(function: Callable[[], None], iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - started) * 1e6 / iterations
+
+
+def gamma_status_lines(iterations: int) -> Dict[str, float]:
+    """check_status: avval har poll'da 3 ta INFO (indent'li JSON dump bilan), endi DEBUG"""
+    log = logging.getLogger('utils.gamma_api')
+    log.addHandler(logging.NullHandler())
+    log.propagate = False
+    log.setLevel(logging.INFO)
+
+    def before():
+        log.info(f"📋 Status response: {json.dumps(STATUS_RESPONSE, indent=2, ensure_ascii=False)[:500]}")
+        log.info(f"📊 Status: {STATUS_RESPONSE['status']}")
+        log.info(f"📄 PPTX URL: {'yo`q'}")
+
+    def after():
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug(f"📋 Status response: {json.dumps(STATUS_RESPONSE, ensure_ascii=False)[:500]}")
+        log.debug(f"📊 Status: {STATUS_RESPONSE['status']}, PPTX URL: {'yo`q'}")
+
+    try:
+        return {'before_us': per_call_us(before, iterations), 'after_us': per_call_us(after, iterations)}
+    finally:
+        log.propagate = True
+        log.handlers.clear()
+
+
+def sql_trace(workdir: str, iterations: int) -> Dict[str, float]:
+    """Database.execute("SELECT 1"): avvalgi print trace (stdout - fayl) va trace'siz"""
+    db = Database(path_to_db=os.path.join(workdir, 'trace.db'))
+
+    def printing(statement):
+        print(f"""
+_____________________________________________________
+Executing:
+{statement}
+_____________________________________________________
+""")
+
+    previous = database.logger
+    try:
+        with open(os.path.join(workdir, 'stdout.txt'), 'w') as out, contextlib.redirect_stdout(out):
+            database.logger = printing
+            traced = per_call_us(lambda: db.execute("SELECT 1", fetchone=True), iterations)
+        database.logger = None
+        plain = per_call_us(lambda: db.execute("SELECT 1", fetchone=True), iterations)
+    finally:
+        database.logger = previous
+    return {'print_us': traced, 'none_us': plain}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--records', type=int, default=20_000)
+    parser.add_argument('--sink-delay-ms', type=float, default=0.2, help="har yozuvdan keyin flush kechikishi")
+    parser.add_argument('--queue-size', type=int, default=10_000)
+    parser.add_argument('--rate-limit', type=int, default=20)
+    parser.add_argument('--window', type=float, default=10)
+    parser.add_argument('--iterations', type=int, default=5_000, help="gamma / SQL trace o'lchovlari")
+    parser.add_argument('--output', help="natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory(prefix="logging_bench_") as workdir:
+        for name in ('sync-text', 'queue-json', 'queue-json+'):
+            report[name] = run_mode(name, args, os.path.join(workdir, f"{name}.log"))
+        report['gamma_status'] = gamma_status_lines(args.iterations)
+        report['sql_trace'] = sql_trace(workdir, args.iterations)
+
+    print(f"🧪 {args.records:,} yozuv, sink flush {args.sink_delay_ms:g} ms, navbat {args.queue_size:,}", file=sys.stderr)
+    print(f"\n{'rejim':<13}{'µs/chaqiruv':>12}{'p99 µs':>9}{'max µs':>10}{'bo`shatish':>11}{'qator':>8}  tashlangan")
+    for name in ('sync-text', 'queue-json', 'queue-json+'):
+        row = report[name]
+        drops = ', '.join(f"{reason} {count}" for reason, count in row['dropped'].items() if count) or '-'
+        print(f"{name:<13}{row['mean_us']:>12.1f}{row['p99_us']:>9.1f}{row['max_us']:>10.0f}"
+              f"{row['drain_seconds']:>10.2f}s{row['lines']:>8,}  {drops}")
+
+    gamma = report['gamma_status']
+    sql = report['sql_trace']
+    print(f"\nGamma check_status log'i: {gamma['before_us']:.1f} µs -> {gamma['after_us']:.2f} µs (har poll)")
+    print(f"Database.execute('SELECT 1'): print trace bilan {sql['print_us']:.1f} µs, trace'siz {sql['none_us']:.1f} µs")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'report': report}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+# benchmarks/openai_hedging.py
+# json_completion: hedge so'rovlar va circuit breaker'lar bilan dum kechikishi
+#
+# Local FakeOpenAI (benchmarks.fake_services) --slow-rate ulushini --slow-factor
+# marta sekin qaytaradi (dum), hedge modeli (gpt-4o) --fast-speedup marta tez.
+# Bir xil so'rov oqimi (seed) uch rejimda:
+#   baseline    - hedge'siz (bitta model, faqat RetryPolicy)
+#   hedge       - p90 dan keyin xuddi shu modelga ikkinchi so'rov
+#   hedge-fast  - p90 dan keyin tezroq modelga (HEDGE_MODELS: gpt-4 -> gpt-4o)
+# Har rejimda avval --warmup ta chaqiruv (kechikish tarixi, o'lchanmaydi), keyin
+# --calls ta chaqiruv --concurrency parallel. Hisobot: p50/p90/p99/max, serverga
+# ketgan so'rovlar (hedge narxi), yo'llar (primary / hedge / fallback), xatolar.
+# --primary-error-rate > 0 bo'lsa asosiy model xato qaytaradi - breaker ochilib,
+# so'rovlar zaxira modelga o'tishi ko'rinadi.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.openai_hedging [--calls 400] [--slow-rate 0.05] [--slow-factor 8] [--output hedging.json]
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, List
+
+from benchmarks.fake_services import FakeOpenAI, serve
+from utils.api_usage import FALLBACK, HEDGE, PRIMARY, json_completion
+from utils.metrics import OPENAI_PATHS
+from utils.openai_client import HedgePolicy, OpenAIClient, RetryPolicy
+
+OPERATION = 'presentation'
+MODEL = 'gpt-4'
+FAST_MODEL = 'gpt-4o'
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def path_counts() -> Dict[str, float]:
+    return {path: OPENAI_PATHS.labels(OPERATION, path).value for path in (PRIMARY, HEDGE, FALLBACK)}
+
+
+async def run_calls(client: OpenAIClient, calls: int, concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    durations, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await json_completion(client, OPERATION, model=MODEL, max_tokens=3000,
+                                      messages=[{'role': 'user', 'content': 'benchmark'}],
+                                      response_format={'type': 'json_object'})
+            except Exception:
+                errors += 1
+                return
+            durations.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return {'durations': durations, 'errors': errors}
+
+
+async def run_mode(name: str, args) -> Dict:
+    fake = FakeOpenAI(latency_ms=args.latency_ms, tokens_per_second=args.tokens_per_second,
+                      completion_tokens=args.completion_tokens, seed=args.seed,
+                      slow_rate=args.slow_rate, slow_factor=args.slow_factor,
+                      model_speedups={FAST_MODEL: args.fast_speedup},
+                      model_error_rates={MODEL: args.primary_error_rate})
+    runner, url = await serve(fake.app())
+
+    models = {MODEL: FAST_MODEL if name == 'hedge-fast' else MODEL}
+    if name == 'baseline':
+        hedge = HedgePolicy(quantile=0, models=models)
+    else:
+        hedge = HedgePolicy(quantile=args.quantile, budget=args.budget, models=models)
+    client = OpenAIClient('fake', base_url=f"{url}/v1", max_connections=args.concurrency * 2,
+                          retry=RetryPolicy(max_retries=2, base_delay=0.05, max_delay=0.5), hedge=hedge)
+    try:
+        await run_calls(client, args.warmup, args.concurrency)
+        sent_before = sum(fake.models.values())
+        paths_before = path_counts()
+        started = time.perf_counter()
+        result = await run_calls(client, args.calls, args.concurrency)
+        elapsed = time.perf_counter() - started
+        paths_after = path_counts()
+    finally:
+        await client.close()
+        await runner.cleanup()
+
+    durations = result['durations']
+    return {
+        'p50': percentile(durations, 0.5),
+        'p90': percentile(durations, 0.9),
+        'p99': percentile(durations, 0.99),
+        'max': max(durations, default=0.0),
+        'errors': result['errors'],
+        'requests': sum(fake.models.values()) - sent_before,
+        'paths': {path: int(paths_after[path] - paths_before[path]) for path in paths_after},
+        'hedge_after': client.hedge_delay(OPERATION, MODEL),
+        'breaker': client.breaker(MODEL).state,
+        'seconds': elapsed,
+    }
+
+
+async def _main(args) -> Dict:
+    report = {}
+    for name in ('baseline', 'hedge', 'hedge-fast'):
+        report[name] = await run_mode(name, args)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--warmup', type=int, default=60)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=300, help="birinchi tokengacha")
+    parser.add_argument('--tokens-per-second', type=float, default=1000)
+    parser.add_argument('--completion-tokens', type=int, default=600)
+    parser.add_argument('--slow-rate', type=float, default=0.05)
+    parser.add_argument('--slow-factor', type=float, default=8)
+    parser.add_argument('--fast-speedup', type=float, default=2.0)
+    parser.add_argument('--primary-error-rate', type=float, default=0.0)
+    parser.add_argument('--quantile', type=float, default=0.9)
+    parser.add_argument('--budget', type=float, default=0.15)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    # Yo'qotilgan hedge / qayta urinish ogohlantirishlari va bekor qilingan so'rovlar
+    # (fake server tomonida "Connection lost") hisobotni bosib ketmasin
+    logging.disable(logging.WARNING)
+    logging.getLogger('aiohttp.server').setLevel(logging.CRITICAL)
+    report = asyncio.run(_main(args))
+
+    print(f"🧪 {args.calls} chaqiruv x 3 rejim, {args.concurrency} parallel, "
+          f"{args.slow_rate:.0%} so'rov {args.slow_factor:g}x sekin")
+    print(f"\n{'rejim':<12}{'p50':>8}{'p90':>8}{'p99':>8}{'max':>8}{'so`rov':>8}{'xato':>6}  yo'llar")
+    for name, row in report.items():
+        paths = ', '.join(f"{path} {count}" for path, count in row['paths'].items() if count)
+        print(f"{name:<12}{row['p50']:>8.2f}{row['p90']:>8.2f}{row['p99']:>8.2f}{row['max']:>8.2f}"
+              f"{row['requests']:>8}{row['errors']:>6}  {paths}")
+
+    baseline = report['baseline']['p99']
+    print()
+    for name in ('hedge', 'hedge-fast'):
+        row = report[name]
+        if baseline:
+            print(f"{name}: p99 {baseline:.2f} s -> {row['p99']:.2f} s ({1 - row['p99'] / baseline:.0%} kam), "
+                  f"qo'shimcha so'rovlar {row['requests'] / args.calls - 1:.1%}, "
+                  f"hedge chegarasi {row['hedge_after'] or 0:.2f} s, breaker {row['breaker']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'report': report}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
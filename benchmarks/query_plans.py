@@ -0,0 +1,123 @@
+# benchmarks/query_plans.py
+# Hot so'rovlar uchun EXPLAIN QUERY PLAN tekshiruvi
+#
+# Migratsiyalar bilan yangi baza yaratadi, har bir hot so'rov rejasida kutilgan
+# indeks ishlatilganini (va to'liq SCAN yo'qligini) tekshiradi. Biror so'rov
+# indeksdan chiqib ketsa - exit code 1.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.query_plans [--users 2000]
+
+import argparse
+import os
+import sys
+import tempfile
+
+import utils.db_api.database as database
+from utils.db_api.users import UserDatabase
+
+# (nom, SQL, parametrlar, kutilgan indeks)
+HOT_QUERIES = [
+    ("count_users_today",
+     "SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ? AND datetime(created_at) < ?",
+     ('2026-01-01 00:00:00', '2026-01-02 00:00:00'), 'idx_users_created_dt'),
+    ("count_users_this_month",
+     "SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?",
+     ('2026-01-01 00:00:00',), 'idx_users_created_dt'),
+    ("users_with_balance",
+     "SELECT COUNT(*) FROM Users WHERE balance > 0", (), 'idx_users_balance_positive'),
+    ("avg_positive_balance",
+     "SELECT COALESCE(AVG(balance), 0) FROM Users WHERE balance > 0", (), 'idx_users_balance_positive'),
+    ("users_with_free",
+     "SELECT telegram_id FROM Users WHERE free_presentations > 0", (), 'idx_users_free_positive'),
+    ("check_if_admin",
+     "SELECT 1 FROM Admins WHERE user_id = ?", (1,), 'idx_admins_user'),
+    ("get_pending_tasks",
+     "SELECT task_uuid, user_id, presentation_type, slide_count, answers, created_at, amount_charged "
+     "FROM PresentationTasks WHERE status = 'pending' ORDER BY created_at ASC",
+     (), 'idx_tasks_status_created'),
+    ("get_user_tasks",
+     "SELECT task_uuid, status, progress FROM PresentationTasks "
+     "WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?) ORDER BY created_at DESC LIMIT ?",
+     (100000, 10), 'idx_tasks_user_created'),
+    ("get_user_transactions",
+     "SELECT id, amount, status, created_at FROM Transactions "
+     "WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?) ORDER BY created_at DESC LIMIT ?",
+     (100000, 10), 'idx_trans_user_created'),
+    ("get_pending_transactions",
+     "SELECT t.id, u.telegram_id, t.amount FROM Transactions t JOIN Users u ON t.user_id = u.id "
+     "WHERE t.status = 'pending' ORDER BY t.created_at DESC",
+     (), 'idx_trans_status_created'),
+    ("get_transactions_page",
+     "SELECT t.id, u.telegram_id, t.amount FROM Transactions t JOIN Users u ON t.user_id = u.id "
+     "WHERE t.status = ? AND t.id > ? ORDER BY t.id LIMIT ?",
+     ('approved', 1000, 11), 'idx_trans_status_id'),
+    ("get_tasks_page",
+     "SELECT p.id, p.task_uuid, u.telegram_id FROM PresentationTasks p JOIN Users u ON p.user_id = u.id "
+     "WHERE p.status = ? AND p.id < ? ORDER BY p.id DESC LIMIT ?",
+     ('completed', 1000, 11), 'idx_tasks_status_id'),
+    ("deposits_today",
+     "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM Transactions "
+     "WHERE transaction_type = 'deposit' AND status = 'approved' AND created_at >= ? AND created_at <= ?",
+     ('2026-01-01 00:00:00', '2026-01-01 23:59:59'), 'idx_trans_type_status_created'),
+    ("withdrawals_today",
+     "SELECT COALESCE(SUM(amount), 0), COUNT(*) FROM Transactions "
+     "WHERE transaction_type = 'withdrawal' AND status = 'approved' AND created_at >= ? AND created_at <= ?",
+     ('2026-01-01 00:00:00', '2026-01-01 23:59:59'), 'idx_trans_type_status_created'),
+]
+
+
+def seed(db: UserDatabase, users: int):
+    """Planner to'g'ri tanlov qilishi uchun ozgina ma'lumot (ANALYZE statistikasi)"""
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO Users (telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(100000 + i, f"user{i}", 1 if i % 10 == 0 else 0, 5000 if i % 7 == 0 else 0,
+              f"2026-01-{i % 28 + 1:02d}T12:00:00") for i in range(users)]
+        )
+        cursor.executemany(
+            "INSERT INTO Transactions (user_id, transaction_type, amount, balance_before, balance_after, status) "
+            "VALUES (?, ?, ?, 0, 0, ?)",
+            [(i % users + 1, ('deposit', 'withdrawal')[i % 2], 1000, ('approved', 'pending')[i % 20 == 0])
+             for i in range(users * 3)]
+        )
+        cursor.executemany(
+            "INSERT INTO PresentationTasks (user_id, task_uuid, presentation_type, slide_count, answers, status) "
+            "VALUES (?, ?, 'basic', 10, '{}', ?)",
+            [(i % users + 1, f"task-{i}", ('completed', 'pending')[i % 25 == 0]) for i in range(users * 2)]
+        )
+    db.execute("ANALYZE", commit=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=2000)
+    args = parser.parse_args()
+
+    database.logger = lambda statement: None
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        db = UserDatabase(path_to_db=os.path.join(tmp, "plans.db"))
+        version = db.migrate()
+        seed(db, args.users)
+        print(f"Sxema versiyasi: {version}\n")
+
+        for name, sql, params, index in HOT_QUERIES:
+            plan = db.explain(sql, params)
+            uses_index = any(index in line for line in plan)
+            full_scan = any(line.startswith('SCAN') and 'INDEX' not in line for line in plan)
+            ok = uses_index and not full_scan
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {name:<26} {index}")
+            if not ok:
+                for line in plan:
+                    print(f"      {line}")
+
+    print(f"\n{len(HOT_QUERIES) - failures}/{len(HOT_QUERIES)} so'rov indeksdan foydalanadi")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
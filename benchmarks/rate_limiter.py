@@ -0,0 +1,142 @@
+# benchmarks/rate_limiter.py
+# RateLimiter xotirasi va tezligi ko'p sonli alohida userlarda
+#
+# --users ta alohida user (standart 1M) har biri ThrottlingMiddleware kabi
+# flood + default bucket'lardan token oladi. O'lchanadi:
+#   - consume() narxi (ns / chaqiruv)
+#   - limiter xotirasi (tracemalloc) va bayt / user
+#   - sweep(): hamma faol bo'lganda va bucket'lar to'lgandan keyin (xotira qaytadimi)
+# Taqqoslash uchun eski yo'l - dispatcher.throttle (MemoryStorage bucket'lari) -
+# --storage-users ta user bilan; u yozuvlarni hech qachon o'chirmaydi.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.rate_limiter [--users 1000000] [--storage-users 100000]
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+
+from middlewares.throttling import BUCKETS, DEFAULT_BUCKET, FLOOD_BUCKET
+from utils.rate_limiter import RateLimiter
+
+FIRST_USER_ID = 100_000_000
+
+
+def build_limiter() -> RateLimiter:
+    limiter = RateLimiter(sweep_interval=10 ** 9)
+    for name, (rate, burst) in BUCKETS.items():
+        limiter.add_bucket(name, rate, burst)
+    return limiter
+
+
+def fill(limiter: RateLimiter, users: int, now: float):
+    for user_id in range(FIRST_USER_ID, FIRST_USER_ID + users):
+        limiter.consume(FLOOD_BUCKET, user_id, now=now)
+        limiter.consume(DEFAULT_BUCKET, user_id, now=now)
+
+
+def measure_limiter(users: int):
+    now = time.monotonic()
+
+    # Vaqt - tracemalloc'siz (u har bir allokatsiyani sekinlashtiradi)
+    limiter = build_limiter()
+    started = time.perf_counter()
+    fill(limiter, users, now)
+    consume_ns = (time.perf_counter() - started) / (users * 2) * 1e9
+
+    # Flood'dagi bitta user: rad etishlar ham arzon bo'lishi kerak
+    flooding = FIRST_USER_ID
+    started = time.perf_counter()
+    rejected = 0
+    for _ in range(100_000):
+        rejected += limiter.consume(FLOOD_BUCKET, flooding, now=now) > 0
+    reject_ns = (time.perf_counter() - started) / 100_000 * 1e9
+
+    started = time.perf_counter()
+    removed_active = limiter.sweep(now)
+    sweep_active = time.perf_counter() - started
+
+    refill = max(burst / rate for rate, burst in BUCKETS.values())
+    started = time.perf_counter()
+    removed_expired = limiter.sweep(now + refill + 1)
+    sweep_expired = time.perf_counter() - started
+    del limiter
+
+    gc.collect()
+    tracemalloc.start()
+    limiter = build_limiter()
+    fill(limiter, users, now)
+    memory = tracemalloc.get_traced_memory()[0]
+
+    limiter.sweep(now + refill + 1)
+    gc.collect()
+    memory_after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return {
+        'consume_ns': consume_ns,
+        'reject_ns': reject_ns,
+        'rejected': rejected,
+        'memory': memory,
+        'sweep_active': sweep_active,
+        'removed_active': removed_active,
+        'sweep_expired': sweep_expired,
+        'removed_expired': removed_expired,
+        'memory_after': memory_after,
+        'keys_after': len(limiter),
+    }
+
+
+async def measure_storage(users: int):
+    from aiogram import Bot, Dispatcher
+    from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+    bot = Bot(token='123456:benchmark')
+
+    async def fill_storage(dispatcher):
+        for user_id in range(FIRST_USER_ID, FIRST_USER_ID + users):
+            await dispatcher.throttle('antiflood__handler', rate=0.1, user_id=user_id, chat_id=user_id)
+
+    started = time.perf_counter()
+    await fill_storage(Dispatcher(bot, storage=MemoryStorage()))
+    throttle_ns = (time.perf_counter() - started) / users * 1e9
+
+    gc.collect()
+    tracemalloc.start()
+    dispatcher = Dispatcher(bot, storage=MemoryStorage())
+    await fill_storage(dispatcher)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {'throttle_ns': throttle_ns, 'memory': memory, 'keys': len(dispatcher.storage.data)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--storage-users', type=int, default=100_000, help="0 - eski yo'lni o'lchamaslik")
+    args = parser.parse_args()
+
+    print(f"🧪 RateLimiter: {args.users:,} alohida user (flood + default bucket)")
+    result = measure_limiter(args.users)
+    print(f"  consume():           {result['consume_ns']:8.0f} ns / chaqiruv")
+    print(f"  rad etish (flood):   {result['reject_ns']:8.0f} ns / chaqiruv ({result['rejected']:,} rad)")
+    print(f"  xotira:              {result['memory'] / 1024 / 1024:8.1f} MB "
+          f"({result['memory'] / args.users:.0f} bayt / user)")
+    print(f"  sweep (hammasi faol): {result['sweep_active'] * 1000:7.0f} ms, o'chirildi {result['removed_active']:,}")
+    print(f"  sweep (to'lgandan keyin): {result['sweep_expired'] * 1000:3.0f} ms, "
+          f"o'chirildi {result['removed_expired']:,}")
+    print(f"  sweep'dan keyin:     {result['memory_after'] / 1024 / 1024:8.1f} MB, {result['keys_after']} yozuv")
+
+    if args.storage_users:
+        print(f"\n🧪 dispatcher.throttle (MemoryStorage): {args.storage_users:,} alohida user")
+        storage = asyncio.run(measure_storage(args.storage_users))
+        print(f"  throttle():          {storage['throttle_ns']:8.0f} ns / chaqiruv")
+        print(f"  xotira:              {storage['memory'] / 1024 / 1024:8.1f} MB "
+              f"({storage['memory'] / args.storage_users:.0f} bayt / user), "
+              f"{storage['keys']:,} chat yozuvi - hech qachon o'chirilmaydi")
+
+
+if __name__ == '__main__':
+    main()
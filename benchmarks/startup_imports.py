@@ -0,0 +1,148 @@
+# benchmarks/startup_imports.py
+# Bot starti: `import app` qancha vaqt oladi va nimalar yuklanadi
+#
+# `python -X importtime -c "import app"` ni bir necha marta ishga tushiradi
+# (toza subprocess, vaqtinchalik DB_DIR, soxta tokenlar), natijadan:
+#   - app importining median vaqti (cumulative) va wall-clock vaqt
+#   - eng og'ir modullar (cumulative) va paketlar bo'yicha self-time yig'indisi
+#   - startda yuklanmasligi kerak bo'lgan og'ir kutubxonalar (openai, docx, ...)
+# Budjetdan oshsa yoki taqiqlangan modul yuklansa - exit code 1 (CI uchun).
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.startup_imports [--runs 5] [--budget-ms 800] [--output startup.json]
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Birinchi foydalanishda yuklanadigan kutubxonalar - `import app` ularni tortmasligi kerak
+LAZY_MODULES = ('openai', 'docx', 'pptx', 'bs4', 'lxml', 'xlsxwriter')
+
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+
+def parse_importtime(stderr: str) -> list:
+    """[(modul, self_us, cumulative_us, chuqurlik)] - -X importtime chiqishidan"""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return modules
+
+
+def run_once(target: str, env: dict, cwd: str, importtime: bool) -> tuple:
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', f'import {target}']
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, cwd=cwd, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        tail = '\n'.join(line for line in result.stderr.splitlines() if not line.startswith('import time:'))
+        raise SystemExit(f"❌ `import {target}` xato bilan tugadi:\n{tail[-2000:]}")
+    return elapsed, result.stderr
+
+
+def build_env(db_dir: str) -> dict:
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT, env.get('PYTHONPATH')]))
+    env['DB_DIR'] = db_dir
+    # Haqiqiy kalitlar kerak emas - faqat import (tarmoqqa chiqilmaydi)
+    for key, value in (('BOT_TOKEN', '123456:benchmark'), ('ADMINS', '1'), ('ip', 'localhost'),
+                       ('OPENAI_API_KEY', 'sk-benchmark'), ('GAMMA_API_KEY', 'benchmark')):
+        env.setdefault(key, value)
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--target', default='app', help="import qilinadigan modul")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=800, help="app importi (median) uchun chegara")
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--output', help="natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = build_env(tmp)
+        # .env o'qilmasligi uchun cwd - vaqtinchalik papka
+        run_once(args.target, env, tmp, importtime=False)  # .pyc keshini isitish
+
+        wall = []
+        target_us = []
+        runs = []
+        for _ in range(args.runs):
+            wall.append(run_once(args.target, env, tmp, importtime=False)[0])
+            _, stderr = run_once(args.target, env, tmp, importtime=True)
+            modules = parse_importtime(stderr)
+            runs.append(modules)
+            target_us.append(next(cumulative for name, _, cumulative, depth in modules
+                                  if name == args.target and depth == 0))
+
+    # Hisobot median run bo'yicha
+    median_index = sorted(range(len(target_us)), key=target_us.__getitem__)[len(target_us) // 2]
+    modules = runs[median_index]
+    loaded = {name for name, _, _, _ in modules}
+
+    packages = {}
+    for name, self_us, _, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+
+    heaviest = sorted(modules, key=lambda module: module[2], reverse=True)[:args.top]
+    lazy_loaded = sorted(package for package in LAZY_MODULES if package in loaded)
+    import_ms = statistics.median(target_us) / 1000
+    wall_ms = statistics.median(wall) * 1000
+
+    print(f"⏱ import {args.target}: {import_ms:.0f} ms (median, {args.runs} run) · "
+          f"python -c wall: {wall_ms:.0f} ms · {len(loaded)} modul")
+
+    print("\nEng og'ir importlar (cumulative):")
+    for name, self_us, cumulative_us, depth in heaviest:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {'  ' * depth}{name}")
+
+    print("\nPaketlar (self-time yig'indisi):")
+    for package, self_us in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+    failures = []
+    if import_ms > args.budget_ms:
+        failures.append(f"import {args.target} {import_ms:.0f} ms > budjet {args.budget_ms:.0f} ms")
+    for package in lazy_loaded:
+        failures.append(f"{package} startda yuklanmoqda (lazy bo'lishi kerak)")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({
+                'target': args.target,
+                'runs': args.runs,
+                'import_ms': import_ms,
+                'wall_ms': wall_ms,
+                'budget_ms': args.budget_ms,
+                'modules': len(loaded),
+                'heaviest': [{'module': name, 'cumulative_ms': cumulative_us / 1000, 'self_ms': self_us / 1000}
+                             for name, self_us, cumulative_us, _ in heaviest],
+                'packages_ms': {package: self_us / 1000 for package, self_us in packages.items()},
+                'lazy_loaded': lazy_loaded,
+                'failures': failures,
+            }, f, indent=2, ensure_ascii=False)
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print(f"\n✅ Budjet ichida ({args.budget_ms:.0f} ms), og'ir kutubxonalar startda yuklanmaydi")
+
+
+if __name__ == '__main__':
+    main()
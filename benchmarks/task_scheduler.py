@@ -0,0 +1,262 @@
+# benchmarks/task_scheduler.py
+# Worker navbati: aralash sintetik yuklamada kutish vaqtlari (diskret simulyatsiya)
+#
+# Bir xil task oqimi (seed) uch siyosat bilan "bajariladi":
+#   legacy - eski worker: har poll'da barcha pending task'lar created_at tartibida
+#            bitta paket, keyingi paket oldingisining eng sekin task'ini kutadi
+#   fifo   - created_at tartibi, paket to'sig'isiz
+#   fair   - utils.task_scheduler.TaskScheduler (user chegarasi, fair queuing,
+#            qisqa ishlar oldin, pullik oldin + bepul uchun starvation oynasi)
+# Hammasida bir xil --slots ta parallel joy (eski kodda chegara yo'q edi, amalda
+# uni Gamma/OpenAI limitlari qo'yadi). Oqim: Poisson bo'yicha oddiy userlar
+# (prezentatsiya / pitch deck / mustaqil ish, bir qismi pullik) + boshida
+# --heavy-users ta user har biri 5 ta 50 sahifali mustaqil ish navbatga qo'yadi.
+# Haqiqiy davomiylik = birlik x soniya/birlik x lognormal shovqin.
+#
+# Hisobot: kutish vaqti (navbatga tushgandan boshlanishgacha) p50/p95/max -
+# qisqa/uzun, pullik/bepul va "og'ir" userlar bo'yicha.
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.task_scheduler [--hours 2] [--rate 110] [--slots 8] [--output scheduler.json]
+
+import argparse
+import json
+import math
+import random
+import statistics
+from typing import Dict, List
+
+from utils.task_scheduler import TaskScheduler
+
+POLL_SECONDS = 5
+
+# Haqiqiy soniya / birlik (scheduler buni bilmaydi - standart qiymatlar va EWMA)
+TRUE_SECONDS_PER_UNIT = {'basic': 10.0, 'pitch_deck': 14.0, 'course_work': 24.0}
+
+
+def generate(hours: float, rate_per_hour: float, heavy_users: int, paid_share: float, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    horizon = hours * 3600
+    tasks = []
+
+    def add(at, user_id, task_type, units, heavy=False):
+        seconds = units * TRUE_SECONDS_PER_UNIT[task_type] * rng.lognormvariate(0, 0.25)
+        tasks.append({
+            'task_uuid': f'sim-{len(tasks)}', 'user_id': user_id, 'type': task_type, 'slide_count': units,
+            'amount_charged': 10000 if rng.random() < paid_share else 0,
+            'arrival': at, 'seconds': seconds, 'heavy': heavy,
+        })
+
+    for user in range(heavy_users):
+        for i in range(5):
+            add(60 + user * 10 + i, 1_000_000 + user, 'course_work', 50, heavy=True)
+
+    at, user_id = 0.0, 1
+    while True:
+        at += rng.expovariate(rate_per_hour / 3600)
+        if at >= horizon:
+            break
+        kind = rng.random()
+        if kind < 0.7:
+            add(at, user_id, 'basic', rng.choice((6, 8, 10, 12, 15)))
+        elif kind < 0.85:
+            add(at, user_id, 'pitch_deck', 12)
+        else:
+            add(at, user_id, 'course_work', rng.choice((10, 15, 20, 30)))
+        user_id += 1
+
+    return sorted(tasks, key=lambda task: task['arrival'])
+
+
+class Policy:
+    def __init__(self, slots: int):
+        self.slots = slots
+
+    def add(self, task: Dict, now: float):
+        raise NotImplementedError
+
+    def pick(self, now: float, running: int) -> List[Dict]:
+        raise NotImplementedError
+
+    def done(self, task: Dict, now: float):
+        pass
+
+    def has_pending(self) -> bool:
+        return bool(self.pending)
+
+
+class LegacyPolicy(Policy):
+    """Poll -> paket -> paket tugaguncha yangi task olinmaydi"""
+
+    def __init__(self, slots: int):
+        super().__init__(slots)
+        self.pending = []
+        self.batch = []
+        self.batch_left = 0
+
+    def add(self, task, now):
+        self.pending.append(task)
+
+    def pick(self, now, running):
+        if not self.batch_left and self.pending:
+            self.batch, self.pending = self.pending, []
+            self.batch_left = len(self.batch)
+        started = []
+        while self.batch and running + len(started) < self.slots:
+            started.append(self.batch.pop(0))
+        return started
+
+    def done(self, task, now):
+        self.batch_left -= 1
+
+    def has_pending(self):
+        return bool(self.pending or self.batch)
+
+
+class FifoPolicy(Policy):
+    def __init__(self, slots: int):
+        super().__init__(slots)
+        self.pending = []
+
+    def add(self, task, now):
+        self.pending.append(task)
+
+    def pick(self, now, running):
+        count = max(0, self.slots - running)
+        started, self.pending = self.pending[:count], self.pending[count:]
+        return started
+
+
+class FairPolicy(Policy):
+    def __init__(self, slots: int, per_user: int, starvation: float):
+        super().__init__(slots)
+        self.scheduler = TaskScheduler(max_inflight=slots, per_user_inflight=per_user,
+                                       starvation_seconds=starvation)
+        self.jobs = {}
+
+    def add(self, task, now):
+        self.scheduler.add(task, now=now)
+
+    def pick(self, now, running):
+        started = []
+        while True:
+            job = self.scheduler.next(now=now)
+            if job is None:
+                return started
+            self.jobs[job.task_uuid] = job
+            started.append(job.task_data)
+
+    def done(self, task, now):
+        self.scheduler.done(self.jobs.pop(task['task_uuid']), task['seconds'])
+
+    def has_pending(self):
+        return self.scheduler.queued > 0
+
+
+def simulate(policy: Policy, tasks: List[Dict]) -> List[Dict]:
+    """Har bir task uchun {'wait', ...}; yangi task'lar faqat poll paytida ko'rinadi"""
+    results = []
+    running = {}  # task_uuid -> (tugash vaqti, task)
+    arrivals = iter(tasks)
+    upcoming = next(arrivals, None)
+    now = 0.0
+
+    while upcoming is not None or running or policy.has_pending():
+        # Poll: shu paytgacha kelgan task'lar navbatga
+        while upcoming is not None and upcoming['arrival'] <= now:
+            policy.add(upcoming, now)
+            upcoming = next(arrivals, None)
+
+        for task in policy.pick(now, len(running)):
+            running[task['task_uuid']] = (now + task['seconds'], task)
+            results.append({**task, 'wait': now - task['arrival']})
+
+        # Keyingi hodisa: tugash (worker darhol uyg'onadi) yoki keyingi poll
+        next_poll = (math.floor(now / POLL_SECONDS) + 1) * POLL_SECONDS
+        next_finish = min((finish for finish, _ in running.values()), default=math.inf)
+        now = min(next_poll, next_finish)
+
+        for task_uuid, (finish, task) in list(running.items()):
+            if finish <= now:
+                del running[task_uuid]
+                policy.done(task, now)
+
+    return results
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(results: List[Dict]) -> Dict[str, Dict]:
+    groups = {
+        'hammasi': results,
+        'qisqa (prezentatsiya/pitch)': [r for r in results if r['type'] != 'course_work'],
+        'uzun (mustaqil ish)': [r for r in results if r['type'] == 'course_work' and not r['heavy']],
+        'pullik': [r for r in results if r['amount_charged'] and not r['heavy']],
+        'bepul': [r for r in results if not r['amount_charged'] and not r['heavy']],
+        "og'ir userlar": [r for r in results if r['heavy']],
+    }
+    summary = {}
+    for name, rows in groups.items():
+        waits = [r['wait'] for r in rows]
+        summary[name] = {
+            'tasks': len(rows),
+            'p50': percentile(waits, 0.5),
+            'p95': percentile(waits, 0.95),
+            'max': max(waits, default=0.0),
+            'mean': statistics.mean(waits) if waits else 0.0,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hours', type=float, default=2)
+    parser.add_argument('--rate', type=float, default=110, help="oddiy task'lar / soat")
+    parser.add_argument('--heavy-users', type=int, default=3)
+    parser.add_argument('--paid-share', type=float, default=0.3)
+    parser.add_argument('--slots', type=int, default=8)
+    parser.add_argument('--per-user', type=int, default=1)
+    parser.add_argument('--starvation', type=float, default=120)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="natijani JSON faylga yozish")
+    args = parser.parse_args()
+
+    tasks = generate(args.hours, args.rate, args.heavy_users, args.paid_share, args.seed)
+    work = sum(task['seconds'] for task in tasks)
+    print(f"🧪 {len(tasks)} task ({args.heavy_users} og'ir user x 5 x 50 sahifa), {args.slots} joy, "
+          f"yuklama {work / (args.hours * 3600 * args.slots):.0%}")
+
+    policies = {
+        'legacy': LegacyPolicy(args.slots),
+        'fifo': FifoPolicy(args.slots),
+        'fair': FairPolicy(args.slots, args.per_user, args.starvation),
+    }
+    report = {}
+    for name, policy in policies.items():
+        report[name] = summarize(simulate(policy, tasks))
+
+    print(f"\n{'guruh (kutish, s)':<30}{'task':>6}" + ''.join(f"{name + ' p50 / p95':>20}" for name in policies))
+    for group in report['fair']:
+        row = f"{group:<30}{report['fair'][group]['tasks']:>6}"
+        for name in policies:
+            stats = report[name][group]
+            row += f"{stats['p50']:>12.0f} / {stats['p95']:<5.0f}"
+        print(row)
+
+    print("\nmax kutish (s): " + ', '.join(
+        f"{name} {report[name]['hammasi']['max']:.0f}" for name in policies))
+    fair = policies['fair'].scheduler.estimator.seconds_per_unit
+    print("o'rganilgan soniya/birlik: " + ', '.join(f"{key} {value:.1f}" for key, value in sorted(fair.items())))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({'params': vars(args), 'tasks': len(tasks), 'report': report}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+# benchmarks/user_context_queries.py
+# Bitta tasdiqlash update'i uchun SQLite so'rovlari soni: eski ketma-ketlik va UserContext
+#
+# Ishga tushirish (loyiha ildizidan):
+#     python -m benchmarks.user_context_queries [--users 1000] [--rounds 200]
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import uuid
+
+import utils.db_api.database as database
+from utils.db_api.database import Database
+from utils.db_api.users import UserDatabase
+
+
+def legacy_confirm(db: UserDatabase, telegram_id: int, price: float):
+    """presentation_confirm ning UserContext'dan oldingi so'rovlar ketma-ketligi"""
+    free_left = db.get_free_presentations(telegram_id)
+    if free_left > 0:
+        db.use_free_presentation(telegram_id)
+        db.get_free_presentations(telegram_id)
+        amount = 0
+    else:
+        if db.get_user_balance(telegram_id) < price:
+            return
+        db.get_user_balance(telegram_id)  # eski deduct_from_balance ichidagi o'qish
+        db.deduct_from_balance(telegram_id, price)
+        db.get_user_balance(telegram_id)
+        db.create_transaction(telegram_id, 'withdrawal', price, 'benchmark', status='approved')
+        amount = price
+    db.get_user_id(telegram_id)  # eski create_presentation_task ichidagi o'qish
+    db.create_presentation_task(telegram_id, str(uuid.uuid4()), 'basic', 10, '{}', amount)
+
+
+def context_confirm(db: UserDatabase, telegram_id: int, price: float):
+    """Middleware yuklagan UserContext bilan"""
+    ctx = db.get_user_context(telegram_id)
+    if ctx.free_presentations > 0:
+        db.use_free_presentation(telegram_id, ctx=ctx)
+        amount = 0
+    else:
+        if ctx.balance < price:
+            return
+        db.deduct_from_balance(telegram_id, price, ctx=ctx)
+        db.create_transaction(telegram_id, 'withdrawal', price, 'benchmark', status='approved', ctx=ctx)
+        amount = price
+    db.create_presentation_task(telegram_id, str(uuid.uuid4()), 'basic', 10, '{}', amount, ctx=ctx)
+
+
+def seed(db: UserDatabase, users: int):
+    db.create_table_users()
+    db.create_table_transactions()
+    db.create_table_presentation_tasks()
+    with db.transaction() as cursor:
+        cursor.executemany(
+            "INSERT INTO Users (telegram_id, username, free_presentations, balance, created_at) "
+            "VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            [(100000 + i, f"user{i}", i % 2, 10_000_000) for i in range(users)]
+        )
+
+
+def run(db: UserDatabase, confirm, users: int, rounds: int, price: float) -> dict:
+    rnd = random.Random(42)
+    Database.query_count = 0
+    started = time.perf_counter()
+    for _ in range(rounds):
+        confirm(db, 100000 + rnd.randrange(users), price)
+    elapsed = time.perf_counter() - started
+    return {
+        'queries_per_update': Database.query_count / rounds,
+        'ms_per_update': elapsed * 1000 / rounds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--price', type=float, default=10000)
+    args = parser.parse_args()
+
+    # SQL trace chiqishini o'chirish - aks holda natijani print o'lchaydi
+    database.logger = lambda statement: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, confirm in (('legacy', legacy_confirm), ('user_context', context_confirm)):
+            db = UserDatabase(path_to_db=os.path.join(tmp, f"{name}.db"))
+            seed(db, args.users)
+            result = run(db, confirm, args.users, args.rounds, args.price)
+            print(f"{name:>14}: {result['queries_per_update']:.2f} so'rov/update, "
+                  f"{result['ms_per_update']:.3f} ms/update")
+
+
+if __name__ == '__main__':
+    main()
@@ -9,3 +9,56 @@ BOT_TOKEN = env.str("BOT_TOKEN")  # Bot toekn
 ADMINS = list(map(int, env.list("ADMINS")))
 IP = env.str("ip")  # Xosting ip manzili
 OPENAI_API_KEY = env.str("OPENAI_API_KEY")
+# /metrics endpoint (faqat localhost); 0 - o'chirilgan
+METRICS_PORT = env.int("METRICS_PORT", 9108)
+# Shundan sekin update'lar /slow jurnaliga tushadi (millisekund)
+SLOW_UPDATE_MS = env.int("SLOW_UPDATE_MS", 1000)
+# SQLite fayllari papkasi (user.db, group.db, channel.db, cache.db)
+DB_DIR = env.str("DB_DIR", "data")
+# Bot API server (bo'sh - api.telegram.org; local Bot API yoki load-test uchun almashtiriladi)
+TELEGRAM_API_URL = env.str("TELEGRAM_API_URL", "")
+# Rate limit oshganda ogohlantirish yubormasdan jim tashlash
+THROTTLE_SILENT = env.bool("THROTTLE_SILENT", False)
+# Gamma theme katalogi sinxroni oralig'i (soat)
+THEME_SYNC_HOURS = env.float("THEME_SYNC_HOURS", 6)
+# Worker: bir vaqtda bajariladigan task'lar, bitta user uchun chegara
+WORKER_CONCURRENCY = env.int("WORKER_CONCURRENCY", 8)
+WORKER_PER_USER = env.int("WORKER_PER_USER", 1)
+# Bepul kvotadagi task pullik task'lar ortida shundan ko'p kutmaydi (soniya)
+FREE_STARVATION_SECONDS = env.float("FREE_STARVATION_SECONDS", 120)
+# Task lease muddati (soniya) - process o'lsa shundan keyin task qayta navbatga qaytadi
+TASK_LEASE_SECONDS = env.int("TASK_LEASE_SECONDS", 90)
+# Shuncha urinishda tugallanmagan task failed (balans qaytariladi)
+TASK_MAX_ATTEMPTS = env.int("TASK_MAX_ATTEMPTS", 3)
+# Worker fayllari (task bo'yicha papkalar) va janitor
+ARTIFACT_DIR = env.str("ARTIFACT_DIR", "/tmp/bot_artifacts")
+ARTIFACT_MAX_AGE_HOURS = env.float("ARTIFACT_MAX_AGE_HOURS", 6)
+ARTIFACT_QUOTA_MB = env.int("ARTIFACT_QUOTA_MB", 2048)
+# Shundan eski yopilgan task/tranzaksiyalar arxiv jadvallariga (kun, kamida 35)
+ARCHIVE_AFTER_DAYS = env.int("ARCHIVE_AFTER_DAYS", 90)
+ARCHIVE_INTERVAL_HOURS = env.float("ARCHIVE_INTERVAL_HOURS", 24)
+# OpenAI: umumiy ulanish havzasi va qayta urinishlar (backoff soniyada)
+OPENAI_MAX_CONNECTIONS = env.int("OPENAI_MAX_CONNECTIONS", 20)
+OPENAI_MAX_RETRIES = env.int("OPENAI_MAX_RETRIES", 2)
+OPENAI_RETRY_BASE_DELAY = env.float("OPENAI_RETRY_BASE_DELAY", 1.0)
+OPENAI_RETRY_MAX_DELAY = env.float("OPENAI_RETRY_MAX_DELAY", 20.0)
+# OpenAI hedge: asosiy so'rov tarixiy shu kvantil vaqtida javob bermasa ikkinchi so'rov (0 - o'chirilgan),
+# hedge'lar ulushi chegarasi va hedge/zaxira modellar ("gpt-4=gpt-4o,gpt-4o=gpt-4o-mini")
+OPENAI_HEDGE_QUANTILE = env.float("OPENAI_HEDGE_QUANTILE", 0.9)
+OPENAI_HEDGE_BUDGET = env.float("OPENAI_HEDGE_BUDGET", 0.15)
+OPENAI_HEDGE_MODELS = env.dict("OPENAI_HEDGE_MODELS", {})
+# Prezentatsiya content'ini theme tanlanayotganda oldindan yaratish: natija saqlanish muddati (soniya)
+# va bir vaqtdagi oldindan yaratishlar chegarasi
+SPECULATIVE_CONTENT = env.bool("SPECULATIVE_CONTENT", True)
+SPECULATION_TTL = env.int("SPECULATION_TTL", 600)
+SPECULATION_MAX_INFLIGHT = env.int("SPECULATION_MAX_INFLIGHT", 20)
+# Log: daraja, format (json | text), navbat hajmi, logger bo'yicha sampling ("httpx=0.1,aiogram=0.5"),
+# bitta call site'dan LOG_RATE_WINDOW soniyada LOG_RATE_LIMIT tadan ko'p emas (0 - cheklovsiz)
+LOG_LEVEL = env.str("LOG_LEVEL", "INFO")
+LOG_FORMAT = env.str("LOG_FORMAT", "json")
+LOG_QUEUE_SIZE = env.int("LOG_QUEUE_SIZE", 10000)
+LOG_SAMPLING = env.dict("LOG_SAMPLING", {})
+LOG_RATE_LIMIT = env.int("LOG_RATE_LIMIT", 20)
+LOG_RATE_WINDOW = env.float("LOG_RATE_WINDOW", 10)
+# Har bir SQL so'rovini DEBUG logga yozish (utils.db_api.sql) - faqat nosozlikni tekshirish uchun
+SQL_TRACE = env.bool("SQL_TRACE", False)
@@ -1,6 +1,8 @@
 from . import admin_free_pptx
 from . import course_worker_handler1
 from . import plan_admin
+from . import business_plans
+from . import channel_subscription
 from . import user_handlers
 from . import reklama
 from . import statistika_admin
@@ -8,11 +8,27 @@ from aiogram.dispatcher.filters import Text
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 import logging
 
-from loader import dp, bot, user_db
+from loader import dp, bot, user_db, task_progress
 from data.config import ADMINS
+from utils.progress_reporter import ProgressReporter, render_bulk_progress
 
 logger = logging.getLogger(__name__)
 
+# Ommaviy amallar progress'i (katta jadvallarda bir necha soniya davom etadi)
+bulk_reporter = ProgressReporter(bot, min_interval=2.0)
+
+
+async def run_bulk(callback: types.CallbackQuery, title: str, steps) -> dict:
+    """user_db.iter_* amalini progress bilan bajarish"""
+    text = f"⏳ <b>{title}</b>"
+    await callback.message.edit_text(text, parse_mode='HTML')
+    chat_id, message_id = callback.message.chat.id, callback.message.message_id
+    bulk_reporter.track(chat_id, message_id, text)
+    return await bulk_reporter.follow(
+        chat_id, message_id, steps,
+        lambda step: render_bulk_progress(title, step['done'], step['total'])
+    )
+
 
 # ==================== FSM STATES ====================
 class AdminFreeStates(StatesGroup):
@@ -332,22 +348,15 @@ async def admin_free_all_execute(callback: types.CallbackQuery, state: FSMContex
 
     count = int(callback.data.split(":")[1])
 
-    await callback.message.edit_text("⏳ <b>Bajarilmoqda...</b>", parse_mode='HTML')
-
     try:
-        user_db.execute(
-            "UPDATE Users SET free_presentations = COALESCE(free_presentations, 0) + ?",
-            parameters=(count,),
-            commit=True
-        )
-
-        total_users = user_db.count_users()
+        result = await run_bulk(callback, "Bajarilmoqda...", user_db.iter_add_free_presentations_to_all(count))
+        total_users = result.get('users', 0)
 
         await callback.message.edit_text(
             f"✅ <b>MUVAFFAQIYATLI!</b>\n\n"
             f"📊 Yangilangan: <b>{total_users}</b> ta user\n"
             f"➕ Har biriga qo'shildi: <b>+{count}</b> ta\n\n"
-            f"Jami qo'shildi: <b>{total_users * count}</b> ta",
+            f"Jami qo'shildi: <b>{result.get('added', 0)}</b> ta",
             reply_markup=free_presentations_menu_keyboard(),
             parse_mode='HTML'
         )
@@ -513,23 +522,11 @@ async def admin_free_setall_execute(callback: types.CallbackQuery, state: FSMCon
 
     count = int(callback.data.split(":")[1])
 
-    await callback.message.edit_text("⏳ <b>Bajarilmoqda...</b>", parse_mode='HTML')
-
     try:
-        result = user_db.execute(
-            "SELECT COALESCE(SUM(free_presentations), 0) FROM Users",
-            fetchone=True
-        )
-        old_total = result[0] if result else 0
-
         # Barcha user'larga O'RNATISH
-        user_db.execute(
-            "UPDATE Users SET free_presentations = ?",
-            parameters=(count,),
-            commit=True
-        )
-
-        total_users = user_db.count_users()
+        result = await run_bulk(callback, "Bajarilmoqda...", user_db.iter_set_free_presentations_for_all(count))
+        old_total = result.get('old_total', 0)
+        total_users = result.get('users', 0)
         new_total = total_users * count
 
         if count == 0:
@@ -680,26 +677,11 @@ async def admin_free_remove_execute(callback: types.CallbackQuery, state: FSMCon
     if not is_admin(callback.from_user.id):
         return
 
-    await callback.message.edit_text("⏳ <b>Bajarilmoqda...</b>", parse_mode='HTML')
-
     try:
-        result = user_db.execute(
-            "SELECT COALESCE(SUM(free_presentations), 0) FROM Users",
-            fetchone=True
-        )
-        old_total = result[0] if result else 0
-
-        result = user_db.execute(
-            "SELECT COUNT(*) FROM Users WHERE free_presentations > 0",
-            fetchone=True
-        )
-        affected_users = result[0] if result else 0
-
         # Barchasini 0 ga tushirish
-        user_db.execute(
-            "UPDATE Users SET free_presentations = 0",
-            commit=True
-        )
+        result = await run_bulk(callback, "Bajarilmoqda...", user_db.iter_set_free_presentations_for_all(0))
+        old_total = result.get('old_total', 0)
+        affected_users = result.get('changed', 0)
 
         await callback.message.edit_text(
             f"🗑 <b>BARCHASI O'CHIRILDI!</b>\n\n"
@@ -764,7 +746,7 @@ async def admin_free_check_user_result(message: types.Message, state: FSMContext
         free_left = user_db.get_free_presentations(telegram_id)
         balance = user_db.get_user_balance(telegram_id)
         stats = user_db.get_user_stats(telegram_id)
-        tasks = user_db.get_user_tasks(telegram_id, limit=3)
+        tasks = task_progress.overlay(user_db.get_user_tasks(telegram_id, limit=3))
 
         total_tasks = len(tasks)
         completed_tasks = len([t for t in tasks if t['status'] == 'completed'])
@@ -849,7 +831,7 @@ async def admin_free_refresh(callback: types.CallbackQuery, state: FSMContext):
     free_left = user_db.get_free_presentations(telegram_id)
     balance = user_db.get_user_balance(telegram_id)
     stats = user_db.get_user_stats(telegram_id)
-    tasks = user_db.get_user_tasks(telegram_id, limit=3)
+    tasks = task_progress.overlay(user_db.get_user_tasks(telegram_id, limit=3))
 
     total_tasks = len(tasks)
     completed_tasks = len([t for t in tasks if t['status'] == 'completed'])
@@ -2,14 +2,28 @@ from aiogram import types
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters import Text
 from aiogram.dispatcher.filters.state import State, StatesGroup
+from aiogram.utils.markdown import quote_html
+import asyncio
+import functools
+import io
 import logging
+import os
+import shutil
+import tempfile
+import time
 
 from data.config import ADMINS
-from loader import dp, user_db, bot
+from loader import dp, user_db, bot, task_progress, theme_catalog, update_profiler, archiver
 from keyboards.default.default_keyboard import menu_ichki_admin, menu_admin
+from utils.data_export import EXPORT_QUERIES, export_csv_gz, export_xlsx
+from utils.pager import Pager, page_cb
+from utils.progress_reporter import ProgressReporter, render_bulk_progress
 
 logger = logging.getLogger(__name__)
 
+# Ommaviy amallar progress'i
+bulk_reporter = ProgressReporter(bot, min_interval=2.0)
+
 
 # ==================== FSM STATES ====================
 class AdminStates(StatesGroup):
@@ -106,26 +120,11 @@ def get_admin_statistics() -> dict:
         # Moliyaviy statistika
         financial_stats = user_db.get_financial_stats()
 
-        # Task statistika
-        pending_tasks = len(user_db.get_pending_tasks())
-
-        # Processing va completed task'lar sonini olish
-        all_tasks_query = """
-            SELECT status, COUNT(*) as count
-            FROM PresentationTasks
-            WHERE status IN ('processing', 'completed')
-            GROUP BY status
-        """
-        task_stats = user_db.execute(all_tasks_query, fetchall=True)
-
-        processing_tasks = 0
-        completed_tasks = 0
-
-        for row in task_stats:
-            if row[0] == 'processing':
-                processing_tasks = row[1]
-            elif row[0] == 'completed':
-                completed_tasks = row[1]
+        # Task statistika (arxivga o'tganlari bilan)
+        task_stats = user_db.get_task_status_counts()
+        pending_tasks = task_stats.get('pending', 0)
+        processing_tasks = task_stats.get('processing', 0)
+        completed_tasks = task_stats.get('completed', 0)
 
         return {
             'total_users': total_users,
@@ -391,55 +390,109 @@ async def enter_new_price(message: types.Message, state: FSMContext):
 
 
 # ==================== TRANZAKSIYALAR ====================
+TRANSACTION_TYPES = {'deposit': "💰", 'withdrawal': "💸"}
+
+
+def render_transaction_row(trans: dict) -> str:
+    username = f"@{trans['username']}" if trans['username'] else trans['telegram_id']
+    receipt = " 🧾" if trans['receipt_file_id'] else ""
+    return (f"{TRANSACTION_TYPES.get(trans['type'], '•')} <b>#{trans['id']}</b> {trans['amount']:,.0f} so'm — "
+            f"{username}{receipt}\n   📅 {trans['created_at']}")
+
+
+def transaction_button(trans: dict) -> types.InlineKeyboardButton:
+    return types.InlineKeyboardButton(f"🔎 #{trans['id']} {trans['amount']:,.0f}",
+                                      callback_data=f"trans_view:{trans['id']}")
+
+
+transactions_pager = Pager(
+    'tx',
+    fetch=lambda status, **page: user_db.get_transactions_page(status, **page),
+    render=render_transaction_row,
+    title="💳 Tranzaksiyalar",
+    filters={
+        'p': ('pending', "⏳ Kutilmoqda"),
+        'a': ('approved', "✅ Tasdiqlangan"),
+        'r': ('rejected', "❌ Rad etilgan"),
+    },
+    item_button=transaction_button,
+    empty="✅ Bu holatda tranzaksiyalar yo'q"
+)
+
+
 @dp.message_handler(Text(equals="💳 Tranzaksiyalar"))
 async def view_transactions(message: types.Message):
-    """Kutilayotgan tranzaksiyalarni ko'rish"""
+    """Tranzaksiyalar ro'yxati (sahifalab, birinchi - kutilayotganlar)"""
     telegram_id = message.from_user.id
 
     if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
         await message.reply("❌ Siz admin emassiz!")
         return
 
-    # Kutilayotgan tranzaksiyalarni olish
-    pending = user_db.get_pending_transactions()
+    await transactions_pager.send(message)
+
+
+@dp.callback_query_handler(page_cb.filter(kind='tx'))
+async def transactions_page_callback(callback: types.CallbackQuery, callback_data: dict):
+    telegram_id = callback.from_user.id
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await callback.answer("❌ Siz admin emassiz!", show_alert=True)
+        return
+    await transactions_pager.edit(callback, callback_data)
+
 
-    if not pending:
-        await message.answer("✅ Kutilayotgan tranzaksiyalar yo'q!")
+@dp.callback_query_handler(lambda c: c.data.startswith('trans_view:'))
+async def transaction_card_callback(callback: types.CallbackQuery):
+    """Bitta tranzaksiya: chek va tasdiqlash / rad etish tugmalari"""
+    telegram_id = callback.from_user.id
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await callback.answer("❌ Siz admin emassiz!", show_alert=True)
         return
 
-    for trans in pending:
-        trans_text = f"""
-💳 <b>YANGI TRANZAKSIYA</b>
+    trans = user_db.get_transaction_by_id(int(callback.data.split(':')[1]))
+    if not trans:
+        await callback.answer("❌ Tranzaksiya topilmadi!", show_alert=True)
+        return
+
+    await send_transaction_card(callback.message, trans)
+    await callback.answer()
+
+
+async def send_transaction_card(message: types.Message, trans: dict):
+    status_line = "Tasdiqlaysizmi?" if trans['status'] == 'pending' else f"Holati: {trans['status']}"
+    trans_text = f"""
+💳 <b>TRANZAKSIYA</b>
 
 🆔 ID: {trans['id']}
-👤 User: @{trans['username']} (ID: {trans['telegram_id']})
+👤 User ID: {trans['telegram_id']}
 💰 Summa: {trans['amount']:,.0f} so'm
 📝 Turi: {trans['type']}
 📄 Tavsif: {trans['description'] or 'Yoq'}
 📅 Sana: {trans['created_at']}
 
-Tasdiqlaysizmi?
+{status_line}
 """
 
-        # Inline keyboard
+    keyboard = None
+    if trans['status'] == 'pending':
         keyboard = types.InlineKeyboardMarkup(row_width=2)
         keyboard.add(
             types.InlineKeyboardButton("✅ Tasdiqlash", callback_data=f"approve_trans:{trans['id']}"),
             types.InlineKeyboardButton("❌ Rad etish", callback_data=f"reject_trans:{trans['id']}")
         )
 
-        # Chek bor bo'lsa
-        if trans['receipt_file_id']:
-            try:
-                await message.answer_photo(
-                    photo=trans['receipt_file_id'],
-                    caption=trans_text,
-                    reply_markup=keyboard
-                )
-            except:
-                await message.answer(trans_text, reply_markup=keyboard)
-        else:
-            await message.answer(trans_text, reply_markup=keyboard)
+    # Chek bor bo'lsa
+    if trans['receipt_file_id']:
+        try:
+            await message.answer_photo(
+                photo=trans['receipt_file_id'],
+                caption=trans_text,
+                reply_markup=keyboard
+            )
+            return
+        except Exception as e:
+            logger.error(f"Chekni yuborishda xato: {e}")
+    await message.answer(trans_text, reply_markup=keyboard)
 
 
 # ==================== TRANZAKSIYALAR CALLBACK HANDLERS ====================
@@ -628,7 +681,7 @@ async def show_user_info(message: types.Message, state: FSMContext):
 
     # User statistikasini olish
     stats = user_db.get_user_stats(target_user_id)
-    tasks = user_db.get_user_tasks(target_user_id, limit=5)
+    tasks = task_progress.overlay(user_db.get_user_tasks(target_user_id, limit=5))
     transactions = user_db.get_user_transactions(target_user_id, limit=5)
 
     username = user[2] if user[2] else "Username yo'q"
@@ -870,18 +923,22 @@ async def execute_reset_all_balances(callback: types.CallbackQuery):
         await callback.answer("❌ Ruxsat yo'q!", show_alert=True)
         return
 
-    await callback.message.edit_text("⏳ Balanslar reset qilinmoqda...")
+    text = "⏳ Balanslar reset qilinmoqda..."
+    await callback.message.edit_text(text)
 
     try:
-        # Reset qilishdan oldingi statistika
-        total_before = user_db.get_total_balance()
-        users_with_balance = user_db.count_users_with_balance()
-
-        # BARCHA BALANSLARNI 0 GA TUSHIRISH
-        success = user_db.reset_all_balances(admin_telegram_id=telegram_id)
+        # BARCHA BALANSLARNI 0 GA TUSHIRISH (bo'laklab, progress bilan)
+        chat_id, message_id = callback.message.chat.id, callback.message.message_id
+        bulk_reporter.track(chat_id, message_id, text)
+        result = await bulk_reporter.follow(
+            chat_id, message_id,
+            user_db.iter_reset_all_balances(admin_telegram_id=telegram_id),
+            lambda step: render_bulk_progress("Balanslar reset qilinmoqda...", step['done'], step['total'])
+        )
+        users_with_balance = result.get('users', 0)
+        total_before = result.get('amount', 0)
 
-        if success:
-            result_text = f"""
+        result_text = f"""
 ✅ <b>BALANSLAR RESET QILINDI!</b>
 
 📊 <b>Natija:</b>
@@ -892,12 +949,10 @@ async def execute_reset_all_balances(callback: types.CallbackQuery):
 
 ⚠️ Bu amal log'ga yozildi.
 """
-            logger.warning(
-                f"🔴 RESET ALL BALANCES by Admin {telegram_id} ({admin_name}): "
-                f"{users_with_balance} users, {total_before:,.0f} so'm"
-            )
-        else:
-            result_text = "❌ Xatolik yuz berdi! Log'larni tekshiring."
+        logger.warning(
+            f"🔴 RESET ALL BALANCES by Admin {telegram_id} ({admin_name}): "
+            f"{users_with_balance} users, {total_before:,.0f} so'm"
+        )
 
         await callback.message.edit_text(result_text)
 
@@ -1145,6 +1200,422 @@ async def finance_report(message: types.Message):
     await message.answer(finance_text)
 
 
+# ==================== EKSPORT ====================
+# Telegram bot API orqali yuboriladigan fayl chegarasi
+TELEGRAM_UPLOAD_LIMIT = 50 * 1024 * 1024
+
+
+@dp.message_handler(commands="export")
+async def export_data(message: types.Message):
+    """
+    Ma'lumotlarni fayl sifatida yuklab olish
+
+    /export                 - barcha jadvallar, XLSX
+    /export csv             - barcha jadvallar, har biri .csv.gz
+    /export xlsx users      - faqat bitta jadval (users, transactions, tasks, purchases)
+    """
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id):
+        await message.reply("❌ Faqat super adminlar uchun!")
+        return
+
+    args = message.get_args().split()
+    file_format = args[0].lower() if args else 'xlsx'
+    tables = [table.lower() for table in args[1:]] or None
+
+    if file_format not in ('xlsx', 'csv') or any(table not in EXPORT_QUERIES for table in tables or []):
+        await message.answer(
+            "❌ Noto'g'ri format!\n\n"
+            "Ishlatish: <code>/export [xlsx|csv] [jadval...]</code>\n"
+            f"Jadvallar: {', '.join(EXPORT_QUERIES)}"
+        )
+        return
+
+    status_message = await message.answer(f"⏳ Eksport tayyorlanmoqda ({file_format.upper()})...")
+    workdir = tempfile.mkdtemp(prefix="export_")
+    loop = asyncio.get_event_loop()
+
+    try:
+        # Yozish sinxron va uzoq - event loop'ni bloklamaslik uchun executor'da
+        if file_format == 'xlsx':
+            stamp = datetime.now(TASHKENT_TZ).strftime('%Y%m%d_%H%M')
+            path = f"{workdir}/export_{stamp}.xlsx"
+            result = await loop.run_in_executor(None, functools.partial(export_xlsx, user_db, path, tables))
+            paths = [path]
+        else:
+            result = await loop.run_in_executor(None, functools.partial(export_csv_gz, user_db, workdir, tables))
+            paths = result['paths']
+
+        summary = "\n".join(f"• {title}: {count:,} qator" for title, count in result['rows'].items())
+        logger.info(
+            f"📤 Eksport ({file_format}) by Admin {telegram_id}: {result['rows']}, "
+            f"{result['size'] / 1024 / 1024:.1f} MB, {result['seconds']:.1f} s"
+        )
+
+        for path in paths:
+            if os.path.getsize(path) > TELEGRAM_UPLOAD_LIMIT:
+                await message.answer(
+                    f"⚠️ {os.path.basename(path)} 50 MB dan katta - yuborib bo'lmaydi.\n"
+                    f"Jadvallarni alohida yoki <code>/export csv</code> bilan urinib ko'ring."
+                )
+                continue
+            await bot.send_document(
+                message.chat.id,
+                document=types.InputFile(path),
+                caption=f"📤 {os.path.basename(path)}"
+            )
+
+        await status_message.edit_text(
+            f"✅ <b>Eksport tayyor</b> ({result['seconds']:.1f} s)\n\n{summary}"
+        )
+
+    except Exception as e:
+        logger.error(f"Eksport xato: {e}")
+        await status_message.edit_text(f"❌ Eksportda xatolik: {e}")
+
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ==================== SEKIN HANDLER'LAR ====================
+@dp.message_handler(commands="slow")
+async def slow_handlers_report(message: types.Message):
+    """
+    Handler'lar kechikishi
+
+    /slow [N]            - eng sekin N ta handler (p95 bo'yicha)
+    /slow log            - oxirgi sekin update'lar
+    /slow profile on|off - sekin update'lar uchun cProfile
+    /slow dump           - oxirgi profilni fayl sifatida yuborish
+    /slow reset          - statistikani tozalash
+    """
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await message.reply("❌ Siz admin emassiz!")
+        return
+
+    args = message.get_args().split()
+    command = args[0].lower() if args else ''
+    threshold_ms = update_profiler.slow_threshold * 1000
+
+    if command == 'log':
+        records = list(update_profiler.slow_log)[-10:]
+        if not records:
+            await message.answer(f"✅ {threshold_ms:.0f} ms dan sekin update yo'q")
+            return
+        lines = [f"🐢 <b>Sekin update'lar</b> (>{threshold_ms:.0f} ms)", ""]
+        for record in reversed(records):
+            profile_mark = " 🔬" if record.profile else ""
+            lines.append(
+                f"• {record.at.strftime('%H:%M:%S')} <code>{record.handler}</code> - "
+                f"{record.duration * 1000:.0f} ms, {record.db_queries} so'rov, user {record.user_id}{profile_mark}"
+            )
+        await message.answer("\n".join(lines))
+        return
+
+    if command == 'profile':
+        enabled = len(args) > 1 and args[1].lower() == 'on'
+        update_profiler.profile_enabled = enabled
+        status = "yoqildi" if enabled else "o'chirildi"
+        await message.answer(f"🔬 cProfile: <b>{status}</b>")
+        return
+
+    if command == 'dump':
+        record = update_profiler.last_profile()
+        if not record:
+            await message.answer("ℹ️ Saqlangan profil yo'q (<code>/slow profile on</code>)")
+            return
+        header = (f"{record.handler} ({record.kind}) - {record.duration * 1000:.0f} ms, "
+                  f"{record.db_queries} so'rov, {record.at:%Y-%m-%d %H:%M:%S}\n\n")
+        document = io.BytesIO((header + record.profile).encode('utf-8'))
+        await bot.send_document(
+            message.chat.id,
+            document=types.InputFile(document, filename=f"profile_{record.handler}.txt")
+        )
+        return
+
+    if command == 'reset':
+        update_profiler.reset()
+        await message.answer("✅ Statistika tozalandi")
+        return
+
+    limit = int(command) if command.isdigit() else 10
+    rows = update_profiler.top(limit)
+    if not rows:
+        await message.answer("ℹ️ Hali ma'lumot yo'q")
+        return
+
+    total = update_profiler.total
+    p50, p95, p99 = total.percentiles(0.5, 0.95, 0.99)
+    lines = [
+        "🐢 <b>ENG SEKIN HANDLER'LAR</b> (p95, ms)",
+        f"🕐 {update_profiler.started_at:%Y-%m-%d %H:%M} dan beri, {total.count} update",
+        f"📊 Umumiy: p50 {p50 * 1000:.0f} · p95 {p95 * 1000:.0f} · p99 {p99 * 1000:.0f}",
+        "",
+    ]
+    for index, row in enumerate(rows, 1):
+        lines.append(
+            f"{index}. <code>{row['handler']}</code> ({row['count']})\n"
+            f"    p50 {row['p50'] * 1000:.0f} · p95 {row['p95'] * 1000:.0f} · "
+            f"p99 {row['p99'] * 1000:.0f} · max {row['max'] * 1000:.0f}"
+        )
+    lines.extend(["", f"🐢 Sekin (>{threshold_ms:.0f} ms): {len(update_profiler.slow_log)} ta - /slow log"])
+    await message.answer("\n".join(lines))
+
+
+# ==================== API SARFI ====================
+@dp.message_handler(commands="usage")
+async def api_usage_report(message: types.Message):
+    """
+    OpenAI / Gamma sarfi (ApiUsage jadvali)
+
+    /usage [kun]         - mahsulot turi/model va kunlar bo'yicha (default: 30 kun)
+    /usage task <uuid>   - bitta task'ning chaqiruvlari
+    """
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await message.reply("❌ Siz admin emassiz!")
+        return
+
+    args = message.get_args().split()
+
+    if args and args[0].lower() == 'task':
+        if len(args) < 2:
+            await message.answer("Ishlatish: <code>/usage task &lt;task_uuid&gt;</code>")
+            return
+        calls = user_db.get_task_usage(args[1])
+        if not calls:
+            await message.answer("ℹ️ Bu task uchun yozuv yo'q")
+            return
+        lines = [f"🧾 <b>Task sarfi</b> <code>{args[1]}</code>", ""]
+        for call in calls:
+            lines.append(
+                f"• {call['service']}/{call['operation']} <code>{call['model'] or '-'}</code> - "
+                f"{call['duration_ms'] / 1000:.1f} s, {call['prompt_tokens']:,}+{call['completion_tokens']:,} tok, "
+                f"${call['cost_usd']:.4f}, kredit {call['credits']}, qayta {call['retries']}, {call['status']}"
+                + (f" ({call['path']})" if call['path'] and call['path'] != 'primary' else "")
+            )
+        lines.append(f"\n💵 Jami: <b>${sum(call['cost_usd'] for call in calls):.4f}</b>, "
+                     f"{sum(call['duration_ms'] for call in calls) / 1000:.1f} s")
+        await message.answer("\n".join(lines))
+        return
+
+    days = int(args[0]) if args and args[0].isdigit() else 30
+    products = user_db.get_usage_by_product(days)
+    if not products:
+        await message.answer(f"ℹ️ Oxirgi {days} kunda yozuv yo'q")
+        return
+
+    lines = [f"💸 <b>API SARFI</b> (oxirgi {days} kun)", "", "📦 <b>Mahsulot / model bo'yicha</b>"]
+    for row in products[:20]:
+        tokens = row['prompt_tokens'] + row['completion_tokens']
+        usage = f"{tokens:,} tok" if row['service'] == 'openai' else f"{row['credits']:,} kredit"
+        lines.append(
+            f"• <b>{row['product']}</b> · {row['service']} <code>{row['model']}</code>\n"
+            f"    {row['tasks']} task, {row['calls']} chaqiruv, {usage}, ${row['cost_usd']:.2f}\n"
+            f"    task uchun: ${row['cost_per_task']:.3f}, {row['seconds_per_task']:.1f} s · "
+            f"o'rtacha {row['avg_ms'] / 1000:.1f} s · qayta {row['retries']} · xato {row['errors']}"
+            + (f" · hedge/zaxira {row['rescued']}" if row['rescued'] else "")
+        )
+
+    days_rows = user_db.get_usage_by_day(min(days, 14))
+    if days_rows:
+        lines.extend(["", "📅 <b>Kunlar bo'yicha</b> (UTC)"])
+        for row in days_rows:
+            usage = f"{row['tokens']:,} tok" if row['service'] == 'openai' else f"{row['credits']:,} kredit"
+            lines.append(
+                f"• {row['day']} {row['service']}: {row['calls']} chaqiruv, {row['tasks']} task, "
+                f"{usage}, ${row['cost_usd']:.2f}, o'rtacha {row['avg_ms'] / 1000:.1f} s"
+            )
+
+    total_cost = sum(row['cost_usd'] for row in products)
+    lines.extend(["", f"💵 Jami OpenAI: <b>${total_cost:.2f}</b> · Gamma kreditlari: "
+                      f"<b>{sum(row['credits'] for row in products):,}</b>"])
+
+    speculation = user_db.get_speculation_usage(days)
+    if speculation['wasted_calls']:
+        lines.append(f"🔮 Oldindan yaratish behuda: {speculation['wasted_calls']} chaqiruv, "
+                     f"{speculation['wasted_tokens']:,} tok ({speculation['wasted_rate']:.1%}), "
+                     f"${speculation['wasted_cost_usd']:.2f}")
+
+    # Telegram xabar chegarasi - qatorlarni butunligicha kesish (HTML teglar buzilmasin)
+    text = ""
+    for line in lines:
+        if len(text) + len(line) > 4000:
+            text += "..."
+            break
+        text += line + "\n"
+    await message.answer(text)
+
+
+# ==================== GAMMA THEME KATALOGI ====================
+@dp.message_handler(commands="themes")
+async def theme_catalog_report(message: types.Message):
+    """
+    Gamma theme katalogi holati
+
+    /themes        - oxirgi sinxron, karusel, katalogda yo'q THEMES
+    /themes sync   - hoziroq sinxronlash
+    """
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await message.reply("❌ Siz admin emassiz!")
+        return
+
+    if message.get_args().strip().lower() == 'sync':
+        if theme_catalog.gamma_api is None:
+            await message.answer("❌ Theme katalogi hali ishga tushmagan")
+            return
+        result = await theme_catalog.sync()
+        if result['status'] == 'error':
+            await message.answer("❌ Gamma /themes xato - log'ni ko'ring")
+            return
+        if result['status'] == 'changed':
+            await message.answer(
+                f"✅ Katalog yangilandi: {result['count']} ta theme "
+                f"(+{len(result['added'])} / -{len(result['removed'])})"
+            )
+        else:
+            await message.answer("✅ Katalog o'zgarmagan")
+
+    state = user_db.get_gamma_theme_sync()
+    if not state:
+        await message.answer("ℹ️ Katalog hali sinxronlanmagan - karuselda barcha lokal theme'lar")
+        return
+
+    rejected = [row['theme_id'] for row in user_db.get_gamma_themes(available_only=False) if row['rejected_at']]
+    lines = [
+        "🎨 <b>GAMMA THEME KATALOGI</b>",
+        "",
+        f"📚 Gamma'da: {state['theme_count']} ta",
+        f"🖼 Karuselda: {theme_catalog.count()} ta",
+        f"🕒 Tekshirildi: {state['synced_at']} (UTC)",
+        f"✏️ O'zgargan: {state['changed_at']} (UTC)",
+    ]
+    if theme_catalog.missing:
+        missing = ", ".join(f"<code>{theme_id}</code>" for theme_id in theme_catalog.missing)
+        lines.append(f"\n⚠️ Katalogda yo'q: {missing}")
+    if rejected:
+        rejected_ids = ", ".join(f"<code>{theme_id}</code>" for theme_id in rejected)
+        lines.append(f"🚫 Gamma rad etgan: {rejected_ids}")
+    await message.answer("\n".join(lines))
+
+
+# ==================== TASK'LAR ====================
+TASK_STATUS_ICONS = {'pending': "⏳", 'processing': "⚙️", 'completed': "✅", 'failed': "❌"}
+
+
+def render_task_row(task: dict) -> str:
+    line = (f"{TASK_STATUS_ICONS.get(task['status'], '•')} <b>#{task['id']}</b> {task['type']} "
+            f"({task['slide_count']}) — {task['progress'] or 0}%, user <code>{task['telegram_id']}</code>")
+    if task['attempts'] and task['attempts'] > 1:
+        line += f", {task['attempts']}-urinish"
+    line += f"\n   <code>{task['task_uuid']}</code> 📅 {task['created_at']}"
+    if task['status'] == 'failed' and task['error_message']:
+        line += f"\n   ⚠️ {quote_html(task['error_message'][:120])}"
+    return line
+
+
+tasks_pager = Pager(
+    'tk',
+    fetch=lambda status, **page: user_db.get_tasks_page(status, **page),
+    render=render_task_row,
+    title="📄 Task'lar",
+    filters={
+        'r': ('processing', "⚙️ Jarayonda"),
+        'q': ('pending', "⏳ Navbatda"),
+        'f': ('failed', "❌ Xato"),
+        'c': ('completed', "✅ Tayyor"),
+    },
+    page_size=6,
+    empty="Bu holatda task'lar yo'q"
+)
+
+
+@dp.message_handler(commands="tasks")
+async def view_tasks(message: types.Message):
+    """Task'lar ro'yxati holat bo'yicha (sahifalab)"""
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await message.reply("❌ Siz admin emassiz!")
+        return
+
+    await tasks_pager.send(message)
+
+
+@dp.callback_query_handler(page_cb.filter(kind='tk'))
+async def tasks_page_callback(callback: types.CallbackQuery, callback_data: dict):
+    telegram_id = callback.from_user.id
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await callback.answer("❌ Siz admin emassiz!", show_alert=True)
+        return
+    await tasks_pager.edit(callback, callback_data)
+
+
+# ==================== ARXIV ====================
+@dp.message_handler(commands="archive")
+async def archive_report(message: types.Message):
+    """
+    Task / tranzaksiya arxivi
+
+    /archive         - faol va arxiv jadvallar, baza hajmi
+    /archive run     - hoziroq arxivlash (+ incremental vacuum, optimize)
+    /archive vacuum  - to'liq VACUUM (faqat super admin; baza shu vaqt band bo'ladi)
+    """
+    telegram_id = message.from_user.id
+
+    if not await check_super_admin_permission(telegram_id) and not await check_admin_permission(telegram_id):
+        await message.reply("❌ Siz admin emassiz!")
+        return
+
+    command = message.get_args().strip().lower()
+    loop = asyncio.get_event_loop()
+
+    if command == 'run':
+        status_message = await message.answer("⏳ Arxivlanmoqda...")
+        result = await archiver.run_once()
+        if result.get('busy'):
+            await status_message.edit_text("⏳ Arxivlash allaqachon bajarilmoqda")
+            return
+        await status_message.edit_text(
+            f"✅ Arxivlandi: {result['tasks']} task, {result['transactions']} tranzaksiya "
+            f"({result['seconds']:.1f} s)\n"
+            f"🧹 Eski idempotency kalitlari: {result['idempotency_keys']}"
+        )
+
+    elif command == 'vacuum':
+        if not await check_super_admin_permission(telegram_id):
+            await message.reply("❌ Faqat super admin uchun!")
+            return
+        if archiver.running:
+            await message.answer("⏳ Arxivlash bajarilmoqda - keyinroq urinib ko'ring")
+            return
+        status_message = await message.answer("⏳ VACUUM bajarilmoqda...")
+        started = time.perf_counter()
+        ok = await loop.run_in_executor(None, user_db.vacuum)
+        await status_message.edit_text(
+            f"✅ VACUUM tugadi ({time.perf_counter() - started:.1f} s)" if ok else "❌ VACUUM xato - log'ni ko'ring"
+        )
+
+    stats = await loop.run_in_executor(None, user_db.get_archive_stats)
+    auto_vacuum = {0: "o'chiq (/archive vacuum)", 1: 'full', 2: 'incremental'}.get(stats['auto_vacuum'], '?')
+    lines = [
+        "🗄 <b>ARXIV</b>",
+        "",
+        f"📄 Task'lar: {stats['tasks_hot']:,} faol, {stats['tasks_archived']:,} arxivda",
+        f"💳 Tranzaksiyalar: {stats['transactions_hot']:,} faol, {stats['transactions_archived']:,} arxivda",
+        f"💾 Baza: {stats['db_bytes'] / 1024 ** 2:.1f} MB, bo'sh {stats['free_bytes'] / 1024 ** 2:.1f} MB",
+        f"🧹 auto_vacuum: {auto_vacuum}",
+        f"⏱ {archiver.after_days} kundan eski yopilganlar arxivlanadi",
+    ]
+    await message.answer("\n".join(lines))
+
+
 # ==================== BUTTON HANDLER ====================
 @dp.message_handler(Text(equals="📊 Statistika"))
 async def stats_button_handler(message: types.Message):
@@ -6,6 +6,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from data.config import ADMINS
 from loader import dp, bot, user_db
+from utils.misc import rate_limit
 
 
 # ==================== USER UCHUN ====================
@@ -125,6 +126,7 @@ async def buy_business_plan(callback: types.CallbackQuery):
         await callback.message.edit_text(text, reply_markup=keyboard, parse_mode='HTML')
 
 
+@rate_limit(key='confirm', cost=3)
 @dp.callback_query_handler(lambda c: c.data.startswith('confirm_plan:'))
 async def confirm_purchase(callback: types.CallbackQuery):
     """Xaridni tasdiqlash"""
@@ -132,38 +134,27 @@ async def confirm_purchase(callback: types.CallbackQuery):
     plan_id = int(callback.data.split(':')[1])
     user_id = callback.from_user.id
 
-    # Plan ma'lumotlari
-    plan = user_db.execute(
-        "SELECT title, price, file_id FROM BusinessPlans WHERE id = ?",
-        parameters=(plan_id,),
-        fetchone=True
+    # Yechish, tranzaksiya, xarid va sold_count - bitta tranzaksiyada.
+    # Plan bir user uchun bir marta sotiladi, shuning uchun kalit (user, plan)
+    result = user_db.purchase_business_plan(
+        telegram_id=user_id,
+        plan_id=plan_id,
+        idempotency_key=f"plan:{user_id}:{plan_id}"
     )
 
-    if not plan:
-        await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+    if result['status'] in ('duplicate', 'already_bought'):
+        await callback.answer("✅ Siz bu planni avval sotib olgansiz!", show_alert=True)
         return
 
-    title, price, file_id = plan
-
-    # Balansdan yechish
-    if not user_db.deduct_from_balance(user_id, price):
+    if result['status'] == 'insufficient':
         await callback.answer("❌ Balans yetarli emas!", show_alert=True)
         return
 
-    # Xaridni saqlash
-    user_db.execute(
-        """INSERT INTO PlanPurchases (user_id, plan_id, price)
-           VALUES ((SELECT id FROM Users WHERE telegram_id = ?), ?, ?)""",
-        parameters=(user_id, plan_id, price),
-        commit=True
-    )
+    if result['status'] != 'ok':
+        await callback.answer("❌ Xatolik yuz berdi", show_alert=True)
+        return
 
-    # Sold count oshirish
-    user_db.execute(
-        "UPDATE BusinessPlans SET sold_count = sold_count + 1 WHERE id = ?",
-        parameters=(plan_id,),
-        commit=True
-    )
+    title, price, file_id = result['title'], result['price'], result['file_id']
 
     # Faylni yuborish
     await bot.send_document(
@@ -174,7 +165,7 @@ async def confirm_purchase(callback: types.CallbackQuery):
 
 📋 Plan: <b>{title}</b>
 💰 To'landi: <b>{price:,.0f} so'm</b>
-💳 Yangi balans: <b>{user_db.get_user_balance(user_id):,.0f} so'm</b>
+💳 Yangi balans: <b>{result['balance']:,.0f} so'm</b>
 
 📁 Fayl yuklab olishingiz mumkin!
 
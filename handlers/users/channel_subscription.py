@@ -6,11 +6,13 @@ from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters import Text
 from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from aiogram.utils.markdown import quote_html
 import logging
 
 from data.config import ADMINS
 from loader import dp, channel_db, bot, user_db
 from keyboards.default.default_keyboard import menu_admin, menu_ichki_kanal
+from utils.pager import Pager, page_cb
 
 logger = logging.getLogger(__name__)
 
@@ -195,45 +197,54 @@ async def process_forward_message(message: types.Message, state: FSMContext):
     await state.finish()
 
 
+# ==================== KANALLAR RO'YXATI (SAHIFALAB) ====================
+def render_channel_row(channel) -> str:
+    return (f"<b>{quote_html(channel[2] or '-')}</b>\n"
+            f"   🆔 ID: <code>{channel[1]}</code>\n"
+            f"   🔗 {channel[3]}")
+
+
+def channels_footer() -> str:
+    return f"📊 Jami: <b>{channel_db.count_channels()}</b> ta kanal"
+
+
+channels_pager = Pager(
+    'ch',
+    fetch=lambda _, **page: channel_db.get_channels_page(**page),
+    render=render_channel_row,
+    title="📋 Kanallar ro'yxati",
+    empty="❌ Hozircha tizimda hech qanday kanal mavjud emas.",
+    footer=channels_footer
+)
+
+# O'chirish uchun: har bir kanal - tugma (remove_channel: tasdiqlash oynasi)
+remove_channels_pager = Pager(
+    'chx',
+    fetch=lambda _, **page: channel_db.get_channels_page(**page),
+    render=lambda channel: f"• {quote_html(channel[2] or '-')}",
+    title="🗑 Kanalni o'chirish",
+    item_button=lambda channel: InlineKeyboardButton(f"🗑 {channel[2]}", callback_data=f"remove_channel:{channel[1]}"),
+    empty="❌ Hozircha tizimda hech qanday kanal mavjud emas.",
+    footer=lambda: "O'chirmoqchi bo'lgan kanalni tanlang:",
+    actions=[InlineKeyboardButton(text="❌ Bekor qilish", callback_data="cancel_remove_channel")]
+)
+
+
 # ==================== KANALNI O'CHIRISH ====================
 @dp.message_handler(Text(equals="❌ Kanalni o'chirish"))
 async def remove_channel_start(message: types.Message):
     if not await is_admin(message.from_user.id):
         return
 
-    # Kanallar ro'yxatini ko'rsatish
-    channels = channel_db.get_all_channels()
-
-    if not channels:
+    if not channel_db.count_channels():
         await message.answer(
             "❌ Hozircha tizimda hech qanday kanal mavjud emas.",
             reply_markup=menu_ichki_kanal
         )
         return
 
-    # Inline keyboard yaratish
-    keyboard = InlineKeyboardMarkup(row_width=1)
-
-    for channel in channels:
-        ch_id = channel[1]
-        title = channel[2]
-        keyboard.add(
-            InlineKeyboardButton(
-                text=f"🗑 {title}",
-                callback_data=f"remove_channel:{ch_id}"
-            )
-        )
-
-    keyboard.add(
-        InlineKeyboardButton(text="❌ Bekor qilish", callback_data="cancel_remove_channel")
-    )
-
-    await message.answer(
-        "🗑 <b>Kanalni o'chirish</b>\n\n"
-        "O'chirmoqchi bo'lgan kanalni tanlang:",
-        reply_markup=keyboard,
-        parse_mode="HTML"
-    )
+    # Kanallar sahifalab: har biri o'chirish tugmasi
+    await remove_channels_pager.send(message)
 
 
 @dp.callback_query_handler(lambda c: c.data.startswith("remove_channel:"))
@@ -306,29 +317,17 @@ async def list_all_channels(message: types.Message):
     if not await is_admin(message.from_user.id):
         return
 
-    channels = channel_db.get_all_channels()
+    await channels_pager.send(message)
 
-    if not channels:
-        await message.answer(
-            "❌ Hozircha tizimda hech qanday kanal mavjud emas.",
-            reply_markup=menu_ichki_kanal
-        )
-        return
-
-    text = "📋 <b>Kanallar ro'yxati:</b>\n\n"
-
-    for i, channel in enumerate(channels, 1):
-        ch_id = channel[1]
-        title = channel[2]
-        invite_link = channel[3]
-
-        text += f"{i}. <b>{title}</b>\n"
-        text += f"   🆔 ID: <code>{ch_id}</code>\n"
-        text += f"   🔗 {invite_link}\n\n"
 
-    text += f"📊 Jami: <b>{len(channels)}</b> ta kanal"
+@dp.callback_query_handler(page_cb.filter(kind=['ch', 'chx']))
+async def channels_page_callback(call: types.CallbackQuery, callback_data: dict):
+    if not await is_admin(call.from_user.id):
+        await call.answer("❌ Sizda ruxsat yo'q!", show_alert=True)
+        return
 
-    await message.answer(text, parse_mode="HTML", disable_web_page_preview=True)
+    pager = channels_pager if callback_data['kind'] == 'ch' else remove_channels_pager
+    await pager.edit(call, callback_data)
 
 
 # ==================== CANCEL HANDLER ====================
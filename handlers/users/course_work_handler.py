@@ -22,6 +22,7 @@ from keyboards.default.default_keyboard import (
     confirm_keyboard
 )
 from data.config import ADMINS
+from utils.db_api.user_context import UserContext
 
 logger = logging.getLogger(__name__)
 
@@ -70,13 +71,11 @@ def skip_or_cancel_keyboard():
 
 # ==================== START HANDLER ====================
 @dp.message_handler(Text(equals="📝 Mustaqil ish"), state='*')
-async def course_work_start(message: types.Message, state: FSMContext):
+async def course_work_start(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Mustaqil ish yaratishni boshlash"""
-    telegram_id = message.from_user.id
-
     try:
-        free_left = user_db.get_free_presentations(telegram_id)
-        balance = user_db.get_user_balance(telegram_id)
+        free_left = user_ctx.free_presentations
+        balance = user_ctx.balance
 
         price_per_page = user_db.get_price('page_basic')
         if not price_per_page:
@@ -466,14 +465,14 @@ Balansni to'ldiring: 💳 To'ldirish
             await state.finish()
             return
 
-    await state.update_data(total_price=total_price)
+    await state.update_data(total_price=total_price, order_key=str(uuid.uuid4()))
     await message.answer(summary, reply_markup=confirm_keyboard(), parse_mode='HTML')
     await CourseWorkStates.confirming_creation.set()
 
 
 # ==================== TASDIQLASH ====================
 @dp.message_handler(Text(equals="✅ Ha, boshlash"), state=CourseWorkStates.confirming_creation)
-async def course_work_confirm(message: types.Message, state: FSMContext):
+async def course_work_confirm(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Mustaqil ish yaratishni tasdiqlash"""
     telegram_id = message.from_user.id
     user_data = await state.get_data()
@@ -491,20 +490,64 @@ async def course_work_confirm(message: types.Message, state: FSMContext):
         language_name = user_data.get('language_name')
         total_price = user_data.get('total_price', 0)
 
-        free_left = user_db.get_free_presentations(telegram_id)
-        is_free = free_left > 0
+        task_uuid = str(uuid.uuid4())
+        content_data = {
+            'work_type': work_type,
+            'work_name': work_name,
+            'topic': topic,
+            'subject': subject,
+            'details': details,
+            'page_count': page_count,
+            'file_format': file_format,
+            'language': language,
+            'language_name': language_name
+        }
+
+        # Yechish, tranzaksiya va task - bitta tranzaksiyada (double tap'dan himoyalangan)
+        result = user_db.charge_and_create_task(
+            telegram_id=telegram_id,
+            idempotency_key=user_data.get('order_key') or task_uuid,
+            task_uuid=task_uuid,
+            presentation_type='course_work',
+            slide_count=page_count,
+            answers=json.dumps(content_data, ensure_ascii=False),
+            price=total_price,
+            description=f'{work_name} yaratish ({page_count} sahifa)',
+            ctx=user_ctx
+        )
+
+        if result['status'] == 'duplicate':
+            await message.answer("⏳ Bu buyurtma allaqachon qabul qilingan!", reply_markup=main_menu_keyboard())
+            await state.finish()
+            return
+
+        if result['status'] == 'insufficient':
+            await message.answer(
+                f"❌ <b>Balans yetarli emas!</b>\n\n"
+                f"Kerakli: {total_price:,.0f} so'm\n"
+                f"Sizda: {result['balance']:,.0f} so'm",
+                parse_mode='HTML',
+                reply_markup=main_menu_keyboard()
+            )
+            await state.finish()
+            return
+
+        if result['status'] != 'ok':
+            await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
+            await state.finish()
+            return
+
+        is_free = result['is_free']
+        task_uuid = result['task_uuid']
 
         if is_free:
             logger.info(f"🎁 BEPUL {work_name}: User {telegram_id}")
-            user_db.use_free_presentation(telegram_id)
-            new_free = user_db.get_free_presentations(telegram_id)
-            amount_charged = 0
 
             success_text = f"""
 🎁 <b>BEPUL {work_name} yaratish boshlandi!</b>
 
 ✨ Bu sizning bepul ishingiz!
-🎁 Qolgan bepul: {new_free} ta
+🎁 Qolgan bepul: {result['free_presentations']} ta
 
 ⏳ <b>Jarayon:</b>
 1️⃣ ⚙️ Matn tayyorlanmoqda...
@@ -515,44 +558,11 @@ async def course_work_confirm(message: types.Message, state: FSMContext):
 ⏱️ Taxminan <b>5-10 daqiqa</b> vaqt ketadi.
 """
         else:
-            current_balance = user_db.get_user_balance(telegram_id)
-
-            if current_balance < total_price:
-                await message.answer(
-                    f"❌ <b>Balans yetarli emas!</b>\n\n"
-                    f"Kerakli: {total_price:,.0f} so'm\n"
-                    f"Sizda: {current_balance:,.0f} so'm",
-                    parse_mode='HTML',
-                    reply_markup=main_menu_keyboard()
-                )
-                await state.finish()
-                return
-
-            success = user_db.deduct_from_balance(telegram_id, total_price)
-
-            if not success:
-                await message.answer("❌ Balansdan yechishda xatolik!", parse_mode='HTML',
-                                     reply_markup=main_menu_keyboard())
-                await state.finish()
-                return
-
-            new_balance = user_db.get_user_balance(telegram_id)
-
-            user_db.create_transaction(
-                telegram_id=telegram_id,
-                transaction_type='withdrawal',
-                amount=total_price,
-                description=f'{work_name} yaratish ({page_count} sahifa)',
-                status='approved'
-            )
-
-            amount_charged = total_price
-
             success_text = f"""
 ✅ <b>{work_name} yaratish boshlandi!</b>
 
 💰 Balansdan yechildi: {total_price:,.0f} so'm
-💳 Yangi balans: {new_balance:,.0f} so'm
+💳 Yangi balans: {result['balance']:,.0f} so'm
 
 ⏳ <b>Jarayon:</b>
 1️⃣ ⚙️ Matn tayyorlanmoqda...
@@ -563,35 +573,6 @@ async def course_work_confirm(message: types.Message, state: FSMContext):
 ⏱️ Taxminan <b>5-10 daqiqa</b> vaqt ketadi.
 """
 
-        task_uuid = str(uuid.uuid4())
-        content_data = {
-            'work_type': work_type,
-            'work_name': work_name,
-            'topic': topic,
-            'subject': subject,
-            'details': details,
-            'page_count': page_count,
-            'file_format': file_format,
-            'language': language,
-            'language_name': language_name
-        }
-
-        task_id = user_db.create_presentation_task(
-            telegram_id=telegram_id,
-            task_uuid=task_uuid,
-            presentation_type='course_work',
-            slide_count=page_count,
-            answers=json.dumps(content_data, ensure_ascii=False),
-            amount_charged=amount_charged
-        )
-
-        if not task_id:
-            if not is_free:
-                user_db.add_to_balance(telegram_id, total_price)
-            await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
-            await state.finish()
-            return
-
         await message.answer(success_text, reply_markup=main_menu_keyboard(), parse_mode='HTML')
         await state.finish()
 
@@ -7,8 +7,8 @@ from aiogram.dispatcher import FSMContext
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, WebAppInfo, ContentType
 from aiogram.utils.exceptions import MessageCantBeEdited, MessageToDeleteNotFound
 
-from loader import dp, bot
-from data.config import OPENAI_API_KEY
+from loader import dp, bot, openai_client
+from utils.misc import rate_limit
 
 # --- IMPORTLAR ---
 from utils.course_work_generator import CourseWorkGenerator
@@ -53,6 +53,7 @@ async def back_to_main_menu(message: types.Message):
 # ==============================================================================
 # 3. DATA QABUL QILISH VA ISHGA TUSHIRISH
 # ==============================================================================
+@rate_limit(key='confirm', cost=3)
 @dp.message_handler(content_types=ContentType.WEB_APP_DATA)
 async def web_app_data_handler(message: types.Message, state: FSMContext):
     telegram_id = message.from_user.id
@@ -85,7 +86,7 @@ async def web_app_data_handler(message: types.Message, state: FSMContext):
         # ---------------------------------------------------------
         # 3. AI GENERATOR (Matn yozish)
         # ---------------------------------------------------------
-        ai_generator = CourseWorkGenerator(api_key=OPENAI_API_KEY)
+        ai_generator = CourseWorkGenerator(openai_client)
 
         content_json = await ai_generator.generate_course_work_content(
             work_type=data.get('work_type', 'referat'),
@@ -7,6 +7,7 @@ from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
 from aiogram.dispatcher.filters import Text
 from aiogram.utils.exceptions import BotBlocked, ChatNotFound, RetryAfter, Unauthorized
+from utils.metrics import TELEGRAM_RETRIES
 
 # Reklama yuborish jarayonlarini saqlash uchun ro'yxat
 advertisements = []
@@ -62,6 +63,7 @@ class Advertisement:
             except (BotBlocked, ChatNotFound, Unauthorized):
                 self.failed_count += 1
             except RetryAfter as e:
+                TELEGRAM_RETRIES.labels('broadcast').inc()
                 await asyncio.sleep(e.timeout)
             await asyncio.sleep(0.1)
             if self.sent_count % 10 == 0:
@@ -1,7 +1,9 @@
 from aiogram import types
 from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from aiogram.utils.markdown import quote_html
 from loader import user_db, dp
 from data.config import ADMINS  # ADMINS ro'yxatini import qilish
+from utils.pager import Pager, page_cb
 
 
 
@@ -52,27 +54,45 @@ async def admin_statistics_handler(message: types.Message):
 
         await message.answer(stats_text, reply_markup=markup, parse_mode="HTML")
 
-# Callback query uchun batafsil statistika
+# Batafsil statistika: adminlar ro'yxati (sahifalab)
+def render_admin_row(admin: dict) -> str:
+    return (f"🆔 <b>ID:</b> {admin['user_id']} | 👤 <b>Telegram ID:</b> {admin['telegram_id']}"
+            f"\n📛 <b>Ismi:</b> {quote_html(admin['name'])}"
+            f"\n🔑 <b>Super admin:</b> {'✅ Ha' if admin['is_super_admin'] else '❌ Yoq'}\n")
+
+
+def config_admins_footer() -> str:
+    # ADMINS (config) - jadvalda bo'lmasligi mumkin bo'lgan super adminlar
+    if not ADMINS:
+        return ""
+    return "👑 <b>Super adminlar (config):</b> " + ", ".join(f"<code>{admin_id}</code>" for admin_id in ADMINS)
+
+
+admins_pager = Pager(
+    'adm',
+    fetch=lambda _, **page: user_db.get_admins_page(**page),
+    render=render_admin_row,
+    title="\U0001F6E0 Adminlar ro'yxati",
+    empty="❌ Admins jadvalida hech kim yo'q.",
+    footer=config_admins_footer
+)
+
+
 @dp.callback_query_handler(lambda c: c.data == "detailed_statistics")
 async def detailed_statistics_callback_handler(call: types.CallbackQuery):
-    total_admins = user_db.get_all_admins()
-
-    # Adminlar haqida batafsil ma'lumot
-    admin_details = "\U0001F6E0 <b>Adminlar ro'yxati:</b>\n"
-    if not total_admins and not ADMINS:
-        admin_details += "\n❌ Hozircha hech qanday admin mavjud emas."
-    else:
-        # Adminlar jadvalidagi adminlar haqida ma'lumot
-        for admin in total_admins:
-            admin_details += (f"\n🆔 <b>ID:</b> {admin['user_id']}"
-                              f"\n👤 <b>Telegram ID:</b> {admin['telegram_id']}"
-                              f"\n📛 <b>Ismi:</b> {admin['name']}"
-                              f"\n🔑 <b>Super admin:</b> {'✅ Ha' if admin['is_super_admin'] else '❌ Yoq'}\n")
-
-        # ADMINS ro'yxatidagi super adminlar haqida ma'lumot qo'shish (agar jadvalda yo'q bo'lsa)
-        for admin_id in ADMINS:
-            if not any(admin['telegram_id'] == admin_id for admin in total_admins):
-                admin_details += f"\n🆔 <b>ID:</b> {admin_id} | 👤 <b>Ism:</b> Super Admin | 🔑 <b>Super Admin:</b> ✅ Ha\n"
-
-    await call.message.edit_text(admin_details, parse_mode="HTML")
-    await call.answer()
+    telegram_id = call.from_user.id
+    if not (await check_super_admin_permission(telegram_id) or await check_admin_permission(telegram_id)):
+        await call.answer()
+        return
+
+    await admins_pager.edit(call, {})
+
+
+@dp.callback_query_handler(page_cb.filter(kind='adm'))
+async def admins_page_callback(call: types.CallbackQuery, callback_data: dict):
+    telegram_id = call.from_user.id
+    if not (await check_super_admin_permission(telegram_id) or await check_admin_permission(telegram_id)):
+        await call.answer()
+        return
+
+    await admins_pager.edit(call, callback_data)
@@ -7,14 +7,16 @@ import logging
 import json
 import uuid
 
-from loader import dp, bot, user_db
+from loader import dp, bot, user_db, theme_catalog, speculation
 from keyboards.default.default_keyboard import (
     main_menu_keyboard,
     cancel_keyboard,
     confirm_keyboard
 )
 from data.config import ADMINS
-from utils.themes_data import get_theme_by_id, get_theme_by_index, get_all_themes, get_themes_count
+from utils.db_api.user_context import UserContext
+from utils.misc import rate_limit
+from utils.themes_data import get_theme_by_id
 
 logger = logging.getLogger(__name__)
 
@@ -71,8 +73,8 @@ def get_theme_keyboard(current_index: int) -> InlineKeyboardMarkup:
     """Theme tanlash uchun inline keyboard"""
     keyboard = InlineKeyboardMarkup(row_width=3)
 
-    total = get_themes_count()
-    theme = get_theme_by_index(current_index)
+    total = theme_catalog.count()
+    theme = theme_catalog.get_by_index(current_index)
 
     nav_buttons = []
 
@@ -105,10 +107,10 @@ def get_theme_keyboard(current_index: int) -> InlineKeyboardMarkup:
 
 async def show_theme_selection(message_or_callback, state: FSMContext, theme_index: int = 0):
     """Theme rasmini va ma'lumotini ko'rsatish"""
-    theme = get_theme_by_index(theme_index)
+    theme = theme_catalog.get_by_index(theme_index)
 
     if not theme:
-        theme = get_theme_by_index(0)
+        theme = theme_catalog.get_by_index(0)
         theme_index = 0
 
     await state.update_data(current_theme_index=theme_index)
@@ -193,22 +195,23 @@ async def send_admin_notification(trans_id: int, user_id: int, amount: float, fi
 
 # ==================== START ====================
 @dp.message_handler(commands=['start'], state='*')
-async def start_handler(message: types.Message, state: FSMContext):
+async def start_handler(message: types.Message, state: FSMContext, user_ctx: UserContext):
     current_state = await state.get_state()
     if current_state:
         await state.finish()
+    speculation.cancel(message.from_user.id)
 
     user = message.from_user
     telegram_id = user.id
     username = user.username or "username_yoq"
 
     try:
-        if not user_db.user_exists(telegram_id):
+        if not user_ctx.exists:
             user_db.add_user(telegram_id, username)
             logger.info(f"✅ Yangi user qo'shildi: {telegram_id}")
 
-        balance = user_db.get_user_balance(telegram_id)
-        free_left = user_db.get_free_presentations(telegram_id)
+        balance = user_ctx.balance
+        free_left = user_ctx.free_presentations if user_ctx.exists else 0
 
         welcome_text = f"""
 👋 <b>Assalomu alaykum, {user.first_name}!</b>
@@ -248,16 +251,14 @@ Pastdagi tugmalardan birini tanlang! 👇
 
 # ==================== PITCH DECK ====================
 @dp.message_handler(Text(equals="🎯 Pitch Deck"), state='*')
-async def pitch_deck_start(message: types.Message, state: FSMContext):
-    telegram_id = message.from_user.id
-
+async def pitch_deck_start(message: types.Message, state: FSMContext, user_ctx: UserContext):
     try:
         price = user_db.get_price('pitch_deck')
         if not price:
             price = 10000
 
-        balance = user_db.get_user_balance(telegram_id)
-        free_left = user_db.get_free_presentations(telegram_id)
+        balance = user_ctx.balance
+        free_left = user_ctx.free_presentations
 
         info_text = f"""
 🎯 <b>PITCH DECK YARATISH</b>
@@ -304,8 +305,9 @@ Avval balansni to'ldiring: 💳 To'ldirish
         await message.answer("❌ Xatolik yuz berdi. Iltimos, qaytadan urinib ko'ring.")
 
 
+@rate_limit(key='confirm', cost=3)
 @dp.message_handler(Text(equals="✅ Ha, boshlash"), state=PitchDeckStates.confirming_creation)
-async def pitch_deck_confirm(message: types.Message, state: FSMContext):
+async def pitch_deck_confirm(message: types.Message, state: FSMContext, user_ctx: UserContext):
     user_data = await state.get_data()
 
     try:
@@ -329,22 +331,54 @@ Qancha ko'p ma'lumot bersangiz, shuncha yaxshi natija!
             answers = user_data.get('answers', [])
             price = user_data.get('price', 50000)
 
-            free_left = user_db.get_free_presentations(telegram_id)
-            is_free = free_left > 0
+            task_uuid = str(uuid.uuid4())
+            content_data = {'answers': answers, 'questions': PITCH_QUESTIONS}
 
-            if is_free:
-                logger.info(f"🎁 BEPUL Pitch Deck: User {telegram_id}, Qolgan: {free_left}")
+            # Yechish, tranzaksiya va task - bitta tranzaksiyada (double tap'dan himoyalangan)
+            result = user_db.charge_and_create_task(
+                telegram_id=telegram_id,
+                idempotency_key=user_data.get('order_key') or task_uuid,
+                task_uuid=task_uuid,
+                presentation_type='pitch_deck',
+                slide_count=12,
+                answers=json.dumps(content_data, ensure_ascii=False),
+                price=price,
+                description='Pitch Deck yaratish',
+                ctx=user_ctx
+            )
+            logger.info(f"📊 Pitch Deck: User {telegram_id}, Narx: {price}, Natija: {result['status']}")
+
+            if result['status'] == 'duplicate':
+                await message.answer("⏳ Bu buyurtma allaqachon qabul qilingan!", reply_markup=main_menu_keyboard())
+                await state.finish()
+                return
 
-                user_db.use_free_presentation(telegram_id)
-                new_free = user_db.get_free_presentations(telegram_id)
+            if result['status'] == 'insufficient':
+                await message.answer(
+                    f"❌ <b>Balans yetarli emas!</b>\n\n"
+                    f"Kerakli: {price:,.0f} so'm\n"
+                    f"Sizda: {result['balance']:,.0f} so'm\n\n"
+                    f"Balansni to'ldiring: 💳 To'ldirish",
+                    parse_mode='HTML',
+                    reply_markup=main_menu_keyboard()
+                )
+                await state.finish()
+                return
 
-                amount_charged = 0
+            if result['status'] != 'ok':
+                await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
+                await state.finish()
+                return
+
+            is_free = result['is_free']
+            task_uuid = result['task_uuid']
 
+            if is_free:
                 success_text = f"""
 🎁 <b>BEPUL Pitch Deck yaratish boshlandi!</b>
 
 ✨ Bu sizning bepul prezentatsiyangiz!
-🎁 Qolgan bepul: {new_free} ta
+🎁 Qolgan bepul: {result['free_presentations']} ta
 
 ⏳ <b>Jarayon:</b>
 1. ⚙️ Content yaratilmoqda...
@@ -357,51 +391,11 @@ Qancha ko'p ma'lumot bersangiz, shuncha yaxshi natija!
 Tayyor bo'lgach sizga <b>professional PPTX fayl</b> yuboriladi! 🎉
 """
             else:
-                current_balance = user_db.get_user_balance(telegram_id)
-                logger.info(f"📊 Pitch Deck: User {telegram_id}, Balans: {current_balance}, Narx: {price}")
-
-                if current_balance < price:
-                    await message.answer(
-                        f"❌ <b>Balans yetarli emas!</b>\n\n"
-                        f"Kerakli: {price:,.0f} so'm\n"
-                        f"Sizda: {current_balance:,.0f} so'm\n\n"
-                        f"Balansni to'ldiring: 💳 To'ldirish",
-                        parse_mode='HTML',
-                        reply_markup=main_menu_keyboard()
-                    )
-                    await state.finish()
-                    return
-
-                success = user_db.deduct_from_balance(telegram_id, price)
-                logger.info(f"💰 Balansdan yechish natijasi: {success}")
-
-                if not success:
-                    await message.answer(
-                        "❌ <b>Balansdan yechishda xatolik!</b>\n\nBalansni tekshiring: 💰 Balansim",
-                        parse_mode='HTML',
-                        reply_markup=main_menu_keyboard()
-                    )
-                    await state.finish()
-                    return
-
-                new_balance = user_db.get_user_balance(telegram_id)
-                logger.info(f"✅ Yangi balans: {new_balance}")
-
-                user_db.create_transaction(
-                    telegram_id=telegram_id,
-                    transaction_type='withdrawal',
-                    amount=price,
-                    description='Pitch Deck yaratish',
-                    status='approved'
-                )
-
-                amount_charged = price
-
                 success_text = f"""
 ✅ <b>Pitch Deck yaratish boshlandi!</b>
 
 💰 Balansdan yechildi: {price:,.0f} so'm
-💳 Yangi balans: {new_balance:,.0f} so'm
+💳 Yangi balans: {result['balance']:,.0f} so'm
 
 ⏳ <b>Jarayon:</b>
 1. ⚙️ Content yaratilmoqda...
@@ -414,25 +408,6 @@ Tayyor bo'lgach sizga <b>professional PPTX fayl</b> yuboriladi! 🎉
 Tayyor bo'lgach sizga <b>professional PPTX fayl</b> yuboriladi! 🎉
 """
 
-            task_uuid = str(uuid.uuid4())
-            content_data = {'answers': answers, 'questions': PITCH_QUESTIONS}
-
-            task_id = user_db.create_presentation_task(
-                telegram_id=telegram_id,
-                task_uuid=task_uuid,
-                presentation_type='pitch_deck',
-                slide_count=12,
-                answers=json.dumps(content_data, ensure_ascii=False),
-                amount_charged=amount_charged
-            )
-
-            if not task_id:
-                if not is_free:
-                    user_db.add_to_balance(telegram_id, price)
-                await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
-                await state.finish()
-                return
-
             await message.answer(success_text, reply_markup=main_menu_keyboard(), parse_mode='HTML')
             await state.finish()
 
@@ -445,7 +420,7 @@ Tayyor bo'lgach sizga <b>professional PPTX fayl</b> yuboriladi! 🎉
 
 
 @dp.message_handler(state=PitchDeckStates.waiting_for_answer)
-async def pitch_deck_answer(message: types.Message, state: FSMContext):
+async def pitch_deck_answer(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Pitch Deck savollariga javoblarni qabul qilish"""
 
     # ✅ Bekor qilish tekshirish
@@ -466,11 +441,11 @@ async def pitch_deck_answer(message: types.Message, state: FSMContext):
         progress = f"✅ {next_q}/{len(PITCH_QUESTIONS)} savol javoblandi\n\n"
         await message.answer(progress + PITCH_QUESTIONS[next_q], reply_markup=cancel_keyboard(), parse_mode='HTML')
     else:
-        await state.update_data(answers=answers)
+        await state.update_data(answers=answers, order_key=str(uuid.uuid4()))
         price = user_data.get('price', 50000)
-        balance = user_db.get_user_balance(message.from_user.id)
+        balance = user_ctx.balance
 
-        free_left = user_db.get_free_presentations(message.from_user.id)
+        free_left = user_ctx.free_presentations
 
         summary = f"""
 🎉 <b>Barcha savollar tugadi!</b>
@@ -502,16 +477,14 @@ Qoladi: {(balance - price):,.0f} so'm
 
 # ==================== PREZENTATSIYA ====================
 @dp.message_handler(Text(equals="📊 Prezentatsiya"), state='*')
-async def presentation_start(message: types.Message, state: FSMContext):
-    telegram_id = message.from_user.id
-
+async def presentation_start(message: types.Message, state: FSMContext, user_ctx: UserContext):
     try:
         price_per_slide = user_db.get_price('slide_basic')
         if not price_per_slide:
             price_per_slide = 2000.0
 
-        balance = user_db.get_user_balance(telegram_id)
-        free_left = user_db.get_free_presentations(telegram_id)
+        balance = user_ctx.balance
+        free_left = user_ctx.free_presentations
 
         info_text = f"""
 📊 <b>PREZENTATSIYA YARATISH</b>
@@ -612,12 +585,13 @@ Masalan: 10
 
 
 @dp.message_handler(state=PresentationStates.waiting_for_slide_count)
-async def presentation_slide_count(message: types.Message, state: FSMContext):
+async def presentation_slide_count(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Slayd sonini qabul qilish va THEME tanlashga o'tkazish"""
 
     # ✅ Bekor qilish tekshirish
     if message.text == "❌ Bekor qilish":
         await state.finish()
+        speculation.cancel(message.from_user.id)
         await message.answer("❌ Bekor qilindi", reply_markup=main_menu_keyboard())
         return
 
@@ -632,8 +606,8 @@ async def presentation_slide_count(message: types.Message, state: FSMContext):
         price_per_slide = user_data.get('price_per_slide', 2000)
         total_price = price_per_slide * slide_count
 
-        balance = user_db.get_user_balance(message.from_user.id)
-        free_left = user_db.get_free_presentations(message.from_user.id)
+        balance = user_ctx.balance
+        free_left = user_ctx.free_presentations
 
         await state.update_data(
             slide_count=slide_count,
@@ -660,6 +634,9 @@ Balansni to'ldiring: 💳 To'ldirish
             await state.finish()
             return
 
+        # Content theme'ga bog'liq emas - user theme tanlayotganda OpenAI ishlay boshlaydi
+        speculation.begin(message.from_user.id, user_data.get('topic', ''), user_data.get('details', ''), slide_count)
+
         await message.answer("🎨 <b>Endi prezentatsiya uchun theme tanlang:</b>", parse_mode='HTML')
         await show_theme_selection(message, state, 0)
         await PresentationStates.waiting_for_theme.set()
@@ -696,11 +673,11 @@ async def theme_next_callback(callback: types.CallbackQuery, state: FSMContext):
 @dp.callback_query_handler(lambda c: c.data == 'theme_count', state=PresentationStates.waiting_for_theme)
 async def theme_count_callback(callback: types.CallbackQuery):
     """Hisob tugmasi - hech narsa qilmaydi"""
-    await callback.answer(f"📊 {get_themes_count()} ta theme mavjud")
+    await callback.answer(f"📊 {theme_catalog.count()} ta theme mavjud")
 
 
 @dp.callback_query_handler(lambda c: c.data.startswith('theme_select:'), state=PresentationStates.waiting_for_theme)
-async def theme_select_callback(callback: types.CallbackQuery, state: FSMContext):
+async def theme_select_callback(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Theme tanlandi"""
     try:
         theme_id = callback.data.split(':')[1]
@@ -714,7 +691,7 @@ async def theme_select_callback(callback: types.CallbackQuery, state: FSMContext
 
         await callback.answer(f"✅ {theme['name']} tanlandi!")
 
-        await show_confirmation(callback.message, state)
+        await show_confirmation(callback.message, state, user_ctx)
 
     except Exception as e:
         logger.error(f"Theme select xato: {e}")
@@ -722,21 +699,21 @@ async def theme_select_callback(callback: types.CallbackQuery, state: FSMContext
 
 
 @dp.callback_query_handler(lambda c: c.data == 'theme_skip', state=PresentationStates.waiting_for_theme)
-async def theme_skip_callback(callback: types.CallbackQuery, state: FSMContext):
+async def theme_skip_callback(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Theme o'tkazib yuborish - standart dizayn"""
     try:
         await state.update_data(selected_theme_id=None, selected_theme_name="Standart")
 
         await callback.answer("⏭ Standart dizayn tanlandi")
 
-        await show_confirmation(callback.message, state)
+        await show_confirmation(callback.message, state, user_ctx)
 
     except Exception as e:
         logger.error(f"Theme skip xato: {e}")
         await callback.answer("❌ Xatolik!")
 
 
-async def show_confirmation(message: types.Message, state: FSMContext):
+async def show_confirmation(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Yakuniy tasdiqlash ekranini ko'rsatish"""
     user_data = await state.get_data()
 
@@ -748,8 +725,7 @@ async def show_confirmation(message: types.Message, state: FSMContext):
     selected_theme_name = user_data.get('selected_theme_name', 'Standart')
     selected_theme_id = user_data.get('selected_theme_id')
 
-    telegram_id = message.chat.id
-    balance = user_db.get_user_balance(telegram_id)
+    balance = user_ctx.balance
 
     theme_emoji = "🎨"
     if selected_theme_id:
@@ -789,6 +765,7 @@ Qoladi: {(balance - total_price):,.0f} so'm
     except:
         pass
 
+    await state.update_data(order_key=str(uuid.uuid4()))
     await bot.send_message(
         message.chat.id,
         summary,
@@ -798,8 +775,9 @@ Qoladi: {(balance - total_price):,.0f} so'm
     await PresentationStates.confirming_creation.set()
 
 
+@rate_limit(key='confirm', cost=3)
 @dp.message_handler(Text(equals="✅ Ha, boshlash"), state=PresentationStates.confirming_creation)
-async def presentation_confirm(message: types.Message, state: FSMContext):
+async def presentation_confirm(message: types.Message, state: FSMContext, user_ctx: UserContext):
     telegram_id = message.from_user.id
     user_data = await state.get_data()
 
@@ -811,22 +789,58 @@ async def presentation_confirm(message: types.Message, state: FSMContext):
     selected_theme_name = user_data.get('selected_theme_name', 'Standart')
 
     try:
-        free_left = user_db.get_free_presentations(telegram_id)
-        is_free = free_left > 0
+        task_uuid = str(uuid.uuid4())
 
-        if is_free:
-            logger.info(f"🎁 BEPUL Prezentatsiya: User {telegram_id}, Qolgan: {free_left}")
+        content_data = {
+            'topic': topic,
+            'details': details,
+            'slide_count': slide_count,
+            'theme_id': selected_theme_id
+        }
+
+        # Yechish, tranzaksiya va task - bitta tranzaksiyada (double tap'dan himoyalangan)
+        result = user_db.charge_and_create_task(
+            telegram_id=telegram_id,
+            idempotency_key=user_data.get('order_key') or task_uuid,
+            task_uuid=task_uuid,
+            presentation_type='basic',
+            slide_count=slide_count,
+            answers=json.dumps(content_data, ensure_ascii=False),
+            price=total_price,
+            description=f'Prezentatsiya yaratish ({slide_count} slayd)',
+            ctx=user_ctx
+        )
+
+        if result['status'] == 'duplicate':
+            await message.answer("⏳ Bu buyurtma allaqachon qabul qilingan!", reply_markup=main_menu_keyboard())
+            await state.finish()
+            return
 
-            user_db.use_free_presentation(telegram_id)
-            new_free = user_db.get_free_presentations(telegram_id)
+        if result['status'] == 'insufficient':
+            await message.answer(
+                f"❌ <b>Balans yetarli emas!</b>\n\n"
+                f"Kerakli: {total_price:,.0f} so'm\n"
+                f"Sizda: {result['balance']:,.0f} so'm",
+                parse_mode='HTML',
+                reply_markup=main_menu_keyboard()
+            )
+            await state.finish()
+            return
+
+        if result['status'] != 'ok':
+            await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
+            await state.finish()
+            return
 
-            amount_charged = 0
+        is_free = result['is_free']
+        task_uuid = result['task_uuid']
 
+        if is_free:
             success_text = f"""
 🎁 <b>BEPUL Prezentatsiya yaratish boshlandi!</b>
 
 ✨ Bu sizning bepul prezentatsiyangiz!
-🎁 Qolgan bepul: {new_free} ta
+🎁 Qolgan bepul: {result['free_presentations']} ta
 🎨 Theme: {selected_theme_name}
 
 ⏳ <b>Jarayon:</b>
@@ -840,44 +854,11 @@ async def presentation_confirm(message: types.Message, state: FSMContext):
 Tayyor bo'lgach sizga <b>PPTX fayl</b> yuboriladi! 🎉
 """
         else:
-            current_balance = user_db.get_user_balance(telegram_id)
-
-            if current_balance < total_price:
-                await message.answer(
-                    f"❌ <b>Balans yetarli emas!</b>\n\n"
-                    f"Kerakli: {total_price:,.0f} so'm\n"
-                    f"Sizda: {current_balance:,.0f} so'm",
-                    parse_mode='HTML',
-                    reply_markup=main_menu_keyboard()
-                )
-                await state.finish()
-                return
-
-            success = user_db.deduct_from_balance(telegram_id, total_price)
-
-            if not success:
-                await message.answer("❌ <b>Balansdan yechishda xatolik!</b>", parse_mode='HTML',
-                                     reply_markup=main_menu_keyboard())
-                await state.finish()
-                return
-
-            new_balance = user_db.get_user_balance(telegram_id)
-
-            user_db.create_transaction(
-                telegram_id=telegram_id,
-                transaction_type='withdrawal',
-                amount=total_price,
-                description=f'Prezentatsiya yaratish ({slide_count} slayd)',
-                status='approved'
-            )
-
-            amount_charged = total_price
-
             success_text = f"""
 ✅ <b>Prezentatsiya yaratish boshlandi!</b>
 
 💰 Balansdan yechildi: {total_price:,.0f} so'm
-💳 Yangi balans: {new_balance:,.0f} so'm
+💳 Yangi balans: {result['balance']:,.0f} so'm
 🎨 Theme: {selected_theme_name}
 
 ⏳ <b>Jarayon:</b>
@@ -891,31 +872,6 @@ Tayyor bo'lgach sizga <b>PPTX fayl</b> yuboriladi! 🎉
 Tayyor bo'lgach sizga <b>PPTX fayl</b> yuboriladi! 🎉
 """
 
-        task_uuid = str(uuid.uuid4())
-
-        content_data = {
-            'topic': topic,
-            'details': details,
-            'slide_count': slide_count,
-            'theme_id': selected_theme_id
-        }
-
-        task_id = user_db.create_presentation_task(
-            telegram_id=telegram_id,
-            task_uuid=task_uuid,
-            presentation_type='basic',
-            slide_count=slide_count,
-            answers=json.dumps(content_data, ensure_ascii=False),
-            amount_charged=amount_charged
-        )
-
-        if not task_id:
-            if not is_free:
-                user_db.add_to_balance(telegram_id, total_price)
-            await message.answer("❌ Task yaratishda xatolik!", parse_mode='HTML')
-            await state.finish()
-            return
-
         await message.answer(success_text, reply_markup=main_menu_keyboard(), parse_mode='HTML')
         await state.finish()
 
@@ -930,7 +886,7 @@ Tayyor bo'lgach sizga <b>PPTX fayl</b> yuboriladi! 🎉
 
 # ==================== BALANS ====================
 @dp.message_handler(Text(equals="💰 Balansim"), state='*')
-async def balance_info(message: types.Message, state: FSMContext):
+async def balance_info(message: types.Message, state: FSMContext, user_ctx: UserContext):
     telegram_id = message.from_user.id
 
     try:
@@ -941,7 +897,7 @@ async def balance_info(message: types.Message, state: FSMContext):
             return
 
         transactions = user_db.get_user_transactions(telegram_id, limit=5)
-        free_left = user_db.get_free_presentations(telegram_id)
+        free_left = user_ctx.free_presentations
 
         info_text = f"""
 💰 <b>BALANSINGIZ</b>
@@ -1037,6 +993,7 @@ Chek (skrinshot yoki PDF) ni bu chatga yuboring
         await message.answer("❌ Iltimos, to'g'ri summa kiriting!")
 
 
+@rate_limit(key='receipt', cost=2)
 @dp.message_handler(content_types=['photo', 'document'], state=BalanceStates.waiting_for_receipt)
 async def balance_topup_receipt(message: types.Message, state: FSMContext):
     telegram_id = message.from_user.id
@@ -1110,6 +1067,7 @@ async def balance_receipt_text_handler(message: types.Message, state: FSMContext
 @dp.message_handler(Text(equals="❌ Bekor qilish"), state='*')
 async def cancel_handler(message: types.Message, state: FSMContext):
     current_state = await state.get_state()
+    speculation.cancel(message.from_user.id)
 
     if current_state:
         await state.finish()
@@ -1121,23 +1079,17 @@ async def cancel_handler(message: types.Message, state: FSMContext):
 @dp.message_handler(Text(equals="❌ Yo'q"), state='*')
 async def no_handler(message: types.Message, state: FSMContext):
     await state.finish()
+    speculation.cancel(message.from_user.id)
     await message.answer("❌ Bekor qilindi", reply_markup=main_menu_keyboard())
 
 
 # ==================== NARXLAR ====================
 @dp.message_handler(Text(equals="💵 Narxlar"), state='*')
-async def prices_handler(message: types.Message):
+async def prices_handler(message: types.Message, user_ctx: UserContext):
     try:
-        prices = user_db.get_all_prices()
-
-        price_text = "💵 <b>XIZMATLAR NARXLARI</b>\n\n"
-
-        for price in prices:
-            if price['is_active']:
-                price_text += f"<b>{price['description']}</b>\n💰 {price['price']:,.0f} {price['currency']}\n━━━━━━━━━━━━━━━\n"
+        price_text = user_db.get_price_list_text()
 
-        telegram_id = message.from_user.id
-        free_left = user_db.get_free_presentations(telegram_id)
+        free_left = user_ctx.free_presentations
 
         if free_left > 0:
             price_text += f"\n🎁 <b>Sizda {free_left} ta BEPUL prezentatsiya bor!</b>"
@@ -1,17 +1,78 @@
 from aiogram import Bot, Dispatcher, types
+from aiogram.bot.api import TELEGRAM_PRODUCTION, TelegramAPIServer
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from utils.db_api.users import UserDatabase
 from utils.db_api.groups import GroupDatabase
 from utils.db_api.channels import ChannelDatabase
 from utils.db_api.cache import MediaCacheDatabase
+from utils.task_progress import TaskProgressRegistry
+from utils.task_scheduler import TaskScheduler
+from utils.artifact_store import ArtifactStore
+from utils.archiver import Archiver
+from utils.openai_client import HedgePolicy, OpenAIClient, RetryPolicy
+from utils.profiling import HandlerProfiler
+from utils.rate_limiter import RateLimiter
+from utils.theme_catalog import ThemeCatalog
+from utils.api_usage import usage_tracker
+from utils.speculation import SpeculativeContent
 
 from data import config
 
-bot = Bot(token=config.BOT_TOKEN, parse_mode=types.ParseMode.HTML)
+api_server = TelegramAPIServer.from_base(config.TELEGRAM_API_URL) if config.TELEGRAM_API_URL else TELEGRAM_PRODUCTION
+bot = Bot(token=config.BOT_TOKEN, parse_mode=types.ParseMode.HTML, server=api_server)
 storage = MemoryStorage()
 dp = Dispatcher(bot, storage=storage)
 #database obyektlarini  yaratamiz
-user_db=UserDatabase(path_to_db="data/user.db")
-group_db=GroupDatabase(path_to_db="data/group.db")
-channel_db=ChannelDatabase(path_to_db="data/channel.db")
-cache_db=MediaCacheDatabase(path_to_db="data/cache.db")
+user_db=UserDatabase(path_to_db=f"{config.DB_DIR}/user.db")
+group_db=GroupDatabase(path_to_db=f"{config.DB_DIR}/group.db")
+channel_db=ChannelDatabase(path_to_db=f"{config.DB_DIR}/channel.db")
+cache_db=MediaCacheDatabase(path_to_db=f"{config.DB_DIR}/cache.db")
+# Worker progress'lari - xotirada yig'ilib paketlab yoziladi
+task_progress = TaskProgressRegistry(user_db, flush_interval_ms=1000)
+# Worker navbati - userlar bo'yicha adolatli, pullik task'lar oldin
+task_scheduler = TaskScheduler(
+    max_inflight=config.WORKER_CONCURRENCY,
+    per_user_inflight=config.WORKER_PER_USER,
+    starvation_seconds=config.FREE_STARVATION_SECONDS
+)
+# Worker fayllari: task bo'yicha papkalar, yosh/hajm bo'yicha tozalash va hard kvota
+artifact_store = ArtifactStore(
+    config.ARTIFACT_DIR,
+    max_age_seconds=config.ARTIFACT_MAX_AGE_HOURS * 3600,
+    quota_bytes=config.ARTIFACT_QUOTA_MB * 1024 ** 2
+)
+# Eski task/tranzaksiyalar arxivi + incremental vacuum / optimize
+archiver = Archiver(
+    user_db,
+    after_days=config.ARCHIVE_AFTER_DAYS,
+    interval=config.ARCHIVE_INTERVAL_HOURS * 3600
+)
+# Handler'lar kechikishi (ProfilingMiddleware yig'adi, /slow ko'rsatadi)
+update_profiler = HandlerProfiler(slow_threshold_ms=config.SLOW_UPDATE_MS)
+# Anti-flood token bucket'lari (ThrottlingMiddleware) - FSM storage'dan alohida
+rate_limiter = RateLimiter()
+# Gamma theme katalogi (app.on_startup sinxronni boshlaydi)
+theme_catalog = ThemeCatalog(user_db, sync_interval=config.THEME_SYNC_HOURS * 3600)
+# Barcha generatorlar uchun bitta OpenAI client (app.on_shutdown yopadi)
+openai_client = OpenAIClient(
+    config.OPENAI_API_KEY,
+    max_connections=config.OPENAI_MAX_CONNECTIONS,
+    retry=RetryPolicy(
+        max_retries=config.OPENAI_MAX_RETRIES,
+        base_delay=config.OPENAI_RETRY_BASE_DELAY,
+        max_delay=config.OPENAI_RETRY_MAX_DELAY
+    ),
+    hedge=HedgePolicy(
+        quantile=config.OPENAI_HEDGE_QUANTILE,
+        budget=config.OPENAI_HEDGE_BUDGET,
+        models=config.OPENAI_HEDGE_MODELS
+    )
+)
+# Slayd soni kiritilganda content oldindan yaratiladi (app.on_startup generatorni ulaydi)
+speculation = SpeculativeContent(
+    enabled=config.SPECULATIVE_CONTENT,
+    ttl=config.SPECULATION_TTL,
+    max_inflight=config.SPECULATION_MAX_INFLIGHT
+)
+# OpenAI / Gamma sarfi ApiUsage jadvaliga yoziladi
+usage_tracker.bind(user_db)
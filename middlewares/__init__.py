@@ -1,10 +1,15 @@
 from aiogram import Dispatcher
 
-from loader import dp
+from data.config import THROTTLE_SILENT
+from loader import dp, rate_limiter, update_profiler
+from .metrics import MetricsMiddleware
+from .profiling import ProfilingMiddleware
 from .throttling import ThrottlingMiddleware
-from .checksub import SubscriptionMiddleware
+from .user_context import UserContextMiddleware
 
 
 if __name__ == "middlewares":
-    dp.middleware.setup(ThrottlingMiddleware())
-    dp.middleware.setup(SubscriptionMiddleware())
\ No newline at end of file
+    dp.middleware.setup(MetricsMiddleware())
+    dp.middleware.setup(ProfilingMiddleware(update_profiler))
+    dp.middleware.setup(ThrottlingMiddleware(rate_limiter, silent=THROTTLE_SILENT))
+    dp.middleware.setup(UserContextMiddleware())
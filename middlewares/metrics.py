@@ -0,0 +1,51 @@
+# middlewares/metrics.py
+# Har bir update uchun handler nomi va qayta ishlash vaqtini metrikalarga yozish
+
+import time
+
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from utils.metrics import HANDLER_SECONDS, UPDATES
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    pre_process  - vaqtni boshlash (boshqa middleware'lar ham o'lchovga kiradi)
+    process      - tanlangan handler nomi
+    post_process - natijani yozish (handler topilmasa "unhandled")
+
+    Boshqa middleware'lardan oldin o'rnatiladi.
+    """
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        data['_metrics_started'] = time.perf_counter()
+
+    async def on_pre_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        data['_metrics_started'] = time.perf_counter()
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        data['_metrics_handler'] = self._handler_name()
+
+    async def on_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        data['_metrics_handler'] = self._handler_name()
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        self._observe(data, 'message')
+
+    async def on_post_process_callback_query(self, callback: types.CallbackQuery, results, data: dict):
+        self._observe(data, 'callback_query')
+
+    @staticmethod
+    def _handler_name() -> str:
+        handler = current_handler.get()
+        return handler.__name__ if handler else 'unknown'
+
+    @staticmethod
+    def _observe(data: dict, kind: str):
+        started = data.pop('_metrics_started', None)
+        handler = data.pop('_metrics_handler', 'unhandled')
+        UPDATES.labels(handler, kind).inc()
+        if started is not None:
+            HANDLER_SECONDS.labels(handler).observe(time.perf_counter() - started)
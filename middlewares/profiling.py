@@ -0,0 +1,75 @@
+# middlewares/profiling.py
+# Update'lar kechikishini handler bo'yicha yig'ish va sekin update'larni ushlash
+
+import time
+
+from aiogram import types
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from utils.db_api.database import update_query_counter
+from utils.log_pipeline import current_telegram_id
+from utils.profiling import HandlerProfiler
+
+
+class ProfilingMiddleware(BaseMiddleware):
+    """
+    Har bir message/callback uchun:
+      - boshidan oxirigacha vaqt (boshqa middleware'lar bilan)
+      - tanlangan handler nomi
+      - shu update bajargan SQLite so'rovlari soni (contextvar orqali)
+      - log yozuvlarida telegram_id (utils.log_pipeline.current_telegram_id)
+      - profiler.profile_enabled bo'lsa - cProfile (faqat sekin bo'lsa saqlanadi)
+    """
+
+    def __init__(self, profiler: HandlerProfiler):
+        self.profiler = profiler
+        super().__init__()
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        self._start(data, message.from_user.id)
+
+    async def on_pre_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        self._start(data, callback.from_user.id)
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        data['_profile_handler'] = self._handler_name()
+
+    async def on_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        data['_profile_handler'] = self._handler_name()
+
+    async def on_post_process_message(self, message: types.Message, results, data: dict):
+        self._finish(data, 'message', message.from_user.id)
+
+    async def on_post_process_callback_query(self, callback: types.CallbackQuery, results, data: dict):
+        self._finish(data, 'callback_query', callback.from_user.id)
+
+    def _start(self, data: dict, user_id: int):
+        counter = [0]
+        data['_profile_token'] = update_query_counter.set(counter)
+        data['_profile_user_token'] = current_telegram_id.set(user_id)
+        data['_profile_queries'] = counter
+        data['_profile'] = self.profiler.start_profile()
+        data['_profile_started'] = time.perf_counter()
+
+    def _finish(self, data: dict, kind: str, user_id: int):
+        started = data.pop('_profile_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        slow = duration >= self.profiler.slow_threshold
+
+        profile_text = self.profiler.stop_profile(data.pop('_profile', None), keep=slow)
+        queries = data.pop('_profile_queries', [0])[0]
+        update_query_counter.reset(data.pop('_profile_token'))
+        current_telegram_id.reset(data.pop('_profile_user_token'))
+
+        self.profiler.observe(
+            data.pop('_profile_handler', 'unhandled'), kind, duration,
+            db_queries=queries, user_id=user_id, profile=profile_text
+        )
+
+    @staticmethod
+    def _handler_name() -> str:
+        handler = current_handler.get()
+        return handler.__name__ if handler else 'unknown'
@@ -1,37 +1,86 @@
-import asyncio
+# middlewares/throttling.py
+# Anti-flood: foydalanuvchi bo'yicha token bucket'lar (utils.rate_limiter)
+#
+# Ikki daraja:
+#   flood  - user'ning barcha message/callback'lari; oshib ketsa - jim tashlanadi
+#   klass  - handler klassi (rate_limit(key=...)), narx - rate_limit(cost=...);
+#            oshib ketsa warn_interval ichida bitta ogohlantirish, qolganlari jim
+# Holat FSM storage'da saqlanmaydi - MemoryStorage throttle kalitlari bilan o'smaydi.
 
-from aiogram import types, Dispatcher
-from aiogram.dispatcher import DEFAULT_RATE_LIMIT
+from aiogram import types
 from aiogram.dispatcher.handler import CancelHandler, current_handler
 from aiogram.dispatcher.middlewares import BaseMiddleware
-from aiogram.utils.exceptions import Throttled
+
+from utils.metrics import RATE_LIMIT_KEYS, THROTTLED
+from utils.rate_limiter import RateLimiter
+
+FLOOD_BUCKET = 'flood'
+DEFAULT_BUCKET = 'default'
+
+# nom: (token / soniya, sig'im)
+BUCKETS = {
+    FLOOD_BUCKET: (3, 20),
+    DEFAULT_BUCKET: (1, 8),
+    # Task yaratish / xarid (cost 3): ketma-ket 2 ta, keyin ~30 soniyada bitta
+    'confirm': (0.1, 6),
+    # To'lov cheki (cost 2): ketma-ket 2 ta, keyin ~40 soniyada bitta
+    'receipt': (0.05, 4),
+}
 
 
 class ThrottlingMiddleware(BaseMiddleware):
     """
-    Simple middleware
+    Handler tanlangandan keyin (on_process) tekshiradi - rad etilgan update
+    handler'ga yetmaydi, metrika/profil middleware'lari esa odatdagidek yopiladi.
+
+    silent=True - ogohlantirishlar ham yuborilmaydi (hamma rad jim).
     """
 
-    def __init__(self, limit=DEFAULT_RATE_LIMIT, key_prefix='antiflood_'):
-        self.rate_limit = limit
-        self.prefix = key_prefix
-        super(ThrottlingMiddleware, self).__init__()
+    def __init__(self, limiter: RateLimiter, silent: bool = False):
+        self.limiter = limiter
+        self.silent = silent
+        for name, (rate, burst) in BUCKETS.items():
+            if name not in limiter.buckets:
+                limiter.add_bucket(name, rate, burst)
+        RATE_LIMIT_KEYS.labels().set_function(lambda: len(limiter))
+        super().__init__()
 
     async def on_process_message(self, message: types.Message, data: dict):
+        retry_after, bucket = self._consume(message.from_user.id)
+        if retry_after:
+            if self._should_warn(bucket, message.from_user.id):
+                await message.reply(self._warning(retry_after))
+            raise CancelHandler()
+
+    async def on_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        retry_after, bucket = self._consume(callback.from_user.id)
+        if retry_after:
+            if self._should_warn(bucket, callback.from_user.id):
+                await callback.answer(self._warning(retry_after))
+            raise CancelHandler()
+
+    def _consume(self, user_id: int):
+        """(retry_after, bucket) - retry_after 0 bo'lsa ruxsat"""
+        retry_after = self.limiter.consume(FLOOD_BUCKET, user_id)
+        if retry_after:
+            return retry_after, FLOOD_BUCKET
+
+        name, cost = DEFAULT_BUCKET, 1
         handler = current_handler.get()
-        dispatcher = Dispatcher.get_current()
         if handler:
-            limit = getattr(handler, "throttling_rate_limit", self.rate_limit)
-            key = getattr(handler, "throttling_key", f"{self.prefix}_{handler.__name__}")
-        else:
-            limit = self.rate_limit
-            key = f"{self.prefix}_message"
-        try:
-            await dispatcher.throttle(key, rate=limit)
-        except Throttled as t:
-            await self.message_throttled(message, t)
-            raise CancelHandler()
+            limit = getattr(handler, 'throttling_rate_limit', None)
+            cost = getattr(handler, 'throttling_cost', 1)
+            key = getattr(handler, 'throttling_key', None) or (handler.__name__ if limit else None)
+            # Noma'lum klass: limit berilgan bo'lsa - "limit soniyada bitta" bucket
+            if key and self.limiter.get_bucket(key, rate=1 / limit if limit else None, burst=max(cost, 1)):
+                name = key
+        return self.limiter.consume(name, user_id, cost), name
+
+    def _should_warn(self, bucket: str, user_id: int) -> bool:
+        warn = not self.silent and bucket != FLOOD_BUCKET and self.limiter.warn(user_id)
+        THROTTLED.labels(bucket, 'warned' if warn else 'dropped').inc()
+        return warn
 
-    async def message_throttled(self, message: types.Message, throttled: Throttled):
-        if throttled.exceeded_count <= 2:
-            await message.reply("Too many requests!")
+    @staticmethod
+    def _warning(retry_after: float) -> str:
+        return f"⏳ Juda ko'p so'rov! {max(1, round(retry_after))} soniyadan keyin qayta urinib ko'ring."
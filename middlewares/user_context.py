@@ -0,0 +1,23 @@
+# middlewares/user_context.py
+# Har bir update uchun foydalanuvchi qatorini bir marta yuklash
+
+from aiogram import types
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from loader import user_db
+
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Users qatorini (id, balans, bepul prezentatsiyalar, flaglar, admin statusi)
+    bitta so'rov bilan olib, handler data'siga "user_ctx" sifatida qo'yadi.
+
+    Handler'da ishlatish:
+        async def handler(message: types.Message, user_ctx: UserContext): ...
+    """
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        data['user_ctx'] = user_db.get_user_context(message.from_user.id)
+
+    async def on_pre_process_callback_query(self, callback: types.CallbackQuery, data: dict):
+        data['user_ctx'] = user_db.get_user_context(callback.from_user.id)
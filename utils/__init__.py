@@ -1,8 +1,15 @@
+import importlib
+
 from . import db_api
 from . import misc
 from .notify_admins import on_startup_notify
-from . import content_generator
-from . import gamma_api
-from . import presentation_worker
-from . import course_work_generator
-from . import docx_generator
+
+# Og'ir modullar (openai, python-docx) - `utils.<nom>` birinchi murojaatda yuklanadi
+_LAZY_SUBMODULES = ('content_generator', 'gamma_api', 'presentation_worker', 'course_work_generator',
+                    'docx_generator')
+
+
+def __getattr__(name):
+    if name in _LAZY_SUBMODULES:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
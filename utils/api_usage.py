@@ -0,0 +1,289 @@
+# utils/api_usage.py
+# Tashqi chaqiruvlar (OpenAI, Gamma) sarfi: tokenlar, model, vaqt, qayta urinishlar
+#
+# Har bir mantiqiy chaqiruv ApiUsage jadvaliga bitta qator bo'lib yoziladi va
+# joriy task_uuid ga bog'lanadi. task_uuid contextvar orqali uzatiladi - worker
+# uni _process_task boshida o'rnatadi, generatorlar va GammaAPI imzolari
+# o'zgarmaydi. Task'dan tashqaridagi chaqiruvlar task_uuid = NULL bilan yoziladi.
+# Hedge qilingan OpenAI chaqiruvi ham bitta qator: tokenlar/narx tugagan barcha
+# so'rovlarniki, path - javob bergan yo'l (primary / hedge / fallback).
+
+import asyncio
+import json
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from utils.metrics import EXTERNAL_RETRIES, OPENAI_HEDGES, OPENAI_PATHS, track_request
+from utils.openai_client import CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Worker bajarayotgan task (har bir task o'z asyncio.Task kontekstida)
+current_task_uuid: ContextVar[Optional[str]] = ContextVar('current_task_uuid', default=None)
+
+# USD / 1M token: (prompt, completion). Model nomi prefiks bo'yicha topiladi
+# ('gpt-4-0613' -> 'gpt-4'), eng uzun mos prefiks tanlanadi.
+MODEL_PRICES = {
+    'gpt-4': (30.0, 60.0),
+    'gpt-4-32k': (60.0, 120.0),
+    'gpt-4-turbo': (10.0, 30.0),
+    'gpt-4o': (2.5, 10.0),
+    'gpt-4o-mini': (0.15, 0.6),
+    'gpt-4.1': (2.0, 8.0),
+    'gpt-4.1-mini': (0.4, 1.6),
+    'gpt-3.5-turbo': (0.5, 1.5),
+}
+
+
+def price_for(model: Optional[str]):
+    if not model:
+        return None
+    best = None
+    for name in MODEL_PRICES:
+        if model.startswith(name) and (best is None or len(name) > len(best)):
+            best = name
+    return MODEL_PRICES[best] if best else None
+
+
+def cost_micros(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> int:
+    """Narx mikro-dollarda (1e-6 USD) - narx 1M token uchun bo'lgani sabab token * narx"""
+    price = price_for(model)
+    if price is None:
+        return 0
+    return int(round(prompt_tokens * price[0] + completion_tokens * price[1]))
+
+
+class UsageCall:
+    """
+    Bitta chaqiruvning o'lchovi
+
+        with usage_tracker.call('gamma', 'create', model=theme_id) as usage:
+            ...
+            usage.retries += 1
+            usage.status = 'ok'
+
+    Xato bilan chiqilsa status - status_code (OpenAI), 'timeout' yoki xato klassi nomi.
+    path - javob qaysi yo'ldan keldi (json_completion: primary / hedge / fallback).
+    """
+
+    __slots__ = ('tracker', 'service', 'operation', 'model', 'prompt_tokens', 'completion_tokens',
+                 'credits', 'cost_micros', 'retries', 'status', 'path', 'started', 'task_uuid')
+
+    def __init__(self, tracker, service: str, operation: str, model: str = None):
+        self.tracker = tracker
+        self.service = service
+        self.operation = operation
+        self.model = model
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.credits = 0
+        self.cost_micros = None  # None - model va tokenlardan hisoblanadi
+        self.retries = 0
+        self.status = None
+        self.path = None
+        self.task_uuid = current_task_uuid.get()
+
+    def add_tokens(self, usage, model: Optional[str]):
+        """Bir nechta so'rov (hedge) - tokenlar va narx har birining modeli bo'yicha qo'shiladi"""
+        if usage is None:
+            return
+        prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+        completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost_micros = (self.cost_micros or 0) + cost_micros(model, prompt_tokens, completion_tokens)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration_ms = int((time.perf_counter() - self.started) * 1000)
+        status = self.status
+        if exc is not None:
+            status = str(getattr(exc, 'status_code', None) or (
+                'timeout' if isinstance(exc, (TimeoutError, asyncio.TimeoutError)) else exc_type.__name__
+            ))
+        self.tracker.record(self, duration_ms, status or 'ok')
+        return False
+
+
+class ApiUsageTracker:
+    """ApiUsage jadvaliga yozuvchi (bind() dan oldin chaqiruvlar yozilmaydi)"""
+
+    def __init__(self):
+        self.db = None
+
+    def bind(self, db):
+        self.db = db
+
+    def call(self, service: str, operation: str, model: str = None) -> UsageCall:
+        return UsageCall(self, service, operation, model)
+
+    def record(self, call: UsageCall, duration_ms: int, status: str):
+        if self.db is None:
+            return
+        # Yozuv xatosi tashqi chaqiruv natijasini buzmasligi kerak
+        try:
+            self.db.add_api_usage(
+                task_uuid=call.task_uuid,
+                service=call.service,
+                operation=call.operation,
+                model=call.model,
+                prompt_tokens=call.prompt_tokens,
+                completion_tokens=call.completion_tokens,
+                credits=call.credits,
+                cost_micros=call.cost_micros if call.cost_micros is not None else
+                cost_micros(call.model, call.prompt_tokens, call.completion_tokens),
+                duration_ms=duration_ms,
+                retries=call.retries,
+                status=status,
+                path=call.path,
+            )
+        except Exception as e:
+            print(f"❌ ApiUsage yozish xato: {e}")
+
+
+usage_tracker = ApiUsageTracker()
+
+
+PRIMARY = 'primary'
+HEDGE = 'hedge'
+FALLBACK = 'fallback'
+
+
+async def _create(openai_client, operation: str, usage: UsageCall, kwargs: Dict):
+    """
+    Bitta model bilan so'rov + RetryPolicy
+
+    Qayta urinishga loyiq xatolar modelning circuit breaker'iga yoziladi;
+    muvaffaqiyatni chaqiruvchi yozadi (json_completion - JSON tekshiruvidan keyin).
+    """
+    policy = openai_client.retry
+    breaker = openai_client.breaker(kwargs.get('model'))
+    attempt = 0
+    while True:
+        try:
+            return await openai_client.client.chat.completions.with_raw_response.create(
+                timeout=openai_client.timeout_for(operation), **kwargs
+            )
+        except Exception as e:
+            retryable = policy.should_retry(e)
+            if retryable:
+                breaker.record(False)
+            if attempt >= policy.max_retries or not retryable or breaker.is_open:
+                raise
+            delay = policy.delay(attempt, e)
+            attempt += 1
+            usage.retries += 1
+            reason = str(getattr(e, 'status_code', None) or type(e).__name__)
+            EXTERNAL_RETRIES.labels('openai', operation, reason).inc()
+            logger.warning(f"⚠️ OpenAI {operation} ({kwargs.get('model')}): {reason}, "
+                           f"{attempt}-qayta urinish {delay:.1f} s dan keyin")
+            await asyncio.sleep(delay)
+
+
+async def _json_leg(openai_client, operation: str, usage: UsageCall, kwargs: Dict):
+    """Bitta yo'l: so'rov -> JSON obyekt; yaroqsiz JSON ham model xatosi hisoblanadi"""
+    model = kwargs.get('model')
+    breaker = openai_client.breaker(model)
+    started = time.perf_counter()
+    response = (await _create(openai_client, operation, usage, kwargs)).parse()
+    usage.add_tokens(getattr(response, 'usage', None), getattr(response, 'model', None) or model)
+    try:
+        content = json.loads(response.choices[0].message.content)
+        if not isinstance(content, dict):
+            raise ValueError(f"JSON obyekt emas: {type(content).__name__}")
+    except (IndexError, TypeError, ValueError) as e:
+        breaker.record(False)
+        raise ValueError(f"OpenAI {model}: yaroqsiz JSON javob ({e})") from e
+    breaker.record(True)
+    openai_client.latency.observe(operation, model, time.perf_counter() - started)
+    return response, content
+
+
+async def json_completion(openai_client, operation: str, **kwargs) -> Dict:
+    """
+    chat.completions.create + JSON javob, kechikish bo'yicha hedge va model circuit breaker'lari
+
+    Barcha OpenAI chaqiruvlari shu orqali: timeout / qayta urinish (_create),
+    metrikalar va bitta ApiUsage yozuvi (hedge / zaxira yo'llari tokenlari bilan).
+
+    - asosiy model breaker'i ochiq - darhol zaxira modelga (HedgePolicy.models)
+    - asosiy so'rov (operatsiya, model) tarixining p90 vaqtida javob bermasa -
+      hedge so'rov; birinchi kelgan yaroqli JSON olinadi, qolgani bekor qilinadi
+    - asosiy so'rov xato / yaroqsiz JSON bilan tugasa - zaxira model bir marta
+
+    Qaysi yo'l yutgani ApiUsage.path va openai_completion_path_total'da. Hech bir
+    yo'l yaroqli JSON bermasa - oxirgi xato (generatorlar shablon content'ga o'tadi).
+    """
+    model = kwargs.get('model')
+    alternate = openai_client.hedge.model_for(model)
+    openai_client.hedge.on_call()
+
+    with track_request('openai', operation) as call, \
+            usage_tracker.call('openai', operation, model=model) as usage:
+        legs = {}
+
+        def launch(leg_model: str, path: str):
+            leg = asyncio.ensure_future(_json_leg(openai_client, operation, usage, {**kwargs, 'model': leg_model}))
+            legs[leg] = (path, leg_model)
+
+        if openai_client.breaker(model).allow():
+            launch(model, PRIMARY)
+            hedge_after = openai_client.hedge_delay(operation, model)
+            spare = True  # hedge / zaxira yo'li hali ishlatilmagan
+        elif alternate != model and openai_client.breaker(alternate).allow():
+            launch(alternate, FALLBACK)
+            hedge_after, spare = None, False
+        else:
+            raise CircuitOpenError(f"OpenAI {model}: circuit ochiq")
+
+        winner = None
+        error = None
+        try:
+            while legs and winner is None:
+                done, _ = await asyncio.wait(legs, timeout=hedge_after, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # Asosiy so'rov p90 dan sekin
+                    hedge_after = None
+                    if spare and openai_client.hedge.take() and openai_client.breaker(alternate).allow():
+                        spare = False
+                        OPENAI_HEDGES.labels(operation, alternate).inc()
+                        launch(alternate, HEDGE)
+                    continue
+
+                for leg in done:
+                    path, leg_model = legs.pop(leg)
+                    try:
+                        response, content = leg.result()
+                    except Exception as e:
+                        error = e
+                        logger.warning(f"⚠️ OpenAI {operation} {path} ({leg_model}) xato: {e}")
+                        continue
+                    winner = (path, leg_model, response, content)
+                    break
+
+                if winner is None and not legs and spare and alternate != model and \
+                        openai_client.breaker(alternate).allow():
+                    spare, hedge_after = False, None
+                    launch(alternate, FALLBACK)
+        finally:
+            for leg in legs:
+                leg.cancel()
+            if legs:
+                await asyncio.gather(*legs, return_exceptions=True)
+
+        if winner is None:
+            raise error or CircuitOpenError(f"OpenAI {model}: zaxira model circuit'i ochiq")
+
+        path, leg_model, response, content = winner
+        call.code = '200'
+        usage.model = getattr(response, 'model', None) or leg_model
+        usage.path = path
+        OPENAI_PATHS.labels(operation, path).inc()
+        if path != PRIMARY:
+            logger.info(f"🔀 OpenAI {operation}: javob {path} yo'lidan ({leg_model})")
+    return content
@@ -0,0 +1,139 @@
+# utils/archiver.py
+# PresentationTasks / Transactions uchun hot-cold arxiv va bazaga texnik xizmat
+#
+# Yopilgan (completed/failed task, approved/rejected tranzaksiya) va after_days
+# dan eski qatorlar *Archive jadvallariga ko'chiriladi (task answers - zlib).
+# Faol jadvallar va ularning indekslari kichik qoladi: dashboard'lar, worker va
+# get_user_* so'rovlari faqat yangi qatorlarni ko'radi. Arxiv shaffof:
+#   - get_task_by_uuid / get_transaction_by_id - topilmasa arxivdan
+#   - get_user_tasks / get_user_transactions - limit to'lmasa arxivdan to'ldiriladi
+#   - "jami" statistikalar - ArchiveTotals yig'indisi qo'shiladi
+# Ko'chirish chunk_size qatorlik qisqa tranzaksiyalarda, executor'da va har
+# bo'lakdan keyin pauza bilan - bot yozuvlari uzoq kutmaydi. Keyin bo'shagan
+# sahifalar incremental_vacuum bilan bo'laklab qaytariladi va PRAGMA optimize
+# (cheklangan ANALYZE) bajariladi. To'liq VACUUM faqat /archive vacuum orqali.
+# Shu o'tishda idempotency_hours dan eski IdempotencyKeys qatorlari ham
+# o'chiriladi (arxivlanmaydi - kalit faqat takroriy tasdiqlashni ushlaydi).
+
+import asyncio
+import logging
+import time
+from typing import Dict
+
+from utils.metrics import ARCHIVED_ROWS
+
+logger = logging.getLogger(__name__)
+
+# Dashboard'larning bugun/hafta/oy oynalari faqat faol jadvallarni o'qiydi
+MIN_AFTER_DAYS = 35
+
+
+class Archiver:
+    def __init__(self, db, after_days: int = 90, chunk_size: int = 500, interval: float = 24 * 3600,
+                 pause: float = 0.2, vacuum_pages: int = 2000, first_run_delay: float = 600,
+                 idempotency_hours: float = 24):
+        self.db = db
+        self.after_days = max(MIN_AFTER_DAYS, int(after_days))
+        self.idempotency_hours = idempotency_hours
+        self.chunk_size = chunk_size
+        self.interval = interval
+        self.pause = pause
+        self.vacuum_pages = vacuum_pages
+        self.first_run_delay = first_run_delay
+        self.last_result: Dict = {}
+        self.running = False
+        self._task = None
+
+    async def _call(self, func, *args):
+        return await asyncio.get_event_loop().run_in_executor(None, func, *args)
+
+    async def _archive(self, chunk, table: str) -> int:
+        moved = 0
+        while True:
+            count = await self._call(chunk, self.after_days, self.chunk_size)
+            if not count:
+                return moved
+            moved += count
+            ARCHIVED_ROWS.labels(table).inc(count)
+            await asyncio.sleep(self.pause)
+
+    async def purge_idempotency_keys(self) -> int:
+        purged = 0
+        while True:
+            count = await self._call(self.db.purge_idempotency_keys_chunk, self.idempotency_hours, self.chunk_size)
+            if not count:
+                return purged
+            purged += count
+            await asyncio.sleep(self.pause)
+
+    async def reclaim_space(self) -> int:
+        """Bo'sh sahifalarni bo'laklab faylga qaytarish; qolgan bo'sh sahifalar"""
+        stats = await self._call(self.db.get_archive_stats)
+        if stats['auto_vacuum'] != 2:
+            # Rejim hali yoqilmagan (katta baza) - bo'sh sahifalar qayta ishlatiladi, fayl kichraymaydi
+            return stats['freelist_count']
+        free = stats['freelist_count']
+        while free > 0:
+            left = await self._call(self.db.incremental_vacuum, self.vacuum_pages)
+            if left >= free:
+                break
+            free = left
+            await asyncio.sleep(self.pause)
+        return free
+
+    async def run_once(self) -> Dict:
+        """
+        Bitta to'liq o'tish: arxivlash, joyni qaytarish, optimize
+
+        Returns:
+            dict: tasks, transactions (ko'chirilganlar), idempotency_keys (o'chirilganlar), free_pages, seconds
+                  (allaqachon bajarilayotgan bo'lsa - {'busy': True})
+        """
+        if self.running:
+            return {'busy': True}
+        self.running = True
+        try:
+            started = time.perf_counter()
+            result = {
+                'tasks': await self._archive(self.db.archive_tasks_chunk, 'PresentationTasks'),
+                'transactions': await self._archive(self.db.archive_transactions_chunk, 'Transactions'),
+                'idempotency_keys': await self.purge_idempotency_keys(),
+            }
+            result['free_pages'] = await self.reclaim_space()
+            await self._call(self.db.optimize)
+            result['seconds'] = time.perf_counter() - started
+            self.last_result = result
+            if result['tasks'] or result['transactions']:
+                logger.info(f"🗄 Arxivlandi: {result['tasks']} task, {result['transactions']} tranzaksiya "
+                            f"({result['seconds']:.1f} s), bo'sh sahifalar: {result['free_pages']}")
+            if result['idempotency_keys']:
+                logger.info(f"🧹 {result['idempotency_keys']} ta eski idempotency kaliti o'chirildi")
+            return result
+        finally:
+            self.running = False
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"✅ Arxivlash ishga tushdi ({self.after_days} kundan eski, har {int(self.interval)} s)")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        # Startup yuklamasi bilan ustma-ust tushmasin
+        await asyncio.sleep(self.first_run_delay)
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error(f"Arxivlash xato: {e}")
+            await asyncio.sleep(self.interval)
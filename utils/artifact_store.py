@@ -0,0 +1,264 @@
+# utils/artifact_store.py
+# Worker fayllari (PPTX/DOCX/PDF) uchun task bo'yicha papkalar va fon tozalovchi
+#
+# Avval fayllar to'g'ridan-to'g'ri /tmp ga yozilardi va xato yo'llarida (yuborish
+# xatosi, PDF'dan keyin o'chmagan DOCX, soffice profil/lock fayllari) qolib
+# ketardi. Endi har bir task o'z papkasida ishlaydi: <root>/<task_uuid>/
+#   - task yakunlanganda (completed/failed) papka butunlay o'chiriladi
+#   - janitor har sweep_interval da: max_age dan eski papkalar, keyin hajm
+#     soft limit (kvotaning 80%) dan oshsa - eng eskilaridan boshlab
+#   - hard kvota: bo'sh joy topilmasa yangi task papkasi berilmaydi
+#     (ArtifactQuotaExceeded - task odatdagi xato yo'li bilan failed + refund)
+# Bajarilayotgan task'lar papkasi hech qachon o'chirilmaydi. Checkpoint'dagi
+# artifact o'chgan bo'lsa, resume uni generationId'dan qayta yuklab oladi.
+# Sweep faqat executor thread'ida va bir vaqtda bitta; usage_bytes / faol
+# task'lar event loop va sweep thread'i o'rtasida lock bilan o'zgartiriladi.
+
+import asyncio
+import fnmatch
+import logging
+import os
+import shutil
+import threading
+import time
+from typing import Dict, Set
+
+from utils.metrics import ARTIFACT_BYTES, ARTIFACT_RECLAIMED_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Eski versiya /tmp ga to'g'ridan-to'g'ri yozgan fayllar
+LEGACY_DIR = '/tmp'
+LEGACY_PATTERNS = (
+    'presentation_*.pptx',
+    'referat_*.docx', 'referat_*.pdf',
+    'kurs_ishi_*.docx', 'kurs_ishi_*.pdf',
+    'mustaqil_ish_*.docx', 'mustaqil_ish_*.pdf',
+    'ilmiy_maqola_*.docx', 'ilmiy_maqola_*.pdf',
+    'hisobot_*.docx', 'hisobot_*.pdf',
+)
+
+SOFT_LIMIT_RATIO = 0.8
+
+
+class ArtifactQuotaExceeded(Exception):
+    pass
+
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for folder, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(folder, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class ArtifactStore:
+    """
+    Task papkalari
+
+        workdir = await artifacts.task_dir(task_uuid)   # <root>/<task_uuid>, faol deb belgilanadi
+        ...                                             # artifacts.record(path) - yozilgan fayl
+        artifacts.release(task_uuid)                    # yakunlandi - papka o'chiriladi
+        artifacts.deactivate(task_uuid)                 # to'xtatildi - resume uchun qoladi
+    """
+
+    def __init__(self, root: str, max_age_seconds: float = 6 * 3600, quota_bytes: int = 2 * 1024 ** 3,
+                 sweep_interval: float = 600, clean_legacy: bool = True):
+        self.root = root
+        self.max_age_seconds = max_age_seconds
+        self.quota_bytes = quota_bytes
+        self.sweep_interval = sweep_interval
+        self.clean_legacy = clean_legacy
+        self.usage_bytes = 0
+        self._active: Set[str] = set()
+        self._sweep_task = None
+        # usage_bytes va _active - loop va sweep thread'i o'rtasida
+        self._lock = threading.Lock()
+        # Bir vaqtda bitta sweep (thread'lar bo'yicha)
+        self._sweep_lock = threading.Lock()
+        # Loop tomonida: kvota sweep'i va janitor executor'ga navbat bilan
+        self._sweep_guard = asyncio.Lock()
+        ARTIFACT_BYTES.labels().set_function(lambda: self.usage_bytes)
+
+    # ==================== TASK PAPKALARI ====================
+
+    def path_for(self, task_uuid: str) -> str:
+        # task_uuid - uuid4 yoki benchmark nomi; papka nomi sifatida xavfsiz qismi
+        safe = "".join(c for c in str(task_uuid) if c.isalnum() or c in '-_') or 'task'
+        return os.path.join(self.root, safe)
+
+    async def task_dir(self, task_uuid: str) -> str:
+        """Task papkasi (bor bo'lsa - o'sha, checkpoint'dagi fayllar bilan)"""
+        path = self.path_for(task_uuid)
+        if not os.path.isdir(path):
+            if self.usage_bytes >= self.quota_bytes:
+                async with self._sweep_guard:
+                    # Kutilgan vaqtda boshqa sweep joy bo'shatgan bo'lishi mumkin
+                    if self.usage_bytes >= self.quota_bytes:
+                        await asyncio.get_running_loop().run_in_executor(None, self.sweep)
+                if self.usage_bytes >= self.quota_bytes:
+                    raise ArtifactQuotaExceeded(
+                        f"Artifact kvotasi to'ldi: {self.usage_bytes // 1024 ** 2} MB / "
+                        f"{self.quota_bytes // 1024 ** 2} MB"
+                    )
+        # Papka yaratilishidan oldin faol - sweep uni o'chirmaydi
+        with self._lock:
+            self._active.add(task_uuid)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def record(self, path: str):
+        """Yozilgan fayl hajmini hisobga olish (keyingi sweep'gacha kvota tekshiruvi uchun)"""
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return
+        with self._lock:
+            self.usage_bytes += size
+
+    def deactivate(self, task_uuid: str):
+        with self._lock:
+            self._active.discard(task_uuid)
+
+    def release(self, task_uuid: str) -> int:
+        """Task yakunlandi - papkani o'chirish; bo'shatilgan baytlar"""
+        with self._lock:
+            self._active.discard(task_uuid)
+        return self._remove(self.path_for(task_uuid), 'task_done')
+
+    def _is_active(self, path: str) -> bool:
+        with self._lock:
+            return any(self.path_for(task_uuid) == path for task_uuid in self._active)
+
+    def _remove(self, path: str, reason: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        size = _tree_size(path) if os.path.isdir(path) else os.lstat(path).st_size
+        try:
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+        except OSError as e:
+            logger.warning(f"⚠️ Artifact o'chirilmadi: {path} - {e}")
+            return 0
+        with self._lock:
+            self.usage_bytes = max(0, self.usage_bytes - size)
+        ARTIFACT_RECLAIMED_BYTES.labels(reason).inc(size)
+        return size
+
+    # ==================== JANITOR ====================
+
+    def sweep(self, now: float = None) -> Dict[str, int]:
+        """
+        Eski va ortiqcha papkalarni o'chirish (bloklovchi - executor thread'ida chaqiriladi)
+
+        Returns:
+            dict: sabab bo'yicha bo'shatilgan baytlar (age, quota, legacy) va usage
+        """
+        with self._sweep_lock:
+            return self._sweep(now)
+
+    def _sweep(self, now: float = None) -> Dict[str, int]:
+        if now is None:
+            now = time.time()
+        reclaimed = {'age': 0, 'quota': 0, 'legacy': 0}
+        os.makedirs(self.root, exist_ok=True)
+
+        entries = []
+        with self._lock:
+            active_paths = {self.path_for(task_uuid) for task_uuid in self._active}
+        with os.scandir(self.root) as it:
+            for entry in it:
+                try:
+                    mtime = entry.stat(follow_symlinks=False).st_mtime
+                except OSError:
+                    continue
+                size = _tree_size(entry.path) if entry.is_dir(follow_symlinks=False) else \
+                    entry.stat(follow_symlinks=False).st_size
+                entries.append((mtime, entry.path, size))
+
+        with self._lock:
+            self.usage_bytes = sum(size for _, _, size in entries)
+        candidates = sorted(entry for entry in entries if entry[1] not in active_paths)
+
+        # Yoshi bo'yicha
+        kept = []
+        for mtime, path, size in candidates:
+            if now - mtime > self.max_age_seconds:
+                # Skan paytida resume qilingan task papkasi o'chirilmaydi
+                if not self._is_active(path):
+                    reclaimed['age'] += self._remove(path, 'age')
+            else:
+                kept.append((mtime, path, size))
+
+        # Hajm bo'yicha - eng eskilaridan
+        soft_limit = self.quota_bytes * SOFT_LIMIT_RATIO
+        for mtime, path, size in kept:
+            if self.usage_bytes <= soft_limit:
+                break
+            if not self._is_active(path):
+                reclaimed['quota'] += self._remove(path, 'quota')
+
+        if self.clean_legacy:
+            reclaimed['legacy'] = self._sweep_legacy(now)
+
+        reclaimed['usage'] = self.usage_bytes
+        return reclaimed
+
+    def _sweep_legacy(self, now: float) -> int:
+        reclaimed = 0
+        try:
+            with os.scandir(LEGACY_DIR) as it:
+                for entry in it:
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if not any(fnmatch.fnmatch(entry.name, pattern) for pattern in LEGACY_PATTERNS):
+                        continue
+                    stat = entry.stat(follow_symlinks=False)
+                    if now - stat.st_mtime > self.max_age_seconds:
+                        try:
+                            os.remove(entry.path)
+                        except OSError:
+                            continue
+                        reclaimed += stat.st_size
+                        ARTIFACT_RECLAIMED_BYTES.labels('legacy').inc(stat.st_size)
+        except OSError as e:
+            logger.warning(f"⚠️ {LEGACY_DIR} tozalashda xato: {e}")
+        return reclaimed
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+            logger.info(f"✅ Artifact janitor ishga tushdi ({self.root}, kvota "
+                        f"{self.quota_bytes // 1024 ** 2} MB)")
+
+    async def stop(self):
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+
+    async def _sweep_loop(self):
+        while True:
+            try:
+                # Katta papkalarda os.walk event loop'ni ushlab turmasin
+                async with self._sweep_guard:
+                    result = await asyncio.get_running_loop().run_in_executor(None, self.sweep)
+                freed = result['age'] + result['quota'] + result['legacy']
+                if freed:
+                    logger.info(f"🧹 Artifact'lar tozalandi: {freed // 1024} KB "
+                                f"(yosh {result['age'] // 1024} KB, kvota {result['quota'] // 1024} KB, "
+                                f"eski /tmp {result['legacy'] // 1024} KB), band: {result['usage'] // 1024 ** 2} MB")
+            except Exception as e:
+                logger.error(f"Artifact janitor xato: {e}")
+            await asyncio.sleep(self.sweep_interval)
@@ -2,7 +2,9 @@ import asyncio
 import json
 import logging
 from typing import Dict, List, Optional
-from openai import AsyncOpenAI
+
+from utils.api_usage import json_completion
+from utils.openai_client import OpenAIClient
 
 logger = logging.getLogger(__name__)
 
@@ -13,8 +15,9 @@ class ContentGenerator:
     Pitch Deck va Prezentatsiya uchun
     """
 
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, openai_client: OpenAIClient):
+        # Umumiy client (ulanish havzasi, timeout'lar, qayta urinishlar) - loader.openai_client
+        self.openai = openai_client
 
     async def generate_pitch_deck_content(
             self,
@@ -46,7 +49,8 @@ class ContentGenerator:
         try:
             logger.info(f"OpenAI: Pitch deck content yaratish boshlandi (model: {model})")
 
-            response = await self.client.chat.completions.create(
+            content = await json_completion(
+                self.openai, 'pitch_deck',
                 model=model,
                 messages=[
                     {
@@ -63,7 +67,6 @@ class ContentGenerator:
                 response_format={"type": "json_object"}
             )
 
-            content = json.loads(response.choices[0].message.content)
             logger.info(f"OpenAI: Pitch deck content yaratildi")
 
             return content
@@ -77,7 +80,8 @@ class ContentGenerator:
             topic: str,
             details: str,
             slide_count: int,
-            use_gpt4: bool = False
+            use_gpt4: bool = False,
+            fallback: bool = True
     ) -> Dict:
         """
         Oddiy prezentatsiya uchun content yaratish
@@ -86,6 +90,7 @@ class ContentGenerator:
             topic: Prezentatsiya mavzusi
             details: Qo'shimcha ma'lumotlar
             slide_count: Slaydlar soni
+            fallback: OpenAI xatosida shablon content (False - xato qaytariladi)
 
         Returns:
             Prezentatsiya content (JSON)
@@ -125,7 +130,8 @@ Jami {slide_count} ta slayd yarating. HAR BIR SLAYD BATAFSIL!
         try:
             logger.info(f"OpenAI: Prezentatsiya content yaratish boshlandi (model: {model})")
 
-            response = await self.client.chat.completions.create(
+            content = await json_completion(
+                self.openai, 'presentation',
                 model=model,
                 messages=[
                     {
@@ -142,13 +148,14 @@ Jami {slide_count} ta slayd yarating. HAR BIR SLAYD BATAFSIL!
                 response_format={"type": "json_object"}
             )
 
-            content = json.loads(response.choices[0].message.content)
             logger.info(f"OpenAI: Prezentatsiya content yaratildi")
 
             return content
 
         except Exception as e:
             logger.error(f"OpenAI xato: {e}")
+            if not fallback:
+                raise
             return self._generate_fallback_presentation_content(topic, details, slide_count)
 
     async def _generate_market_analysis(self, project_info: str, target_audience: str, model: str) -> Dict:
@@ -170,7 +177,8 @@ Bozor tahlili JSON:
 """
 
         try:
-            response = await self.client.chat.completions.create(
+            return await json_completion(
+                self.openai, 'market_analysis',
                 model=model,
                 messages=[
                     {"role": "system", "content": "Siz bozor tahlili mutaxassisisiz."},
@@ -181,8 +189,6 @@ Bozor tahlili JSON:
                 response_format={"type": "json_object"}
             )
 
-            return json.loads(response.choices[0].message.content)
-
         except:
             return {
                 'tam': "100 mln dollar",
@@ -3,10 +3,11 @@
 # ✅ YANGILANGAN - Ko'proq va batafsil content
 
 import asyncio
-import json
 import logging
 from typing import Dict, List, Optional
-from openai import AsyncOpenAI
+
+from utils.api_usage import json_completion
+from utils.openai_client import OpenAIClient
 
 logger = logging.getLogger(__name__)
 
@@ -17,8 +18,9 @@ class CourseWorkGenerator:
     ✅ YANGILANGAN - Batafsil content
     """
 
-    def __init__(self, api_key: str):
-        self.client = AsyncOpenAI(api_key=api_key)
+    def __init__(self, openai_client: OpenAIClient):
+        # Umumiy client (ulanish havzasi, timeout'lar, qayta urinishlar) - loader.openai_client
+        self.openai = openai_client
 
     async def generate_course_work_content(
             self,
@@ -191,7 +193,8 @@ Jami {total_words} so'zdan kam bo'lmasin!
         try:
             logger.info(f"📝 OpenAI: {structure['name']} yaratish boshlandi ({total_words} so'z)")
 
-            response = await self.client.chat.completions.create(
+            content = await json_completion(
+                self.openai, 'course_work',
                 model=model,
                 messages=[
                     {
@@ -218,7 +221,6 @@ MUHIM QOIDALAR:
                 response_format={"type": "json_object"}
             )
 
-            content = json.loads(response.choices[0].message.content)
             logger.info(f"✅ OpenAI: {structure['name']} yaratildi")
 
             # Validatsiya va to'ldirish
@@ -0,0 +1,148 @@
+# utils/data_export.py
+# Admin eksporti: Users, Transactions, PresentationTasks, PlanPurchases
+#
+# Qatorlar Database.iter_rows() orqali bo'laklab o'qiladi va darhol faylga
+# yoziladi - XLSX uchun xlsxwriter'ning constant_memory rejimi, CSV uchun
+# gzip oqimi. Xotira jadval hajmiga bog'liq emas. Funksiyalar sinxron -
+# handler'lar ularni executor'da ishga tushiradi.
+
+import csv
+import gzip
+import io
+import os
+import time
+from typing import Dict, List
+
+# Excel varag'idagi maksimal qatorlar soni (sarlavha bilan)
+XLSX_MAX_ROWS = 1_048_576
+
+# (nom, SQL) - answers (katta JSON) eksport qilinmaydi; arxivlangan qatorlar ham kiradi
+EXPORT_QUERIES = {
+    'users': (
+        "Users",
+        """SELECT id, telegram_id, username, balance, free_presentations, total_spent, total_deposited,
+                  is_active, is_blocked, last_active, created_at
+           FROM Users ORDER BY id"""
+    ),
+    'transactions': (
+        "Transactions",
+        """SELECT t.id, u.telegram_id, t.transaction_type, t.amount, t.balance_before, t.balance_after,
+                  t.description, t.status, t.admin_id, t.created_at, t.updated_at
+           FROM (SELECT id, user_id, transaction_type, amount, balance_before, balance_after, description,
+                        status, admin_id, created_at, updated_at FROM Transactions
+                 UNION ALL
+                 SELECT id, user_id, transaction_type, amount, balance_before, balance_after, description,
+                        status, admin_id, created_at, updated_at FROM TransactionsArchive) t
+           LEFT JOIN Users u ON u.id = t.user_id
+           ORDER BY t.id"""
+    ),
+    'tasks': (
+        "PresentationTasks",
+        """SELECT p.id, u.telegram_id, p.task_uuid, p.presentation_type, p.slide_count, p.status,
+                  p.progress, p.amount_charged, p.error_message, p.started_at, p.completed_at, p.created_at
+           FROM (SELECT id, user_id, task_uuid, presentation_type, slide_count, status, progress, amount_charged,
+                        error_message, started_at, completed_at, created_at FROM PresentationTasks
+                 UNION ALL
+                 SELECT id, user_id, task_uuid, presentation_type, slide_count, status, progress, amount_charged,
+                        error_message, started_at, completed_at, created_at FROM PresentationTasksArchive) p
+           LEFT JOIN Users u ON u.id = p.user_id
+           ORDER BY p.id"""
+    ),
+    'purchases': (
+        "PlanPurchases",
+        """SELECT pp.id, u.telegram_id, pp.plan_id, bp.title, pp.price, pp.purchased_at
+           FROM PlanPurchases pp
+           LEFT JOIN Users u ON u.id = pp.user_id
+           LEFT JOIN BusinessPlans bp ON bp.id = pp.plan_id
+           ORDER BY pp.id"""
+    ),
+}
+
+
+def export_xlsx(db, path: str, tables: List[str] = None) -> Dict:
+    """
+    Jadvallarni bitta XLSX faylga (har biri alohida varaq) yozish
+
+    Returns:
+        Dict: {'path', 'rows': {jadval: soni}, 'seconds', 'size'}
+    """
+    import xlsxwriter  # faqat eksportda kerak - bot starti uchun yuklanmaydi
+
+    started = time.perf_counter()
+    rows_written = {}
+
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_urls': False})
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#DDEBF7'})
+    try:
+        for key in tables or EXPORT_QUERIES:
+            title, sql = EXPORT_QUERIES[key]
+            rows = db.iter_rows(sql)
+            header = next(rows)
+
+            part = 1
+            sheet = _add_sheet(workbook, title, part, header, header_format)
+            row_index = 1
+            count = 0
+            for row in rows:
+                if row_index >= XLSX_MAX_ROWS:
+                    # Varaq to'ldi - davomi keyingi varaqda
+                    part += 1
+                    sheet = _add_sheet(workbook, title, part, header, header_format)
+                    row_index = 1
+                sheet.write_row(row_index, 0, row)
+                row_index += 1
+                count += 1
+            rows_written[title] = count
+    finally:
+        workbook.close()
+
+    return {
+        'path': path,
+        'rows': rows_written,
+        'seconds': time.perf_counter() - started,
+        'size': os.path.getsize(path),
+    }
+
+
+def _add_sheet(workbook, title: str, part: int, header: List[str], header_format):
+    sheet = workbook.add_worksheet(title if part == 1 else f"{title} ({part})")
+    sheet.write_row(0, 0, header, header_format)
+    sheet.freeze_panes(1, 0)
+    return sheet
+
+
+def export_csv_gz(db, directory: str, tables: List[str] = None) -> Dict:
+    """
+    Har bir jadvalni alohida <jadval>.csv.gz fayliga yozish
+
+    Returns:
+        Dict: {'paths', 'rows': {jadval: soni}, 'seconds', 'size'}
+    """
+    started = time.perf_counter()
+    rows_written = {}
+    paths = []
+
+    for key in tables or EXPORT_QUERIES:
+        title, sql = EXPORT_QUERIES[key]
+        path = os.path.join(directory, f"{title}.csv.gz")
+        rows = db.iter_rows(sql)
+
+        with gzip.open(path, 'wb', compresslevel=6) as raw:
+            # utf-8-sig - Excel kirill/lotin harflarini to'g'ri ochishi uchun
+            with io.TextIOWrapper(raw, encoding='utf-8-sig', newline='') as stream:
+                writer = csv.writer(stream)
+                writer.writerow(next(rows))
+                count = 0
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+
+        rows_written[title] = count
+        paths.append(path)
+
+    return {
+        'paths': paths,
+        'rows': rows_written,
+        'seconds': time.perf_counter() - started,
+        'size': sum(os.path.getsize(path) for path in paths),
+    }
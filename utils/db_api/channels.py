@@ -98,6 +98,17 @@ class ChannelDatabase(Database):
             logger.error(f"❌ Kanallarni olishda xato: {e}")
             return []
 
+    def get_channels_page(self, after: int = None, before: int = None, limit: int = 10):
+        """Faol kanallar - keyset sahifa (id tartibida)"""
+        try:
+            return self.fetch_page(
+                "SELECT * FROM Channels WHERE (is_active = TRUE OR is_active = 1)",
+                after=after, before=before, limit=limit
+            )
+        except Exception as e:
+            logger.error(f"❌ Kanallarni olishda xato: {e}")
+            return [], False
+
     def get_channel_by_id(self, channel_id: int):
         """Kanal ID bo'yicha olish"""
         try:
@@ -1,16 +1,40 @@
 # database.py: Umumiy ma'lumotlar bazasi bilan bog'lanish va "execute" funksiyasi
+import logging
 import sqlite3
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 
-def logger(statement):
-    print(f"""
-_____________________________________________________        
-Executing: 
-{statement}
-_____________________________________________________
-""")
+from utils.metrics import DB_QUERY_SECONDS
+
+sql_logger = logging.getLogger('utils.db_api.sql')
+
+
+def trace_sql(statement):
+    sql_logger.debug(statement)
+
+
+# Ulanishning set_trace_callback'i: None - o'chirilgan (har so'rovga qo'shimcha chaqiruv yo'q),
+# SQL_TRACE=1 bo'lsa app trace_sql'ni o'rnatadi; benchmark'lar so'rovlarni yig'ish uchun almashtiradi
+logger = None
+
+# Joriy update (asyncio task) uchun so'rovlar hisoblagichi - ProfilingMiddleware o'rnatadi
+update_query_counter: ContextVar = ContextVar('update_query_counter', default=None)
+
+
+def _count_query():
+    Database.query_count += 1
+    counter = update_query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
 
 class Database:
+    # Jarayon bo'yicha bajarilgan so'rovlar (ulanishlar) soni - benchmark uchun
+    query_count = 0
+
     def __init__(self, path_to_db="main.db"):
         self.path_to_db = path_to_db
 
@@ -21,6 +45,8 @@ class Database:
     def execute(self, sql: str, parameters: tuple = None, fetchone=False, fetchall=False, commit=False):
         if not parameters:
             parameters = ()
+        _count_query()
+        started = time.perf_counter()
         connection = self.connection
         connection.set_trace_callback(logger)
         cursor = connection.cursor()
@@ -38,8 +64,97 @@ class Database:
             connection.rollback()
         finally:
             connection.close()
+            # Chaqirgan metod nomi bo'yicha (masalan get_user_context)
+            DB_QUERY_SECONDS.labels(sys._getframe(1).f_code.co_name).observe(time.perf_counter() - started)
         return data
 
+    def execute_in(self, cursor, sql: str, parameters: tuple = None, fetchall=False):
+        """
+        Sxema metodlari uchun: cursor berilsa - o'sha tranzaksiyada (xato yuqoriga uzatiladi,
+        migratsiya butunligicha bekor qilinadi), aks holda odatdagi execute(commit=True)
+        """
+        if cursor is None:
+            return self.execute(sql, parameters=parameters, fetchall=fetchall, commit=not fetchall)
+        cursor.execute(sql, parameters or ())
+        return cursor.fetchall() if fetchall else None
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        """
+        Bitta ulanishda bir nechta so'rovni atomik bajarish
+
+        Blok ichida xato bo'lsa ROLLBACK qilinadi va xato yuqoriga uzatiladi.
+        immediate=True - yozish qulfini boshidanoq olish (BEGIN IMMEDIATE)
+        """
+        _count_query()
+        started = time.perf_counter()
+        site = sys._getframe(2).f_code.co_name  # 1 - contextlib.__enter__
+        connection = self.connection
+        connection.set_trace_callback(logger)
+        connection.isolation_level = None
+        cursor = connection.cursor()
+        try:
+            cursor.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            yield cursor
+            cursor.execute("COMMIT")
+        except BaseException:
+            if connection.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+            DB_QUERY_SECONDS.labels(site).observe(time.perf_counter() - started)
+
+    def iter_rows(self, sql: str, parameters: tuple = None, batch_size: int = 5000):
+        """
+        Natijani bo'laklab o'qish (fetchmany) - butun jadval xotiraga yuklanmaydi
+
+        Birinchi qiymat - ustun nomlari, keyin qatorlar.
+        """
+        _count_query()
+        connection = self.connection
+        connection.set_trace_callback(logger)
+        try:
+            cursor = connection.execute(sql, parameters or ())
+            yield [column[0] for column in cursor.description]
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            connection.close()
+
+    def fetch_page(self, sql: str, parameters: tuple = None, key: str = 'id',
+                   after: int = None, before: int = None, limit: int = 10):
+        """
+        Keyset sahifa (OFFSET'siz): sql - WHERE sharti bilan tugaydigan SELECT
+
+        after  - key shundan katta qatorlar (keyingi sahifa, after=None - boshidan)
+        before - key shundan kichik qatorlar (oldingi sahifa)
+
+        Returns:
+            (rows, has_more): rows key o'sish tartibida; has_more - shu yo'nalishda yana qator bor
+        """
+        parameters = tuple(parameters or ())
+        if before is not None:
+            sql += f" AND {key} < ? ORDER BY {key} DESC LIMIT ?"
+            parameters += (before, limit + 1)
+        else:
+            sql += f" AND {key} > ? ORDER BY {key} LIMIT ?"
+            parameters += (after or 0, limit + 1)
+        rows = self.execute(sql, parameters=parameters, fetchall=True) or []
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if before is not None:
+            rows.reverse()
+        return rows, has_more
+
+    def explain(self, sql: str, parameters: tuple = None) -> list:
+        """EXPLAIN QUERY PLAN natijasi (detail qatorlari)"""
+        rows = self.execute(f"EXPLAIN QUERY PLAN {sql}", parameters=parameters, fetchall=True) or []
+        return [row[3] for row in rows]
+
     @staticmethod
     def format_args(sql, parameters: dict):
         sql += " AND ".join([f"{item} = ?" for item in parameters])
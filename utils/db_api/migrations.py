@@ -0,0 +1,182 @@
+# migrations.py: user.db sxemasi uchun versiyalangan migratsiyalar
+#
+# Qo'llanilgan versiya PRAGMA user_version da saqlanadi (tarix - SchemaMigrations
+# jadvalida). Startup'da versiya oxirgisiga teng bo'lsa, bitta PRAGMA o'qishdan
+# boshqa hech narsa bajarilmaydi. Yangi jadval/indeks kerak bo'lsa - MIGRATIONS
+# ro'yxatiga keyingi raqam bilan qo'shing, eskilarini o'zgartirmang.
+#
+# Har bir migratsiya bitta tranzaksiyada: funksiya (db, cursor) shu cursor'da
+# ishlaydi, versiya ham shu tranzaksiyada yoziladi. Xato bo'lsa hammasi bekor
+# qilinadi, versiya oshmaydi va MigrationError - bot ishga tushmaydi. VACUUM
+# kabi tranzaksiyada bajarilmaydigan qadam - funksiya qaytargan callable,
+# commit'dan keyin chaqiriladi.
+
+
+class MigrationError(Exception):
+    pass
+
+
+def _baseline(db, cursor):
+    """Mavjud create_table_* metodlari (IF NOT EXISTS - eski bazalarda ham xavfsiz)"""
+    db.create_table_users(cursor)
+    db.create_table_transactions(cursor)
+    db.create_table_pricing(cursor)
+    db.create_table_presentation_tasks(cursor)
+    db.create_business_plans_table(cursor)
+
+
+HOT_QUERY_INDEXES = [
+    # Users: created_at ikki formatda yoziladi ('YYYY-MM-DDTHH:MM:SS.ffffff' add_user'da va
+    # CURRENT_TIMESTAMP). datetime() ifodasi ikkalasini bir xil ko'rinishga keltiradi,
+    # ifoda indeksi esa shu predikatni sargable qiladi
+    "CREATE INDEX IF NOT EXISTS idx_users_created_dt ON Users(datetime(created_at))",
+    # Balansi / bepul prezentatsiyasi bor userlar - qisman indekslar
+    "CREATE INDEX IF NOT EXISTS idx_users_balance_positive ON Users(balance) WHERE balance > 0",
+    "CREATE INDEX IF NOT EXISTS idx_users_free_positive ON Users(free_presentations) WHERE free_presentations > 0",
+    # UserContext'dagi EXISTS(Admins) va check_if_admin
+    "CREATE INDEX IF NOT EXISTS idx_admins_user ON Admins(user_id)",
+
+    # PresentationTasks: get_pending_tasks (status + created_at tartibi)
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON PresentationTasks(status, created_at)",
+    # get_user_tasks (user + oxirgilari)
+    "CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON PresentationTasks(user_id, created_at)",
+    # Kunlik task statistikasi (created_at oralig'i, status bo'yicha guruhlash)
+    "CREATE INDEX IF NOT EXISTS idx_tasks_created_status ON PresentationTasks(created_at, status)",
+
+    # Transactions: dashboard'lar (type, status, created_at) + SUM(amount) - qoplovchi indeks
+    "CREATE INDEX IF NOT EXISTS idx_trans_type_status_created "
+    "ON Transactions(transaction_type, status, created_at, amount)",
+    # get_pending_transactions (status + created_at tartibi)
+    "CREATE INDEX IF NOT EXISTS idx_trans_status_created ON Transactions(status, created_at)",
+    # get_user_transactions
+    "CREATE INDEX IF NOT EXISTS idx_trans_user_created ON Transactions(user_id, created_at)",
+
+    # Yuqoridagilar bilan takrorlanadigan eski indekslar
+    "DROP INDEX IF EXISTS idx_transactions_user",
+    "DROP INDEX IF EXISTS idx_transactions_status",
+    "DROP INDEX IF EXISTS idx_tasks_user",
+    "DROP INDEX IF EXISTS idx_tasks_status",
+    "DROP INDEX IF EXISTS idx_tasks_uuid",  # task_uuid UNIQUE - o'z indeksi bor
+]
+
+
+def _hot_query_indexes(db, cursor):
+    for sql in HOT_QUERY_INDEXES:
+        cursor.execute(sql)
+    cursor.execute("ANALYZE")
+
+
+def _api_usage(db, cursor):
+    db.create_table_api_usage(cursor)
+
+
+def _gamma_themes(db, cursor):
+    db.create_table_gamma_themes(cursor)
+
+
+def _task_checkpoints(db, cursor):
+    db.create_table_task_checkpoints(cursor)
+
+
+# Shu hajmgacha auto_vacuum'ni darhol yoqish uchun VACUUM (kattaroq baza - /archive vacuum)
+ARCHIVE_VACUUM_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _archive(db, cursor):
+    db.create_table_archive(cursor)
+    return _archive_vacuum
+
+
+def _archive_vacuum(db):
+    # Arxivga ko'chirilgan joy faylga bo'laklab qaytarilishi uchun (Archiver -> incremental_vacuum).
+    # Mavjud bazada auto_vacuum rejimi faqat VACUUM'dan keyin kuchga kiradi (tranzaksiyadan tashqarida).
+    stats = db.get_archive_stats()
+    if stats['auto_vacuum'] != 2 and stats['db_bytes'] <= ARCHIVE_VACUUM_MAX_BYTES:
+        db.vacuum()
+
+
+# Admin ro'yxatlari (utils.pager): WHERE status = ? AND id > ? ORDER BY id - saralashsiz
+KEYSET_INDEXES = [
+    "CREATE INDEX IF NOT EXISTS idx_trans_status_id ON Transactions(status, id)",
+    "CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON PresentationTasks(status, id)",
+]
+
+
+def _keyset_indexes(db, cursor):
+    for sql in KEYSET_INDEXES:
+        cursor.execute(sql)
+
+
+def _api_usage_path(db, cursor):
+    db.create_api_usage_path_column(cursor)
+
+
+def _idempotency_created_index(db, cursor):
+    # Archiver eski IdempotencyKeys qatorlarini created_at bo'yicha o'chiradi
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_created ON IdempotencyKeys(created_at)")
+
+
+# (versiya, nom, funksiya)
+MIGRATIONS = [
+    (1, "Boshlang'ich jadvallar", _baseline),
+    (2, "Hot query indekslari", _hot_query_indexes),
+    (3, "ApiUsage (OpenAI / Gamma sarfi)", _api_usage),
+    (4, "Gamma theme katalogi", _gamma_themes),
+    (5, "Task lease va checkpoint'lari", _task_checkpoints),
+    (6, "Task / tranzaksiya arxivi", _archive),
+    (7, "Keyset sahifalash indekslari", _keyset_indexes),
+    (8, "ApiUsage.path (OpenAI hedge / zaxira yo'li)", _api_usage_path),
+    (9, "IdempotencyKeys.created_at indeksi", _idempotency_created_index),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(db) -> int:
+    result = db.execute("PRAGMA user_version", fetchone=True)
+    return int(result[0]) if result else 0
+
+
+def run_migrations(db) -> int:
+    """
+    Qo'llanilmagan migratsiyalarni bajarish
+
+    Returns:
+        int: Joriy sxema versiyasi
+
+    Raises:
+        MigrationError: migratsiya bajarilmadi (u va keyingilari qo'llanilmagan)
+    """
+    current = get_schema_version(db)
+    if current >= LATEST_VERSION:
+        return current
+
+    for version, name, apply in MIGRATIONS:
+        if version <= current:
+            continue
+
+        print(f"⚙️ Migratsiya {version}: {name}")
+        try:
+            with db.transaction(immediate=True) as cursor:
+                cursor.execute("""
+                CREATE TABLE IF NOT EXISTS SchemaMigrations (
+                    version INTEGER PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+                );
+                """)
+                after_commit = apply(db, cursor)
+                cursor.execute(
+                    "INSERT OR REPLACE INTO SchemaMigrations (version, name) VALUES (?, ?)",
+                    (version, name)
+                )
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+        except Exception as e:
+            raise MigrationError(f"Migratsiya {version} ({name}) bajarilmadi: {e}") from e
+        current = version
+
+        if callable(after_commit):
+            after_commit(db)
+
+    print(f"✅ Sxema versiyasi: {current}")
+    return current
@@ -0,0 +1,114 @@
+# pricing.py: Narxlar jadvalining jarayon ichidagi nusxasi (snapshot)
+#
+# Narxlar faqat admin panelidagi update_price orqali o'zgaradi, lekin har bir
+# oqimga kirishda va tasdiqlashda o'qiladi. Shuning uchun jadval bir marta
+# yuklanadi va butun jarayon bo'ylab o'zgarmas obyekt sifatida ishlatiladi.
+# Bir nechta jarayon sinxron qolishi uchun PricingVersion jadvalidagi versiya
+# raqami vaqti-vaqti bilan tekshiriladi.
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+def render_price_list(rows: Tuple[Dict, ...]) -> str:
+    """"💵 Narxlar" xabari (bepul prezentatsiya qatorisiz)"""
+    price_text = "💵 <b>XIZMATLAR NARXLARI</b>\n\n"
+
+    for price in rows:
+        if price['is_active']:
+            price_text += f"<b>{price['description']}</b>\n💰 {price['price']:,.0f} {price['currency']}\n━━━━━━━━━━━━━━━\n"
+
+    return price_text
+
+
+class PricingState:
+    """Narxlarning o'zgarmas nusxasi - faqat butunlay almashtiriladi"""
+
+    __slots__ = ('version', 'rows', 'active_prices', 'price_list_text')
+
+    def __init__(self, version: int, rows: Tuple[Dict, ...]):
+        self.version = version
+        self.rows = rows
+        self.active_prices = {row['service_type']: row['price'] for row in rows if row['is_active']}
+        self.price_list_text = render_price_list(rows)
+
+
+class PricingSnapshot:
+    """
+    Pricing jadvalining keshi
+
+    - Birinchi murojaatda yuklanadi
+    - check_interval soniyada bir marta PricingVersion tekshiriladi
+    - Versiya o'zgarsa, yangi PricingState yaratilib bitta havola almashtiriladi
+    """
+
+    def __init__(self, db, check_interval: float = 5.0):
+        self.db = db
+        self.check_interval = check_interval
+        self._state: Optional[PricingState] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _read_version(self) -> int:
+        result = self.db.execute("SELECT version FROM PricingVersion WHERE id = 1", fetchone=True)
+        return int(result[0]) if result else 0
+
+    def _load(self, version: int) -> PricingState:
+        results = self.db.execute(
+            "SELECT service_type, price, currency, description, is_active FROM Pricing ORDER BY service_type",
+            fetchall=True
+        ) or []
+        rows = tuple(
+            {
+                'service_type': row[0],
+                'price': float(row[1]),
+                'currency': row[2],
+                'description': row[3],
+                'is_active': bool(row[4])
+            }
+            for row in results
+        )
+        return PricingState(version, rows)
+
+    def get(self) -> PricingState:
+        """Joriy nusxa (kerak bo'lsa versiyani tekshirib qayta yuklaydi)"""
+        state = self._state
+        if state is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return state
+
+            version = self._read_version()
+            if state is None or state.version != version:
+                state = self._load(version)
+                self._state = state
+            self._checked_at = time.monotonic()
+            return state
+
+    def reload(self) -> PricingState:
+        """Narx o'zgargandan keyin darhol qayta yuklash"""
+        with self._lock:
+            state = self._load(self._read_version())
+            self._state = state
+            self._checked_at = time.monotonic()
+            return state
+
+    def invalidate(self):
+        """Keyingi murojaatda qayta yuklashga majburlash"""
+        with self._lock:
+            self._state = None
+            self._checked_at = 0.0
+
+    # ==================== O'QISH ====================
+
+    def get_price(self, service_type: str) -> Optional[float]:
+        return self.get().active_prices.get(service_type)
+
+    def get_all_prices(self) -> List[Dict]:
+        return [dict(row) for row in self.get().rows]
+
+    def get_price_list_text(self) -> str:
+        return self.get().price_list_text
@@ -0,0 +1,48 @@
+# user_context.py: Bitta update davomida ishlatiladigan foydalanuvchi ma'lumotlari
+#
+# UserContextMiddleware har bir update uchun Users qatorini bitta so'rov bilan
+# yuklaydi va handler'larga "user_ctx" nomi bilan uzatadi. Balans yoki bepul
+# prezentatsiyalar o'zgarsa, UserDatabase metodlari shu obyektni joyida yangilaydi.
+from typing import Optional
+
+
+class UserContext:
+    """Foydalanuvchi qatorining update ichidagi nusxasi"""
+
+    __slots__ = (
+        'telegram_id', 'id', 'username', 'balance', 'free_presentations',
+        'total_spent', 'is_active', 'is_blocked', 'is_admin'
+    )
+
+    def __init__(
+            self,
+            telegram_id: int,
+            id: Optional[int] = None,
+            username: Optional[str] = None,
+            balance: float = 0.0,
+            free_presentations: int = 0,
+            total_spent: float = 0.0,
+            is_active: bool = True,
+            is_blocked: bool = False,
+            is_admin: bool = False
+    ):
+        self.telegram_id = telegram_id
+        self.id = id
+        self.username = username
+        self.balance = balance
+        self.free_presentations = free_presentations
+        self.total_spent = total_spent
+        self.is_active = is_active
+        self.is_blocked = is_blocked
+        self.is_admin = is_admin
+
+    @property
+    def exists(self) -> bool:
+        """Users jadvalida qator bormi (/start bosilganmi)"""
+        return self.id is not None
+
+    def __repr__(self):
+        return (
+            f"UserContext(telegram_id={self.telegram_id}, id={self.id}, "
+            f"balance={self.balance}, free={self.free_presentations})"
+        )
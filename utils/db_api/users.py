@@ -1,12 +1,25 @@
 from .database import Database
+from .migrations import run_migrations
+from .pricing import PricingSnapshot
+from .user_context import UserContext
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict
+from typing import Optional, List, Dict, Iterator
+import json
+import zlib
 import pytz
 
 TASHKENT_TZ = pytz.timezone('Asia/Tashkent')
 
 class UserDatabase(Database):
-    def create_table_users(self):
+    def __init__(self, path_to_db="main.db"):
+        super().__init__(path_to_db)
+        self.pricing = PricingSnapshot(self)
+
+    def migrate(self) -> int:
+        """Sxemani oxirgi versiyaga keltirish (o'zgarish bo'lmasa - faqat PRAGMA o'qish)"""
+        return run_migrations(self)
+
+    def create_table_users(self, cursor=None):
         """Foydalanuvchilar jadvali"""
         sql_users = """
         CREATE TABLE IF NOT EXISTS Users (
@@ -23,7 +36,7 @@ class UserDatabase(Database):
             created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
         );
         """
-        self.execute(sql_users, commit=True)
+        self.execute_in(cursor, sql_users)
 
         sql_admins = """
         CREATE TABLE IF NOT EXISTS Admins (
@@ -35,9 +48,9 @@ class UserDatabase(Database):
             FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE
         );
         """
-        self.execute(sql_admins, commit=True)
+        self.execute_in(cursor, sql_admins)
 
-    def create_table_transactions(self):
+    def create_table_transactions(self, cursor=None):
         """Tranzaksiyalar jadvali"""
         sql = """
         CREATE TABLE IF NOT EXISTS Transactions (
@@ -57,13 +70,24 @@ class UserDatabase(Database):
             FOREIGN KEY (admin_id) REFERENCES Users(id) ON DELETE SET NULL
         );
         """
-        self.execute(sql, commit=True)
-        self.execute("CREATE INDEX IF NOT EXISTS idx_transactions_user ON Transactions(user_id);", commit=True)
-        self.execute("CREATE INDEX IF NOT EXISTS idx_transactions_status ON Transactions(status);", commit=True)
+        self.execute_in(cursor, sql)
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_transactions_user ON Transactions(user_id);")
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_transactions_status ON Transactions(status);")
+
+        # Takroriy tasdiqlashlarni (double tap) aniqlash uchun kalitlar
+        self.execute_in(cursor, """
+        CREATE TABLE IF NOT EXISTS IdempotencyKeys (
+            key VARCHAR(100) PRIMARY KEY,
+            result TEXT NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        # Eski kalitlarni tozalash (purge_idempotency_keys_chunk) uchun
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_idempotency_created ON IdempotencyKeys(created_at);")
 
 
 
-    def create_table_pricing(self):
+    def create_table_pricing(self, cursor=None):
         """Narxlar jadvali"""
         sql = """
         CREATE TABLE IF NOT EXISTS Pricing (
@@ -79,7 +103,7 @@ class UserDatabase(Database):
             FOREIGN KEY (updated_by) REFERENCES Users(id) ON DELETE SET NULL
         );
         """
-        self.execute(sql, commit=True)
+        self.execute_in(cursor, sql)
 
         default_prices = [
             ('slide_basic', 1000.00, "so'm", 'Oddiy slayd', True),
@@ -89,12 +113,22 @@ class UserDatabase(Database):
         ]
 
         for service, price, currency, desc, active in default_prices:
-            self.execute("""
+            self.execute_in(cursor, """
                 INSERT OR IGNORE INTO Pricing (service_type, price, currency, description, is_active)
                 VALUES (?, ?, ?, ?, ?)
-            """, parameters=(service, price, currency, desc, active), commit=True)
+            """, (service, price, currency, desc, active))
 
-    def create_table_presentation_tasks(self):
+        # Narxlar versiyasi - boshqa jarayonlardagi keshlarni sinxronlash uchun
+        self.execute_in(cursor, """
+        CREATE TABLE IF NOT EXISTS PricingVersion (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL DEFAULT 0
+        );
+        """)
+        self.execute_in(cursor, "INSERT OR IGNORE INTO PricingVersion (id, version) VALUES (1, 0)")
+        self.pricing.invalidate()
+
+    def create_table_presentation_tasks(self, cursor=None):
         """Prezentatsiya task'lari"""
         sql = """
         CREATE TABLE IF NOT EXISTS PresentationTasks (
@@ -115,16 +149,16 @@ class UserDatabase(Database):
             FOREIGN KEY (user_id) REFERENCES Users(id) ON DELETE CASCADE
         );
         """
-        self.execute(sql, commit=True)
-        self.execute("CREATE INDEX IF NOT EXISTS idx_tasks_user ON PresentationTasks(user_id);", commit=True)
-        self.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON PresentationTasks(status);", commit=True)
-        self.execute("CREATE INDEX IF NOT EXISTS idx_tasks_uuid ON PresentationTasks(task_uuid);", commit=True)
+        self.execute_in(cursor, sql)
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_tasks_user ON PresentationTasks(user_id);")
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_tasks_status ON PresentationTasks(status);")
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_tasks_uuid ON PresentationTasks(task_uuid);")
 
     # ==================== USER METHODLAR ====================
 
     # users_db.py ga qo'shish
 
-    def create_business_plans_table(self):
+    def create_business_plans_table(self, cursor=None):
         """Biznes planlar jadvali"""
         sql = """
         CREATE TABLE IF NOT EXISTS BusinessPlans (
@@ -140,7 +174,7 @@ class UserDatabase(Database):
             created_at DATETIME DEFAULT CURRENT_TIMESTAMP
         );
         """
-        self.execute(sql, commit=True)
+        self.execute_in(cursor, sql)
 
         # Sotib olish tarixi
         sql_purchases = """
@@ -154,10 +188,146 @@ class UserDatabase(Database):
             FOREIGN KEY (plan_id) REFERENCES BusinessPlans(id)
         );
         """
-        self.execute(sql_purchases, commit=True)
+        self.execute_in(cursor, sql_purchases)
 
+    def create_table_api_usage(self, cursor=None):
+        """OpenAI / Gamma chaqiruvlari sarfi (bitta chaqiruv - bitta qator)"""
+        sql = """
+        CREATE TABLE IF NOT EXISTS ApiUsage (
+            id INTEGER PRIMARY KEY,
+            task_uuid VARCHAR(100) NULL,  -- task'dan tashqari chaqiruvlarda NULL
+            service VARCHAR(20) NOT NULL,  -- openai | gamma
+            operation VARCHAR(30) NOT NULL,
+            model VARCHAR(50) NULL,
+            prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            completion_tokens INTEGER NOT NULL DEFAULT 0,
+            credits INTEGER NOT NULL DEFAULT 0,  -- Gamma kreditlari
+            cost_micros INTEGER NOT NULL DEFAULT 0,  -- 1e-6 USD
+            duration_ms INTEGER NOT NULL,
+            retries INTEGER NOT NULL DEFAULT 0,
+            status VARCHAR(20) NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+        self.execute_in(cursor, sql)
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_usage_task ON ApiUsage(task_uuid);")
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_usage_created ON ApiUsage(created_at);")
+
+    def create_api_usage_path_column(self, cursor=None):
+        """ApiUsage.path - javob qaysi yo'ldan keldi (primary / hedge / fallback)"""
+        columns = {row[1] for row in self.execute_in(cursor, "PRAGMA table_info(ApiUsage)", fetchall=True) or []}
+        if 'path' not in columns:
+            self.execute_in(cursor, "ALTER TABLE ApiUsage ADD COLUMN path VARCHAR(10) NULL")
+
+    def create_table_gamma_themes(self, cursor=None):
+        """Gamma /themes katalogi (utils.theme_catalog sinxronlaydi)"""
+        sql = """
+        CREATE TABLE IF NOT EXISTS GammaThemes (
+            theme_id VARCHAR(100) PRIMARY KEY,
+            name VARCHAR(255) NULL,
+            theme_type VARCHAR(50) NULL,  -- standard | custom
+            is_available BOOLEAN NOT NULL DEFAULT TRUE,  -- oxirgi sinxronda bor edi
+            first_seen_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            last_seen_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            rejected_at DATETIME NULL  -- Gamma POST'da 400/422 qaytargan
+        );
+        """
+        self.execute_in(cursor, sql)
+
+        sql_sync = """
+        CREATE TABLE IF NOT EXISTS GammaThemeSync (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            etag VARCHAR(255) NULL,
+            digest VARCHAR(64) NULL,  -- ETag bo'lmasa - ro'yxat sha256'i
+            theme_count INTEGER NOT NULL DEFAULT 0,
+            synced_at DATETIME NULL,
+            changed_at DATETIME NULL
+        );
+        """
+        self.execute_in(cursor, sql_sync)
+
+    def create_table_task_checkpoints(self, cursor=None):
+        """Task bosqichlari natijalari + PresentationTasks'ga lease ustunlari"""
+        columns = {row[1] for row in
+                   self.execute_in(cursor, "PRAGMA table_info(PresentationTasks)", fetchall=True) or []}
+        for name, definition in (
+                ('lease_owner', 'VARCHAR(100) NULL'),  # task'ni bajarayotgan worker
+                ('lease_expires_at', 'DATETIME NULL'),  # shundan keyin task yetim hisoblanadi
+                ('attempts', 'INTEGER NOT NULL DEFAULT 0')):
+            if name not in columns:
+                self.execute_in(cursor, f"ALTER TABLE PresentationTasks ADD COLUMN {name} {definition}")
 
+        sql = """
+        CREATE TABLE IF NOT EXISTS TaskCheckpoints (
+            task_uuid VARCHAR(100) PRIMARY KEY,
+            stage VARCHAR(30) NOT NULL,  -- content | gamma_created | artifact | delivered
+            content TEXT NULL,  -- OpenAI natijasi (JSON), yetkazilgandan keyin o'chiriladi
+            generation_id VARCHAR(100) NULL,
+            artifact_path TEXT NULL,
+            artifact_name TEXT NULL,
+            file_id TEXT NULL,  -- yuborilgan hujjatning Telegram file_id'si
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (task_uuid) REFERENCES PresentationTasks(task_uuid) ON DELETE CASCADE
+        );
+        """
+        self.execute_in(cursor, sql)
 
+    def create_table_archive(self, cursor=None):
+        """
+        Arxiv jadvallari: yopilgan eski task'lar (answers zlib bilan siqilgan) va
+        tranzaksiyalar. id'lar asl jadvaldagidek saqlanadi (AUTOINCREMENT - qayta
+        berilmaydi), shuning uchun id/uuid bo'yicha qidiruv ikkala jadvalda ham ishlaydi.
+        """
+        self.execute_in(cursor, """
+        CREATE TABLE IF NOT EXISTS PresentationTasksArchive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            task_uuid VARCHAR(100) NOT NULL UNIQUE,
+            presentation_type VARCHAR(50) NOT NULL,
+            slide_count INTEGER,
+            answers_z BLOB NULL,  -- zlib(answers JSON)
+            status VARCHAR(50) NOT NULL,
+            progress INTEGER,
+            error_message TEXT NULL,
+            amount_charged DECIMAL(10, 2) NULL,
+            started_at DATETIME NULL,
+            completed_at DATETIME NULL,
+            created_at DATETIME NOT NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        self.execute_in(cursor, """
+        CREATE TABLE IF NOT EXISTS TransactionsArchive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            transaction_type VARCHAR(50) NOT NULL,
+            amount DECIMAL(10, 2) NOT NULL,
+            balance_before DECIMAL(10, 2) NOT NULL,
+            balance_after DECIMAL(10, 2) NOT NULL,
+            description TEXT NULL,
+            receipt_file_id TEXT NULL,
+            status VARCHAR(50) NOT NULL,
+            admin_id INTEGER NULL,
+            created_at DATETIME NOT NULL,
+            updated_at DATETIME NULL,
+            archived_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """)
+        # Arxivga o'tganlarning yig'indisi - "jami" statistikalar arxivni skanerlamaydi
+        self.execute_in(cursor, """
+        CREATE TABLE IF NOT EXISTS ArchiveTotals (
+            source VARCHAR(30) NOT NULL,  -- PresentationTasks | Transactions
+            kind VARCHAR(50) NOT NULL,  -- presentation_type | transaction_type
+            status VARCHAR(50) NOT NULL,
+            count INTEGER NOT NULL DEFAULT 0,
+            amount DECIMAL(14, 2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (source, kind, status)
+        );
+        """)
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_tasks_archive_user_created "
+                     "ON PresentationTasksArchive(user_id, created_at)")
+        self.execute_in(cursor, "CREATE INDEX IF NOT EXISTS idx_trans_archive_user_created "
+                     "ON TransactionsArchive(user_id, created_at)")
 
     def user_exists(self, telegram_id: int) -> bool:
         sql = "SELECT 1 FROM Users WHERE telegram_id = ?"
@@ -181,33 +351,61 @@ class UserDatabase(Database):
         result = self.execute(sql, parameters=(telegram_id,), fetchone=True)
         return float(result[0]) if result else 0.0
 
-    def add_to_balance(self, telegram_id: int, amount: float) -> bool:
+    def add_to_balance(self, telegram_id: int, amount: float, ctx: UserContext = None) -> bool:
         try:
             sql = """
             UPDATE Users SET balance = balance + ?, total_deposited = total_deposited + ?
             WHERE telegram_id = ?
             """
             self.execute(sql, parameters=(amount, amount, telegram_id), commit=True)
+            if ctx is not None:
+                ctx.balance += amount
             return True
         except Exception as e:
             print(f"❌ Balansga qo'shishda xato: {e}")
             return False
 
-    def deduct_from_balance(self, telegram_id: int, amount: float) -> bool:
+    def deduct_from_balance(self, telegram_id: int, amount: float, ctx: UserContext = None) -> bool:
+        """Shartli yechish - balans yetarli bo'lmasa hech narsa o'zgarmaydi"""
         try:
-            current_balance = self.get_user_balance(telegram_id)
-            if current_balance < amount:
-                return False
             sql = """
             UPDATE Users SET balance = balance - ?, total_spent = total_spent + ?
             WHERE telegram_id = ? AND balance >= ?
             """
-            self.execute(sql, parameters=(amount, amount, telegram_id, amount), commit=True)
-            return True
+            with self.transaction() as cursor:
+                cursor.execute(sql, (amount, amount, telegram_id, amount))
+                success = cursor.rowcount > 0
+            if success and ctx is not None:
+                ctx.balance -= amount
+                ctx.total_spent += amount
+            return success
         except Exception as e:
             print(f"❌ Balansdan yechishda xato: {e}")
             return False
 
+    def get_user_context(self, telegram_id: int) -> UserContext:
+        """Update uchun foydalanuvchi qatori va admin statusi - bitta so'rov"""
+        sql = """
+        SELECT u.id, u.username, u.balance, u.free_presentations, u.total_spent,
+               u.is_active, u.is_blocked,
+               EXISTS(SELECT 1 FROM Admins a WHERE a.user_id = u.id)
+        FROM Users u WHERE u.telegram_id = ?
+        """
+        row = self.execute(sql, parameters=(telegram_id,), fetchone=True)
+        if not row:
+            return UserContext(telegram_id)
+        return UserContext(
+            telegram_id,
+            id=row[0],
+            username=row[1],
+            balance=float(row[2] or 0),
+            free_presentations=int(row[3]) if row[3] is not None else 2,
+            total_spent=float(row[4] or 0),
+            is_active=bool(row[5]),
+            is_blocked=bool(row[6]),
+            is_admin=bool(row[7])
+        )
+
     def get_user_stats(self, telegram_id: int) -> Optional[Dict]:
         sql = "SELECT balance, total_spent, total_deposited, created_at FROM Users WHERE telegram_id = ?"
         result = self.execute(sql, parameters=(telegram_id,), fetchone=True)
@@ -229,20 +427,25 @@ class UserDatabase(Database):
             amount: float,
             description: str = None,
             receipt_file_id: str = None,
-            status: str = 'pending'
+            status: str = 'pending',
+            ctx: UserContext = None
     ) -> Optional[int]:
         """
         Yangi tranzaksiya yaratish
 
         ✅ TO'G'IRLANGAN - TO'G'RI ID QAYTARADI
+        ctx berilsa user_id va balans qaytadan o'qilmaydi
         """
         try:
-            user_id = self.get_user_id(telegram_id)
-            if not user_id:
-                print(f"❌ User topilmadi: telegram_id={telegram_id}")
-                return None
-
-            balance_before = self.get_user_balance(telegram_id)
+            if ctx is not None and ctx.exists:
+                user_id = ctx.id
+                balance_before = ctx.balance
+            else:
+                user_id = self.get_user_id(telegram_id)
+                if not user_id:
+                    print(f"❌ User topilmadi: telegram_id={telegram_id}")
+                    return None
+                balance_before = self.get_user_balance(telegram_id)
 
             sql = """
             INSERT INTO Transactions (
@@ -253,29 +456,20 @@ class UserDatabase(Database):
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
             """
 
-            self.execute(
-                sql,
-                parameters=(
-                    user_id, transaction_type, amount,
-                    balance_before, balance_before,
-                    description, receipt_file_id, status
-                ),
-                commit=True
-            )
-
-            # ✅ TO'G'IRLANGAN: Oxirgi kiritilgan ID ni olish
-            result = self.execute(
-                "SELECT id FROM Transactions WHERE user_id = ? ORDER BY id DESC LIMIT 1",
-                parameters=(user_id,),
-                fetchone=True
-            )
-
-            if result:
-                trans_id = result[0]
-                print(f"✅ Tranzaksiya yaratildi: ID={trans_id}")
-                return trans_id
+            with self.transaction() as cursor:
+                cursor.execute(
+                    sql,
+                    (
+                        user_id, transaction_type, amount,
+                        balance_before, balance_before,
+                        description, receipt_file_id, status
+                    )
+                )
+                # ✅ TO'G'IRLANGAN: Shu ulanishda kiritilgan ID
+                trans_id = cursor.lastrowid
 
-            return None
+            print(f"✅ Tranzaksiya yaratildi: ID={trans_id}")
+            return trans_id
 
         except Exception as e:
             print(f"❌ Tranzaksiya yaratishda xato: {e}")
@@ -284,16 +478,20 @@ class UserDatabase(Database):
     def get_transaction_by_id(self, trans_id: int) -> Optional[Dict]:
         """Tranzaksiyani ID bo'yicha olish"""
         try:
-            sql = """
-            SELECT 
-                t.id, t.user_id, t.transaction_type, t.amount,
-                t.description, t.receipt_file_id, t.status,
-                t.admin_id, t.created_at, t.updated_at, u.telegram_id
-            FROM Transactions t
-            JOIN Users u ON t.user_id = u.id
-            WHERE t.id = ?
-            """
-            result = self.execute(sql, parameters=(trans_id,), fetchone=True)
+            # Avval faol jadval, keyin arxiv (eski, yopilgan tranzaksiyalar)
+            for table in ('Transactions', 'TransactionsArchive'):
+                sql = f"""
+                SELECT 
+                    t.id, t.user_id, t.transaction_type, t.amount,
+                    t.description, t.receipt_file_id, t.status,
+                    t.admin_id, t.created_at, t.updated_at, u.telegram_id
+                FROM {table} t
+                JOIN Users u ON t.user_id = u.id
+                WHERE t.id = ?
+                """
+                result = self.execute(sql, parameters=(trans_id,), fetchone=True)
+                if result:
+                    break
 
             if result:
                 return {
@@ -387,6 +585,33 @@ class UserDatabase(Database):
             })
         return transactions
 
+    def get_transactions_page(self, status: str = 'pending', after: int = None, before: int = None,
+                              limit: int = 10):
+        """
+        Admin ro'yxati uchun keyset sahifa (id tartibida - eng eskisi birinchi)
+
+        Returns:
+            (List[Dict], bool): tranzaksiyalar va shu yo'nalishda yana bor-yo'qligi
+        """
+        rows, has_more = self.fetch_page(
+            """SELECT t.id, u.telegram_id, u.username, t.transaction_type, t.amount, t.description,
+                      t.receipt_file_id, t.created_at
+               FROM Transactions t
+               JOIN Users u ON t.user_id = u.id
+               WHERE t.status = ?""",
+            parameters=(status,), key='t.id', after=after, before=before, limit=limit
+        )
+        return [{
+            'id': row[0],
+            'telegram_id': row[1],
+            'username': row[2],
+            'type': row[3],
+            'amount': float(row[4]),
+            'description': row[5],
+            'receipt_file_id': row[6],
+            'created_at': row[7]
+        } for row in rows], has_more
+
     def get_user_transactions(self, telegram_id: int, limit: int = 10) -> List[Dict]:
         sql = """
         SELECT id, transaction_type, amount, balance_before, balance_after, description, status, created_at
@@ -394,7 +619,17 @@ class UserDatabase(Database):
         WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?)
         ORDER BY created_at DESC LIMIT ?
         """
-        results = self.execute(sql, parameters=(telegram_id, limit), fetchall=True)
+        results = self.execute(sql, parameters=(telegram_id, limit), fetchall=True) or []
+        if len(results) < limit:
+            # Qolgani - arxivdan (arxivdagilar faol jadvaldagilardan eski)
+            results += self.execute(
+                """SELECT id, transaction_type, amount, balance_before, balance_after, description, status, created_at
+                   FROM TransactionsArchive
+                   WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?)
+                   ORDER BY created_at DESC LIMIT ?""",
+                parameters=(telegram_id, limit - len(results)),
+                fetchall=True
+            ) or []
         transactions = []
         for row in results:
             transactions.append({
@@ -409,45 +644,239 @@ class UserDatabase(Database):
             })
         return transactions
 
+    # ==================== BILLING (UNIT OF WORK) ====================
+
+    @staticmethod
+    def _get_idempotent_result(cursor, idempotency_key: str) -> Optional[Dict]:
+        cursor.execute("SELECT result FROM IdempotencyKeys WHERE key = ?", (idempotency_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        result = json.loads(row[0])
+        result['status'] = 'duplicate'
+        return result
+
+    @staticmethod
+    def _save_idempotent_result(cursor, idempotency_key: str, result: Dict):
+        cursor.execute(
+            "INSERT INTO IdempotencyKeys (key, result) VALUES (?, ?)",
+            (idempotency_key, json.dumps(result, ensure_ascii=False))
+        )
+
+    @staticmethod
+    def _apply_to_context(ctx: Optional[UserContext], result: Dict):
+        if ctx is not None and result.get('balance') is not None:
+            ctx.balance = result['balance']
+            ctx.free_presentations = result['free_presentations']
+
+    def charge_and_create_task(
+            self,
+            telegram_id: int,
+            idempotency_key: str,
+            task_uuid: str,
+            presentation_type: str,
+            slide_count: int,
+            answers: str,
+            price: float,
+            description: str,
+            allow_free: bool = True,
+            ctx: UserContext = None
+    ) -> Dict:
+        """
+        To'lov + ledger + task - bitta BEGIN IMMEDIATE tranzaksiyada
+
+        Bepul prezentatsiya bo'lsa (allow_free=True) u ishlatiladi, aks holda
+        balansdan shartli yechiladi. Bir xil idempotency_key bilan qayta
+        chaqirilsa, hech narsa o'zgarmaydi va birinchi natija qaytadi.
+
+        Returns:
+            dict: status - 'ok' | 'duplicate' | 'insufficient' | 'not_found' | 'error',
+                  task_uuid, is_free, amount_charged, balance, free_presentations
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                previous = self._get_idempotent_result(cursor, idempotency_key)
+                if previous:
+                    return previous
+
+                cursor.execute(
+                    "SELECT id, balance, COALESCE(free_presentations, 2) FROM Users WHERE telegram_id = ?",
+                    (telegram_id,)
+                )
+                user = cursor.fetchone()
+                if not user:
+                    return {'status': 'not_found'}
+
+                user_id, balance, free_left = user[0], float(user[1] or 0), int(user[2])
+                is_free = allow_free and free_left > 0
+
+                if is_free:
+                    cursor.execute(
+                        "UPDATE Users SET free_presentations = ? WHERE id = ?",
+                        (free_left - 1, user_id)
+                    )
+                    free_left -= 1
+                    amount_charged = 0
+                else:
+                    if balance < price:
+                        return {
+                            'status': 'insufficient', 'balance': balance,
+                            'free_presentations': free_left
+                        }
+                    cursor.execute(
+                        "UPDATE Users SET balance = balance - ?, total_spent = total_spent + ? WHERE id = ?",
+                        (price, price, user_id)
+                    )
+                    cursor.execute(
+                        """INSERT INTO Transactions
+                           (user_id, transaction_type, amount, balance_before, balance_after,
+                            description, status, created_at)
+                           VALUES (?, 'withdrawal', ?, ?, ?, ?, 'approved', CURRENT_TIMESTAMP)""",
+                        (user_id, price, balance, balance - price, description)
+                    )
+                    balance -= price
+                    amount_charged = price
+
+                cursor.execute(
+                    """INSERT INTO PresentationTasks
+                       (user_id, task_uuid, presentation_type, slide_count, answers, amount_charged)
+                       VALUES (?, ?, ?, ?, ?, ?)""",
+                    (user_id, task_uuid, presentation_type, slide_count, answers, amount_charged)
+                )
+
+                result = {
+                    'status': 'ok',
+                    'task_uuid': task_uuid,
+                    'is_free': is_free,
+                    'amount_charged': amount_charged,
+                    'balance': balance,
+                    'free_presentations': free_left
+                }
+                self._save_idempotent_result(cursor, idempotency_key, result)
+
+            self._apply_to_context(ctx, result)
+            return result
+
+        except Exception as e:
+            print(f"❌ charge_and_create_task xato: {e}")
+            return {'status': 'error'}
+
+    def purchase_business_plan(
+            self, telegram_id: int, plan_id: int, idempotency_key: str, ctx: UserContext = None
+    ) -> Dict:
+        """
+        Biznes plan xaridi - yechish, ledger, PlanPurchases va sold_count bitta tranzaksiyada
+
+        Returns:
+            dict: status - 'ok' | 'duplicate' | 'already_bought' | 'insufficient' |
+                  'not_found' | 'error', title, price, file_id, balance
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                previous = self._get_idempotent_result(cursor, idempotency_key)
+                if previous:
+                    return previous
+
+                cursor.execute(
+                    "SELECT title, price, file_id FROM BusinessPlans WHERE id = ?",
+                    (plan_id,)
+                )
+                plan = cursor.fetchone()
+                cursor.execute(
+                    "SELECT id, balance, COALESCE(free_presentations, 2) FROM Users WHERE telegram_id = ?",
+                    (telegram_id,)
+                )
+                user = cursor.fetchone()
+                if not plan or not user:
+                    return {'status': 'not_found'}
+
+                title, price, file_id = plan[0], float(plan[1]), plan[2]
+                user_id, balance, free_left = user[0], float(user[1] or 0), int(user[2])
+
+                cursor.execute(
+                    "SELECT 1 FROM PlanPurchases WHERE user_id = ? AND plan_id = ?",
+                    (user_id, plan_id)
+                )
+                if cursor.fetchone():
+                    return {'status': 'already_bought', 'title': title, 'file_id': file_id}
+
+                if balance < price:
+                    return {'status': 'insufficient', 'title': title, 'price': price, 'balance': balance}
+
+                cursor.execute(
+                    "UPDATE Users SET balance = balance - ?, total_spent = total_spent + ? WHERE id = ?",
+                    (price, price, user_id)
+                )
+                cursor.execute(
+                    """INSERT INTO Transactions
+                       (user_id, transaction_type, amount, balance_before, balance_after,
+                        description, status, created_at)
+                       VALUES (?, 'withdrawal', ?, ?, ?, ?, 'approved', CURRENT_TIMESTAMP)""",
+                    (user_id, price, balance, balance - price, f"Biznes plan: {title}")
+                )
+                cursor.execute(
+                    "INSERT INTO PlanPurchases (user_id, plan_id, price) VALUES (?, ?, ?)",
+                    (user_id, plan_id, price)
+                )
+                cursor.execute(
+                    "UPDATE BusinessPlans SET sold_count = sold_count + 1 WHERE id = ?",
+                    (plan_id,)
+                )
+
+                result = {
+                    'status': 'ok',
+                    'title': title,
+                    'price': price,
+                    'file_id': file_id,
+                    'balance': balance - price,
+                    'free_presentations': free_left
+                }
+                self._save_idempotent_result(cursor, idempotency_key, result)
+
+            self._apply_to_context(ctx, result)
+            return result
+
+        except Exception as e:
+            print(f"❌ purchase_business_plan xato: {e}")
+            return {'status': 'error'}
+
     # ==================== PRICING METHODLAR ====================
 
     def get_price(self, service_type: str) -> Optional[float]:
-        sql = "SELECT price FROM Pricing WHERE service_type = ? AND is_active = TRUE"
-        result = self.execute(sql, parameters=(service_type,), fetchone=True)
-        return float(result[0]) if result else None
+        """Faol narx (xotiradagi nusxadan)"""
+        return self.pricing.get_price(service_type)
 
     def update_price(self, service_type: str, new_price: float, admin_telegram_id: int) -> bool:
         try:
             admin_id = self.get_user_id(admin_telegram_id)
-            sql = "UPDATE Pricing SET price = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP WHERE service_type = ?"
-            self.execute(sql, parameters=(new_price, admin_id, service_type), commit=True)
+            with self.transaction() as cursor:
+                cursor.execute(
+                    "UPDATE Pricing SET price = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP WHERE service_type = ?",
+                    (new_price, admin_id, service_type)
+                )
+                cursor.execute("UPDATE PricingVersion SET version = version + 1 WHERE id = 1")
+            self.pricing.reload()
             return True
         except Exception as e:
             print(f"❌ Narxni yangilashda xato: {e}")
             return False
 
     def get_all_prices(self) -> List[Dict]:
-        sql = "SELECT service_type, price, currency, description, is_active FROM Pricing ORDER BY service_type"
-        results = self.execute(sql, fetchall=True)
-        prices = []
-        for row in results:
-            prices.append({
-                'service_type': row[0],
-                'price': float(row[1]),
-                'currency': row[2],
-                'description': row[3],
-                'is_active': bool(row[4])
-            })
-        return prices
+        """Barcha narxlar (xotiradagi nusxadan)"""
+        return self.pricing.get_all_prices()
+
+    def get_price_list_text(self) -> str:
+        """Tayyor "💵 Narxlar" matni - faqat narxlar o'zgarganda qayta quriladi"""
+        return self.pricing.get_price_list_text()
 
     # ==================== PRESENTATION TASK METHODLAR ====================
 
     def create_presentation_task(
             self, telegram_id: int, task_uuid: str, presentation_type: str,
-            slide_count: int, answers: str, amount_charged: float
+            slide_count: int, answers: str, amount_charged: float, ctx: UserContext = None
     ) -> Optional[int]:
         try:
-            user_id = self.get_user_id(telegram_id)
+            user_id = ctx.id if ctx is not None else self.get_user_id(telegram_id)
             if not user_id:
                 return None
 
@@ -455,12 +884,9 @@ class UserDatabase(Database):
             INSERT INTO PresentationTasks (user_id, task_uuid, presentation_type, slide_count, answers, amount_charged)
             VALUES (?, ?, ?, ?, ?, ?)
             """
-            self.execute(sql, parameters=(user_id, task_uuid, presentation_type, slide_count, answers, amount_charged),
-                         commit=True)
-
-            result = self.execute("SELECT id FROM PresentationTasks WHERE task_uuid = ?", parameters=(task_uuid,),
-                                  fetchone=True)
-            return result[0] if result else None
+            with self.transaction() as cursor:
+                cursor.execute(sql, (user_id, task_uuid, presentation_type, slide_count, answers, amount_charged))
+                return cursor.lastrowid
 
         except Exception as e:
             print(f"❌ Task yaratishda xato: {e}")
@@ -495,6 +921,26 @@ class UserDatabase(Database):
             print(f"❌ Task statusini yangilashda xato: {e}")
             return False
 
+    def update_tasks_progress(self, rows: List[tuple]) -> bool:
+        """
+        Bir nechta task progress'ini bitta tranzaksiyada yozish
+
+        Args:
+            rows: [(progress, file_path, task_uuid), ...]
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.executemany(
+                    """UPDATE PresentationTasks
+                       SET progress = COALESCE(?, progress), file_path = COALESCE(?, file_path)
+                       WHERE task_uuid = ? AND status = 'processing'""",
+                    rows
+                )
+            return True
+        except Exception as e:
+            print(f"❌ Task progress'larini yozishda xato: {e}")
+            return False
+
     def get_task_by_uuid(self, task_uuid: str) -> Optional[Dict]:
         sql = """
         SELECT id, user_id, task_uuid, presentation_type, slide_count, answers, status, progress, 
@@ -502,6 +948,16 @@ class UserDatabase(Database):
         FROM PresentationTasks WHERE task_uuid = ?
         """
         result = self.execute(sql, parameters=(task_uuid,), fetchone=True)
+        if result is None:
+            result = self.execute(
+                """SELECT id, user_id, task_uuid, presentation_type, slide_count, answers_z, status, progress,
+                          NULL, error_message, amount_charged, started_at, completed_at, created_at
+                   FROM PresentationTasksArchive WHERE task_uuid = ?""",
+                parameters=(task_uuid,),
+                fetchone=True
+            )
+            if result:
+                result = result[:5] + (self._decompress(result[5]),) + result[6:]
         if result:
             return {
                 'id': result[0], 'user_id': result[1], 'task_uuid': result[2],
@@ -519,7 +975,16 @@ class UserDatabase(Database):
         WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?)
         ORDER BY created_at DESC LIMIT ?
         """
-        results = self.execute(sql, parameters=(telegram_id, limit), fetchall=True)
+        results = self.execute(sql, parameters=(telegram_id, limit), fetchall=True) or []
+        if len(results) < limit:
+            results += self.execute(
+                """SELECT task_uuid, presentation_type, slide_count, status, progress, NULL, amount_charged, created_at
+                   FROM PresentationTasksArchive
+                   WHERE user_id = (SELECT id FROM Users WHERE telegram_id = ?)
+                   ORDER BY created_at DESC LIMIT ?""",
+                parameters=(telegram_id, limit - len(results)),
+                fetchall=True
+            ) or []
         tasks = []
         for row in results:
             tasks.append({
@@ -530,15 +995,57 @@ class UserDatabase(Database):
         return tasks
 
     def get_pending_tasks(self) -> List[Dict]:
-        sql = "SELECT task_uuid, user_id, presentation_type, slide_count, answers, created_at FROM PresentationTasks WHERE status = 'pending' ORDER BY created_at ASC"
+        sql = "SELECT task_uuid, user_id, presentation_type, slide_count, answers, created_at, amount_charged FROM PresentationTasks WHERE status = 'pending' ORDER BY created_at ASC"
         results = self.execute(sql, fetchall=True)
         tasks = []
         for row in results:
             tasks.append(
                 {'task_uuid': row[0], 'user_id': row[1], 'type': row[2], 'slide_count': row[3], 'answers': row[4],
-                 'created_at': row[5]})
+                 'created_at': row[5], 'amount_charged': float(row[6]) if row[6] else 0.0})
         return tasks
 
+    def get_tasks_page(self, status: str, after: int = None, before: int = None, limit: int = 10):
+        """Admin ro'yxati uchun keyset sahifa (faol jadval, id tartibida)"""
+        rows, has_more = self.fetch_page(
+            """SELECT p.id, p.task_uuid, u.telegram_id, p.presentation_type, p.slide_count, p.status,
+                      p.progress, p.amount_charged, p.error_message, p.attempts, p.created_at
+               FROM PresentationTasks p
+               JOIN Users u ON p.user_id = u.id
+               WHERE p.status = ?""",
+            parameters=(status,), key='p.id', after=after, before=before, limit=limit
+        )
+        return [{
+            'id': row[0], 'task_uuid': row[1], 'telegram_id': row[2], 'type': row[3], 'slide_count': row[4],
+            'status': row[5], 'progress': row[6], 'amount_charged': row[7], 'error_message': row[8],
+            'attempts': row[9], 'created_at': row[10]
+        } for row in rows], has_more
+
+    def get_task_duration_stats(self, days: int = 14) -> List[Dict]:
+        """
+        Task turi bo'yicha o'rtacha bajarilish vaqti (started_at -> completed_at)
+
+        Returns:
+            list: [{'type', 'tasks', 'seconds_per_unit'}] - birlik: slide_count (mustaqil ishda sahifa)
+        """
+        try:
+            sql = """
+            SELECT presentation_type, COUNT(*),
+                   SUM((julianday(completed_at) - julianday(started_at)) * 86400),
+                   SUM(MAX(COALESCE(slide_count, 10), 1))
+            FROM PresentationTasks
+            WHERE created_at >= datetime('now', ?) AND status = 'completed'
+              AND started_at IS NOT NULL AND completed_at >= started_at
+            GROUP BY presentation_type
+            """
+            rows = self.execute(sql, parameters=(f'-{int(days)} days',), fetchall=True)
+            return [
+                {'type': row[0], 'tasks': row[1], 'seconds_per_unit': (row[2] or 0) / row[3] if row[3] else 0.0}
+                for row in rows
+            ]
+        except Exception as e:
+            print(f"❌ get_task_duration_stats xato: {e}")
+            return []
+
     # ==================== STATISTIKA ====================
 
     def get_financial_stats(self) -> Dict:
@@ -602,26 +1109,29 @@ class UserDatabase(Database):
     def count_blocked_users(self):
         return self.execute("SELECT COUNT(*) FROM Users WHERE is_blocked = TRUE;", fetchone=True)[0]
 
+    # created_at predikatlari datetime(created_at) ustida - idx_users_created_dt ifoda indeksi
+    # ishlatiladi va ikkala yozuv formati ('T' va bo'shliq bilan) to'g'ri solishtiriladi
+
     def count_users_last_12_hours(self):
-        time_threshold = (datetime.now() - timedelta(hours=12)).isoformat()
-        return \
-        self.execute("SELECT COUNT(*) FROM Users WHERE created_at >= ?;", parameters=(time_threshold,), fetchone=True)[
-            0]
+        time_threshold = (datetime.now() - timedelta(hours=12)).strftime('%Y-%m-%d %H:%M:%S')
+        return self.execute("SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?;",
+                            parameters=(time_threshold,), fetchone=True)[0]
 
     def count_users_today(self):
-        today = datetime.now().date().isoformat()
-        return \
-        self.execute("SELECT COUNT(*) FROM Users WHERE DATE(created_at) = ?;", parameters=(today,), fetchone=True)[0]
+        today = datetime.now().date()
+        start, end = f"{today} 00:00:00", f"{today + timedelta(days=1)} 00:00:00"
+        return self.execute("SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ? AND datetime(created_at) < ?;",
+                            parameters=(start, end), fetchone=True)[0]
 
     def count_users_this_week(self):
-        start_of_week = (datetime.now() - timedelta(days=datetime.now().weekday())).date().isoformat()
-        return self.execute("SELECT COUNT(*) FROM Users WHERE DATE(created_at) >= ?;", parameters=(start_of_week,),
-                            fetchone=True)[0]
+        start_of_week = (datetime.now() - timedelta(days=datetime.now().weekday())).date()
+        return self.execute("SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?;",
+                            parameters=(f"{start_of_week} 00:00:00",), fetchone=True)[0]
 
     def count_users_this_month(self):
-        start_of_month = datetime.now().replace(day=1).date().isoformat()
-        return self.execute("SELECT COUNT(*) FROM Users WHERE DATE(created_at) >= ?;", parameters=(start_of_month,),
-                            fetchone=True)[0]
+        start_of_month = datetime.now().replace(day=1).date()
+        return self.execute("SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?;",
+                            parameters=(f"{start_of_month} 00:00:00",), fetchone=True)[0]
 
     def add_admin(self, user_id: int, name: str, is_super_admin: bool = False):
         if not self.check_if_admin(user_id):
@@ -641,6 +1151,17 @@ class UserDatabase(Database):
             admins.append({"user_id": row[0], "telegram_id": row[1], "name": row[2], "is_super_admin": row[3]})
         return admins
 
+    def get_admins_page(self, after: int = None, before: int = None, limit: int = 10):
+        """Adminlar - keyset sahifa (Admins.id tartibida)"""
+        rows, has_more = self.fetch_page(
+            """SELECT Admins.id, Admins.user_id, Users.telegram_id, Admins.name, Admins.is_super_admin
+               FROM Admins JOIN Users ON Admins.user_id = Users.id
+               WHERE 1 = 1""",
+            key='Admins.id', after=after, before=before, limit=limit
+        )
+        return [{"id": row[0], "user_id": row[1], "telegram_id": row[2], "name": row[3], "is_super_admin": row[4]}
+                for row in rows], has_more
+
     def check_if_admin(self, user_id: int) -> bool:
         result = self.execute("SELECT 1 FROM Admins WHERE user_id = ?", parameters=(user_id,), fetchone=True)
         return result is not None
@@ -668,7 +1189,76 @@ class UserDatabase(Database):
         )
         return result[0] if result else 0
 
-    def reset_all_balances(self, admin_telegram_id: int) -> bool:
+    # ==================== BULK (SET-BASED) AMALLAR ====================
+    # Barcha userlarga tegadigan amallar id oraliqlari bo'yicha bo'laklarga
+    # bo'linadi: har bir bo'lak - bitta BEGIN IMMEDIATE tranzaksiyada bir nechta
+    # set-based so'rov. Yozish qulfi bo'lak davomida ushlanadi, orada boshqa
+    # so'rovlar o'tib ketadi. iter_* metodlari har bo'lakdan keyin progress
+    # yield qiladi - handler'lar shu orada event loop'ga navbat beradi.
+
+    BULK_CHUNK_SIZE = 20000
+
+    def _iter_user_chunks(self, apply_chunk, chunk_size: int = None) -> Iterator[Dict]:
+        """
+        apply_chunk(cursor, low_id, high_id) -> Dict[str, int] (bo'lak natijalari)
+
+        Yield: {'done': ..., 'total': ..., <yig'ilgan natijalar>}
+        """
+        chunk_size = chunk_size or self.BULK_CHUNK_SIZE
+        bounds = self.execute("SELECT MIN(id), MAX(id) FROM Users", fetchone=True)
+        totals = {}
+        if not bounds or bounds[0] is None:
+            yield {'done': 0, 'total': 0, **totals}
+            return
+
+        first_id, last_id = bounds
+        span = last_id - first_id + 1
+        for low in range(first_id, last_id + 1, chunk_size):
+            high = min(low + chunk_size - 1, last_id)
+            with self.transaction(immediate=True) as cursor:
+                chunk_result = apply_chunk(cursor, low, high)
+            for key, value in chunk_result.items():
+                totals[key] = totals.get(key, 0) + value
+            yield {'done': high - first_id + 1, 'total': span, **totals}
+
+    @staticmethod
+    def _drain(steps: Iterator[Dict]) -> Dict:
+        last = {}
+        for last in steps:
+            pass
+        return last
+
+    def iter_reset_all_balances(self, admin_telegram_id: int, chunk_size: int = None) -> Iterator[Dict]:
+        """
+        Barcha balanslarni 0 ga tushirish (har bir bo'lakda INSERT ... SELECT + UPDATE)
+
+        Yield natijalari: users (reset qilinganlar), amount (o'chirilgan summa)
+        """
+        def apply_chunk(cursor, low, high):
+            users, amount = cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(balance), 0) FROM Users "
+                "WHERE id BETWEEN ? AND ? AND balance > 0",
+                (low, high)
+            ).fetchone()
+            if users:
+                cursor.execute(
+                    """INSERT INTO Transactions
+                       (user_id, transaction_type, amount, balance_before, balance_after,
+                        description, status, admin_id, created_at, updated_at)
+                       SELECT id, 'reset', balance, balance, 0, 'Admin tomonidan barcha balanslar reset qilindi',
+                              'approved', ?, datetime('now'), datetime('now')
+                       FROM Users WHERE id BETWEEN ? AND ? AND balance > 0""",
+                    (admin_telegram_id, low, high)
+                )
+            cursor.execute(
+                "UPDATE Users SET balance = 0 WHERE id BETWEEN ? AND ? AND balance != 0",
+                (low, high)
+            )
+            return {'users': users, 'amount': amount}
+
+        return self._iter_user_chunks(apply_chunk, chunk_size)
+
+    def reset_all_balances(self, admin_telegram_id: int, chunk_size: int = None) -> Dict:
         """
         Barcha foydalanuvchilar balansini 0 ga tushirish
 
@@ -676,48 +1266,57 @@ class UserDatabase(Database):
             admin_telegram_id: Reset qilgan admin ID si
 
         Returns:
-            bool: Muvaffaqiyatli bo'lsa True
+            Dict: {'success': bool, 'users': int, 'amount': float}
         """
         try:
-            # 1. Avval balansi bor userlarni olish (log uchun)
-            users_with_balance = self.execute(
-                "SELECT id, telegram_id, balance FROM Users WHERE balance > 0",
-                fetchall=True
-            )
-
-            if not users_with_balance:
+            result = self._drain(self.iter_reset_all_balances(admin_telegram_id, chunk_size))
+            users = result.get('users', 0)
+            if users:
+                print(f"✅ {users} ta user balansi reset qilindi")
+            else:
                 print("ℹ️ Balansi bor user yo'q")
-                return True
-
-            # 2. Har bir user uchun reset tranzaksiya yozish
-            for user in users_with_balance:
-                user_id = user[0]
-                telegram_id = user[1]
-                old_balance = user[2]
-
-                # Tranzaksiya yozish
-                self.execute(
-                    """INSERT INTO Transactions 
-                       (user_id, transaction_type, amount, balance_before, balance_after, 
-                        description, status, admin_id, created_at, updated_at)
-                       VALUES (?, 'reset', ?, ?, 0, 'Admin tomonidan barcha balanslar reset qilindi', 
-                               'approved', ?, datetime('now'), datetime('now'))""",
-                    parameters=(user_id, old_balance, old_balance, admin_telegram_id),
-                    commit=True
-                )
+            return {'success': True, 'users': users, 'amount': result.get('amount', 0)}
 
-            # 3. BARCHA balanslarni 0 ga tushirish
-            self.execute(
-                "UPDATE Users SET balance = 0",
-                commit=True
+        except Exception as e:
+            print(f"❌ Reset balances xato: {e}")
+            return {'success': False, 'users': 0, 'amount': 0}
+
+    def iter_add_free_presentations_to_all(self, count: int, chunk_size: int = None) -> Iterator[Dict]:
+        """
+        Barcha userlarga bepul prezentatsiya qo'shish
+
+        Yield natijalari: users (yangilanganlar), added (jami qo'shilgan)
+        """
+        def apply_chunk(cursor, low, high):
+            cursor.execute(
+                "UPDATE Users SET free_presentations = COALESCE(free_presentations, 0) + ? "
+                "WHERE id BETWEEN ? AND ?",
+                (count, low, high)
             )
+            return {'users': cursor.rowcount, 'added': cursor.rowcount * count}
 
-            print(f"✅ {len(users_with_balance)} ta user balansi reset qilindi")
-            return True
+        return self._iter_user_chunks(apply_chunk, chunk_size)
 
-        except Exception as e:
-            print(f"❌ Reset balances xato: {e}")
-            return False
+    def iter_set_free_presentations_for_all(self, count: int, chunk_size: int = None) -> Iterator[Dict]:
+        """
+        Barcha userlarga bepul prezentatsiya sonini o'rnatish (count=0 - barchasini o'chirish)
+
+        Yield natijalari: users (jami), changed (qiymati o'zgarganlar), old_total (eski jami)
+        """
+        def apply_chunk(cursor, low, high):
+            users, old_total = cursor.execute(
+                "SELECT COUNT(*), COALESCE(SUM(free_presentations), 0) FROM Users WHERE id BETWEEN ? AND ?",
+                (low, high)
+            ).fetchone()
+            # Qiymati allaqachon count bo'lgan qatorlar qayta yozilmaydi
+            cursor.execute(
+                "UPDATE Users SET free_presentations = ? "
+                "WHERE id BETWEEN ? AND ? AND free_presentations IS NOT ?",
+                (count, low, high, count)
+            )
+            return {'users': users, 'changed': cursor.rowcount, 'old_total': old_total}
+
+        return self._iter_user_chunks(apply_chunk, chunk_size)
 
 
 # ==================== KENGAYTIRILGAN STATISTIKA METODLARI ====================
@@ -778,7 +1377,7 @@ class UserDatabase(Database):
 
             # Bugun ro'yxatdan o'tganlar
             result = self.execute(
-                "SELECT COUNT(*) FROM Users WHERE created_at >= ? AND created_at <= ?",
+                "SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ? AND datetime(created_at) <= ?",
                 parameters=(today_start, today_end),
                 fetchone=True
             )
@@ -786,7 +1385,7 @@ class UserDatabase(Database):
 
             # Bu hafta ro'yxatdan o'tganlar
             result = self.execute(
-                "SELECT COUNT(*) FROM Users WHERE created_at >= ?",
+                "SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?",
                 parameters=(week_start_utc,),
                 fetchone=True
             )
@@ -794,7 +1393,7 @@ class UserDatabase(Database):
 
             # Bu oy ro'yxatdan o'tganlar
             result = self.execute(
-                "SELECT COUNT(*) FROM Users WHERE created_at >= ?",
+                "SELECT COUNT(*) FROM Users WHERE datetime(created_at) >= ?",
                 parameters=(month_start_utc,),
                 fetchone=True
             )
@@ -915,8 +1514,9 @@ class UserDatabase(Database):
                    WHERE transaction_type = 'deposit' AND status = 'approved'""",
                 fetchone=True
             )
-            stats['total_deposited'] = float(result[0]) if result else 0.0
-            stats['total_deposit_count'] = result[1] if result else 0
+            archived = self.get_archived_totals('Transactions', 'deposit', 'approved')
+            stats['total_deposited'] = (float(result[0]) if result else 0.0) + archived['amount']
+            stats['total_deposit_count'] = (result[1] if result else 0) + archived['count']
 
             # Jami sarflangan
             result = self.execute(
@@ -924,8 +1524,9 @@ class UserDatabase(Database):
                    WHERE transaction_type = 'withdrawal' AND status = 'approved'""",
                 fetchone=True
             )
-            stats['total_spent'] = float(result[0]) if result else 0.0
-            stats['total_spent_count'] = result[1] if result else 0
+            archived = self.get_archived_totals('Transactions', 'withdrawal', 'approved')
+            stats['total_spent'] = (float(result[0]) if result else 0.0) + archived['amount']
+            stats['total_spent_count'] = (result[1] if result else 0) + archived['count']
 
             # Jami kutilayotgan
             result = self.execute(
@@ -949,12 +1550,8 @@ class UserDatabase(Database):
             stats['today_tasks'] = {row[0]: row[1] for row in result} if result else {}
             stats['today_tasks_total'] = sum(stats['today_tasks'].values())
 
-            # Jami tasklar
-            result = self.execute(
-                "SELECT status, COUNT(*) FROM PresentationTasks GROUP BY status",
-                fetchall=True
-            )
-            stats['all_tasks'] = {row[0]: row[1] for row in result} if result else {}
+            # Jami tasklar (arxivdagilar bilan)
+            stats['all_tasks'] = self.get_task_status_counts()
 
             # ==================== TOP USERLAR ====================
 
@@ -1045,7 +1642,7 @@ class UserDatabase(Database):
             print(f"❌ get_free_presentations xato: {e}")
             return 0
 
-    def use_free_presentation(self, telegram_id: int) -> bool:
+    def use_free_presentation(self, telegram_id: int, ctx: UserContext = None) -> bool:
         """
         Bepul prezentatsiyani ishlatish (1 ta kamaytirish)
 
@@ -1053,19 +1650,22 @@ class UserDatabase(Database):
             bool: Muvaffaqiyatli bo'lsa True
         """
         try:
-            current_free = self.get_free_presentations(telegram_id)
+            with self.transaction() as cursor:
+                cursor.execute(
+                    "UPDATE Users SET free_presentations = COALESCE(free_presentations, 2) - 1 "
+                    "WHERE telegram_id = ? AND COALESCE(free_presentations, 2) > 0",
+                    (telegram_id,)
+                )
+                success = cursor.rowcount > 0
 
-            if current_free <= 0:
+            if not success:
                 return False
 
-            self.execute(
-                "UPDATE Users SET free_presentations = free_presentations - 1 WHERE telegram_id = ?",
-                parameters=(telegram_id,),
-                commit=True
-            )
-
-            new_free = self.get_free_presentations(telegram_id)
-            print(f"✅ Bepul prezentatsiya ishlatildi: User {telegram_id}, Qoldi: {new_free}")
+            if ctx is not None:
+                ctx.free_presentations -= 1
+                print(f"✅ Bepul prezentatsiya ishlatildi: User {telegram_id}, Qoldi: {ctx.free_presentations}")
+            else:
+                print(f"✅ Bepul prezentatsiya ishlatildi: User {telegram_id}")
 
             return True
 
@@ -1122,4 +1722,709 @@ class UserDatabase(Database):
 
         except Exception as e:
             print(f"❌ add_free_presentations xato: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    # ==================== API USAGE (OpenAI / Gamma sarfi) ====================
+
+    def add_api_usage(self, task_uuid: Optional[str], service: str, operation: str, model: Optional[str],
+                      prompt_tokens: int, completion_tokens: int, credits: int, cost_micros: int,
+                      duration_ms: int, retries: int, status: str, path: Optional[str] = None):
+        """Bitta tashqi chaqiruv yozuvi (utils.api_usage.usage_tracker chaqiradi)"""
+        self.execute(
+            """INSERT INTO ApiUsage (task_uuid, service, operation, model, prompt_tokens, completion_tokens,
+                                     credits, cost_micros, duration_ms, retries, status, path)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            parameters=(task_uuid, service, operation, model, prompt_tokens, completion_tokens,
+                        credits, cost_micros, duration_ms, retries, status, path),
+            commit=True
+        )
+
+    def get_task_usage(self, task_uuid: str) -> List[Dict]:
+        """Bitta task'ning barcha tashqi chaqiruvlari"""
+        try:
+            rows = self.execute(
+                """SELECT service, operation, model, prompt_tokens, completion_tokens, credits,
+                          cost_micros, duration_ms, retries, status, created_at, path
+                   FROM ApiUsage WHERE task_uuid = ? ORDER BY id""",
+                parameters=(task_uuid,),
+                fetchall=True
+            )
+            return [{
+                'service': row[0],
+                'operation': row[1],
+                'model': row[2],
+                'prompt_tokens': row[3],
+                'completion_tokens': row[4],
+                'credits': row[5],
+                'cost_usd': row[6] / 1_000_000,
+                'duration_ms': row[7],
+                'retries': row[8],
+                'status': row[9],
+                'created_at': row[10],
+                'path': row[11],
+            } for row in rows or []]
+        except Exception as e:
+            print(f"❌ get_task_usage xato: {e}")
+            return []
+
+    def get_usage_by_product(self, days: int = 30) -> List[Dict]:
+        """
+        Mahsulot turi (presentation_type) va model bo'yicha sarf
+
+        Returns:
+            List[Dict]: product, service, model, tasks, calls, tokens, credits, cost_usd,
+                        cost_per_task, seconds_per_task, avg_ms, retries, errors,
+                        rescued (javob hedge / zaxira model yo'lidan kelgan chaqiruvlar)
+        """
+        try:
+            rows = self.execute(
+                """SELECT COALESCE(p.presentation_type, pa.presentation_type, '-') AS product, a.service,
+                          COALESCE(a.model, '-'),
+                          COUNT(DISTINCT a.task_uuid), COUNT(*),
+                          SUM(a.prompt_tokens), SUM(a.completion_tokens), SUM(a.credits),
+                          SUM(a.cost_micros), SUM(a.duration_ms), SUM(a.retries),
+                          SUM(a.status NOT IN ('ok', 'completed')), SUM(a.path IN ('hedge', 'fallback'))
+                   FROM ApiUsage a
+                   LEFT JOIN PresentationTasks p ON p.task_uuid = a.task_uuid
+                   LEFT JOIN PresentationTasksArchive pa ON p.task_uuid IS NULL AND pa.task_uuid = a.task_uuid
+                   WHERE a.created_at >= datetime('now', ?)
+                   GROUP BY product, a.service, a.model
+                   ORDER BY SUM(a.cost_micros) DESC, COUNT(*) DESC""",
+                parameters=(f"-{int(days)} days",),
+                fetchall=True
+            )
+            result = []
+            for row in rows or []:
+                tasks = row[3] or 0
+                result.append({
+                    'product': row[0],
+                    'service': row[1],
+                    'model': row[2],
+                    'tasks': tasks,
+                    'calls': row[4],
+                    'prompt_tokens': row[5] or 0,
+                    'completion_tokens': row[6] or 0,
+                    'credits': row[7] or 0,
+                    'cost_usd': (row[8] or 0) / 1_000_000,
+                    'cost_per_task': (row[8] or 0) / 1_000_000 / tasks if tasks else 0,
+                    'seconds_per_task': (row[9] or 0) / 1000 / tasks if tasks else 0,
+                    'avg_ms': (row[9] or 0) / row[4] if row[4] else 0,
+                    'retries': row[10] or 0,
+                    'errors': row[11] or 0,
+                    'rescued': row[12] or 0,
+                })
+            return result
+        except Exception as e:
+            print(f"❌ get_usage_by_product xato: {e}")
+            return []
+
+    def get_openai_latency_samples(self, days: int = 7, limit: int = 5000) -> List[Dict]:
+        """
+        OpenAI muvaffaqiyatli chaqiruvlari davomiyligi (hedge chegarasi uchun tarix)
+
+        Returns:
+            List[Dict]: operation, model, duration_ms - yangilari birinchi
+        """
+        try:
+            rows = self.execute(
+                """SELECT operation, model, duration_ms FROM ApiUsage
+                   WHERE service = 'openai' AND status = 'ok' AND created_at >= datetime('now', ?)
+                   ORDER BY created_at DESC, id DESC LIMIT ?""",
+                parameters=(f"-{int(days)} days", limit),
+                fetchall=True
+            )
+            return [{'operation': row[0], 'model': row[1], 'duration_ms': row[2]} for row in rows or []]
+        except Exception as e:
+            print(f"❌ get_openai_latency_samples xato: {e}")
+            return []
+
+    def attach_speculative_usage(self, speculation_id: str, task_uuid: str) -> bool:
+        """Oldindan yaratilgan content task'ga olindi - uning ApiUsage yozuvlari shu task'ga o'tadi"""
+        try:
+            self.execute(
+                "UPDATE ApiUsage SET task_uuid = ? WHERE task_uuid = ?",
+                parameters=(task_uuid, speculation_id),
+                commit=True
+            )
+            return True
+        except Exception as e:
+            print(f"❌ attach_speculative_usage xato: {e}")
+            return False
+
+    def get_speculation_usage(self, days: int = 30) -> Dict:
+        """
+        Oldindan yaratish (utils.speculation) sarfi: task'ga olinmagan 'spec:' yozuvlari - behuda
+
+        Returns:
+            dict: wasted_calls, wasted_tokens, wasted_cost_usd, presentation_tokens,
+                  wasted_rate (prezentatsiya tokenlariga nisbatan)
+        """
+        try:
+            since = f"-{int(days)} days"
+            wasted = self.execute(
+                """SELECT COUNT(*), SUM(prompt_tokens + completion_tokens), SUM(cost_micros)
+                   FROM ApiUsage
+                   WHERE task_uuid >= 'spec:' AND task_uuid < 'spec;' AND created_at >= datetime('now', ?)""",
+                parameters=(since,),
+                fetchone=True
+            )
+            total = self.execute(
+                """SELECT SUM(prompt_tokens + completion_tokens) FROM ApiUsage
+                   WHERE created_at >= datetime('now', ?) AND service = 'openai' AND operation = 'presentation'""",
+                parameters=(since,),
+                fetchone=True
+            )
+            wasted_tokens = wasted[1] or 0
+            presentation_tokens = total[0] or 0
+            return {
+                'wasted_calls': wasted[0] or 0,
+                'wasted_tokens': wasted_tokens,
+                'wasted_cost_usd': (wasted[2] or 0) / 1_000_000,
+                'presentation_tokens': presentation_tokens,
+                'wasted_rate': wasted_tokens / presentation_tokens if presentation_tokens else 0.0,
+            }
+        except Exception as e:
+            print(f"❌ get_speculation_usage xato: {e}")
+            return {'wasted_calls': 0, 'wasted_tokens': 0, 'wasted_cost_usd': 0.0,
+                    'presentation_tokens': 0, 'wasted_rate': 0.0}
+
+    def get_usage_by_day(self, days: int = 14) -> List[Dict]:
+        """
+        Kunlar (UTC) va servis bo'yicha sarf
+
+        Returns:
+            List[Dict]: day, service, calls, tokens, credits, cost_usd, avg_ms, tasks
+        """
+        try:
+            rows = self.execute(
+                """SELECT date(created_at) AS day, service, COUNT(*),
+                          SUM(prompt_tokens + completion_tokens), SUM(credits), SUM(cost_micros),
+                          AVG(duration_ms), COUNT(DISTINCT task_uuid)
+                   FROM ApiUsage
+                   WHERE created_at >= datetime('now', ?)
+                   GROUP BY day, service
+                   ORDER BY day DESC, service""",
+                parameters=(f"-{int(days)} days",),
+                fetchall=True
+            )
+            return [{
+                'day': row[0],
+                'service': row[1],
+                'calls': row[2],
+                'tokens': row[3] or 0,
+                'credits': row[4] or 0,
+                'cost_usd': (row[5] or 0) / 1_000_000,
+                'avg_ms': row[6] or 0,
+                'tasks': row[7] or 0,
+            } for row in rows or []]
+        except Exception as e:
+            print(f"❌ get_usage_by_day xato: {e}")
+            return []
+
+    # ==================== GAMMA THEME KATALOGI ====================
+
+    def get_gamma_theme_sync(self) -> Optional[Dict]:
+        """Oxirgi sinxron holati (hali sinxronlanmagan bo'lsa None)"""
+        try:
+            row = self.execute(
+                "SELECT etag, digest, theme_count, synced_at, changed_at FROM GammaThemeSync WHERE id = 1",
+                fetchone=True
+            )
+            if not row:
+                return None
+            return {
+                'etag': row[0],
+                'digest': row[1],
+                'theme_count': row[2],
+                'synced_at': row[3],
+                'changed_at': row[4],
+            }
+        except Exception as e:
+            print(f"❌ get_gamma_theme_sync xato: {e}")
+            return None
+
+    def get_gamma_themes(self, available_only: bool = True) -> List[Dict]:
+        try:
+            sql = "SELECT theme_id, name, theme_type, is_available, rejected_at FROM GammaThemes"
+            if available_only:
+                sql += " WHERE is_available = 1"
+            rows = self.execute(sql + " ORDER BY theme_id", fetchall=True)
+            return [{
+                'theme_id': row[0],
+                'name': row[1],
+                'theme_type': row[2],
+                'is_available': bool(row[3]),
+                'rejected_at': row[4],
+            } for row in rows or []]
+        except Exception as e:
+            print(f"❌ get_gamma_themes xato: {e}")
+            return []
+
+    def save_gamma_themes(self, themes: List[Dict], etag: Optional[str], digest: str) -> Dict:
+        """
+        Yangi katalog - bitta tranzaksiyada: ro'yxatdagilar upsert, qolganlari is_available = 0
+
+        Returns:
+            dict: added, removed (theme_id ro'yxatlari)
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute("SELECT theme_id FROM GammaThemes WHERE is_available = 1")
+                before = {row[0] for row in cursor.fetchall()}
+                current = {theme['id'] for theme in themes}
+
+                cursor.execute("UPDATE GammaThemes SET is_available = 0 WHERE is_available = 1")
+                cursor.executemany(
+                    """INSERT INTO GammaThemes (theme_id, name, theme_type) VALUES (?, ?, ?)
+                       ON CONFLICT(theme_id) DO UPDATE SET
+                           name = excluded.name,
+                           theme_type = excluded.theme_type,
+                           is_available = 1,
+                           last_seen_at = CURRENT_TIMESTAMP,
+                           rejected_at = NULL""",
+                    [(theme['id'], theme.get('name'), theme.get('type')) for theme in themes]
+                )
+                cursor.execute(
+                    """INSERT INTO GammaThemeSync (id, etag, digest, theme_count, synced_at, changed_at)
+                       VALUES (1, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                       ON CONFLICT(id) DO UPDATE SET
+                           etag = excluded.etag,
+                           digest = excluded.digest,
+                           theme_count = excluded.theme_count,
+                           synced_at = excluded.synced_at,
+                           changed_at = excluded.changed_at""",
+                    (etag, digest, len(current))
+                )
+            return {'added': sorted(current - before), 'removed': sorted(before - current)}
+        except Exception as e:
+            print(f"❌ save_gamma_themes xato: {e}")
+            return {'added': [], 'removed': [], 'error': str(e)}
+
+    def touch_gamma_theme_sync(self):
+        """Katalog o'zgarmagan - faqat tekshiruv vaqti"""
+        self.execute("UPDATE GammaThemeSync SET synced_at = CURRENT_TIMESTAMP WHERE id = 1", commit=True)
+
+    def mark_gamma_theme_rejected(self, theme_id: str):
+        """Gamma theme'ni rad etdi - keyingi sinxrongacha ishlatilmaydi"""
+        self.execute(
+            "UPDATE GammaThemes SET is_available = 0, rejected_at = CURRENT_TIMESTAMP WHERE theme_id = ?",
+            parameters=(theme_id,),
+            commit=True
+        )
+
+    # ==================== TASK LEASE / CHECKPOINT ====================
+
+    def claim_task(self, task_uuid: str, owner: str, lease_seconds: int) -> bool:
+        """pending -> processing, lease bilan (boshqa worker olgan bo'lsa False)"""
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute(
+                    """UPDATE PresentationTasks
+                       SET status = 'processing', lease_owner = ?, lease_expires_at = datetime('now', ?),
+                           attempts = attempts + 1, started_at = CURRENT_TIMESTAMP
+                       WHERE task_uuid = ? AND status = 'pending'""",
+                    (owner, f'+{int(lease_seconds)} seconds', task_uuid)
+                )
+                return cursor.rowcount == 1
+        except Exception as e:
+            print(f"❌ claim_task xato: {e}")
+            return False
+
+    def renew_task_leases(self, owner: str, task_uuids: List[str], lease_seconds: int) -> int:
+        """Bajarilayotgan task'lar lease'ini uzaytirish; uzaytirilganlar soni"""
+        if not task_uuids:
+            return 0
+        try:
+            placeholders = ', '.join('?' * len(task_uuids))
+            with self.transaction() as cursor:
+                cursor.execute(
+                    f"""UPDATE PresentationTasks SET lease_expires_at = datetime('now', ?)
+                        WHERE lease_owner = ? AND status = 'processing' AND task_uuid IN ({placeholders})""",
+                    (f'+{int(lease_seconds)} seconds', owner, *task_uuids)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            print(f"❌ renew_task_leases xato: {e}")
+            return 0
+
+    def release_task_leases(self, owner: str, task_uuids: List[str]) -> int:
+        """To'xtash paytida: task'lar darhol 'pending' ga (urinish hisoblanmaydi)"""
+        if not task_uuids:
+            return 0
+        try:
+            placeholders = ', '.join('?' * len(task_uuids))
+            with self.transaction() as cursor:
+                cursor.execute(
+                    f"""UPDATE PresentationTasks
+                        SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL,
+                            attempts = MAX(attempts - 1, 0)
+                        WHERE lease_owner = ? AND status = 'processing' AND task_uuid IN ({placeholders})""",
+                    (owner, *task_uuids)
+                )
+                return cursor.rowcount
+        except Exception as e:
+            print(f"❌ release_task_leases xato: {e}")
+            return 0
+
+    def reclaim_expired_tasks(self, max_attempts: int, error_message: str = None) -> Dict:
+        """
+        Lease'i tugagan (yoki lease'siz qolgan) 'processing' task'lar
+
+        attempts < max_attempts bo'lsa - qayta 'pending' (checkpoint'dan davom etadi),
+        aks holda shu tranzaksiyada 'failed' + refund (_fail_and_refund). Boshqa worker
+        allaqachon olgan task 'exhausted' ga tushmaydi - refund bir marta.
+
+        Returns:
+            dict: requeued (task_uuid'lar),
+                  exhausted ([{'task_uuid', 'user_id', 'type', 'telegram_id', 'refunded'}])
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute(
+                    """SELECT task_uuid, user_id, presentation_type, attempts FROM PresentationTasks
+                       WHERE status = 'processing'
+                         AND (lease_expires_at IS NULL OR lease_expires_at < datetime('now'))"""
+                )
+                rows = cursor.fetchall()
+                requeued = [row[0] for row in rows if row[3] < max_attempts]
+                cursor.executemany(
+                    """UPDATE PresentationTasks SET status = 'pending', lease_owner = NULL, lease_expires_at = NULL
+                       WHERE task_uuid = ? AND status = 'processing'""",
+                    [(task_uuid,) for task_uuid in requeued]
+                )
+                exhausted = []
+                for row in rows:
+                    if row[3] < max_attempts:
+                        continue
+                    result = self._fail_and_refund(cursor, row[0], error_message, statuses=('processing',))
+                    if result['status'] == 'ok':
+                        exhausted.append({'task_uuid': row[0], 'user_id': row[1], 'type': row[2],
+                                          'telegram_id': result['telegram_id'], 'refunded': result['refunded']})
+            return {'requeued': requeued, 'exhausted': exhausted}
+        except Exception as e:
+            print(f"❌ reclaim_expired_tasks xato: {e}")
+            return {'requeued': [], 'exhausted': []}
+
+    def _fail_and_refund(self, cursor, task_uuid: str, error_message: str = None,
+                         statuses: tuple = ('pending', 'processing')) -> Dict:
+        """
+        Task'ni 'failed' qilish va amount_charged'ni qaytarish - chaqiruvchining tranzaksiyasida
+
+        Status faqat statuses dan biri bo'lsa o'zgaradi (aks holda task allaqachon
+        yakunlangan / boshqa worker olgan - 'skipped'). Kalit 'refund:<task_uuid>'
+        IdempotencyKeys'da - qayta chaqiruv 'duplicate', pul ikki marta qaytmaydi.
+        """
+        idempotency_key = f"refund:{task_uuid}"
+        previous = self._get_idempotent_result(cursor, idempotency_key)
+        if previous:
+            return previous
+
+        placeholders = ', '.join('?' for _ in statuses)
+        cursor.execute(
+            f"""UPDATE PresentationTasks
+                SET status = 'failed', error_message = COALESCE(?, error_message),
+                    completed_at = CURRENT_TIMESTAMP, lease_owner = NULL, lease_expires_at = NULL
+                WHERE task_uuid = ? AND status IN ({placeholders})""",
+            (error_message, task_uuid, *statuses)
+        )
+        if cursor.rowcount == 0:
+            return {'status': 'skipped', 'telegram_id': None, 'refunded': 0}
+
+        cursor.execute(
+            """SELECT u.id, u.telegram_id, u.balance, t.amount_charged
+               FROM PresentationTasks t JOIN Users u ON u.id = t.user_id
+               WHERE t.task_uuid = ?""",
+            (task_uuid,)
+        )
+        row = cursor.fetchone()
+        refunded = float(row[3] or 0) if row else 0
+        if refunded > 0:
+            balance = float(row[2] or 0)
+            cursor.execute(
+                "UPDATE Users SET balance = balance + ?, total_deposited = total_deposited + ? WHERE id = ?",
+                (refunded, refunded, row[0])
+            )
+            cursor.execute(
+                """INSERT INTO Transactions
+                   (user_id, transaction_type, amount, balance_before, balance_after,
+                    description, status, created_at)
+                   VALUES (?, 'refund', ?, ?, ?, 'Xatolik - avtomatik qaytarildi', 'approved', CURRENT_TIMESTAMP)""",
+                (row[0], refunded, balance, balance + refunded)
+            )
+
+        result = {'status': 'ok', 'telegram_id': row[1] if row else None, 'refunded': refunded}
+        self._save_idempotent_result(cursor, idempotency_key, result)
+        return result
+
+    def fail_task_and_refund(self, task_uuid: str, error_message: str = None) -> Dict:
+        """
+        Task xatosi: 'failed' + refund + ledger bitta BEGIN IMMEDIATE tranzaksiyada
+
+        Returns:
+            dict: status - 'ok' | 'duplicate' | 'skipped' | 'error', telegram_id, refunded
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                return self._fail_and_refund(cursor, task_uuid, error_message)
+        except Exception as e:
+            print(f"❌ fail_task_and_refund xato: {e}")
+            return {'status': 'error', 'telegram_id': None, 'refunded': 0}
+
+    def get_task_checkpoint(self, task_uuid: str) -> Optional[Dict]:
+        try:
+            row = self.execute(
+                """SELECT stage, content, generation_id, artifact_path, artifact_name, file_id, updated_at
+                   FROM TaskCheckpoints WHERE task_uuid = ?""",
+                parameters=(task_uuid,),
+                fetchone=True
+            )
+            if not row:
+                return None
+            return {
+                'stage': row[0],
+                'content': json.loads(row[1]) if row[1] else None,
+                'generation_id': row[2],
+                'artifact_path': row[3],
+                'artifact_name': row[4],
+                'file_id': row[5],
+                'updated_at': row[6],
+            }
+        except Exception as e:
+            print(f"❌ get_task_checkpoint xato: {e}")
+            return None
+
+    def save_task_checkpoint(self, task_uuid: str, stage: str, content: Dict = None, generation_id: str = None,
+                             artifact_path: str = None, artifact_name: str = None, file_id: str = None) -> bool:
+        """
+        Bosqich natijasi (berilmagan maydonlar oldingi qiymatida qoladi)
+
+        'delivered' bosqichida content o'chiriladi - qayta ishlash kerak emas.
+        """
+        try:
+            self.execute(
+                """INSERT INTO TaskCheckpoints
+                       (task_uuid, stage, content, generation_id, artifact_path, artifact_name, file_id)
+                   VALUES (?, ?, ?, ?, ?, ?, ?)
+                   ON CONFLICT(task_uuid) DO UPDATE SET
+                       stage = excluded.stage,
+                       content = CASE WHEN excluded.stage = 'delivered' THEN NULL
+                                      ELSE COALESCE(excluded.content, content) END,
+                       generation_id = COALESCE(excluded.generation_id, generation_id),
+                       artifact_path = COALESCE(excluded.artifact_path, artifact_path),
+                       artifact_name = COALESCE(excluded.artifact_name, artifact_name),
+                       file_id = COALESCE(excluded.file_id, file_id),
+                       updated_at = CURRENT_TIMESTAMP""",
+                parameters=(
+                    task_uuid, stage,
+                    json.dumps(content, ensure_ascii=False) if content is not None else None,
+                    generation_id, artifact_path, artifact_name, file_id
+                ),
+                commit=True
+            )
+            return True
+        except Exception as e:
+            print(f"❌ save_task_checkpoint xato: {e}")
+            return False
+
+    # ==================== ARXIV (HOT / COLD) ====================
+
+    @staticmethod
+    def _decompress(blob) -> Optional[str]:
+        if blob is None:
+            return None
+        return zlib.decompress(blob).decode('utf-8')
+
+    @staticmethod
+    def _add_to_totals(cursor, source: str, totals: Dict[tuple, list]):
+        cursor.executemany(
+            """INSERT INTO ArchiveTotals (source, kind, status, count, amount) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(source, kind, status) DO UPDATE SET
+                   count = count + excluded.count, amount = amount + excluded.amount""",
+            [(source, kind, status, count, amount) for (kind, status), (count, amount) in totals.items()]
+        )
+
+    def archive_tasks_chunk(self, older_than_days: int, chunk_size: int = 500) -> int:
+        """
+        Bitta bo'lak: yopilgan (completed/failed) eski task'larni arxivga ko'chirish
+
+        Har bir bo'lak alohida qisqa tranzaksiya - bot yozuvlari orasida navbat kutadi.
+        Returns:
+            int: ko'chirilgan task'lar soni (0 - boshqa qolmadi)
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute(
+                    """SELECT id, user_id, task_uuid, presentation_type, slide_count, answers, status, progress,
+                              error_message, amount_charged, started_at, completed_at, created_at
+                       FROM PresentationTasks
+                       WHERE status IN ('completed', 'failed') AND created_at < datetime('now', ?)
+                       LIMIT ?""",
+                    (f'-{int(older_than_days)} days', int(chunk_size))
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return 0
+
+                totals: Dict[tuple, list] = {}
+                archived = []
+                for row in rows:
+                    answers = zlib.compress(row[5].encode('utf-8')) if row[5] is not None else None
+                    archived.append(row[:5] + (answers,) + row[6:])
+                    total = totals.setdefault((row[3], row[6]), [0, 0.0])
+                    total[0] += 1
+                    total[1] += float(row[9] or 0)
+
+                cursor.executemany(
+                    """INSERT OR REPLACE INTO PresentationTasksArchive
+                           (id, user_id, task_uuid, presentation_type, slide_count, answers_z, status, progress,
+                            error_message, amount_charged, started_at, completed_at, created_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    archived
+                )
+                cursor.executemany("DELETE FROM TaskCheckpoints WHERE task_uuid = ?", [(row[2],) for row in rows])
+                cursor.executemany("DELETE FROM PresentationTasks WHERE id = ?", [(row[0],) for row in rows])
+                self._add_to_totals(cursor, 'PresentationTasks', totals)
+                return len(rows)
+        except Exception as e:
+            print(f"❌ archive_tasks_chunk xato: {e}")
+            return 0
+
+    def archive_transactions_chunk(self, older_than_days: int, chunk_size: int = 500) -> int:
+        """Bitta bo'lak: yopilgan (approved/rejected) eski tranzaksiyalarni arxivga ko'chirish"""
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute(
+                    """SELECT id, user_id, transaction_type, amount, balance_before, balance_after, description,
+                              receipt_file_id, status, admin_id, created_at, updated_at
+                       FROM Transactions
+                       WHERE status IN ('approved', 'rejected') AND created_at < datetime('now', ?)
+                       LIMIT ?""",
+                    (f'-{int(older_than_days)} days', int(chunk_size))
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return 0
+
+                totals: Dict[tuple, list] = {}
+                for row in rows:
+                    total = totals.setdefault((row[2], row[8]), [0, 0.0])
+                    total[0] += 1
+                    total[1] += float(row[3] or 0)
+
+                cursor.executemany(
+                    """INSERT OR REPLACE INTO TransactionsArchive
+                           (id, user_id, transaction_type, amount, balance_before, balance_after, description,
+                            receipt_file_id, status, admin_id, created_at, updated_at)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    rows
+                )
+                cursor.executemany("DELETE FROM Transactions WHERE id = ?", [(row[0],) for row in rows])
+                self._add_to_totals(cursor, 'Transactions', totals)
+                return len(rows)
+        except Exception as e:
+            print(f"❌ archive_transactions_chunk xato: {e}")
+            return 0
+
+    def purge_idempotency_keys_chunk(self, older_than_hours: float = 24, chunk_size: int = 500) -> int:
+        """
+        Bitta bo'lak: eski idempotency kalitlarini o'chirish
+
+        Kalit faqat double tap / qayta yuborishni ushlaydi - bir kundan keyin kerak emas.
+        Returns:
+            int: o'chirilgan kalitlar soni (0 - boshqa qolmadi)
+        """
+        try:
+            with self.transaction(immediate=True) as cursor:
+                cursor.execute(
+                    """DELETE FROM IdempotencyKeys WHERE key IN (
+                           SELECT key FROM IdempotencyKeys WHERE created_at < datetime('now', ?) LIMIT ?)""",
+                    (f'-{float(older_than_hours)} hours', int(chunk_size))
+                )
+                return cursor.rowcount
+        except Exception as e:
+            print(f"❌ purge_idempotency_keys_chunk xato: {e}")
+            return 0
+
+    def get_archived_totals(self, source: str, kind: str = None, status: str = None) -> Dict:
+        """Arxivga o'tganlar yig'indisi: {'count', 'amount'}"""
+        sql = "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(amount), 0) FROM ArchiveTotals WHERE source = ?"
+        parameters = [source]
+        if kind is not None:
+            sql += " AND kind = ?"
+            parameters.append(kind)
+        if status is not None:
+            sql += " AND status = ?"
+            parameters.append(status)
+        result = self.execute(sql, parameters=tuple(parameters), fetchone=True)
+        return {'count': int(result[0]), 'amount': float(result[1])} if result else {'count': 0, 'amount': 0.0}
+
+    def get_task_status_counts(self) -> Dict[str, int]:
+        """Barcha vaqt uchun task'lar statusi bo'yicha (faol jadval + arxiv yig'indisi)"""
+        counts: Dict[str, int] = {}
+        for sql in ("SELECT status, COUNT(*) FROM PresentationTasks GROUP BY status",
+                    "SELECT status, SUM(count) FROM ArchiveTotals WHERE source = 'PresentationTasks' GROUP BY status"):
+            for status, count in self.execute(sql, fetchall=True) or []:
+                counts[status] = counts.get(status, 0) + int(count or 0)
+        return counts
+
+    def get_archive_stats(self) -> Dict:
+        """Faol / arxiv jadvallar hajmi va bazadagi bo'sh sahifalar"""
+        stats = {}
+        for key, table in (('tasks_hot', 'PresentationTasks'), ('tasks_archived', 'PresentationTasksArchive'),
+                           ('transactions_hot', 'Transactions'), ('transactions_archived', 'TransactionsArchive')):
+            result = self.execute(f"SELECT COUNT(*) FROM {table}", fetchone=True)
+            stats[key] = result[0] if result else 0
+        for key in ('page_count', 'page_size', 'freelist_count', 'auto_vacuum'):
+            result = self.execute(f"PRAGMA {key}", fetchone=True)
+            stats[key] = result[0] if result else 0
+        stats['db_bytes'] = stats['page_count'] * stats['page_size']
+        stats['free_bytes'] = stats['freelist_count'] * stats['page_size']
+        return stats
+
+    # ==================== TEXNIK XIZMAT ====================
+
+    def incremental_vacuum(self, pages: int) -> int:
+        """
+        Bo'sh sahifalarning bir qismini faylga qaytarish (auto_vacuum=INCREMENTAL bo'lsa)
+
+        Returns:
+            int: qolgan bo'sh sahifalar
+        """
+        try:
+            with self.transaction() as cursor:
+                # Pragma har bir sahifa uchun qadam - oxirigacha o'qilmasa bajarilmaydi
+                cursor.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            result = self.execute("PRAGMA freelist_count", fetchone=True)
+            return result[0] if result else 0
+        except Exception as e:
+            print(f"❌ incremental_vacuum xato: {e}")
+            return 0
+
+    def optimize(self, analysis_limit: int = 1000):
+        """PRAGMA optimize - faqat o'zgargan jadvallar statistikasi (cheklangan ANALYZE)"""
+        try:
+            # analysis_limit ulanishga tegishli - ikkalasi bitta ulanishda
+            with self.transaction() as cursor:
+                cursor.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}").fetchall()
+                cursor.execute("PRAGMA optimize").fetchall()
+        except Exception as e:
+            print(f"❌ optimize xato: {e}")
+
+    def vacuum(self) -> bool:
+        """
+        To'liq VACUUM (auto_vacuum rejimini ham qo'llaydi)
+
+        Butun bazani qayta yozadi va shu vaqt yozuvlarni to'sadi - faqat admin buyrug'i bilan.
+        """
+        try:
+            connection = self.connection
+            connection.isolation_level = None
+            try:
+                connection.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                connection.execute("VACUUM")
+            finally:
+                connection.close()
+            return True
+        except Exception as e:
+            print(f"❌ vacuum xato: {e}")
+            return False
@@ -9,17 +9,29 @@ from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
-try:
-    from docx import Document
-    from docx.shared import Inches, Pt, Cm, RGBColor
-    from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
-    from docx.enum.style import WD_STYLE_TYPE
-    from docx.enum.table import WD_TABLE_ALIGNMENT
+# python-docx (va lxml) birinchi DocxGenerator() da yuklanadi - bot starti uchun shart emas
+Document = Inches = Pt = Cm = RGBColor = None
+WD_ALIGN_PARAGRAPH = WD_LINE_SPACING = WD_STYLE_TYPE = WD_TABLE_ALIGNMENT = None
+DOCX_AVAILABLE = None  # None - hali tekshirilmagan
 
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-    logger.warning("⚠️ python-docx kutubxonasi topilmadi!")
+
+def _load_docx() -> bool:
+    global Document, Inches, Pt, Cm, RGBColor
+    global WD_ALIGN_PARAGRAPH, WD_LINE_SPACING, WD_STYLE_TYPE, WD_TABLE_ALIGNMENT, DOCX_AVAILABLE
+
+    if DOCX_AVAILABLE is None:
+        try:
+            from docx import Document
+            from docx.shared import Inches, Pt, Cm, RGBColor
+            from docx.enum.text import WD_ALIGN_PARAGRAPH, WD_LINE_SPACING
+            from docx.enum.style import WD_STYLE_TYPE
+            from docx.enum.table import WD_TABLE_ALIGNMENT
+
+            DOCX_AVAILABLE = True
+        except ImportError:
+            DOCX_AVAILABLE = False
+            logger.warning("⚠️ python-docx kutubxonasi topilmadi!")
+    return DOCX_AVAILABLE
 
 
 class DocxGenerator:
@@ -29,7 +41,7 @@ class DocxGenerator:
     """
 
     def __init__(self):
-        if not DOCX_AVAILABLE:
+        if not _load_docx():
             raise ImportError("python-docx kutubxonasi o'rnatilmagan. pip install python-docx")
 
     def create_course_work(
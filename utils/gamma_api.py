@@ -5,9 +5,33 @@ import ssl
 from typing import Optional, Dict
 import json
 
+from utils.api_usage import UsageCall, usage_tracker
+from utils.metrics import aiohttp_trace_config
+
 logger = logging.getLogger(__name__)
 
 
+def _classify_request(method: str, url) -> str:
+    """Metrikalar uchun so'rov turi"""
+    path = url.path
+    if path.endswith('/generations') and method == 'POST':
+        return 'create'
+    if '/generations/' in path:
+        return 'status'
+    if path.endswith('/themes'):
+        return 'themes'
+    return 'download'
+
+
+def _deducted_credits(result: Optional[Dict]) -> int:
+    """Status javobidagi {'credits': {'deducted': N, 'remaining': M}}"""
+    credits = (result or {}).get('credits') or {}
+    try:
+        return int(credits.get('deducted') or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0
+
+
 class GammaAPI:
     """
     Gamma API client - OFFICIAL DOCUMENTATION
@@ -19,10 +43,13 @@ class GammaAPI:
     - GET /themes - mavjud theme'lar ro'yxati
     """
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: str = "https://public-api.gamma.app/v1.0", theme_catalog=None):
         self.api_key = api_key
-        self.base_url = "https://public-api.gamma.app/v1.0"
+        self.base_url = base_url.rstrip('/')
+        # utils.theme_catalog.ThemeCatalog - theme_id POST'dan oldin tekshiriladi
+        self.theme_catalog = theme_catalog
         self.timeout = aiohttp.ClientTimeout(total=600)
+        self.trace_config = aiohttp_trace_config('gamma', _classify_request)
 
         # SSL context (macOS uchun)
         self.ssl_context = ssl.create_default_context()
@@ -35,8 +62,7 @@ class GammaAPI:
             title: str = "Prezentatsiya",
             num_cards: int = 10,
             text_mode: str = "generate",
-            theme_id: str = None,
-            _retry_without_theme: bool = False  # Internal flag
+            theme_id: str = None
     ) -> Optional[Dict]:
         """
         Gamma prezentatsiya yaratish
@@ -51,6 +77,27 @@ class GammaAPI:
         Returns:
             {'generationId': '...', 'status': 'processing'}
         """
+        # Katalogda yo'q theme - darhol standart dizayn (ikkinchi POST'siz)
+        if theme_id and self.theme_catalog is not None and not self.theme_catalog.is_available(theme_id):
+            logger.warning(f"⚠️ Theme '{theme_id}' Gamma katalogida yo'q - standart dizayn")
+            theme_id = None
+
+        # ApiUsage: bitta qator, theme'siz qayta urinish - retries
+        with usage_tracker.call('gamma', 'create', model=theme_id or 'default') as usage:
+            result = await self._create_generation(text_content, title, num_cards, text_mode, theme_id, usage)
+            usage.status = 'ok' if result else 'failed'
+        return result
+
+    async def _create_generation(
+            self,
+            text_content: str,
+            title: str,
+            num_cards: int,
+            text_mode: str,
+            theme_id: Optional[str],
+            usage: UsageCall,
+            _retry_without_theme: bool = False  # Internal flag
+    ) -> Optional[Dict]:
         headers = {
             "X-API-KEY": self.api_key,
             "Content-Type": "application/json",
@@ -78,7 +125,8 @@ class GammaAPI:
         try:
             connector = aiohttp.TCPConnector(ssl=self.ssl_context)
 
-            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector,
+                                             trace_configs=[self.trace_config]) as session:
                 logger.info(f"🎯 Gamma API: POST {self.base_url}/generations")
                 logger.info(
                     f"📊 Cards: {num_cards}, Mode: {text_mode}, Theme: {theme_id if theme_id and not _retry_without_theme else 'default'}")
@@ -90,8 +138,7 @@ class GammaAPI:
                 ) as response:
 
                     response_text = await response.text()
-                    logger.info(f"📥 Response status: {response.status}")
-                    logger.info(f"📄 Response: {response_text[:300]}")
+                    logger.debug(f"📥 Response ({response.status}): {response_text[:300]}")
 
                     if response.status in [200, 201]:
                         result = json.loads(response_text) if response_text else {}
@@ -109,15 +156,20 @@ class GammaAPI:
                     else:
                         logger.error(f"❌ Gamma API XATO ({response.status}): {response_text}")
 
-                        # ✅ FALLBACK: Agar theme bilan xato bo'lsa, theme'siz qayta urinish
-                        if theme_id and not _retry_without_theme and response.status in [400, 422, 500]:
+                        # ✅ FALLBACK: Theme rad etildi (katalog eskirgan) - theme'siz qayta urinish,
+                        # keyingi sinxrongacha bu theme yuborilmaydi
+                        if theme_id and not _retry_without_theme and response.status in [400, 422]:
                             logger.warning(f"⚠️ Theme '{theme_id}' bilan xato! Theme'siz qayta urinib ko'ramiz...")
-                            return await self.create_presentation_from_text(
+                            if self.theme_catalog is not None:
+                                self.theme_catalog.mark_rejected(theme_id)
+                            usage.retries += 1
+                            return await self._create_generation(
                                 text_content=text_content,
                                 title=title,
                                 num_cards=num_cards,
                                 text_mode=text_mode,
                                 theme_id=None,
+                                usage=usage,
                                 _retry_without_theme=True
                             )
 
@@ -128,19 +180,6 @@ class GammaAPI:
             return None
         except Exception as e:
             logger.error(f"💥 Xato: {e}")
-
-            # ✅ FALLBACK: Exception bo'lsa ham theme'siz urinish
-            if theme_id and not _retry_without_theme:
-                logger.warning(f"⚠️ Exception! Theme'siz qayta urinib ko'ramiz...")
-                return await self.create_presentation_from_text(
-                    text_content=text_content,
-                    title=title,
-                    num_cards=num_cards,
-                    text_mode=text_mode,
-                    theme_id=None,
-                    _retry_without_theme=True
-                )
-
             return None
 
     async def get_themes(self, limit: int = 50) -> Optional[list]:
@@ -149,40 +188,70 @@ class GammaAPI:
 
         Endpoint: GET /v1.0/themes
         """
+        result = await self.fetch_themes(page_size=limit)
+        return result['themes'] if result['status'] == 'ok' else None
+
+    async def fetch_themes(self, etag: str = None, page_size: int = 50, max_pages: int = 20) -> Dict:
+        """
+        Butun theme katalogi (sahifalab: hasMore / nextCursor)
+
+        etag berilsa birinchi sahifa If-None-Match bilan so'raladi - 304 bo'lsa
+        katalog o'zgarmagan, qolgan sahifalar yuklanmaydi.
+
+        Returns:
+            dict: status - 'ok' | 'not_modified' | 'error', themes, etag
+        """
         headers = {
             "X-API-KEY": self.api_key,
             "accept": "application/json"
         }
+        themes = []
+        new_etag = None
+        cursor = None
 
         try:
             connector = aiohttp.TCPConnector(ssl=self.ssl_context)
 
-            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
-                logger.info(f"🎨 Gamma API: GET {self.base_url}/themes")
-
-                async with session.get(
-                        f"{self.base_url}/themes?limit={limit}",
-                        headers=headers
-                ) as response:
-
-                    if response.status == 200:
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector,
+                                             trace_configs=[self.trace_config]) as session:
+                for page in range(max_pages):
+                    params = {'limit': page_size}
+                    if cursor:
+                        params['after'] = cursor
+                    page_headers = dict(headers)
+                    if etag and page == 0:
+                        page_headers['If-None-Match'] = etag
+
+                    logger.info(f"🎨 Gamma API: GET {self.base_url}/themes (sahifa {page + 1})")
+                    async with session.get(f"{self.base_url}/themes", headers=page_headers,
+                                           params=params) as response:
+                        if response.status == 304:
+                            logger.info("🎨 Theme katalogi o'zgarmagan (304)")
+                            return {'status': 'not_modified', 'themes': [], 'etag': etag}
+
+                        if response.status != 200:
+                            response_text = await response.text()
+                            logger.error(f"❌ Themes xato ({response.status}): {response_text[:300]}")
+                            return {'status': 'error', 'themes': [], 'etag': None}
+
+                        if page == 0:
+                            new_etag = response.headers.get('ETag')
                         result = await response.json()
-                        themes = result.get('data', result if isinstance(result, list) else [])
-                        logger.info(f"✅ {len(themes)} ta theme topildi")
 
-                        # Theme ID'larni log qilish
-                        for theme in themes[:10]:
-                            logger.info(f"🎨 Theme: id='{theme.get('id')}', name='{theme.get('name')}'")
+                    if isinstance(result, list):
+                        themes.extend(result)
+                        break
+                    themes.extend(result.get('data') or [])
+                    cursor = result.get('nextCursor')
+                    if not result.get('hasMore') or not cursor:
+                        break
 
-                        return themes
-                    else:
-                        response_text = await response.text()
-                        logger.error(f"❌ Themes xato ({response.status}): {response_text}")
-                        return None
+            logger.info(f"✅ {len(themes)} ta theme topildi")
+            return {'status': 'ok', 'themes': themes, 'etag': new_etag}
 
         except Exception as e:
             logger.error(f"💥 Themes xato: {e}")
-            return None
+            return {'status': 'error', 'themes': [], 'etag': None}
 
     async def check_status(self, generation_id: str) -> Optional[Dict]:
         """
@@ -198,7 +267,8 @@ class GammaAPI:
         try:
             connector = aiohttp.TCPConnector(ssl=self.ssl_context)
 
-            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector,
+                                             trace_configs=[self.trace_config]) as session:
                 async with session.get(
                         f"{self.base_url}/generations/{generation_id}",
                         headers=headers
@@ -209,7 +279,9 @@ class GammaAPI:
                     if response.status == 200:
                         result = json.loads(response_text)
 
-                        logger.info(f"📋 Status response: {json.dumps(result, indent=2, ensure_ascii=False)[:500]}")
+                        # Har poll'da - faqat DEBUG'da (JSON dump ham shunda yig'iladi)
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug(f"📋 Status response: {json.dumps(result, ensure_ascii=False)[:500]}")
 
                         status = result.get('status', 'unknown')
                         gamma_url = result.get('gammaUrl', '')
@@ -219,8 +291,7 @@ class GammaAPI:
                         files = result.get('files', [])
                         exports = result.get('exports', {})
 
-                        logger.info(f"📊 Status: {status}")
-                        logger.info(f"📄 PPTX URL: {pptx_url[:50] if pptx_url else 'yo`q'}")
+                        logger.debug(f"📊 Status: {status}, PPTX URL: {pptx_url[:50] if pptx_url else 'yo`q'}")
 
                         return {
                             'status': status,
@@ -233,7 +304,7 @@ class GammaAPI:
                         }
 
                     elif response.status == 202:
-                        logger.info("⏳ 202 - hali ishlanmoqda")
+                        logger.debug("⏳ 202 - hali ishlanmoqda")
                         return {
                             'status': 'processing',
                             'gammaUrl': '',
@@ -253,7 +324,8 @@ class GammaAPI:
         try:
             connector = aiohttp.TCPConnector(ssl=self.ssl_context)
 
-            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector) as session:
+            async with aiohttp.ClientSession(timeout=self.timeout, connector=connector,
+                                             trace_configs=[self.trace_config]) as session:
                 logger.info(f"📥 Download: {file_url[:80]}...")
 
                 async with session.get(file_url) as response:
@@ -322,39 +394,47 @@ class GammaAPI:
 
         logger.info(f"⏳ Kutish: max {timeout_seconds}s, interval {check_interval}s")
 
-        while elapsed < timeout_seconds:
-            status_info = await self.check_status(generation_id)
+        # ApiUsage: bitta qator - kutish vaqti, so'rovlar soni (retries), sarflangan kreditlar
+        with usage_tracker.call('gamma', 'generate') as usage:
+            polls = 0
+            while elapsed < timeout_seconds:
+                status_info = await self.check_status(generation_id)
+                polls += 1
+                usage.retries = polls - 1
+
+                if not status_info:
+                    logger.warning("⚠️ Status xato, qayta...")
+                    await asyncio.sleep(check_interval)
+                    elapsed += check_interval
+                    continue
+
+                status = status_info.get('status', '')
+
+                if status == 'failed' or status == 'error':
+                    logger.error("❌ Generation failed!")
+                    usage.status = 'failed'
+                    return False
+
+                if status == 'completed':
+                    usage.credits = _deducted_credits(status_info.get('result'))
+                    if wait_for_pptx:
+                        pptx_url = status_info.get('pptxUrl', '')
+                        if pptx_url:
+                            logger.info("✅ Tayyor! PPTX URL ham bor!")
+                            return True
+                        else:
+                            logger.info("⏳ Completed, lekin PPTX URL hali yo'q...")
+                    else:
+                        logger.info("✅ Tayyor!")
+                        return True
 
-            if not status_info:
-                logger.warning("⚠️ Status xato, qayta...")
+                logger.info(f"⏳ {elapsed}s / {timeout_seconds}s (status: {status})")
                 await asyncio.sleep(check_interval)
                 elapsed += check_interval
-                continue
-
-            status = status_info.get('status', '')
-
-            if status == 'failed' or status == 'error':
-                logger.error("❌ Generation failed!")
-                return False
 
-            if status == 'completed':
-                if wait_for_pptx:
-                    pptx_url = status_info.get('pptxUrl', '')
-                    if pptx_url:
-                        logger.info("✅ Tayyor! PPTX URL ham bor!")
-                        return True
-                    else:
-                        logger.info("⏳ Completed, lekin PPTX URL hali yo'q...")
-                else:
-                    logger.info("✅ Tayyor!")
-                    return True
-
-            logger.info(f"⏳ {elapsed}s / {timeout_seconds}s (status: {status})")
-            await asyncio.sleep(check_interval)
-            elapsed += check_interval
-
-        logger.error(f"⏱️ Timeout: {timeout_seconds}s")
-        return False
+            logger.error(f"⏱️ Timeout: {timeout_seconds}s")
+            usage.status = 'timeout'
+            return False
 
     def format_content_for_gamma(self, content: Dict, content_type: str) -> str:
         """Content'ni Gamma uchun formatlash"""
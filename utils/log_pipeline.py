@@ -0,0 +1,191 @@
+# utils/log_pipeline.py
+# Event loop'ni to'xtatmaydigan log: QueueHandler -> QueueListener (alohida thread), JSON
+#
+# Avval logging.basicConfig StreamHandler'i har bir yozuvni event loop ichida
+# formatlab, stderr'ga sinxron yozardi; Gamma har status so'rovida JSON dump,
+# Database.execute har SQL'ni print qilardi. Endi:
+#   - loop tomonida faqat filtrlar va navbatga qo'yish (QueueHandler); format
+#     va yozish - QueueListener thread'ida. Navbat to'lsa yozuv tashlanadi
+#     (log_records_dropped_total{reason="queue_full"}), loop kutmaydi
+#   - JSON qator: ts, level, logger, msg, task_uuid (worker), telegram_id
+#     (update yoki task egasi), exc; LOG_FORMAT=text - avvalgi ko'rinish
+#   - sampling: logger bo'yicha DEBUG/INFO yozuvlarning shu ulushi (LOG_SAMPLING)
+#   - rate limit: bitta call site (fayl:qator) window soniyada rate_limit tadan
+#     ko'p yozmaydi (ERROR dan tashqari), tashlanganlar soni keyingi yozuvda
+#     'suppressed' maydonida
+
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from utils.api_usage import current_task_uuid
+from utils.metrics import LOG_DROPPED, LOG_QUEUE_DEPTH, LOG_RECORDS
+
+# Joriy update / task egasi - ProfilingMiddleware va worker o'rnatadi
+current_telegram_id: ContextVar[Optional[int]] = ContextVar('current_telegram_id', default=None)
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Logger bo'yicha DEBUG/INFO yozuvlar ulushi (LOG_SAMPLING ustidan yoziladi)
+DEFAULT_SAMPLING = {
+    'httpx': 0.1,  # har bir OpenAI so'rovi uchun "HTTP Request: POST ..." qatori
+}
+
+
+class ContextFilter(logging.Filter):
+    """task_uuid / telegram_id - contextvar'lar loop tomonida o'qiladi (listener thread'ida ular yo'q)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.task_uuid = current_task_uuid.get()
+        record.telegram_id = current_telegram_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Logger bo'yicha sampling va call site bo'yicha rate limit
+
+    sampling - {'logger.nomi': 0.1}: shu logger (va bolalari) DEBUG/INFO
+    yozuvlarining 10% i qoladi. rate_limit / window - bitta call site'dan
+    window soniyada rate_limit tadan ortig'i tashlanadi (0 - cheklov yo'q).
+    """
+
+    def __init__(self, sampling: Dict[str, float] = None, rate_limit: int = 20, window: float = 10.0,
+                 clock=time.monotonic):
+        super().__init__()
+        self.sampling = {name: float(rate) for name, rate in {**DEFAULT_SAMPLING, **(sampling or {})}.items()}
+        self.rate_limit = rate_limit
+        self.window = window
+        self.clock = clock
+        self._rates: Dict[str, float] = {}
+        # call site -> [oyna boshlangan vaqt, oynadagi yozuvlar, tashlanganlar]
+        self._sites: Dict[Tuple[str, int], list] = {}
+
+    def sample_rate(self, name: str) -> float:
+        rate = self._rates.get(name)
+        if rate is None:
+            rate, probe = 1.0, name
+            while probe:
+                if probe in self.sampling:
+                    rate = self.sampling[probe]
+                    break
+                probe = probe.rpartition('.')[0]
+            self._rates[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno <= logging.INFO:
+            rate = self.sample_rate(record.name)
+            if rate < 1.0 and random.random() >= rate:
+                LOG_DROPPED.labels('sampled').inc()
+                return False
+
+        if self.rate_limit and record.levelno < logging.ERROR:
+            now = self.clock()
+            key = (record.pathname, record.lineno)
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= self.window:
+                suppressed = site[2] if site else 0
+                site = self._sites[key] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if site[1] >= self.rate_limit:
+                site[2] += 1
+                LOG_DROPPED.labels('rate_limited').inc()
+                return False
+            site[1] += 1
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Bitta yozuv - bitta JSON qator"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for field in ('task_uuid', 'telegram_id', 'suppressed'):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Navbat to'lsa kutmaydi va handleError traceback'ini chiqarmaydi - yozuv tashlanadi"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Xabar loop tomonida yig'iladi (args pickle/thread-safe bo'lmasligi mumkin),
+        # JSON va traceback formati - listener thread'ida
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_DROPPED.labels('queue_full').inc()
+            return
+        LOG_RECORDS.labels(record.levelname).inc()
+
+
+class LogListener(logging.handlers.QueueListener):
+    """stop(): navbat to'la bo'lsa ham yozilib bo'linishini kutadi, ikkinchi chaqiruv - hech narsa qilmaydi"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def setup_logging(level: str = 'INFO', fmt: str = 'json', queue_size: int = 10000,
+                  sampling: Dict[str, float] = None, rate_limit: int = 20, window: float = 10.0,
+                  stream=None) -> LogListener:
+    """
+    Root logger'ni navbat orqali yozishga o'tkazish (avvalgi handler'lar olib tashlanadi)
+
+    Qaytarilgan listener ishga tushirilgan; app.on_shutdown (yoki atexit) stop() qiladi -
+    navbatdagi yozuvlar yozib bo'linadi.
+    """
+    log_queue = queue.Queue(maxsize=queue_size)
+    LOG_QUEUE_DEPTH.labels().set_function(log_queue.qsize)
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+    handler = NonBlockingQueueHandler(log_queue)
+    # Avval sampling / rate limit - tashlanadigan yozuvga contextvar'lar o'qilmaydi
+    handler.addFilter(SamplingFilter(sampling, rate_limit=rate_limit, window=window))
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    listener = LogListener(log_queue, output)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,411 @@
+# utils/metrics.py
+# Jarayon ichidagi metrikalar (counter, gauge, histogram) va /metrics endpoint
+#
+# Prometheus text formatida (0.0.4) beriladi, tashqi kutubxonasiz. Metrikalar
+# label qiymatlari bo'yicha "child" obyektlarga bo'linadi:
+#
+#     UPDATES.labels('start_handler', 'message').inc()
+#     with EXTERNAL_SECONDS.labels('gamma', 'create').time(): ...
+#
+# Yangilash GIL ostida oddiy += - worker thread'lari (executor) uchun ham
+# yetarli; juda kam hollarda bitta qiymat yo'qolishi mumkin, bu metrikalar
+# uchun maqbul.
+
+import asyncio
+import bisect
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Sekundlarda - handler'lar, SQLite so'rovlari
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Tashqi API'lar, worker bosqichlari, soffice
+SLOW_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        """Label qiymatlari bo'yicha child (keshlangan)"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: {len(self.labelnames)} ta label kerak, {len(values)} berildi")
+            with self._lock:
+                child = self._children.setdefault(tuple(str(v) for v in values), self._new_child())
+                self._children[values] = child
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _label_str(self, values: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def _unique_children(self):
+        seen = set()
+        for values, child in list(self._children.items()):
+            if id(child) in seen:
+                continue
+            seen.add(id(child))
+            yield tuple(str(v) for v in values), child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._unique_children(), key=lambda item: item[0]):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{self._label_str(values)} {_format_value(child.value)}"]
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value: float):
+        self.value = value
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Qiymat scrape paytida hisoblanadi"""
+        self.function = function
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def _render_child(self, values, child) -> List[str]:
+        value = child.value
+        if child.function is not None:
+            try:
+                value = child.function()
+            except Exception as e:
+                logger.debug(f"Gauge {self.name} funksiya xato: {e}")
+        return [f"{self.name}{self._label_str(values)} {_format_value(value)}"]
+
+
+class _Timer:
+    __slots__ = ('child', 'started')
+
+    def __init__(self, child):
+        self.child = child
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.child.observe(time.perf_counter() - self.started)
+        return False
+
+
+class _HistogramChild:
+    __slots__ = ('upper_bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)  # oxirgisi - +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+            cumulative += count
+            label = self._label_str(values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{label} {cumulative}")
+        label = self._label_str(values)
+        lines.append(f"{self.name}_sum{label} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{label} {child.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Metrikalar ro'yxati - render() Prometheus text formatini qaytaradi"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metrika allaqachon mavjud: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+# ==================== BOT ====================
+UPDATES = REGISTRY.counter(
+    'bot_updates_total', "Qayta ishlangan update'lar (handler bo'yicha)", ('handler', 'kind'))
+HANDLER_SECONDS = REGISTRY.histogram(
+    'bot_handler_duration_seconds', "Update'ni qayta ishlash vaqti (middleware'lar bilan)", ('handler',))
+TELEGRAM_RETRIES = REGISTRY.counter(
+    'telegram_retries_total', "Telegram flood control (RetryAfter) holatlari", ('source',))
+THROTTLED = REGISTRY.counter(
+    'bot_throttled_total', "Rate limit bo'yicha rad etilgan update'lar", ('bucket', 'action'))
+RATE_LIMIT_KEYS = REGISTRY.gauge(
+    'bot_rate_limit_keys', "Rate limiter'da saqlanayotgan yozuvlar (user x bucket)")
+
+# ==================== DATABASE ====================
+DB_QUERY_SECONDS = REGISTRY.histogram(
+    'db_query_duration_seconds', "SQLite so'rovlari (Database.execute/transaction chaqirgan metod bo'yicha)",
+    ('site',))
+ARCHIVED_ROWS = REGISTRY.counter(
+    'db_archived_rows_total', "Arxiv jadvallariga ko'chirilgan qatorlar", ('table',))
+
+# ==================== WORKER ====================
+WORKER_QUEUE_DEPTH = REGISTRY.gauge(
+    'worker_queue_depth', "Navbatda kutayotgan task'lar (TaskScheduler)")
+WORKER_INFLIGHT = REGISTRY.gauge(
+    'worker_inflight', "Hozir bajarilayotgan task'lar")
+WORKER_QUEUE_WAIT_SECONDS = REGISTRY.histogram(
+    'worker_queue_wait_seconds', "Navbatga tushgandan bajarilish boshlanguncha", ('task_type', 'tier'),
+    SLOW_BUCKETS)
+WORKER_STAGE_SECONDS = REGISTRY.histogram(
+    'worker_stage_duration_seconds', "Worker bosqichlari davomiyligi", ('task_type', 'stage'), SLOW_BUCKETS)
+SOFFICE_SECONDS = REGISTRY.histogram(
+    'soffice_convert_duration_seconds', "DOCX -> PDF konvertatsiya (soffice)", ('result',), SLOW_BUCKETS)
+TASK_DELIVERY_SECONDS = REGISTRY.histogram(
+    'worker_task_delivery_seconds', "Task yaratilgandan fayl yuborilguncha (speculation - oldindan yaratish natijasi)",
+    ('task_type', 'speculation'), SLOW_BUCKETS)
+SPECULATIONS = REGISTRY.counter(
+    'speculative_content_total', "Oldindan content yaratish: started, hit, joined, miss, mismatch, expired, ...",
+    ('outcome',))
+ARTIFACT_BYTES = REGISTRY.gauge(
+    'worker_artifact_bytes', "Task papkalaridagi fayllar hajmi (oxirgi sweep + yozilganlar)")
+ARTIFACT_RECLAIMED_BYTES = REGISTRY.counter(
+    'worker_artifact_reclaimed_bytes_total', "O'chirilgan artifact'lar hajmi", ('reason',))
+
+# ==================== TASHQI API'LAR ====================
+EXTERNAL_SECONDS = REGISTRY.histogram(
+    'external_request_duration_seconds', "OpenAI / Gamma so'rovlari davomiyligi", ('service', 'operation'),
+    SLOW_BUCKETS)
+EXTERNAL_RESPONSES = REGISTRY.counter(
+    'external_requests_total', "OpenAI / Gamma javoblari (HTTP kod yoki xato turi)", ('service', 'operation', 'code'))
+EXTERNAL_RETRIES = REGISTRY.counter(
+    'external_retries_total', "Qayta urinishlar (sabab - HTTP kod yoki xato turi)", ('service', 'operation', 'reason'))
+OPENAI_PATHS = REGISTRY.counter(
+    'openai_completion_path_total', "OpenAI javobi qaysi yo'ldan keldi (primary / hedge / fallback)",
+    ('operation', 'path'))
+OPENAI_HEDGES = REGISTRY.counter(
+    'openai_hedged_requests_total', "Sekin asosiy so'rov uchun yuborilgan hedge so'rovlari", ('operation', 'model'))
+OPENAI_BREAKER_STATE = REGISTRY.gauge(
+    'openai_circuit_state', "Model circuit breaker holati (0 - yopiq, 1 - sinov, 2 - ochiq)", ('model',))
+
+
+# ==================== LOGGING ====================
+LOG_RECORDS = REGISTRY.counter(
+    'log_records_total', "Log yozuvlari (QueueHandler'ga tushgan)", ('level',))
+LOG_DROPPED = REGISTRY.counter(
+    'log_records_dropped_total', "Yozilmagan log yozuvlari (sampled, rate_limited, queue_full)", ('reason',))
+LOG_QUEUE_DEPTH = REGISTRY.gauge(
+    'log_queue_depth', "Log navbatidagi yozuvlar (QueueListener hali yozmagan)")
+
+
+class track_request:
+    """
+    Tashqi so'rovni o'lchash
+
+        with track_request('gamma', 'create') as call:
+            async with session.post(...) as response:
+                call.code = response.status
+
+    Xato bo'lsa kod - status_code atributi (OpenAI), 'timeout' yoki xato klassi nomi.
+    """
+
+    __slots__ = ('service', 'operation', 'code', 'started')
+
+    def __init__(self, service: str, operation: str):
+        self.service = service
+        self.operation = operation
+        self.code = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        EXTERNAL_SECONDS.labels(self.service, self.operation).observe(time.perf_counter() - self.started)
+        code = self.code
+        if exc is not None:
+            code = getattr(exc, 'status_code', None) or (
+                'timeout' if isinstance(exc, (TimeoutError, asyncio.TimeoutError)) else exc_type.__name__
+            )
+        EXTERNAL_RESPONSES.labels(self.service, self.operation, str(code if code is not None else 'ok')).inc()
+        return False
+
+
+async def observe_request(awaitable, service: str, operation: str, ok_code: str = '200'):
+    """Bitta awaitable (masalan OpenAI chaqiruvi) uchun track_request"""
+    with track_request(service, operation) as call:
+        result = await awaitable
+        call.code = ok_code
+    return result
+
+
+def aiohttp_trace_config(service: str, classify: Callable[[str, object], str]):
+    """
+    aiohttp ClientSession(trace_configs=[...]) uchun - har bir HTTP so'rovni o'lchaydi
+
+    classify(method, url) -> operation nomi
+    """
+    from aiohttp import TraceConfig
+
+    async def on_request_start(session, context, params):
+        context.started = time.perf_counter()
+
+    async def on_request_end(session, context, params):
+        operation = classify(params.method, params.url)
+        EXTERNAL_SECONDS.labels(service, operation).observe(time.perf_counter() - context.started)
+        EXTERNAL_RESPONSES.labels(service, operation, str(params.response.status)).inc()
+
+    async def on_request_exception(session, context, params):
+        operation = classify(params.method, params.url)
+        EXTERNAL_SECONDS.labels(service, operation).observe(time.perf_counter() - context.started)
+        exc = params.exception
+        code = 'timeout' if isinstance(exc, (TimeoutError, asyncio.TimeoutError)) else type(exc).__name__
+        EXTERNAL_RESPONSES.labels(service, operation, code).inc()
+
+    trace_config = TraceConfig()
+    trace_config.on_request_start.append(on_request_start)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_exception.append(on_request_exception)
+    return trace_config
+
+
+class StageTimer:
+    """
+    Worker bosqichlari: mark() oldingi mark'dan beri o'tgan vaqtni yozadi
+
+        timer = StageTimer('presentation')
+        ...content...
+        timer.mark('content')
+    """
+
+    __slots__ = ('task_type', 'last')
+
+    def __init__(self, task_type: str):
+        self.task_type = task_type
+        self.last = time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        WORKER_STAGE_SECONDS.labels(self.task_type, stage).observe(now - self.last)
+        self.last = now
+
+
+# ==================== HTTP ENDPOINT ====================
+
+async def start_metrics_server(host: str = '127.0.0.1', port: int = 9108):
+    """GET /metrics - aiohttp web server (runner qaytariladi, to'xtatish uchun runner.cleanup())"""
+    from aiohttp import web
+
+    async def metrics_handler(request):
+        return web.Response(body=REGISTRY.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get('/metrics', metrics_handler)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"📈 Metrics: http://{host}:{port}/metrics")
+    return runner
@@ -1,16 +1,19 @@
-def rate_limit(limit: int, key=None):
+def rate_limit(limit: float = None, key=None, cost: int = 1):
     """
     Decorator for configuring rate limit and key in different functions.
 
-    :param limit:
-    :param key:
+    :param limit: seconds per call for the handler's own bucket (ignored if key is a predefined bucket)
+    :param key: bucket class shared by several handlers (middlewares.throttling.BUCKETS)
+    :param cost: tokens taken per call - expensive actions cost more
     :return:
     """
 
     def decorator(func):
-        setattr(func, 'throttling_rate_limit', limit)
+        if limit:
+            setattr(func, 'throttling_rate_limit', limit)
         if key:
             setattr(func, 'throttling_key', key)
+        setattr(func, 'throttling_cost', cost)
         return func
 
     return decorator
@@ -12,3 +12,12 @@ async def on_startup_notify(dp: Dispatcher):
 
         except Exception as err:
             logging.exception(err)
+
+
+async def notify_admins(bot, text: str):
+    """Barcha adminlarga xabar (bittasiga yetmasa - qolganlariga yuboriladi)"""
+    for admin in ADMINS:
+        try:
+            await bot.send_message(admin, text)
+        except Exception as err:
+            logging.exception(err)
@@ -0,0 +1,301 @@
+# utils/openai_client.py
+# Umumiy AsyncOpenAI: bitta httpx ulanish havzasi, operatsiya bo'yicha timeout, qayta urinish siyosati
+#
+# Avval ContentGenerator va CourseWorkGenerator (worker'dagi va handler'dagi
+# nusxalari ham) har biri o'z AsyncOpenAI'sini - o'z ulanish havzasi bilan -
+# yaratardi, hammasi SDK'ning standart 600 s timeout'i va 2 ta qayta urinishi
+# bilan. Endi:
+#   - bitta httpx.AsyncClient: max_connections / keepalive chegaralari
+#   - timeout operatsiya bo'yicha: bozor tahlili / reja qisqa, 16k tokenli
+#     mustaqil ish uzun (OPERATION_TIMEOUTS)
+#   - qayta urinish api_usage._create'da (RetryPolicy): 408/409/429/5xx, ulanish
+#     xatosi va timeout - eksponensial backoff + jitter, Retry-After hisobga
+#     olinadi. SDK'ning o'z qayta urinishi o'chirilgan (max_retries=0)
+#   - client birinchi so'rovda yaratiladi (openai importi startni sekinlashtirmaydi),
+#     app.on_shutdown close() bilan havzani yopadi
+#   - dum kechikishi (api_usage.json_completion): asosiy so'rov (operatsiya, model)
+#     bo'yicha tarixiy p90 vaqtida javob bermasa - hedge so'rov (HedgePolicy,
+#     ixtiyoriy tezroq model), birinchi yaroqli JSON olinadi. Hedge'lar ulushi
+#     budget bilan chegaralangan. Har bir model uchun CircuitBreaker: xatolar
+#     ulushi oshsa model cooldown davomida chetlab o'tiladi (zaxira modelga)
+
+import logging
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from utils.metrics import OPENAI_BREAKER_STATE
+
+logger = logging.getLogger(__name__)
+
+# O'qish (javob kutish) timeout'i, soniya
+OPERATION_TIMEOUTS = {
+    'market_analysis': 45,
+    'presentation': 120,
+    'pitch_deck': 150,
+    'course_work': 420,
+}
+DEFAULT_TIMEOUT = 120
+
+RETRY_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class RetryPolicy:
+    """Qaysi xatoda va qancha kutib qayta urinish"""
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 1.0, max_delay: float = 20.0,
+                 jitter: float = 0.25):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    @staticmethod
+    def should_retry(exc: BaseException) -> bool:
+        import openai
+
+        if isinstance(exc, (openai.APIConnectionError, TimeoutError)):  # APITimeoutError ham
+            return True
+        if isinstance(exc, openai.APIStatusError):
+            return exc.status_code in RETRY_STATUSES
+        return False
+
+    @staticmethod
+    def retry_after(exc: BaseException) -> Optional[float]:
+        """429/503 javobidagi Retry-After (soniya yoki retry-after-ms)"""
+        response = getattr(exc, 'response', None)
+        headers = getattr(response, 'headers', None)
+        if not headers:
+            return None
+        try:
+            if headers.get('retry-after-ms'):
+                return float(headers['retry-after-ms']) / 1000
+            if headers.get('retry-after'):
+                return float(headers['retry-after'])
+        except (TypeError, ValueError):
+            pass
+        return None
+
+    def delay(self, attempt: int, exc: BaseException = None) -> float:
+        """attempt - 0 dan boshlab (birinchi qayta urinish oldidan)"""
+        retry_after = self.retry_after(exc) if exc is not None else None
+        if retry_after is not None and 0 <= retry_after <= self.max_delay * 3:
+            return retry_after
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay * (1 - self.jitter * random.random())
+
+
+# Hedge / zaxira so'rov uchun model (ro'yxatda yo'q bo'lsa - o'sha model)
+HEDGE_MODELS = {
+    'gpt-4': 'gpt-4o',
+}
+
+
+class CircuitOpenError(Exception):
+    """Model (va zaxira modeli) circuit breaker'i ochiq - so'rov yuborilmadi"""
+
+
+class LatencyTracker:
+    """(operatsiya, model) bo'yicha oxirgi muvaffaqiyatli so'rovlar davomiyligi"""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[Tuple[str, str], Deque[float]] = {}
+
+    def observe(self, operation: str, model: str, seconds: float):
+        samples = self._samples.get((operation, model))
+        if samples is None:
+            samples = self._samples[(operation, model)] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def count(self, operation: str, model: str) -> int:
+        return len(self._samples.get((operation, model), ()))
+
+    def quantile(self, operation: str, model: str, q: float) -> Optional[float]:
+        samples = self._samples.get((operation, model))
+        if not samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def load(self, rows: List[Dict]):
+        """get_openai_latency_samples() natijasi (yangilari birinchi)"""
+        for row in reversed(rows):
+            if row.get('model') and row.get('duration_ms'):
+                self.observe(row['operation'], row['model'], row['duration_ms'] / 1000)
+
+
+class CircuitBreaker:
+    """
+    Bitta model uchun: oxirgi window ta so'rovdan failure_ratio qismi xato
+    bo'lsa - cooldown soniya ochiq (so'rov yuborilmaydi), keyin bitta sinov
+    so'rovi; u muvaffaqiyatli bo'lsa yopiladi, aks holda yana ochiladi
+    """
+
+    CLOSED = 'closed'
+    HALF_OPEN = 'half_open'
+    OPEN = 'open'
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, model: str, window: int = 20, min_calls: int = 10, failure_ratio: float = 0.5,
+                 cooldown: float = 30.0, clock=time.monotonic):
+        self.model = model
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        self._results: Deque[bool] = deque(maxlen=window)
+        OPENAI_BREAKER_STATE.labels(model).set_function(lambda: self.STATE_VALUES[self.state])
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and self.clock() - self.opened_at < self.cooldown
+
+    def allow(self) -> bool:
+        """So'rov yuborish mumkinmi (ochiq holatda cooldown tugasa - bitta sinov)"""
+        if self.state == self.CLOSED:
+            return True
+        if self.clock() - self.opened_at < self.cooldown:
+            return False
+        # Sinov so'rovi bekor qilinib natija yozilmasa ham, keyingi cooldown'dan keyin yana sinov
+        self.state = self.HALF_OPEN
+        self.opened_at = self.clock()
+        return True
+
+    def record(self, ok: bool):
+        if self.state == self.HALF_OPEN:
+            if ok:
+                self.state = self.CLOSED
+                self._results.clear()
+                logger.info(f"✅ OpenAI {self.model}: circuit yopildi")
+            else:
+                self._open()
+            return
+
+        self._results.append(ok)
+        failures = self._results.count(False)
+        if self.state == self.CLOSED and len(self._results) >= self.min_calls and \
+                failures >= self.failure_ratio * len(self._results):
+            self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self.opened_at = self.clock()
+        self._results.clear()
+        logger.warning(f"⚠️ OpenAI {self.model}: circuit ochildi ({self.cooldown:.0f} s)")
+
+
+class HedgePolicy:
+    """
+    Qachon va qaysi modelga hedge so'rov
+
+    quantile - asosiy so'rov (operatsiya, model) tarixining shu kvantilidan uzoq
+    davom etsa hedge (0 - o'chirilgan); min_samples ta tarixgacha hedge yo'q.
+    budget - hedge'lar ulushi chegarasi: har chaqiruv budget token qo'shadi,
+    har hedge 1 token oladi (burst ta gacha yig'iladi).
+    """
+
+    def __init__(self, quantile: float = 0.9, min_samples: int = 20, min_delay: float = 1.0,
+                 budget: float = 0.15, burst: float = 5.0, models: Dict[str, str] = None):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.budget = budget
+        self.burst = burst
+        self.models = {**HEDGE_MODELS, **(models or {})}
+        self._tokens = burst
+
+    @property
+    def enabled(self) -> bool:
+        return self.quantile > 0
+
+    def model_for(self, model: Optional[str]) -> Optional[str]:
+        return self.models.get(model) or model
+
+    def on_call(self):
+        self._tokens = min(self.burst, self._tokens + self.budget)
+
+    def take(self) -> bool:
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class OpenAIClient:
+    """
+    Generatorlar uchun umumiy client
+
+        openai_client = OpenAIClient(api_key, max_connections=20)
+        content = await json_completion(openai_client, 'presentation', model=..., messages=...)
+        ...
+        await openai_client.close()
+    """
+
+    def __init__(self, api_key: str, base_url: str = None, max_connections: int = 20,
+                 max_keepalive: int = 10, keepalive_expiry: float = 30, connect_timeout: float = 10,
+                 timeouts: Dict[str, float] = None, retry: RetryPolicy = None, hedge: HedgePolicy = None):
+        self.api_key = api_key
+        self.base_url = base_url  # None - SDK OPENAI_BASE_URL'ni o'zi o'qiydi
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.timeouts = {**OPERATION_TIMEOUTS, **(timeouts or {})}
+        self.retry = retry or RetryPolicy()
+        self.hedge = hedge or HedgePolicy()
+        self.latency = LatencyTracker()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            import httpx
+            from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+            http_client = DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=self.timeout_for(None),
+            )
+            self._client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                http_client=http_client,
+                max_retries=0,
+                timeout=self.timeout_for(None),
+            )
+            logger.info(f"✅ OpenAI client tayyor (havza: {self.max_connections} ulanish, "
+                        f"{self.retry.max_retries} qayta urinish)")
+        return self._client
+
+    def timeout_for(self, operation: Optional[str]):
+        import httpx
+
+        read = self.timeouts.get(operation, DEFAULT_TIMEOUT)
+        return httpx.Timeout(read, connect=self.connect_timeout)
+
+    def breaker(self, model: Optional[str]) -> CircuitBreaker:
+        model = model or '-'
+        breaker = self._breakers.get(model)
+        if breaker is None:
+            breaker = self._breakers[model] = CircuitBreaker(model)
+        return breaker
+
+    def hedge_delay(self, operation: str, model: Optional[str]) -> Optional[float]:
+        """Shuncha soniyada javob bo'lmasa hedge (None - hedge yo'q: o'chirilgan yoki tarix kam)"""
+        if not self.hedge.enabled or self.latency.count(operation, model) < self.hedge.min_samples:
+            return None
+        return max(self.hedge.min_delay, self.latency.quantile(operation, model, self.hedge.quantile))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
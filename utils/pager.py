@@ -0,0 +1,134 @@
+# utils/pager.py
+# Admin ro'yxatlari uchun inline-klaviaturali sahifalash (keyset)
+#
+# Avval ro'yxatlar (kutilayotgan tranzaksiyalar, kanallar, adminlar) butunligicha
+# bazadan o'qilib, har bir qator alohida xabar yoki bitta ulkan matn bo'lib
+# yuborilardi - to'lovlar ko'p paytda adminlar flood limitiga tushardi. Endi
+# bitta xabar, sahifada page_size ta qator, ◀️ / ▶️ tugmalari shu xabarni
+# tahrirlaydi. So'rovlar OFFSET'siz: WHERE id > ? ORDER BY id LIMIT n
+# (Database.fetch_page). Holat callback_data'da:
+#   pg:<kind>:<filter>:<yo'nalish>:<id>   masalan  pg:tx:p:n:1042
+# (64 bayt chegarasidan ancha kichik, serverda hech narsa saqlanmaydi).
+
+import logging
+from typing import Callable, Dict, List, Tuple
+
+from aiogram import types
+from aiogram.utils.callback_data import CallbackData
+from aiogram.utils.exceptions import MessageNotModified
+
+logger = logging.getLogger(__name__)
+
+page_cb = CallbackData('pg', 'kind', 'flt', 'dir', 'key')
+
+NEXT = 'n'
+PREV = 'p'
+NO_FILTER = '-'
+
+
+class Pager:
+    """
+    Bitta ro'yxat turi
+
+        pager = Pager('tx', fetch=..., render=..., title="💳 Tranzaksiyalar",
+                      filters={'p': ('pending', "⏳ Kutilmoqda"), ...})
+        await pager.send(message)                           # birinchi sahifa
+        @dp.callback_query_handler(page_cb.filter(kind='tx'))
+        async def ...(call, callback_data): await pager.edit(call, callback_data)
+
+    fetch(value, after=, before=, limit=) -> (rows, has_more); value - filter qiymati
+    render(row) -> str; item_button(row) -> InlineKeyboardButton | None; key(row) -> int
+    footer() -> str - ro'yxat ostidagi matn; actions - har sahifada oxirgi qatordagi tugmalar
+    """
+
+    def __init__(self, kind: str, fetch: Callable, render: Callable[[dict], str], title: str,
+                 filters: Dict[str, Tuple[str, str]] = None, page_size: int = 8,
+                 item_button: Callable = None, key: Callable = None, empty: str = "Ro'yxat bo'sh",
+                 footer: Callable[[], str] = None, actions: List[types.InlineKeyboardButton] = None):
+        self.kind = kind
+        self.fetch = fetch
+        self.render = render
+        self.title = title
+        self.filters = filters or {}
+        self.page_size = page_size
+        self.item_button = item_button
+        self.key = key or (lambda row: row['id'] if isinstance(row, dict) else row[0])
+        self.empty = empty
+        self.footer = footer
+        self.actions = actions or []
+
+    def _button(self, text: str, flt: str, direction: str, key: int) -> types.InlineKeyboardButton:
+        return types.InlineKeyboardButton(
+            text, callback_data=page_cb.new(kind=self.kind, flt=flt, dir=direction, key=key)
+        )
+
+    def build(self, flt: str = None, direction: str = NEXT, key: int = 0) -> Tuple[str, types.InlineKeyboardMarkup]:
+        """Sahifa matni va klaviaturasi"""
+        if flt not in self.filters:
+            flt = next(iter(self.filters), NO_FILTER)
+        value = self.filters[flt][0] if flt in self.filters else None
+
+        if direction == PREV and key:
+            rows, has_more = self.fetch(value, before=key, limit=self.page_size)
+            has_prev, has_next = has_more, True
+            if not rows:
+                # Oldingi qatorlar o'chirilgan/holati o'zgargan - boshidan
+                return self.build(flt)
+        else:
+            rows, has_more = self.fetch(value, after=key or None, limit=self.page_size)
+            has_prev, has_next = bool(key), has_more
+
+        header = self.title
+        if flt in self.filters:
+            header += f" — {self.filters[flt][1]}"
+        lines = [f"<b>{header}</b>", ""]
+        if rows:
+            lines.extend(self.render(row) for row in rows)
+        else:
+            lines.append(self.empty)
+        footer = self.footer() if self.footer else None
+        if footer:
+            lines.extend(["", footer])
+
+        markup = types.InlineKeyboardMarkup(row_width=2)
+        if self.item_button:
+            buttons: List[types.InlineKeyboardButton] = [
+                button for button in (self.item_button(row) for row in rows) if button is not None
+            ]
+            if buttons:
+                markup.add(*buttons)
+
+        navigation = []
+        if has_prev and rows:
+            navigation.append(self._button("◀️", flt, PREV, self.key(rows[0])))
+        # Yangilash - joriy sahifa boshidan
+        navigation.append(self._button("🔄", flt, NEXT, self.key(rows[0]) - 1 if rows and has_prev else 0))
+        if has_next and rows:
+            navigation.append(self._button("▶️", flt, NEXT, self.key(rows[-1])))
+        markup.row(*navigation)
+
+        if len(self.filters) > 1:
+            markup.row(*[
+                self._button(f"• {label}" if code == flt else label, code, NEXT, 0)
+                for code, (_, label) in self.filters.items()
+            ])
+        if self.actions:
+            markup.row(*self.actions)
+        return "\n".join(lines), markup
+
+    async def send(self, message: types.Message, flt: str = None):
+        text, markup = self.build(flt)
+        await message.answer(text, reply_markup=markup, disable_web_page_preview=True)
+
+    async def edit(self, call: types.CallbackQuery, callback_data: dict):
+        try:
+            key = int(callback_data.get('key') or 0)
+        except (TypeError, ValueError):
+            key = 0
+        text, markup = self.build(callback_data.get('flt'), callback_data.get('dir', NEXT), key)
+        try:
+            await call.message.edit_text(text, reply_markup=markup, disable_web_page_preview=True)
+        except MessageNotModified:
+            pass
+        await call.answer()
+
@@ -6,13 +6,37 @@ import asyncio
 import logging
 import json
 import os
+import socket
+import tempfile
+import time
 from datetime import datetime
 from typing import Optional
 from aiogram import Bot
 from aiogram.types import InputFile
 
+from utils.api_usage import current_task_uuid
+from utils.log_pipeline import current_telegram_id
+from utils.metrics import (SOFFICE_SECONDS, TASK_DELIVERY_SECONDS, WORKER_INFLIGHT, WORKER_QUEUE_DEPTH,
+                           WORKER_QUEUE_WAIT_SECONDS, StageTimer)
+from utils.progress_reporter import ProgressReporter, Stage, StageTemplate
+from utils.task_scheduler import TaskScheduler
+
 logger = logging.getLogger(__name__)
 
+COURSE_WORK_STAGES = [
+    Stage("Matn tayyorlash", "Matn tayyorlanmoqda...", "Matn tayyor"),
+    Stage("Formatlash", "Formatlash...", "Formatlash tugadi"),
+    Stage("Fayl yaratish", "Fayl yaratilmoqda...", "Fayl tayyor"),
+    Stage("Tayyor!", "Yuborilmoqda...", "Yuborildi!"),
+]
+
+PRESENTATION_STAGES = [
+    Stage("Kontent", "Kontent tayyorlanmoqda...", "Kontent tayyor"),
+    Stage("Dizayn", "Dizayn qilinmoqda...", "Dizayn tayyor"),
+    Stage("PPTX yuklab olish", "PPTX yuklab olinmoqda...", "PPTX tayyor"),
+    Stage("Tayyor!", "Yuborilmoqda...", "Yuborildi!"),
+]
+
 
 class PresentationWorker:
     """
@@ -22,33 +46,66 @@ class PresentationWorker:
     ✅ Mustaqil ish (DOCX/PDF) - YANGI
     """
 
-    def __init__(self, bot: Bot, user_db, content_generator, gamma_api):
+    def __init__(self, bot: Bot, user_db, content_generator, gamma_api, progress_registry=None,
+                 scheduler: TaskScheduler = None, poll_interval: float = 5,
+                 lease_seconds: int = 90, max_attempts: int = 3, artifacts=None,
+                 speculation=None):
         self.bot = bot
         self.user_db = user_db
         self.content_generator = content_generator
         self.gamma_api = gamma_api
+
+        # Progress yozuvlari - berilmasa to'g'ridan-to'g'ri bazaga
+        if progress_registry is None:
+            from utils.task_progress import TaskProgressRegistry
+            progress_registry = TaskProgressRegistry(user_db)
+        self.progress = progress_registry
+
+        # Task papkalari (PPTX/DOCX/PDF, soffice profili) - berilmasa standart ildiz
+        if artifacts is None:
+            from utils.artifact_store import ArtifactStore
+            artifacts = ArtifactStore(os.path.join(tempfile.gettempdir(), 'bot_artifacts'))
+        self.artifacts = artifacts
+
+        # Theme tanlanayotganda oldindan yaratilgan content (utils.speculation)
+        self.speculation = speculation
+
+        # Navbat: userlar bo'yicha adolatli, qisqa ishlar oldin (utils.task_scheduler)
+        self.scheduler = scheduler or TaskScheduler()
+        self.poll_interval = poll_interval
+        self._running = set()
+        self._wakeup = asyncio.Event()
+
+        # Lease: bajarilayotgan task'lar muddati uzaytirib turiladi; process o'lsa
+        # muddat tugaydi va task checkpoint'idan davom ettirish uchun qaytariladi
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._leased = set()
+        self.lease_task = None
+
+        # Progress xabarlari - chat bo'yicha chastota cheklovi bilan
+        self.reporter = ProgressReporter(bot, min_interval=3.0)
         self.is_running = False
         self.worker_task = None
 
-        # Course work tools
+        # Course work tools - birinchi mustaqil ish task'ida (python-docx startda yuklanmaydi)
         self.course_work_generator = None
         self.docx_generator = None
-        self._init_course_work_tools()
+        self._course_work_tools_ready = False
 
     def _init_course_work_tools(self):
-        """Course work toollarini ishga tushirish"""
+        """Course work toollarini ishga tushirish (bir marta)"""
+        if self._course_work_tools_ready:
+            return
+        self._course_work_tools_ready = True
         try:
             from utils.course_work_generator import CourseWorkGenerator
             from utils.docx_generator import DocxGenerator
 
-            from environs import Env
-            env = Env()
-            env.read_env()
-            openai_key = env.str("OPENAI_API_KEY", None)
-
-            if openai_key:
-                self.course_work_generator = CourseWorkGenerator(openai_key)
-                logger.info("✅ CourseWorkGenerator tayyor")
+            # ContentGenerator bilan bitta OpenAI client (ulanish havzasi)
+            self.course_work_generator = CourseWorkGenerator(self.content_generator.openai)
+            logger.info("✅ CourseWorkGenerator tayyor")
 
             self.docx_generator = DocxGenerator()
             logger.info("✅ DocxGenerator tayyor")
@@ -62,18 +119,33 @@ class PresentationWorker:
         """Worker'ni ishga tushirish"""
         if not self.is_running:
             self.is_running = True
+            await self.progress.start()
+            # Taxminiy davomiylik - oxirgi task'lar tarixidan
+            self.scheduler.estimator.load(self.user_db.get_task_duration_stats())
+            # Oldingi process'dan qolgan task'lar (lease'siz yoki muddati o'tgan)
+            await self._reclaim_orphans()
+            self.lease_task = asyncio.create_task(self._lease_loop())
             self.worker_task = asyncio.create_task(self._process_queue())
             logger.info("✅ Presentation Worker ishga tushdi")
 
     async def stop(self):
         """Worker'ni to'xtatish"""
         self.is_running = False
-        if self.worker_task:
-            self.worker_task.cancel()
-            try:
-                await self.worker_task
-            except asyncio.CancelledError:
-                pass
+        for background in (self.worker_task, self.lease_task):
+            if background:
+                background.cancel()
+                try:
+                    await background
+                except asyncio.CancelledError:
+                    pass
+        for task in list(self._running):
+            task.cancel()
+        if self._running:
+            leased = list(self._leased)
+            await asyncio.gather(*self._running, return_exceptions=True)
+            # Keyingi ishga tushishda lease muddatini kutmasdan checkpoint'dan davom etadi
+            self.user_db.release_task_leases(self.worker_id, leased)
+        await self.progress.stop()
         logger.info("❌ Presentation Worker to'xtatildi")
 
     async def _process_queue(self):
@@ -82,28 +154,108 @@ class PresentationWorker:
 
         while self.is_running:
             try:
-                pending_tasks = self.user_db.get_pending_tasks()
+                added = self.scheduler.add_many(self.user_db.get_pending_tasks())
+                if added:
+                    logger.info(f"🔄 {added} ta yangi task navbatga qo'shildi")
 
-                if pending_tasks:
-                    logger.info(f"🔄 {len(pending_tasks)} ta task topildi")
+                self._dispatch()
 
-                    tasks = [self._process_task(task_data) for task_data in pending_tasks]
-                    await asyncio.gather(*tasks, return_exceptions=True)
-
-                await asyncio.sleep(5)
+                # Keyingi tekshiruv - poll_interval o'tganda yoki task tugab joy bo'shaganda
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
 
             except Exception as e:
                 logger.error(f"Worker queue xato: {e}")
                 await asyncio.sleep(10)
 
+    def _dispatch(self):
+        """Bo'sh joylar bo'yicha scheduler tanlagan task'larni boshlash"""
+        while True:
+            job = self.scheduler.next()
+            if job is None:
+                break
+            WORKER_QUEUE_WAIT_SECONDS.labels(job.task_data.get('type'), job.tier).observe(
+                time.monotonic() - job.enqueued_at)
+            task = asyncio.create_task(self._run_job(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+        WORKER_QUEUE_DEPTH.labels().set(self.scheduler.queued)
+        WORKER_INFLIGHT.labels().set(self.scheduler.inflight)
+
+    async def _run_job(self, job):
+        started = time.monotonic()
+        ok = False
+        try:
+            # pending -> processing atomik (boshqa worker yoki eski nusxa olgan bo'lsa - o'tkazib yuboriladi)
+            if not self.user_db.claim_task(job.task_uuid, self.worker_id, self.lease_seconds):
+                logger.info(f"⏭ Task allaqachon olingan: {job.task_uuid}")
+                return
+            self._leased.add(job.task_uuid)
+            await self._process_task(job.task_data)
+            state = self.progress.get(job.task_uuid)
+            ok = bool(state and state['status'] == 'completed')
+        finally:
+            self._leased.discard(job.task_uuid)
+            state = self.progress.get(job.task_uuid)
+            if state and state['status'] in ('completed', 'failed'):
+                self.artifacts.release(job.task_uuid)
+            else:
+                # To'xtatildi / olinmadi - papka resume uchun qoladi (janitor yoshi bo'yicha tozalaydi)
+                self.artifacts.deactivate(job.task_uuid)
+            self.scheduler.done(job, time.monotonic() - started, ok=ok)
+            self._wakeup.set()
+
+    async def _lease_loop(self):
+        """Lease'larni uzaytirish va yetim task'larni qaytarish"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                self.user_db.renew_task_leases(self.worker_id, list(self._leased), self.lease_seconds)
+                await self._reclaim_orphans()
+            except Exception as e:
+                logger.error(f"Lease yangilash xato: {e}")
+
+    async def _reclaim_orphans(self):
+        error_message = "Worker qayta ishga tushishlarida tugallanmadi"
+        # Exhausted task'lar shu chaqiruvda 'failed' + refund qilingan (bitta tranzaksiya)
+        result = self.user_db.reclaim_expired_tasks(self.max_attempts, error_message)
+        if result['requeued']:
+            logger.warning(f"♻️ {len(result['requeued'])} ta yetim task navbatga qaytarildi")
+            self._wakeup.set()
+        for task_data in result['exhausted']:
+            logger.error(f"❌ Task {self.max_attempts} marta tugallanmadi: {task_data['task_uuid']}")
+            await self._handle_task_error(task_data, error_message, refund={'status': 'ok', **task_data})
+            self.artifacts.release(task_data['task_uuid'])
+
+    def _checkpoint(self, task_uuid: str, stage: str, **fields):
+        """Bosqich natijasini saqlash - restart'dan keyin shu joydan davom etiladi"""
+        if not self.user_db.save_task_checkpoint(task_uuid, stage, **fields):
+            logger.warning(f"⚠️ Checkpoint saqlanmadi: {task_uuid} ({stage})")
+
     async def _process_task(self, task_data: dict):
         """Bitta taskni qayta ishlash"""
         task_uuid = task_data.get('task_uuid')
         task_type = task_data.get('type')
+        # OpenAI/Gamma chaqiruvlari ApiUsage'da shu task'ga bog'lanadi
+        usage_context = current_task_uuid.set(task_uuid)
 
         try:
             logger.info(f"🎯 Task boshlandi: {task_uuid} (Type: {task_type})")
 
+            checkpoint = self.user_db.get_task_checkpoint(task_uuid) or {}
+            if checkpoint:
+                logger.info(f"♻️ Task '{checkpoint['stage']}' bosqichidan davom etadi: {task_uuid}")
+            if checkpoint.get('file_id'):
+                # Oldingi urinishda yuborilgan, faqat yakunlanmay qolgan
+                self.progress.update(task_uuid, 'completed', progress=100)
+                return
+            # Task fayllari o'z papkasida - yakunlanganda butunlay o'chiriladi
+            task_data = {**task_data, 'checkpoint': checkpoint, 'workdir': await self.artifacts.task_dir(task_uuid)}
+
             if task_type == 'course_work':
                 await self._process_course_work(task_data)
             else:
@@ -112,15 +264,19 @@ class PresentationWorker:
         except Exception as e:
             logger.error(f"❌ Task xato: {task_uuid} - {e}")
             await self._handle_task_error(task_data, str(e))
+        finally:
+            current_task_uuid.reset(usage_context)
 
     async def _process_course_work(self, task_data: dict):
         """Mustaqil ish / Referat yaratish"""
         task_uuid = task_data.get('task_uuid')
         user_id = task_data.get('user_id')
+        telegram_id = None
         progress_message_id = None
 
         try:
-            self.user_db.update_task_status(task_uuid, 'processing', progress=5)
+            timer = StageTimer('course_work')
+            self.progress.update(task_uuid, 'processing', progress=5)
 
             answers_json = task_data.get('answers', '{}')
             answers_data = json.loads(answers_json)
@@ -136,126 +292,112 @@ class PresentationWorker:
             language_name = answers_data.get('language_name', "O'zbek tili")
 
             telegram_id = self._get_telegram_id(user_id)
+            current_telegram_id.set(telegram_id)  # job o'z asyncio task'ida - tashqariga chiqmaydi
+            template = StageTemplate(
+                f"📝 {work_name} yaratilmoqda...",
+                COURSE_WORK_STAGES,
+                header=f"📚 Mavzu: {topic[:50]}...\n🌐 Til: {language_name}"
+            )
 
             if telegram_id:
-                msg = await self.bot.send_message(
-                    telegram_id,
-                    f"📝 <b>{work_name} yaratilmoqda...</b>\n\n"
-                    f"📚 Mavzu: {topic[:50]}...\n"
-                    f"🌐 Til: {language_name}\n\n"
-                    f"⏳ <b>Jarayon:</b>\n"
-                    f"1️⃣ ⚙️ Matn tayyorlanmoqda...\n"
-                    f"2️⃣ ⏸ Formatlash\n"
-                    f"3️⃣ ⏸ Fayl yaratish\n"
-                    f"4️⃣ ⏸ Tayyor!\n\n"
-                    f"📊 Progress: 5%",
-                    parse_mode='HTML'
+                progress_message_id = await self.reporter.send(telegram_id, template.render(0, 5))
+
+            # Content yaratish (oldingi urinishda yaratilgan bo'lsa - checkpoint'dan)
+            checkpoint = task_data.get('checkpoint') or {}
+            workdir = task_data.get('workdir') or await self.artifacts.task_dir(task_uuid)
+            content = checkpoint.get('content')
+            self._init_course_work_tools()
+
+            if content is None:
+                logger.info(f"📝 OpenAI: {work_name} content yaratish")
+
+                if not self.course_work_generator:
+                    raise Exception("CourseWorkGenerator mavjud emas!")
+
+                content = await self.course_work_generator.generate_course_work_content(
+                    work_type=work_type,
+                    topic=topic,
+                    subject=subject,
+                    details=details,
+                    page_count=page_count,
+                    language=language,
+                    use_gpt4=True
                 )
-                progress_message_id = msg.message_id
-
-            # Content yaratish
-            logger.info(f"📝 OpenAI: {work_name} content yaratish")
-
-            if not self.course_work_generator:
-                raise Exception("CourseWorkGenerator mavjud emas!")
-
-            content = await self.course_work_generator.generate_course_work_content(
-                work_type=work_type,
-                topic=topic,
-                subject=subject,
-                details=details,
-                page_count=page_count,
-                language=language,
-                use_gpt4=True
-            )
 
-            if not content:
-                raise Exception("Content yaratilmadi")
+                if not content:
+                    raise Exception("Content yaratilmadi")
 
-            self.user_db.update_task_status(task_uuid, 'processing', progress=40)
+                self._checkpoint(task_uuid, 'content', content=content)
 
-            if telegram_id and progress_message_id:
-                try:
-                    await self.bot.edit_message_text(
-                        f"📝 <b>{work_name} yaratilmoqda...</b>\n\n"
-                        f"⏳ <b>Jarayon:</b>\n"
-                        f"1️⃣ ✅ Matn tayyor\n"
-                        f"2️⃣ ⚙️ Formatlash...\n"
-                        f"3️⃣ ⏸ Fayl yaratish\n"
-                        f"4️⃣ ⏸ Tayyor!\n\n"
-                        f"📊 Progress: 40%",
-                        telegram_id,
-                        progress_message_id,
-                        parse_mode='HTML'
-                    )
-                except:
-                    pass
+            timer.mark('content')
+            self.progress.update(task_uuid, 'processing', progress=40)
+            await self.reporter.update(telegram_id, progress_message_id, template.render(1, 40))
 
-            # Fayl yaratish
-            logger.info(f"📄 Fayl yaratish: {file_format}")
+            artifact_path = checkpoint.get('artifact_path')
+            if artifact_path and os.path.exists(artifact_path):
+                output_path = artifact_path
+                filename = checkpoint.get('artifact_name') or os.path.basename(artifact_path)
+                file_format = 'pdf' if output_path.endswith('.pdf') else 'docx'
+            else:
+                # Fayl yaratish
+                logger.info(f"📄 Fayl yaratish: {file_format}")
 
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            safe_topic = "".join(c for c in topic[:30] if c.isalnum() or c in ' _-').strip()
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                safe_topic = "".join(c for c in topic[:30] if c.isalnum() or c in ' _-').strip()
 
-            if file_format == 'docx':
-                filename = f"{work_type}_{safe_topic}_{timestamp}.docx"
-                output_path = f"/tmp/{filename}"
+                if file_format == 'docx':
+                    filename = f"{work_type}_{safe_topic}_{timestamp}.docx"
+                    output_path = os.path.join(workdir, filename)
 
-                if not self.docx_generator:
-                    raise Exception("DocxGenerator mavjud emas!")
+                    if not self.docx_generator:
+                        raise Exception("DocxGenerator mavjud emas!")
 
-                success = self.docx_generator.create_course_work(content, output_path, work_type)
+                    success = self.docx_generator.create_course_work(content, output_path, work_type)
 
-                if not success:
-                    raise Exception("DOCX yaratilmadi")
+                    if not success:
+                        raise Exception("DOCX yaratilmadi")
 
-            else:  # PDF
-                docx_filename = f"{work_type}_{safe_topic}_{timestamp}.docx"
-                docx_path = f"/tmp/{docx_filename}"
+                    timer.mark('docx')
 
-                if not self.docx_generator:
-                    raise Exception("DocxGenerator mavjud emas!")
+                else:  # PDF
+                    docx_filename = f"{work_type}_{safe_topic}_{timestamp}.docx"
+                    docx_path = os.path.join(workdir, docx_filename)
 
-                success = self.docx_generator.create_course_work(content, docx_path, work_type)
+                    if not self.docx_generator:
+                        raise Exception("DocxGenerator mavjud emas!")
 
-                if not success:
-                    raise Exception("DOCX yaratilmadi")
+                    success = self.docx_generator.create_course_work(content, docx_path, work_type)
 
-                filename = f"{work_type}_{safe_topic}_{timestamp}.pdf"
-                output_path = f"/tmp/{filename}"
+                    if not success:
+                        raise Exception("DOCX yaratilmadi")
 
-                pdf_success = await self._convert_docx_to_pdf(docx_path, output_path)
+                    timer.mark('docx')
+                    self.progress.update(task_uuid, 'processing', progress=60)
+                    await self.reporter.update(telegram_id, progress_message_id, template.render(2, 60))
 
-                if not pdf_success:
-                    logger.warning("⚠️ PDF konvertatsiya xato, DOCX yuboriladi")
-                    filename = docx_filename
-                    output_path = docx_path
-                    file_format = 'docx'
+                    filename = f"{work_type}_{safe_topic}_{timestamp}.pdf"
+                    output_path = os.path.join(workdir, filename)
 
-                if pdf_success and os.path.exists(docx_path):
-                    try:
-                        os.remove(docx_path)
-                    except:
-                        pass
+                    pdf_success = await self._convert_docx_to_pdf(docx_path, output_path)
+                    timer.mark('pdf')
 
-            self.user_db.update_task_status(task_uuid, 'processing', progress=80)
+                    if not pdf_success:
+                        logger.warning("⚠️ PDF konvertatsiya xato, DOCX yuboriladi")
+                        filename = docx_filename
+                        output_path = docx_path
+                        file_format = 'docx'
 
-            if telegram_id and progress_message_id:
-                try:
-                    await self.bot.edit_message_text(
-                        f"📝 <b>{work_name} yaratilmoqda...</b>\n\n"
-                        f"⏳ <b>Jarayon:</b>\n"
-                        f"1️⃣ ✅ Matn tayyor\n"
-                        f"2️⃣ ✅ Formatlash tugadi\n"
-                        f"3️⃣ ✅ Fayl tayyor\n"
-                        f"4️⃣ ⚙️ Yuborilmoqda...\n\n"
-                        f"📊 Progress: 80%",
-                        telegram_id,
-                        progress_message_id,
-                        parse_mode='HTML'
-                    )
-                except:
-                    pass
+                    if pdf_success and os.path.exists(docx_path):
+                        try:
+                            os.remove(docx_path)
+                        except:
+                            pass
+
+                self._checkpoint(task_uuid, 'artifact', artifact_path=output_path, artifact_name=filename)
+                self.artifacts.record(output_path)
+
+            self.progress.update(task_uuid, 'processing', progress=80)
+            await self.reporter.update(telegram_id, progress_message_id, template.render(3, 80))
 
             # User'ga yuborish
             if telegram_id and os.path.exists(output_path):
@@ -276,75 +418,75 @@ Muvaffaqiyatlar! 🚀
 """
 
                     with open(output_path, 'rb') as f:
-                        await self.bot.send_document(
+                        sent = await self.bot.send_document(
                             telegram_id,
                             document=InputFile(f, filename=filename),
                             caption=caption,
                             parse_mode='HTML'
                         )
 
+                    self._checkpoint(task_uuid, 'delivered', file_id=sent.document.file_id)
                     logger.info(f"✅ {file_format.upper()} yuborildi")
+                    timer.mark('send')
 
                 except Exception as e:
                     logger.error(f"Yuborishda xato: {e}")
                     raise
 
-            self.user_db.update_task_status(task_uuid, 'completed', progress=100, file_path=output_path)
-
-            if telegram_id and progress_message_id:
-                try:
-                    await self.bot.edit_message_text(
-                        f"🎉 <b>{work_name} tayyor!</b>\n\n"
-                        f"⏳ <b>Jarayon:</b>\n"
-                        f"1️⃣ ✅ Matn tayyor\n"
-                        f"2️⃣ ✅ Formatlash tugadi\n"
-                        f"3️⃣ ✅ Fayl tayyor\n"
-                        f"4️⃣ ✅ Yuborildi!\n\n"
-                        f"📊 Progress: 100%",
-                        telegram_id,
-                        progress_message_id,
-                        parse_mode='HTML'
-                    )
-                except:
-                    pass
-
-            try:
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-            except:
-                pass
+            self.progress.update(task_uuid, 'completed', progress=100, file_path=output_path)
+            await self.reporter.finish(
+                telegram_id, progress_message_id,
+                template.render(len(COURSE_WORK_STAGES), 100, title=f"🎉 {work_name} tayyor!")
+            )
 
             logger.info(f"✅ {work_name} task tugallandi: {task_uuid}")
 
         except Exception as e:
             logger.error(f"❌ Course work xato: {task_uuid} - {e}")
+            # Kechiktirilgan progress edit xato xabaridan keyin kelmasin
+            self.reporter.cancel(telegram_id, progress_message_id)
             await self._handle_task_error(task_data, str(e))
+        finally:
+            # To'xtatilgan (CancelledError) task ham reporter'da qolmasin
+            self.reporter.cancel(telegram_id, progress_message_id)
 
     async def _convert_docx_to_pdf(self, docx_path: str, pdf_path: str) -> bool:
         """DOCX ni PDF ga konvertatsiya"""
         try:
             import subprocess
 
+            # Profil va lock fayllari task papkasida - task bilan birga o'chadi
+            profile_dir = os.path.join(os.path.dirname(pdf_path), '.soffice_profile')
             cmd = [
-                'soffice', '--headless', '--convert-to', 'pdf',
+                'soffice', f'-env:UserInstallation=file://{profile_dir}', '--headless', '--convert-to', 'pdf',
                 '--outdir', os.path.dirname(pdf_path), docx_path
             ]
 
+            started = time.perf_counter()
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
 
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60)
+            except asyncio.TimeoutError:
+                SOFFICE_SECONDS.labels('timeout').observe(time.perf_counter() - started)
+                # Osilib qolgan soffice profil lock'ini ushlab turmasin
+                process.kill()
+                await process.wait()
+                raise
 
             if process.returncode == 0:
                 expected_pdf = docx_path.replace('.docx', '.pdf')
                 if os.path.exists(expected_pdf):
                     if expected_pdf != pdf_path:
                         os.rename(expected_pdf, pdf_path)
+                    SOFFICE_SECONDS.labels('ok').observe(time.perf_counter() - started)
                     return True
 
+            SOFFICE_SECONDS.labels('failed').observe(time.perf_counter() - started)
             return False
 
         except Exception as e:
@@ -356,10 +498,12 @@ Muvaffaqiyatlar! 🚀
         task_uuid = task_data.get('task_uuid')
         task_type = task_data.get('type')
         user_id = task_data.get('user_id')
+        telegram_id = None
         progress_message_id = None
 
         try:
-            self.user_db.update_task_status(task_uuid, 'processing', progress=5)
+            timer = StageTimer(task_type or 'presentation')
+            self.progress.update(task_uuid, 'processing', progress=5)
 
             # Theme olish
             theme_id = None
@@ -380,136 +524,152 @@ Muvaffaqiyatlar! 🚀
                 pass
 
             telegram_id = self._get_telegram_id(user_id)
-            if telegram_id:
-                theme_text = f"\n🎨 Theme: {theme_name}" if theme_id else ""
-                msg = await self.bot.send_message(
-                    telegram_id,
-                    f"🎨 <b>Prezentatsiya yaratilmoqda...</b>{theme_text}\n\n"
-                    f"⏳ Progress: 5%",
-                    parse_mode='HTML'
-                )
-                progress_message_id = msg.message_id
-
-            # Content yaratish
-            content = await self._generate_content(task_data)
-            if not content:
-                raise Exception("Content yaratilmadi")
-
-            self.user_db.update_task_status(task_uuid, 'processing', progress=30)
+            current_telegram_id.set(telegram_id)  # job o'z asyncio task'ida - tashqariga chiqmaydi
+            type_name = "Pitch Deck" if task_type == 'pitch_deck' else "Prezentatsiya"
+            template = StageTemplate(
+                f"🎨 {type_name} yaratilmoqda...",
+                PRESENTATION_STAGES,
+                header=f"🎨 Theme: {theme_name}" if theme_id else ""
+            )
 
-            if telegram_id and progress_message_id:
-                try:
-                    await self.bot.edit_message_text(
-                        f"🎨 <b>Prezentatsiya yaratilmoqda...</b>\n\n"
-                        f"✅ Kontent tayyor\n⚙️ Dizayn...\n\n"
-                        f"📊 Progress: 30%",
-                        telegram_id, progress_message_id, parse_mode='HTML'
+            if telegram_id:
+                progress_message_id = await self.reporter.send(telegram_id, template.render(0, 5))
+
+            # Content yaratish (oldingi urinishda yaratilgan bo'lsa - checkpoint'dan)
+            checkpoint = task_data.get('checkpoint') or {}
+            workdir = task_data.get('workdir') or await self.artifacts.task_dir(task_uuid)
+            content = checkpoint.get('content')
+            speculation = 'checkpoint' if content is not None else 'off'
+            if content is None and task_type == 'basic' and self.speculation is not None and self.speculation.enabled:
+                content, speculation = await self._take_speculative_content(task_data, telegram_id)
+            if content is None:
+                content = await self._generate_content(task_data)
+                if not content:
+                    raise Exception("Content yaratilmadi")
+            if checkpoint.get('content') is None:
+                self._checkpoint(task_uuid, 'content', content=content)
+
+            timer.mark('content')
+            self.progress.update(task_uuid, 'processing', progress=30)
+            await self.reporter.update(telegram_id, progress_message_id, template.render(1, 30))
+
+            output_path = checkpoint.get('artifact_path')
+            filename = checkpoint.get('artifact_name')
+            if not (output_path and os.path.exists(output_path)):
+                # Gamma API (generationId saqlangan bo'lsa - qayta yaratilmaydi)
+                generation_id = checkpoint.get('generation_id')
+                if not generation_id:
+                    slide_count = task_data.get('slide_count', 10)
+                    formatted_text = self.gamma_api.format_content_for_gamma(content, task_type)
+
+                    ai_result = await self.gamma_api.create_presentation_from_text(
+                        text_content=formatted_text,
+                        title=content.get('project_name') or content.get('title', 'Prezentatsiya'),
+                        num_cards=slide_count,
+                        text_mode="generate",
+                        theme_id=theme_id
                     )
-                except:
-                    pass
 
-            # Gamma API
-            slide_count = task_data.get('slide_count', 10)
-            formatted_text = self.gamma_api.format_content_for_gamma(content, task_type)
+                    if not ai_result:
+                        raise Exception("Gamma API xato")
 
-            ai_result = await self.gamma_api.create_presentation_from_text(
-                text_content=formatted_text,
-                title=content.get('project_name') or content.get('title', 'Prezentatsiya'),
-                num_cards=slide_count,
-                text_mode="generate",
-                theme_id=theme_id
-            )
+                    generation_id = ai_result.get('generationId')
+                    if not generation_id:
+                        raise Exception("generationId topilmadi")
 
-            if not ai_result:
-                raise Exception("Gamma API xato")
+                    self._checkpoint(task_uuid, 'gamma_created', generation_id=generation_id)
 
-            generation_id = ai_result.get('generationId')
-            if not generation_id:
-                raise Exception("generationId topilmadi")
+                timer.mark('gamma_create')
+                self.progress.update(task_uuid, 'processing', progress=50)
+                await self.reporter.update(telegram_id, progress_message_id, template.render(1, 50))
 
-            self.user_db.update_task_status(task_uuid, 'processing', progress=50)
+                # Kutish
+                is_ready = await self.gamma_api.wait_for_completion(
+                    generation_id, timeout_seconds=600, check_interval=10, wait_for_pptx=True
+                )
 
-            # Kutish
-            is_ready = await self.gamma_api.wait_for_completion(
-                generation_id, timeout_seconds=600, check_interval=10, wait_for_pptx=True
-            )
+                if not is_ready:
+                    raise Exception("Gamma API timeout")
 
-            if not is_ready:
-                raise Exception("Gamma API timeout")
+                timer.mark('gamma_wait')
+                self.progress.update(task_uuid, 'processing', progress=80)
+                await self.reporter.update(telegram_id, progress_message_id, template.render(2, 80))
 
-            self.user_db.update_task_status(task_uuid, 'processing', progress=80)
+                # PPTX yuklab olish
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                filename = f"presentation_{task_type}_{user_id}_{timestamp}.pptx"
+                output_path = os.path.join(workdir, filename)
 
-            # PPTX yuklab olish
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"presentation_{task_type}_{user_id}_{timestamp}.pptx"
-            output_path = f"/tmp/{filename}"
+                download_success = await self.gamma_api.download_pptx(generation_id, output_path)
 
-            download_success = await self.gamma_api.download_pptx(generation_id, output_path)
+                if not download_success or not os.path.exists(output_path):
+                    raise Exception("PPTX yuklab olinmadi")
 
-            if not download_success or not os.path.exists(output_path):
-                raise Exception("PPTX yuklab olinmadi")
+                self._checkpoint(task_uuid, 'artifact', artifact_path=output_path, artifact_name=filename)
+                self.artifacts.record(output_path)
+                timer.mark('download')
 
-            self.user_db.update_task_status(task_uuid, 'processing', progress=95, file_path=output_path)
+            self.progress.update(task_uuid, 'processing', progress=95, file_path=output_path)
+            await self.reporter.update(telegram_id, progress_message_id, template.render(3, 95))
 
             # User'ga yuborish
             if telegram_id:
                 try:
                     with open(output_path, 'rb') as f:
-                        type_name = "Pitch Deck" if task_type == 'pitch_deck' else "Prezentatsiya"
                         theme_caption = f"\n🎨 Theme: {theme_name}" if theme_id else ""
 
-                        await self.bot.send_document(
+                        sent = await self.bot.send_document(
                             telegram_id,
-                            document=InputFile(f, filename=filename),
+                            document=InputFile(f, filename=filename or os.path.basename(output_path)),
                             caption=f"🎉 <b>{type_name} tayyor!</b>{theme_caption}\n\nMuvaffaqiyatlar! 🚀",
                             parse_mode='HTML'
                         )
+                    self._checkpoint(task_uuid, 'delivered', file_id=sent.document.file_id)
+                    timer.mark('send')
+                    self._observe_delivery(task_data, speculation)
                 except Exception as e:
                     raise
 
-            self.user_db.update_task_status(task_uuid, 'completed', progress=100, file_path=output_path)
-
-            try:
-                if os.path.exists(output_path):
-                    os.remove(output_path)
-            except:
-                pass
+            self.progress.update(task_uuid, 'completed', progress=100, file_path=output_path)
+            await self.reporter.finish(
+                telegram_id, progress_message_id,
+                template.render(len(PRESENTATION_STAGES), 100, title=f"🎉 {type_name} tayyor!")
+            )
 
             logger.info(f"✅ Prezentatsiya task tugallandi: {task_uuid}")
 
         except Exception as e:
             logger.error(f"❌ Prezentatsiya xato: {task_uuid} - {e}")
+            # Kechiktirilgan progress edit xato xabaridan keyin kelmasin
+            self.reporter.cancel(telegram_id, progress_message_id)
             await self._handle_task_error(task_data, str(e))
+        finally:
+            # To'xtatilgan (CancelledError) task ham reporter'da qolmasin
+            self.reporter.cancel(telegram_id, progress_message_id)
+
+    async def _handle_task_error(self, task_data: dict, error_message: str, refund: dict = None):
+        """
+        Xatoni boshqarish
 
-    async def _handle_task_error(self, task_data: dict, error_message: str):
-        """Xatoni boshqarish"""
+        'failed' + balans qaytarish bitta tranzaksiyada (fail_task_and_refund, refund=None
+        bo'lsa); task allaqachon yakunlangan / qaytarilgan bo'lsa user'ga qayta yozilmaydi.
+        """
         task_uuid = task_data.get('task_uuid')
         user_id = task_data.get('user_id')
 
-        self.user_db.update_task_status(task_uuid, 'failed', error_message=error_message)
+        if refund is None:
+            refund = self.user_db.fail_task_and_refund(task_uuid, error_message)
+        if refund['status'] == 'error':
+            logger.error(f"Balans qaytarishda xato: {task_uuid}")
+        elif refund['refunded']:
+            logger.info(f"💰 Balans qaytarildi: {refund['refunded']}")
 
-        # Balans qaytarish
-        try:
-            task_info = self.user_db.get_task_by_uuid(task_uuid)
-            if task_info and task_info.get('amount_charged'):
-                amount = task_info['amount_charged']
-                telegram_id = self._get_telegram_id(user_id)
-
-                if telegram_id and amount > 0:
-                    self.user_db.add_to_balance(telegram_id, amount)
-                    self.user_db.create_transaction(
-                        telegram_id=telegram_id,
-                        transaction_type='refund',
-                        amount=amount,
-                        description='Xatolik - avtomatik qaytarildi',
-                        status='approved'
-                    )
-                    logger.info(f"💰 Balans qaytarildi: {amount}")
-        except Exception as e:
-            logger.error(f"Balans qaytarishda xato: {e}")
+        if refund['status'] in ('skipped', 'duplicate'):
+            return
+        self.progress.update(task_uuid, 'failed', error_message=error_message)
 
         # User'ga xabar
-        telegram_id = self._get_telegram_id(user_id)
+        telegram_id = refund.get('telegram_id') or self._get_telegram_id(user_id)
         if telegram_id:
             try:
                 await self.bot.send_message(
@@ -522,6 +682,33 @@ Muvaffaqiyatlar! 🚀
             except:
                 pass
 
+    async def _take_speculative_content(self, task_data: dict, telegram_id: Optional[int]):
+        """Slayd soni kiritilganda boshlangan content (kirishlar mos kelsa) - (content, natija)"""
+        try:
+            answers_data = json.loads(task_data.get('answers') or '{}')
+            return await self.speculation.take(
+                telegram_id,
+                answers_data.get('topic', ''),
+                answers_data.get('details', ''),
+                answers_data.get('slide_count', 10),
+                task_uuid=task_data.get('task_uuid')
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Oldindan yaratilgan content olinmadi: {e}")
+            return None, 'failed'
+
+    @staticmethod
+    def _observe_delivery(task_data: dict, speculation: str):
+        """Task yaratilgandan (tasdiqlash) fayl yuborilguncha"""
+        try:
+            created_at = datetime.fromisoformat(str(task_data.get('created_at')))
+        except ValueError:
+            return
+        TASK_DELIVERY_SECONDS.labels(task_data.get('type'), speculation).observe(
+            max(0.0, (datetime.utcnow() - created_at).total_seconds()))
+
     async def _generate_content(self, task_data: dict) -> Optional[dict]:
         """Content yaratish"""
         task_type = task_data.get('type')
@@ -0,0 +1,180 @@
+# utils/profiling.py
+# Handler'lar kechikishi: bounded reservoir'lar, sekin update'lar jurnali, ixtiyoriy cProfile
+#
+# Har bir handler uchun oxirgi N ta emas, butun oqimdan tasodifiy N ta namuna
+# saqlanadi (reservoir sampling) - xotira cheklangan, p50/p95/p99 esa butun
+# davr uchun baholanadi. Chegaradan sekin update'lar alohida jurnalga tushadi.
+
+import cProfile
+import io
+import pstats
+import random
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+
+# Shuncha vaqt to'xtatilmagan profil tashlab yuboriladi
+STALE_PROFILE_SECONDS = 60
+
+
+class Reservoir:
+    """Vitter R algoritmi - size ta namuna, jami/max aniq hisoblanadi"""
+
+    __slots__ = ('size', 'samples', 'count', 'total', 'max', '_random')
+
+    def __init__(self, size: int = 512, seed: int = None):
+        self.size = size
+        self.samples: List[float] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._random = random.Random(seed)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            index = self._random.randrange(self.count)
+            if index < self.size:
+                self.samples[index] = value
+
+    def percentiles(self, *quantiles: float) -> List[float]:
+        if not self.samples:
+            return [0.0 for _ in quantiles]
+        ordered = sorted(self.samples)
+        last = len(ordered) - 1
+        return [ordered[min(last, int(round(q * last)))] for q in quantiles]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class SlowUpdate:
+    """Chegaradan sekin bo'lgan bitta update"""
+
+    __slots__ = ('handler', 'kind', 'user_id', 'duration', 'db_queries', 'at', 'profile')
+
+    def __init__(self, handler: str, kind: str, user_id: Optional[int], duration: float, db_queries: int,
+                 profile: str = None):
+        self.handler = handler
+        self.kind = kind
+        self.user_id = user_id
+        self.duration = duration
+        self.db_queries = db_queries
+        self.at = datetime.now()
+        self.profile = profile
+
+
+class HandlerProfiler:
+    """
+    Handler'lar statistikasi
+
+    observe()  - middleware chaqiradi
+    top()      - eng sekin handler'lar (p95 bo'yicha)
+    slow_log   - oxirgi sekin update'lar (deque, maxlen)
+    """
+
+    def __init__(self, slow_threshold_ms: float = 1000, reservoir_size: int = 512, slow_log_size: int = 50,
+                 profile_enabled: bool = False):
+        self.slow_threshold = slow_threshold_ms / 1000
+        self.reservoir_size = reservoir_size
+        self.profile_enabled = profile_enabled
+        self.handlers: Dict[str, Reservoir] = {}
+        self.total = Reservoir(reservoir_size)
+        self.slow_log = deque(maxlen=slow_log_size)
+        self.started_at = datetime.now()
+        # Bir vaqtda faqat bitta cProfile: (profil, boshlangan vaqt)
+        self._active_profile = None
+
+    # ==================== cProfile ====================
+
+    def start_profile(self) -> Optional[cProfile.Profile]:
+        """
+        Update uchun cProfile (yoqilgan va boshqa profil ishlamayotgan bo'lsa)
+
+        Eslatma: await paytida event loop'dagi boshqa task'lar ham profilga tushadi.
+        """
+        if not self.profile_enabled:
+            return None
+        if self._active_profile is not None:
+            profile, started = self._active_profile
+            if time.monotonic() - started < STALE_PROFILE_SECONDS:
+                return None
+            # post_process chaqirilmay qolgan (update bekor qilingan) - eskisini o'chirish
+            profile.disable()
+            self._active_profile = None
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Boshqa profiler (masalan debugger) faol
+            return None
+        self._active_profile = (profile, time.monotonic())
+        return profile
+
+    def stop_profile(self, profile: Optional[cProfile.Profile], keep: bool, limit: int = 25) -> Optional[str]:
+        if profile is None:
+            return None
+        profile.disable()
+        if self._active_profile is not None and self._active_profile[0] is profile:
+            self._active_profile = None
+        if not keep:
+            return None
+        stream = io.StringIO()
+        pstats.Stats(profile, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    # ==================== YIG'ISH ====================
+
+    def observe(self, handler: str, kind: str, duration: float, db_queries: int = 0, user_id: int = None,
+                profile: str = None) -> bool:
+        """Natijani yozish; sekin bo'lsa jurnalga qo'shib True qaytaradi"""
+        reservoir = self.handlers.get(handler)
+        if reservoir is None:
+            reservoir = self.handlers[handler] = Reservoir(self.reservoir_size)
+        reservoir.add(duration)
+        self.total.add(duration)
+
+        if duration < self.slow_threshold:
+            return False
+        self.slow_log.append(SlowUpdate(handler, kind, user_id, duration, db_queries, profile))
+        return True
+
+    def reset(self):
+        self.handlers.clear()
+        self.total = Reservoir(self.reservoir_size)
+        self.slow_log.clear()
+        self.started_at = datetime.now()
+
+    # ==================== HISOBOT ====================
+
+    def top(self, limit: int = 10) -> List[Dict]:
+        """Eng sekin handler'lar (p95 bo'yicha kamayish tartibida)"""
+        rows = []
+        for handler, reservoir in self.handlers.items():
+            p50, p95, p99 = reservoir.percentiles(0.5, 0.95, 0.99)
+            rows.append({
+                'handler': handler,
+                'count': reservoir.count,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'max': reservoir.max,
+                'mean': reservoir.mean,
+            })
+        rows.sort(key=lambda row: row['p95'], reverse=True)
+        return rows[:limit]
+
+    def last_profile(self) -> Optional[SlowUpdate]:
+        for record in reversed(self.slow_log):
+            if record.profile:
+                return record
+        return None
@@ -0,0 +1,247 @@
+# utils/progress_reporter.py
+# Telegram'dagi progress xabarlarini tahrirlash - chastota cheklovi bilan
+#
+# - Bir chat uchun min_interval soniyada ko'pi bilan bitta edit
+# - Oraliqda kelgan yangilanishlar birlashtiriladi (faqat oxirgisi yuboriladi)
+# - Matn o'zgarmagan bo'lsa edit yuborilmaydi
+# - Bosqichlar ro'yxati StageTemplate orqali quriladi
+
+import asyncio
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiogram import Bot
+from aiogram.utils.exceptions import MessageNotModified, RetryAfter, TelegramAPIError
+
+from utils.metrics import TELEGRAM_RETRIES
+
+logger = logging.getLogger(__name__)
+
+STAGE_NUMBERS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣"]
+
+
+class Stage:
+    """Bosqich: kutilayotgan, bajarilayotgan va tugagan holat matnlari"""
+
+    __slots__ = ('pending', 'active', 'done')
+
+    def __init__(self, pending: str, active: str = None, done: str = None):
+        self.pending = pending
+        self.active = active or f"{pending}..."
+        self.done = done or pending
+
+
+class StageTemplate:
+    """
+    Bosqichlar ro'yxati shabloni
+
+    Masalan:
+        📝 Mustaqil ish yaratilmoqda...
+
+        ⏳ Jarayon:
+        1️⃣ ✅ Matn tayyor
+        2️⃣ ⚙️ Formatlash...
+        3️⃣ ⏸ Fayl yaratish
+
+        📊 Progress: 40%
+    """
+
+    def __init__(self, title: str, stages: List[Stage], header: str = ""):
+        self.title = title
+        self.stages = stages
+        self.header = header
+
+    def render(self, current: int, progress: int, title: str = None) -> str:
+        """
+        current - bajarilayotgan bosqich indeksi (len(stages) - hammasi tugagan)
+        """
+        lines = [f"<b>{title or self.title}</b>", ""]
+        if self.header:
+            lines.extend([self.header, ""])
+        lines.append("⏳ <b>Jarayon:</b>")
+
+        for index, stage in enumerate(self.stages):
+            number = STAGE_NUMBERS[index] if index < len(STAGE_NUMBERS) else f"{index + 1}."
+            if index < current:
+                lines.append(f"{number} ✅ {stage.done}")
+            elif index == current:
+                lines.append(f"{number} ⚙️ {stage.active}")
+            else:
+                lines.append(f"{number} ⏸ {stage.pending}")
+
+        lines.extend(["", f"📊 Progress: {progress}%"])
+        return "\n".join(lines)
+
+
+def render_bulk_progress(title: str, done: int, total: int) -> str:
+    """Ommaviy (bulk) amal uchun progress matni"""
+    percent = int(done * 100 / total) if total else 100
+    filled = percent // 10
+    return (
+        f"⏳ <b>{title}</b>\n\n"
+        f"{'▓' * filled}{'░' * (10 - filled)} {percent}%"
+    )
+
+
+class _MessageState:
+    __slots__ = ('sent_text', 'pending_text', 'flush_task')
+
+    def __init__(self, sent_text: str):
+        self.sent_text = sent_text
+        self.pending_text = None
+        self.flush_task = None
+
+
+class ProgressReporter:
+    """
+    Progress xabarlarini yuborish va tahrirlash
+
+    send()   - birinchi xabar
+    update() - oraliq holat (kerak bo'lsa kechiktiriladi va birlashtiriladi)
+    finish() - yakuniy holat (darhol yuboriladi)
+    """
+
+    def __init__(self, bot: Bot, min_interval: float = 3.0, parse_mode: str = 'HTML'):
+        self.bot = bot
+        self.min_interval = min_interval
+        self.parse_mode = parse_mode
+        self._last_edit: Dict[int, float] = {}
+        self._messages: Dict[Tuple[int, int], _MessageState] = {}
+
+        # Metrikalar
+        self.stats = {
+            'sent': 0,                # yuborilgan edit'lar
+            'skipped_unchanged': 0,   # matn o'zgarmagani uchun yuborilmagan
+            'coalesced': 0,           # kechiktirilgan edit yangisi bilan almashtirilgan
+            'dropped': 0,             # finish() sababli bekor qilingan kechiktirilgan edit'lar
+            'failed': 0,              # Telegram xatosi
+            'retry_after': 0,         # flood control (RetryAfter)
+        }
+
+    async def send(self, chat_id: int, text: str) -> Optional[int]:
+        """Progress xabarini yuborish, message_id qaytaradi"""
+        try:
+            msg = await self.bot.send_message(chat_id, text, parse_mode=self.parse_mode)
+        except TelegramAPIError as e:
+            self.stats['failed'] += 1
+            logger.warning(f"Progress xabarini yuborib bo'lmadi: {chat_id} - {e}")
+            return None
+
+        self._messages[(chat_id, msg.message_id)] = _MessageState(text)
+        self._last_edit[chat_id] = time.monotonic()
+        return msg.message_id
+
+    def track(self, chat_id: int, message_id: int, text: str):
+        """Boshqa joyda yuborilgan xabarni progress uchun ro'yxatga olish"""
+        self._messages[(chat_id, message_id)] = _MessageState(text)
+        self._last_edit[chat_id] = time.monotonic()
+
+    def cancel(self, chat_id: int, message_id: Optional[int]):
+        """Kutilayotgan edit'ni bekor qilish (yakuniy xabarni chaqiruvchi o'zi yuboradi)"""
+        state = self._forget(chat_id, message_id)
+        if state is not None and state.flush_task is not None:
+            state.flush_task.cancel()
+            state.flush_task = None
+            self.stats['dropped'] += 1
+
+    async def follow(self, chat_id: int, message_id: int, steps: Iterable[Dict],
+                     render: Callable[[Dict], str]) -> Dict:
+        """
+        Bo'laklab bajariladigan amalni kuzatish (masalan user_db.iter_* generatorlari)
+
+        Har bir qadamdan keyin progress yangilanadi va event loop'ga navbat beriladi.
+        Oxirgi qadam natijasi qaytariladi; xabar reporter'dan chiqariladi.
+        """
+        last = {}
+        try:
+            for last in steps:
+                await self.update(chat_id, message_id, render(last))
+                await asyncio.sleep(0)
+        finally:
+            self.cancel(chat_id, message_id)
+        return last
+
+    async def update(self, chat_id: int, message_id: Optional[int], text: str):
+        """Oraliq holat - interval ichida bo'lsa kechiktiriladi"""
+        state = self._get_state(chat_id, message_id)
+        if state is None:
+            return
+
+        if text == (state.pending_text or state.sent_text):
+            self.stats['skipped_unchanged'] += 1
+            return
+
+        wait = self.min_interval - (time.monotonic() - self._last_edit.get(chat_id, 0.0))
+        if wait <= 0 and state.flush_task is None:
+            await self._edit(chat_id, message_id, state, text)
+            return
+
+        if state.pending_text is not None:
+            self.stats['coalesced'] += 1
+        state.pending_text = text
+        if state.flush_task is None:
+            state.flush_task = asyncio.create_task(self._flush_later(chat_id, message_id, state, max(wait, 0)))
+
+    async def finish(self, chat_id: int, message_id: Optional[int], text: str):
+        """Yakuniy holat - kutilayotgan edit bekor qilinib, darhol yuboriladi"""
+        state = self._get_state(chat_id, message_id)
+        if state is None:
+            return
+
+        if state.flush_task is not None:
+            state.flush_task.cancel()
+            state.flush_task = None
+            self.stats['dropped'] += 1
+        state.pending_text = None
+
+        if text != state.sent_text:
+            await self._edit(chat_id, message_id, state, text)
+        else:
+            self.stats['skipped_unchanged'] += 1
+        self._forget(chat_id, message_id)
+
+    def _forget(self, chat_id: int, message_id: Optional[int]) -> Optional[_MessageState]:
+        """Xabarni chiqarish; chat'da boshqa kuzatilayotgan xabar qolmasa - _last_edit ham"""
+        state = self._messages.pop((chat_id, message_id), None)
+        if state is not None and not any(key[0] == chat_id for key in self._messages):
+            self._last_edit.pop(chat_id, None)
+        return state
+
+    def _get_state(self, chat_id: int, message_id: Optional[int]) -> Optional[_MessageState]:
+        if not chat_id or not message_id:
+            return None
+        return self._messages.get((chat_id, message_id))
+
+    async def _flush_later(self, chat_id: int, message_id: int, state: _MessageState, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            state.flush_task = None
+            text, state.pending_text = state.pending_text, None
+            if text is not None and text != state.sent_text:
+                await self._edit(chat_id, message_id, state, text)
+        except asyncio.CancelledError:
+            pass
+
+    async def _edit(self, chat_id: int, message_id: int, state: _MessageState, text: str):
+        self._last_edit[chat_id] = time.monotonic()
+        try:
+            await self.bot.edit_message_text(text, chat_id, message_id, parse_mode=self.parse_mode)
+            state.sent_text = text
+            self.stats['sent'] += 1
+        except MessageNotModified:
+            state.sent_text = text
+            self.stats['skipped_unchanged'] += 1
+        except RetryAfter as e:
+            # Flood control - keyingi edit'ni kechiktirish, matnni kutilayotgan sifatida saqlash
+            self.stats['retry_after'] += 1
+            TELEGRAM_RETRIES.labels('progress_edit').inc()
+            self._last_edit[chat_id] = time.monotonic() + e.timeout
+            state.pending_text = text
+            if state.flush_task is None:
+                state.flush_task = asyncio.create_task(
+                    self._flush_later(chat_id, message_id, state, e.timeout + self.min_interval)
+                )
+        except TelegramAPIError as e:
+            self.stats['failed'] += 1
+            logger.debug(f"Progress edit xato: {chat_id}/{message_id} - {e}")
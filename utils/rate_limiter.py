@@ -0,0 +1,104 @@
+# utils/rate_limiter.py
+# Foydalanuvchi bo'yicha token bucket'lar - FSM storage'dan mustaqil, xotirasi cheklangan
+#
+# Har bir bucket klassi uchun bitta dict: telegram_id -> TAT ("theoretical arrival
+# time", GCRA). Bucket to'la bo'lgan (TAT <= hozir) yozuv saqlanmagan yozuv bilan
+# bir xil, shuning uchun sweep() ularni o'chiradi - xotira faqat so'nggi
+# burst / rate soniya ichida faol bo'lgan userlar soniga bog'liq. Sweep dict'ni
+# qaytadan quradi (dict o'chirishdan keyin kichraymaydi).
+
+import time
+from typing import Dict, Optional
+
+
+class Bucket:
+    """rate - soniyasiga tiklanadigan tokenlar, burst - sig'im"""
+
+    __slots__ = ('name', 'rate', 'burst', 'interval', 'window', 'store')
+
+    def __init__(self, name: str, rate: float, burst: float):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.interval = 1.0 / rate
+        self.window = burst * self.interval
+        self.store: Dict[int, float] = {}
+
+
+class RateLimiter:
+    """
+    GCRA token bucket'lar
+
+        limiter.add_bucket('confirm', rate=0.2, burst=6)
+        retry_after = limiter.consume('confirm', user_id, cost=3)  # 0 - ruxsat
+
+    Rad etilgan chaqiruv token sarflamaydi. warn() - bitta user'ga ogohlantirish
+    warn_interval ichida bir marta (qolganlari jim tashlanadi).
+    """
+
+    def __init__(self, sweep_interval: float = 60, warn_interval: float = 30):
+        self.buckets: Dict[str, Bucket] = {}
+        self.sweep_interval = sweep_interval
+        self.warn_interval = warn_interval
+        self._warned: Dict[int, float] = {}
+        self._last_sweep = time.monotonic()
+
+    def add_bucket(self, name: str, rate: float, burst: float) -> Bucket:
+        bucket = self.buckets[name] = Bucket(name, rate, burst)
+        return bucket
+
+    def get_bucket(self, name: str, rate: float = None, burst: float = None) -> Optional[Bucket]:
+        """Mavjud bucket; yo'q bo'lsa va rate berilgan bo'lsa - yangisi"""
+        bucket = self.buckets.get(name)
+        if bucket is None and rate:
+            bucket = self.add_bucket(name, rate, burst or 1)
+        return bucket
+
+    def consume(self, name: str, key: int, cost: float = 1, now: float = None) -> float:
+        """cost token olish; 0 - ruxsat, aks holda necha soniyadan keyin urinish mumkin"""
+        if now is None:
+            now = time.monotonic()
+        if now - self._last_sweep >= self.sweep_interval:
+            self.sweep(now)
+
+        bucket = self.buckets[name]
+        tat = bucket.store.get(key, now)
+        if tat < now:
+            tat = now
+        new_tat = tat + cost * bucket.interval
+        overflow = new_tat - now - bucket.window
+        if overflow > 0:
+            return overflow
+        bucket.store[key] = new_tat
+        return 0.0
+
+    def warn(self, key: int, now: float = None) -> bool:
+        """Ogohlantirish yuborish kerakmi (user uchun warn_interval ichida birinchi rad)"""
+        if now is None:
+            now = time.monotonic()
+        if self._warned.get(key, 0) > now:
+            return False
+        self._warned[key] = now + self.warn_interval
+        return True
+
+    def sweep(self, now: float = None) -> int:
+        """To'lgan bucket'lar va eskirgan ogohlantirishlarni o'chirish; o'chirilganlar soni"""
+        if now is None:
+            now = time.monotonic()
+        self._last_sweep = now
+        removed = 0
+        for bucket in self.buckets.values():
+            before = len(bucket.store)
+            bucket.store = {key: tat for key, tat in bucket.store.items() if tat > now}
+            removed += before - len(bucket.store)
+        before = len(self._warned)
+        self._warned = {key: until for key, until in self._warned.items() if until > now}
+        return removed + before - len(self._warned)
+
+    def __len__(self) -> int:
+        return sum(len(bucket.store) for bucket in self.buckets.values()) + len(self._warned)
+
+    def stats(self) -> Dict[str, int]:
+        result = {name: len(bucket.store) for name, bucket in self.buckets.items()}
+        result['warned'] = len(self._warned)
+        return result
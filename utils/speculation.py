@@ -0,0 +1,206 @@
+# utils/speculation.py
+# Prezentatsiya content'ini user theme tanlayotgan paytda oldindan yaratish
+#
+# Slaydlar soni kiritilganda mavzu, qo'shimcha va slayd soni ma'lum, content esa
+# theme'ga bog'liq emas - lekin OpenAI chaqiruvi faqat "✅ Ha, boshlash" va
+# worker poll'idan keyin boshlanardi. Endi:
+#   - begin(): slayd soni qabul qilinganda fon task'ida generate_presentation_content
+#     boshlanadi; natija (telegram_id, kirishlar hash'i) bilan ttl soniya turadi
+#   - worker take(): kirishlar mos kelsa - tayyor content (yoki hali ishlayotgan
+#     so'rovni kutadi), aks holda odatdagidek o'zi yaratadi
+#   - bekor qilish, boshqa kirishlar bilan qayta begin() yoki ttl - task bekor
+#     qilinadi / natija tashlanadi
+#   - bir vaqtda max_inflight tadan ko'p spekulyativ so'rov yo'q (pullik
+#     task'larning OpenAI havzasini siqib chiqarmasin)
+#   - OpenAI sarfi ApiUsage'da 'spec:<id>' task_uuid bilan yoziladi, take()
+#     da haqiqiy task'ga o'tkaziladi; qolganlari - behuda ketgan tokenlar
+#     (UserDatabase.get_speculation_usage)
+
+import asyncio
+import hashlib
+import logging
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from utils.api_usage import current_task_uuid
+from utils.metrics import SPECULATIONS
+
+logger = logging.getLogger(__name__)
+
+SPECULATION_PREFIX = 'spec:'
+
+# take() natijalari (worker_task_delivery_seconds.speculation yorlig'i ham)
+HIT = 'hit'  # content tayyor edi
+JOINED = 'joined'  # so'rov hali ishlayotgan edi - kutildi
+MISS = 'miss'  # spekulyatsiya yo'q (o'chirilgan, muddati o'tgan, restart)
+MISMATCH = 'mismatch'  # kirishlar boshqa
+FAILED = 'failed'  # spekulyativ so'rov xato bilan tugagan
+
+
+def inputs_digest(topic: str, details: str, slide_count) -> str:
+    raw = "\x1f".join((topic or '', details or '', str(slide_count)))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+
+
+class _Entry:
+    __slots__ = ('speculation_id', 'digest', 'task', 'expires_at')
+
+    def __init__(self, speculation_id: str, digest: str, task: asyncio.Task, expires_at: float):
+        self.speculation_id = speculation_id
+        self.digest = digest
+        self.task = task
+        self.expires_at = expires_at
+
+
+class SpeculativeContent:
+    """
+    User bo'yicha bitta spekulyatsiya
+
+        speculation.begin(telegram_id, topic, details, slide_count)     # slayd soni qabul qilindi
+        speculation.cancel(telegram_id)                                 # flow bekor qilindi
+        content, outcome = await speculation.take(telegram_id, topic, details, slide_count, task_uuid)
+    """
+
+    def __init__(self, enabled: bool = True, ttl: float = 600, max_inflight: int = 20,
+                 sweep_interval: float = 60, clock=time.monotonic):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_inflight = max_inflight
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self.content_generator = None
+        self.db = None
+        self._entries: Dict[int, _Entry] = {}
+        self._sweep_task = None
+
+    @property
+    def inflight(self) -> int:
+        return sum(1 for entry in self._entries.values() if not entry.task.done())
+
+    # ==================== HANDLER TOMONI ====================
+
+    def begin(self, telegram_id: int, topic: str, details: str, slide_count: int) -> bool:
+        """Oldindan yaratishni boshlash (bir xil kirishlar bilan allaqachon boshlangan bo'lsa - o'sha)"""
+        if not self.enabled or self.content_generator is None:
+            return False
+
+        digest = inputs_digest(topic, details, slide_count)
+        entry = self._entries.get(telegram_id)
+        if entry is not None:
+            if entry.digest == digest and not entry.task.cancelled():
+                entry.expires_at = self.clock() + self.ttl
+                return True
+            self._drop(telegram_id, 'replaced')
+
+        if self.inflight >= self.max_inflight:
+            SPECULATIONS.labels('skipped').inc()
+            return False
+
+        speculation_id = f"{SPECULATION_PREFIX}{uuid.uuid4().hex}"
+        # ApiUsage yozuvi spekulyatsiya id'si bilan (task yaratilganda o'tkaziladi)
+        token = current_task_uuid.set(speculation_id)
+        try:
+            task = asyncio.create_task(self._generate(topic, details, slide_count))
+        finally:
+            current_task_uuid.reset(token)
+        self._entries[telegram_id] = _Entry(speculation_id, digest, task, self.clock() + self.ttl)
+        SPECULATIONS.labels('started').inc()
+        return True
+
+    def cancel(self, telegram_id: int):
+        if telegram_id in self._entries:
+            self._drop(telegram_id, 'cancelled')
+
+    async def _generate(self, topic: str, details: str, slide_count: int) -> Dict:
+        # fallback=False: OpenAI xatosida shablon content emas - worker o'zi qayta urinadi
+        return await self.content_generator.generate_presentation_content(
+            topic, details, slide_count, use_gpt4=False, fallback=False
+        )
+
+    def _drop(self, telegram_id: int, outcome: str):
+        entry = self._entries.pop(telegram_id)
+        if not entry.task.done():
+            entry.task.cancel()
+        elif not entry.task.cancelled() and entry.task.exception() is not None:
+            outcome = FAILED
+        SPECULATIONS.labels(outcome).inc()
+
+    # ==================== WORKER TOMONI ====================
+
+    async def take(self, telegram_id: int, topic: str, details: str, slide_count: int,
+                   task_uuid: str = None) -> Tuple[Optional[Dict], str]:
+        """(content, natija) - content None bo'lsa worker o'zi yaratadi"""
+        entry = self._entries.get(telegram_id)
+        if entry is None or entry.expires_at <= self.clock():
+            if entry is not None:
+                self._drop(telegram_id, 'expired')
+            SPECULATIONS.labels(MISS).inc()
+            return None, MISS
+        if entry.digest != inputs_digest(topic, details, slide_count):
+            self._drop(telegram_id, MISMATCH)
+            return None, MISMATCH
+
+        del self._entries[telegram_id]
+        outcome = HIT if entry.task.done() else JOINED
+        try:
+            await asyncio.wait({entry.task})
+        except asyncio.CancelledError:
+            # Worker to'xtatildi - spekulyativ so'rov ham kerak emas
+            entry.task.cancel()
+            raise
+
+        content = None
+        if not entry.task.cancelled():
+            error = entry.task.exception()
+            if error is not None:
+                logger.warning(f"⚠️ Oldindan yaratilgan content xato: {error}")
+            else:
+                content = entry.task.result()
+        if not content:
+            SPECULATIONS.labels(FAILED).inc()
+            return None, FAILED
+
+        if task_uuid and self.db is not None:
+            self.db.attach_speculative_usage(entry.speculation_id, task_uuid)
+        SPECULATIONS.labels(outcome).inc()
+        return content, outcome
+
+    # ==================== LIFECYCLE ====================
+
+    def sweep(self) -> int:
+        """Muddati o'tganlarni tashlash (ishlayotgan so'rov bekor qilinadi)"""
+        now = self.clock()
+        expired = [telegram_id for telegram_id, entry in self._entries.items() if entry.expires_at <= now]
+        for telegram_id in expired:
+            self._drop(telegram_id, 'expired')
+        return len(expired)
+
+    async def start(self, content_generator, db=None):
+        self.content_generator = content_generator
+        self.db = db
+        if self.enabled and self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_loop())
+            logger.info(f"✅ Oldindan content yaratish yoqildi (ttl {self.ttl:.0f} s, "
+                        f"bir vaqtda {self.max_inflight} ta)")
+
+    async def stop(self):
+        if self._sweep_task:
+            self._sweep_task.cancel()
+            try:
+                await self._sweep_task
+            except asyncio.CancelledError:
+                pass
+            self._sweep_task = None
+        for telegram_id in list(self._entries):
+            self._drop(telegram_id, 'cancelled')
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                expired = self.sweep()
+                if expired:
+                    logger.info(f"🔮 {expired} ta oldindan yaratilgan content muddati o'tdi")
+            except Exception as e:
+                logger.error(f"Speculation sweep xato: {e}")
@@ -0,0 +1,188 @@
+# utils/task_progress.py
+# Task progress'larini xotirada yig'ib, PresentationTasks'ga paketlab yozish
+#
+# Worker progress'ni tez-tez yangilaydi (5/30/50/80/95%). Har biri alohida
+# ulanish va commit bo'lsa, foydalanuvchi so'rovlari bilan bitta fayl uchun
+# raqobatlashadi. Shu sababli:
+#   - status o'zgarishi (pending -> processing) va yakuniy holatlar
+#     (completed/failed) darhol yoziladi
+#   - faqat progress/file_path o'zgarishlari xotirada qoladi va har
+#     flush_interval_ms da bitta tranzaksiyada yoziladi
+
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ('completed', 'failed')
+
+
+class TaskProgress:
+    """Bitta task'ning xotiradagi holati"""
+
+    __slots__ = ('task_uuid', 'status', 'progress', 'file_path', 'error_message', 'updated_at')
+
+    def __init__(self, task_uuid: str):
+        self.task_uuid = task_uuid
+        self.status = None
+        self.progress = None
+        self.file_path = None
+        self.error_message = None
+        self.updated_at = 0.0
+
+    def as_dict(self) -> Dict:
+        return {
+            'task_uuid': self.task_uuid,
+            'status': self.status,
+            'progress': self.progress,
+            'file_path': self.file_path,
+            'error_message': self.error_message,
+        }
+
+
+class TaskProgressRegistry:
+    """
+    Progress reestri
+
+    update() - worker chaqiradi (sinxron, arzon)
+    get() / overlay() - status so'rovlari uchun yangi ma'lumot
+    """
+
+    def __init__(self, user_db, flush_interval_ms: int = 1000, retention_seconds: float = 300.0):
+        self.user_db = user_db
+        self.flush_interval = flush_interval_ms / 1000
+        self.retention_seconds = retention_seconds
+        self._entries: Dict[str, TaskProgress] = {}
+        self._dirty = set()
+        self._flush_task = None
+
+        # Statistika
+        self.written_through = 0
+        self.coalesced = 0
+        self.flushed_rows = 0
+        self.flushes = 0
+
+    # ==================== YOZISH ====================
+
+    def update(self, task_uuid: str, status: str, progress: int = None, file_path: str = None,
+               error_message: str = None) -> bool:
+        """update_task_status bilan bir xil imzo"""
+        entry = self._entries.get(task_uuid)
+        if entry is None:
+            entry = TaskProgress(task_uuid)
+            self._entries[task_uuid] = entry
+
+        status_changed = entry.status != status
+        entry.status = status
+        if progress is not None:
+            entry.progress = progress
+        if file_path:
+            entry.file_path = file_path
+        if error_message:
+            entry.error_message = error_message
+        entry.updated_at = time.monotonic()
+
+        if status_changed or status in TERMINAL_STATUSES:
+            # Holat o'tishlari darhol (progress va file_path ham birga)
+            self._dirty.discard(task_uuid)
+            self.written_through += 1
+            return self.user_db.update_task_status(
+                task_uuid, status,
+                progress=entry.progress,
+                file_path=entry.file_path,
+                error_message=error_message
+            )
+
+        if task_uuid in self._dirty:
+            self.coalesced += 1
+        self._dirty.add(task_uuid)
+        return True
+
+    def flush(self) -> int:
+        """O'zgargan progress'larni bitta tranzaksiyada yozish"""
+        if not self._dirty:
+            return 0
+
+        rows = []
+        for task_uuid in self._dirty:
+            entry = self._entries.get(task_uuid)
+            if entry:
+                rows.append((entry.progress, entry.file_path, task_uuid))
+        self._dirty.clear()
+
+        if rows and not self.user_db.update_tasks_progress(rows):
+            # Keyingi flush'da qayta urinish
+            self._dirty.update(row[2] for row in rows)
+            return 0
+
+        self.flushes += 1
+        self.flushed_rows += len(rows)
+        return len(rows)
+
+    def _evict_stale(self):
+        """Yakunlangan va eskirgan yozuvlarni tozalash"""
+        threshold = time.monotonic() - self.retention_seconds
+        stale = [
+            task_uuid for task_uuid, entry in self._entries.items()
+            if entry.updated_at < threshold and task_uuid not in self._dirty
+        ]
+        for task_uuid in stale:
+            del self._entries[task_uuid]
+
+    # ==================== O'QISH ====================
+
+    def get(self, task_uuid: str, max_age: float = None) -> Optional[Dict]:
+        """Xotiradagi holat (max_age soniyadan eski bo'lsa None)"""
+        entry = self._entries.get(task_uuid)
+        if entry is None:
+            return None
+        if max_age is not None and time.monotonic() - entry.updated_at > max_age:
+            return None
+        return entry.as_dict()
+
+    def get_task_status(self, task_uuid: str, max_age: float = None) -> Optional[Dict]:
+        """Avval xotiradan, bo'lmasa bazadan"""
+        fresh = self.get(task_uuid, max_age)
+        if fresh:
+            return fresh
+        return self.user_db.get_task_by_uuid(task_uuid)
+
+    def overlay(self, tasks: List[Dict]) -> List[Dict]:
+        """get_user_tasks natijasidagi status/progress'ni xotiradagisi bilan almashtirish"""
+        for task in tasks:
+            entry = self._entries.get(task.get('task_uuid'))
+            if entry is not None:
+                task['status'] = entry.status
+                if entry.progress is not None:
+                    task['progress'] = entry.progress
+                if entry.file_path:
+                    task['file_path'] = entry.file_path
+        return tasks
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self):
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_loop())
+            logger.info(f"✅ Task progress reestri ishga tushdi ({int(self.flush_interval * 1000)} ms)")
+
+    async def stop(self):
+        if self._flush_task:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                self.flush()
+                self._evict_stale()
+            except Exception as e:
+                logger.error(f"Progress flush xato: {e}")
@@ -0,0 +1,219 @@
+# utils/task_scheduler.py
+# Worker navbati: userlar orasida adolatli taqsimot, qisqa ishlar oldin
+#
+# Avval worker pending task'larni created_at tartibida paketlab olardi va
+# paketning eng sekin task'ini kutardi - 5 ta 50 sahifali mustaqil ish
+# navbatga qo'ygan bitta user hammani ushlab turardi. Endi:
+#   - bir vaqtda max_inflight ta task, bitta userdan per_user_inflight tadan ko'p emas
+#   - userlar orasida start-time fair queuing: har bir user'ning virtual vaqti
+#     unga berilgan (taxminiy) ish hajmi / vazn qadar o'sadi, navbat eng kam
+#     xizmat olgan user'ga beriladi - kalit (virtual vaqt + narx) bo'lgani uchun
+#     qisqa ishlar tabiiy ravishda oldinga o'tadi
+#   - narx = birlik (slayd / sahifa) x soniya / birlik; soniya / birlik task turi
+#     bo'yicha tarixdan (bazadagi completed task'lar) va har bir tugagan task'dan
+#     EWMA bilan yangilanadi
+#   - pullik task'lar bepul kvotadagilardan oldin, lekin starvation_seconds dan
+#     ko'p kutgan bepul task keyingi bo'sh joyni oladi
+
+import itertools
+import time
+from typing import Dict, List, Optional
+
+PAID = 'paid'
+FREE = 'free'
+
+# Tarix bo'lmaganda (soniya / slayd yoki sahifa)
+DEFAULT_SECONDS_PER_UNIT = {
+    'basic': 12.0,
+    'pitch_deck': 15.0,
+    'course_work': 20.0,
+}
+FALLBACK_SECONDS_PER_UNIT = 15.0
+
+# Bir xil tier ichida pullik user virtual vaqti ikki barobar sekin o'sadi
+TIER_WEIGHTS = {PAID: 2.0, FREE: 1.0}
+
+
+class DurationEstimator:
+    """Task turi bo'yicha soniya / birlik (EWMA)"""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.seconds_per_unit: Dict[str, float] = dict(DEFAULT_SECONDS_PER_UNIT)
+
+    @staticmethod
+    def units(task_data: dict) -> int:
+        try:
+            return max(1, int(task_data.get('slide_count') or 10))
+        except (TypeError, ValueError):
+            return 10
+
+    def estimate(self, task_data: dict) -> float:
+        rate = self.seconds_per_unit.get(task_data.get('type'), FALLBACK_SECONDS_PER_UNIT)
+        return self.units(task_data) * rate
+
+    def observe(self, task_type: str, units: int, seconds: float):
+        if seconds <= 0 or units <= 0:
+            return
+        rate = seconds / units
+        previous = self.seconds_per_unit.get(task_type)
+        if previous is None:
+            self.seconds_per_unit[task_type] = rate
+        else:
+            self.seconds_per_unit[task_type] = previous + self.alpha * (rate - previous)
+
+    def load(self, rows: List[Dict]):
+        """get_task_duration_stats() natijasi"""
+        for row in rows:
+            if row.get('seconds_per_unit'):
+                self.seconds_per_unit[row['type']] = row['seconds_per_unit']
+
+
+class Job:
+    __slots__ = ('task_data', 'task_uuid', 'user_id', 'tier', 'cost', 'enqueued_at', 'seq')
+
+    def __init__(self, task_data: dict, cost: float, enqueued_at: float, seq: int):
+        self.task_data = task_data
+        self.task_uuid = task_data['task_uuid']
+        self.user_id = task_data.get('user_id')
+        self.tier = PAID if task_data.get('amount_charged') else FREE
+        self.cost = cost
+        self.enqueued_at = enqueued_at
+        self.seq = seq
+
+
+class UserQueue:
+    __slots__ = ('jobs', 'inflight', 'vtime')
+
+    def __init__(self, vtime: float):
+        self.jobs: List[Job] = []
+        self.inflight = 0
+        self.vtime = vtime
+
+    def best(self) -> Job:
+        """Avval pullik, keyin eng qisqa, keyin eng eski"""
+        return min(self.jobs, key=lambda job: (job.tier != PAID, job.cost, job.seq))
+
+
+class TaskScheduler:
+    """
+    Worker uchun navbat
+
+        scheduler.add(task_data)            # get_pending_tasks() natijasi
+        job = scheduler.next()              # None - bo'sh joy yoki tayyor task yo'q
+        ...
+        scheduler.done(job, seconds, ok=True)
+
+    Holat faqat xotirada: task'lar bazada 'pending' bo'lib turadi, restart'dan
+    keyin worker ularni qaytadan qo'shadi.
+    """
+
+    def __init__(self, max_inflight: int = 8, per_user_inflight: int = 1,
+                 starvation_seconds: float = 120, estimator: DurationEstimator = None, clock=time.monotonic):
+        self.max_inflight = max_inflight
+        self.per_user_inflight = per_user_inflight
+        self.starvation_seconds = starvation_seconds
+        self.estimator = estimator or DurationEstimator()
+        self.clock = clock
+
+        self.virtual_time = 0.0
+        self._users: Dict[int, UserQueue] = {}
+        self._known = set()
+        self._queued = 0
+        self._inflight = 0
+        self._seq = itertools.count()
+
+    # ==================== NAVBAT ====================
+
+    def add(self, task_data: dict, now: float = None) -> bool:
+        """Yangi task (allaqachon navbatda yoki bajarilayotgan bo'lsa - False)"""
+        task_uuid = task_data.get('task_uuid')
+        if not task_uuid or task_uuid in self._known:
+            return False
+        if now is None:
+            now = self.clock()
+
+        user = self._users.get(task_data.get('user_id'))
+        if user is None:
+            # Qaytgan user o'tmishdagi "qarz"ini olib kelmaydi
+            user = self._users[task_data.get('user_id')] = UserQueue(self.virtual_time)
+
+        user.jobs.append(Job(task_data, self.estimator.estimate(task_data), now, next(self._seq)))
+        self._known.add(task_uuid)
+        self._queued += 1
+        return True
+
+    def add_many(self, tasks: List[dict], now: float = None) -> int:
+        return sum(self.add(task_data, now) for task_data in tasks)
+
+    def next(self, now: float = None) -> Optional[Job]:
+        """Keyingi bajariladigan task"""
+        if self._inflight >= self.max_inflight or not self._queued:
+            return None
+        if now is None:
+            now = self.clock()
+
+        starving = None
+        best_key = {PAID: None, FREE: None}
+        best = {PAID: None, FREE: None}
+        for user_id, user in self._users.items():
+            if not user.jobs or user.inflight >= self.per_user_inflight:
+                continue
+            job = user.best()
+            if job.tier == FREE:
+                # Bepul task'lar uchun chegaralangan kutish (user'ning eng eski bepul task'i)
+                oldest = min((j for j in user.jobs if j.tier == FREE), key=lambda j: j.seq)
+                if now - oldest.enqueued_at >= self.starvation_seconds and \
+                        (starving is None or oldest.seq < starving[1].seq):
+                    starving = (user, oldest)
+            key = max(user.vtime, self.virtual_time) + job.cost / TIER_WEIGHTS[job.tier]
+            if best_key[job.tier] is None or key < best_key[job.tier]:
+                best_key[job.tier] = key
+                best[job.tier] = (user, job)
+
+        choice = starving or best[PAID] or best[FREE]
+        if choice is None:
+            return None
+
+        user, job = choice
+        start = max(user.vtime, self.virtual_time)
+        user.vtime = start + job.cost / TIER_WEIGHTS[job.tier]
+        self.virtual_time = start
+        user.jobs.remove(job)
+        user.inflight += 1
+        self._queued -= 1
+        self._inflight += 1
+        return job
+
+    def done(self, job: Job, seconds: float = None, ok: bool = True):
+        """Task tugadi (muvaffaqiyatli bo'lsa davomiyligi taxminni yangilaydi)"""
+        self._known.discard(job.task_uuid)
+        self._inflight -= 1
+        user = self._users.get(job.user_id)
+        if user is not None:
+            user.inflight -= 1
+            if not user.jobs and user.inflight <= 0:
+                del self._users[job.user_id]
+        if ok and seconds:
+            self.estimator.observe(job.task_data.get('type'), self.estimator.units(job.task_data), seconds)
+
+    # ==================== HOLAT ====================
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    def __len__(self) -> int:
+        return self._queued
+
+    def stats(self) -> Dict:
+        return {
+            'queued': self._queued,
+            'inflight': self._inflight,
+            'users': len(self._users),
+            'seconds_per_unit': dict(self.estimator.seconds_per_unit),
+        }
@@ -0,0 +1,166 @@
+# utils/theme_catalog.py
+# Gamma theme katalogi: fon sinxroni, theme_id tekshiruvi, karusel ro'yxati
+#
+# GET /themes natijasi GammaThemes jadvalida saqlanadi. O'zgarish ETag
+# (If-None-Match -> 304) bilan, server ETag bermasa - ro'yxat sha256'i bilan
+# aniqlanadi; o'zgarmagan katalog qayta yozilmaydi. Restart'dan keyin katalog
+# bazadan o'qiladi - tarmoq kutilmaydi.
+#
+# Karusel uchun theme'ning rasmi (file_id) va tavsifi kerak, ular faqat
+# themes_data.THEMES da bor - shuning uchun karusel = THEMES ∩ katalog.
+# THEMES'dagi, lekin katalogda yo'q theme'lar adminlarga bildiriladi.
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+from utils.themes_data import THEMES
+
+logger = logging.getLogger(__name__)
+
+
+class ThemeCatalog:
+    """
+    available = None - katalog hali sinxronlanmagan: barcha THEMES ishonchli
+    deb olinadi (oldingi xatti-harakat), Gamma rad etsa - 400/422 fallback.
+    """
+
+    def __init__(self, db, sync_interval: float = 6 * 3600):
+        self.db = db
+        self.sync_interval = sync_interval
+        self.available: Optional[Set[str]] = None
+        self.carousel: List[dict] = list(THEMES)
+        self.missing: List[str] = []
+        self.gamma_api = None
+        self.notify: Optional[Callable[[str], Awaitable]] = None
+        self._sync_task = None
+
+    # ==================== HOLAT ====================
+
+    def load(self):
+        """Oxirgi sinxron natijasi bazadan"""
+        if not self.db.get_gamma_theme_sync():
+            return
+        self._apply({row['theme_id'].lower() for row in self.db.get_gamma_themes()})
+        logger.info(f"🎨 Theme katalogi: {len(self.available)} ta, karuselda {len(self.carousel)} ta")
+
+    def _apply(self, available: Set[str]):
+        self.available = available
+        # Katalog bo'sh keldi (API xatosi/o'zgarishi) - karuselni bo'shatmaslik
+        self.carousel = [theme for theme in THEMES if theme['id'].lower() in available] or list(THEMES)
+        self.missing = [theme['id'] for theme in THEMES if theme['id'].lower() not in available]
+
+    def is_available(self, theme_id: str) -> bool:
+        if not theme_id:
+            return False
+        return self.available is None or theme_id.lower() in self.available
+
+    def mark_rejected(self, theme_id: str):
+        """Gamma theme'ni POST'da rad etdi - keyingi sinxrongacha yuborilmaydi"""
+        self.db.mark_gamma_theme_rejected(theme_id)
+        if self.available is not None:
+            self._apply(self.available - {theme_id.lower()})
+
+    # ==================== KARUSEL ====================
+
+    def count(self) -> int:
+        return len(self.carousel)
+
+    def get_by_index(self, index: int) -> Optional[dict]:
+        if 0 <= index < len(self.carousel):
+            return self.carousel[index]
+        return None
+
+    # ==================== SINXRON ====================
+
+    @staticmethod
+    def digest(themes: List[Dict]) -> str:
+        items = sorted((str(theme.get('id')), theme.get('name') or '', theme.get('type') or '') for theme in themes)
+        return hashlib.sha256(json.dumps(items, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+    async def sync(self) -> Dict:
+        """
+        Bitta sinxron
+
+        Returns:
+            dict: status - 'changed' | 'unchanged' | 'error', count, added, removed, missing
+        """
+        state = self.db.get_gamma_theme_sync() or {}
+        result = await self.gamma_api.fetch_themes(etag=state.get('etag'))
+
+        if result['status'] == 'error':
+            return {'status': 'error'}
+
+        themes = [theme for theme in result['themes'] if theme.get('id')]
+        if result['status'] == 'not_modified' or (themes and self.digest(themes) == state.get('digest')):
+            self.db.touch_gamma_theme_sync()
+            if self.available is None:
+                self.load()
+            return {'status': 'unchanged', 'count': state.get('theme_count', 0), 'missing': self.missing}
+
+        if not themes:
+            logger.warning("⚠️ Gamma bo'sh theme ro'yxati qaytardi - katalog o'zgartirilmadi")
+            return {'status': 'error'}
+
+        saved = self.db.save_gamma_themes(themes, result['etag'], self.digest(themes))
+        if saved.get('error'):
+            return {'status': 'error'}
+
+        previous_missing = set(self.missing) if self.available is not None else set()
+        self._apply({theme['id'].lower() for theme in themes})
+        logger.info(f"🎨 Theme katalogi yangilandi: {len(themes)} ta "
+                    f"(+{len(saved['added'])} / -{len(saved['removed'])})")
+
+        newly_missing = [theme_id for theme_id in self.missing if theme_id not in previous_missing]
+        if newly_missing:
+            await self._notify(
+                "⚠️ <b>Gamma theme'lari topilmadi</b>\n\n"
+                "themes_data.THEMES dagi quyidagi theme'lar Gamma katalogida yo'q va karuseldan olindi:\n"
+                + "\n".join(f"• <code>{theme_id}</code>" for theme_id in newly_missing)
+            )
+
+        return {
+            'status': 'changed',
+            'count': len(themes),
+            'added': saved['added'],
+            'removed': saved['removed'],
+            'missing': self.missing,
+        }
+
+    async def _notify(self, text: str):
+        logger.warning(text.replace('<b>', '').replace('</b>', ''))
+        if self.notify is None:
+            return
+        try:
+            await self.notify(text)
+        except Exception as e:
+            logger.error(f"❌ Theme katalogi xabari xato: {e}")
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self, gamma_api, notify: Callable[[str], Awaitable] = None):
+        self.gamma_api = gamma_api
+        self.notify = notify
+        self.load()
+        if self._sync_task is None:
+            self._sync_task = asyncio.create_task(self._sync_loop())
+            logger.info(f"✅ Theme katalogi sinxroni ishga tushdi (har {int(self.sync_interval)} s)")
+
+    async def stop(self):
+        if self._sync_task:
+            self._sync_task.cancel()
+            try:
+                await self._sync_task
+            except asyncio.CancelledError:
+                pass
+            self._sync_task = None
+
+    async def _sync_loop(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.error(f"Theme katalogi sinxron xato: {e}")
+            await asyncio.sleep(self.sync_interval)